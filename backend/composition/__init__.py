@@ -8,10 +8,14 @@ from .export_profiles import (
     normalize_export_settings,
     resolve_export_profile,
 )
+from .proxy_media import CompositionProxyStore
 from .render_execute import (
     RENDER_EXEC_SCHEMA_VERSION,
     CompositionRenderExecutionService,
+    parse_ffmpeg_progress,
+    safe_scope_key,
 )
+from .render_jobs import RENDER_JOB_STATES, CompositionRenderJobQueue
 
 __all__ = [
     "CompositionRenderManifestStore",
@@ -20,6 +24,11 @@ __all__ = [
     "resolve_export_profile",
     "normalize_export_settings",
     "build_export_plan",
+    "CompositionProxyStore",
     "RENDER_EXEC_SCHEMA_VERSION",
     "CompositionRenderExecutionService",
+    "parse_ffmpeg_progress",
+    "safe_scope_key",
+    "RENDER_JOB_STATES",
+    "CompositionRenderJobQueue",
 ]
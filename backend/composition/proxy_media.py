@@ -0,0 +1,316 @@
+"""Low-resolution proxy media for `quality="preview"` composition renders.
+
+- Video sources get an all-intra H.264 proxy (`-g 1`, `fastdecode`) capped at
+  `max_height` lines, video only; audio keeps reading the original file.
+- Still images get a downscaled PNG (alpha preserved). Animated GIFs are not
+  proxied.
+- Proxies are keyed by source content hash, so re-uploads of the same bytes
+  (other loops, other file names) share one proxy. Media cache file ids already
+  carry that hash; other sources are hashed once per (path, size, mtime).
+- Generation runs on a small background pool; `proxy_for` never blocks on
+  ffmpeg and returns None until the proxy is ready.
+- The store is bounded by `max_total_bytes`: hits refresh a proxy's mtime and
+  each generation evicts least recently used proxies until the store fits.
+- A failed generation is not retried for `failed_retry_sec`, unless the source
+  file's size/mtime changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+_MEDIA_CACHE_ID_RE = re.compile(r"^([0-9a-f]{16})_")
+_STILL_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
+_VIDEO_EXTENSIONS = {".mp4", ".mov", ".m4v", ".mkv", ".webm", ".avi", ".mpg", ".mpeg", ".ts", ".mxf"}
+_HASH_CHUNK_BYTES = 1024 * 1024
+PROXY_STATES = ("pending", "running", "ready", "failed")
+
+
+def proxy_kind(path: str) -> Optional[str]:
+    """Return `"video"`, `"still"` or None (not proxied) from the file extension."""
+    ext = os.path.splitext(str(path or ""))[1].strip().lower()
+    if ext in _VIDEO_EXTENSIONS:
+        return "video"
+    if ext in _STILL_EXTENSIONS:
+        return "still"
+    return None
+
+
+class CompositionProxyStore:
+    """Thread-safe, content-addressed proxy cache with a lazy worker pool."""
+
+    def __init__(
+        self,
+        path: str,
+        max_height: int = 540,
+        max_workers: int = 1,
+        timeout_sec: float = 900.0,
+        max_total_bytes: int = 4 * 1024 * 1024 * 1024,
+        failed_retry_sec: float = 600.0,
+    ) -> None:
+        self._path = os.path.realpath(path)
+        self._max_height = max(16, int(max_height or 540)) // 2 * 2
+        self._max_workers = max(1, int(max_workers or 1))
+        self._timeout_sec = max(1.0, float(timeout_sec or 900.0))
+        self._max_total_bytes = max(0, int(max_total_bytes or 0))
+        self._failed_retry_sec = max(0.0, float(failed_retry_sec or 0.0))
+        self._lock = threading.Lock()
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def max_height(self) -> int:
+        return self._max_height
+
+    def proxy_for(self, source_path: str) -> Optional[str]:
+        """Return the ready proxy for `source_path`, scheduling generation when missing."""
+        status = self.schedule(source_path)
+        if status and status["state"] == "ready":
+            # Refresh the LRU position used by `_prune`.
+            try:
+                os.utime(status["proxy_path"], None)
+            except OSError:
+                pass
+            return status["proxy_path"]
+        return None
+
+    def schedule(self, source_path: str) -> Optional[Dict[str, Any]]:
+        """Queue proxy generation for `source_path` (coalesced); None if not proxiable."""
+        source = os.path.realpath(str(source_path or ""))
+        kind = proxy_kind(source)
+        if kind is None or not os.path.isfile(source):
+            return None
+        content_hash = self._known_hash(source)
+        identity = _file_identity(source)
+        with self._lock:
+            job_key = content_hash or source
+            job = self._jobs.get(job_key)
+            if job is not None and self._job_current(job, identity):
+                return dict(job)
+            if content_hash:
+                proxy_path = self._proxy_path(content_hash, kind)
+                if os.path.isfile(proxy_path):
+                    job = self._new_job(source, kind, "ready", proxy_path)
+                    self._jobs[job_key] = job
+                    return dict(job)
+            job = self._new_job(source, kind, "pending", None)
+            self._jobs[job_key] = job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="lemouf-composition-proxy",
+                )
+            self._executor.submit(self._run, job_key, job)
+            return dict(job)
+
+    def status(self, source_path: str) -> Optional[Dict[str, Any]]:
+        source = os.path.realpath(str(source_path or ""))
+        content_hash = self._known_hash(source)
+        with self._lock:
+            job = self._jobs.get(content_hash or source) or self._jobs.get(source)
+            return dict(job) if job is not None else None
+
+    def wait(self, source_path: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until the proxy for `source_path` is final (worker threads/tests only)."""
+        deadline = None if timeout is None else time.time() + max(0.0, float(timeout))
+        while True:
+            current = self.status(source_path)
+            if current is None or current["state"] in ("ready", "failed"):
+                return current
+            if deadline is not None and time.time() >= deadline:
+                return current
+            time.sleep(0.05)
+
+    def _job_current(self, job: Dict[str, Any], identity: Optional[Tuple[str, int, int]]) -> bool:
+        if job["state"] == "ready":
+            # Evicted by `_prune` (or removed by hand): generate again.
+            return bool(job["proxy_path"]) and os.path.isfile(job["proxy_path"])
+        if job["state"] == "failed":
+            # Known-bad sources wait out the cooldown unless the file changed.
+            if identity != job.get("source_identity"):
+                return False
+            return time.time() - float(job.get("finished_at") or 0.0) < self._failed_retry_sec
+        return True
+
+    def _new_job(self, source: str, kind: str, state: str, proxy_path: Optional[str]) -> Dict[str, Any]:
+        return {
+            "source_path": source,
+            "source_identity": _file_identity(source),
+            "kind": kind,
+            "state": state,
+            "proxy_path": proxy_path,
+            "error": None,
+            "submitted_at": time.time(),
+        }
+
+    def _proxy_path(self, content_hash: str, kind: str) -> str:
+        extension = ".mp4" if kind == "video" else ".png"
+        return os.path.join(self._path, f"{content_hash}_{self._max_height}p{extension}")
+
+    def _known_hash(self, source: str) -> Optional[str]:
+        match = _MEDIA_CACHE_ID_RE.match(os.path.basename(source))
+        if match:
+            return match.group(1)
+        identity = _file_identity(source)
+        with self._lock:
+            return self._hashes.get(identity) if identity else None
+
+    def _content_hash(self, source: str) -> str:
+        known = self._known_hash(source)
+        if known:
+            return known
+        identity = _file_identity(source)
+        digest = hashlib.sha256()
+        with open(source, "rb") as fh:
+            for chunk in iter(lambda: fh.read(_HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+        content_hash = digest.hexdigest()[:16]
+        if identity:
+            with self._lock:
+                self._hashes[identity] = content_hash
+        return content_hash
+
+    def _run(self, job_key: str, job: Dict[str, Any]) -> None:
+        with self._lock:
+            job["state"] = "running"
+        source = str(job["source_path"])
+        kind = str(job["kind"])
+        content_hash = job_key
+        proxy_path = None
+        error = None
+        try:
+            content_hash = self._content_hash(source)
+            proxy_path = self._proxy_path(content_hash, kind)
+            if not os.path.isfile(proxy_path):
+                error = self._generate(source, kind, proxy_path)
+        except Exception as exc:
+            error = f"proxy_exception:{exc}"
+        with self._lock:
+            job["state"] = "failed" if error else "ready"
+            job["proxy_path"] = None if error else proxy_path
+            job["error"] = error
+            job["finished_at"] = time.time()
+            if content_hash != job_key:
+                # Registered before the hash was known: expose it (and failures) under the hash too.
+                self._jobs[content_hash] = job
+        if not error and proxy_path:
+            self._prune(keep=proxy_path)
+
+    def _prune(self, keep: str) -> None:
+        """Evict least recently used proxies until the store fits `max_total_bytes`."""
+        files = []
+        total = 0
+        try:
+            names = os.listdir(self._path)
+        except OSError:
+            return
+        for name in names:
+            full = os.path.join(self._path, name)
+            if name.endswith(".tmp"):
+                continue
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            total += int(st.st_size)
+            if full != keep:
+                files.append((float(st.st_mtime), name, full, int(st.st_size)))
+        for _mtime, _name, full, size in sorted(files):
+            if total <= self._max_total_bytes:
+                break
+            try:
+                os.remove(full)
+            except OSError:
+                continue
+            total -= size
+
+    def _generate(self, source: str, kind: str, proxy_path: str) -> Optional[str]:
+        ffmpeg_path = shutil.which("ffmpeg")
+        if not ffmpeg_path:
+            return "ffmpeg_not_found"
+        os.makedirs(self._path, exist_ok=True)
+        tmp_path = f"{os.path.splitext(proxy_path)[0]}.{os.getpid()}.{threading.get_ident()}.tmp"
+        command = _proxy_command(ffmpeg_path, source, kind, tmp_path, self._max_height)
+        try:
+            completed = subprocess.run(
+                command,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                timeout=self._timeout_sec,
+                check=False,
+            )
+        except subprocess.TimeoutExpired:
+            _remove_quietly(tmp_path)
+            return "proxy_timeout"
+        if completed.returncode != 0 or not os.path.isfile(tmp_path):
+            _remove_quietly(tmp_path)
+            tail = completed.stderr.decode("utf-8", "replace").strip().splitlines()[-1:] if completed.stderr else []
+            return f"proxy_ffmpeg_failed:{tail[0] if tail else completed.returncode}"
+        os.replace(tmp_path, proxy_path)
+        return None
+
+
+def _proxy_command(ffmpeg_path: str, source: str, kind: str, output_path: str, max_height: int) -> list:
+    # Never upscale; `-2` keeps the width even for yuv420p.
+    scale = f"scale=-2:'min({max_height},ih)'"
+    if kind == "still":
+        return [ffmpeg_path, "-y", "-v", "error", "-i", source, "-frames:v", "1", "-vf", scale, "-f", "image2", "-update", "1", "-c:v", "png", output_path]
+    return [
+        ffmpeg_path,
+        "-y",
+        "-v",
+        "error",
+        "-i",
+        source,
+        "-map",
+        "0:v:0",
+        "-an",
+        "-sn",
+        "-vf",
+        f"{scale},format=yuv420p",
+        "-fps_mode",
+        "passthrough",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-tune",
+        "fastdecode",
+        "-g",
+        "1",
+        "-crf",
+        "23",
+        "-f",
+        "mp4",
+        "-movflags",
+        "+faststart",
+        output_path,
+    ]
+
+
+def _file_identity(path: str) -> Optional[Tuple[str, int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (path, int(stat.st_size), int(stat.st_mtime_ns))
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
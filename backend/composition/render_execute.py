@@ -9,6 +9,7 @@ This module now supports two deterministic execution modes:
 
 from __future__ import annotations
 
+import hashlib
 import json
 import math
 import os
@@ -18,7 +19,12 @@ import subprocess
 import threading
 import time
 import uuid
-from typing import Any, Dict, List, Optional, Tuple
+from bisect import bisect_left, insort
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .proxy_media import CompositionProxyStore
 
 
 _SAFE_SCOPE_RE = re.compile(r"[^a-z0-9_-]+", re.IGNORECASE)
@@ -27,9 +33,19 @@ _MEDIA_CACHE_URL_PREFIX = "/lemouf/loop/media_cache/"
 _RENDER_FILE_URL_PREFIX = "/lemouf/composition/render_file/"
 _IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif"}
 _MAX_DIAGNOSTIC_ITEMS = 120
+_RENDER_INDEX_FILE = ".render_index.json"
+_RENDER_CACHE_VERSION = 1
+_OUTPUT_PLACEHOLDER = "<output>"
+RENDER_QUALITIES = ("final", "preview")
+# Encoder speed settings appended to the profile's video args for preview renders.
+_PREVIEW_ENCODER_ARGS = {
+    "libx264": ["-preset", "ultrafast", "-tune", "fastdecode"],
+    "libvpx-vp9": ["-deadline", "realtime", "-cpu-used", "8"],
+}
 
 
-def _safe_scope(value: str) -> str:
+def safe_scope_key(value: str) -> str:
+    """Normalize a scope key to the folder-safe form used for render paths and job queues."""
     text = str(value or "").strip().lower()
     text = _SAFE_SCOPE_RE.sub("_", text).strip("_")
     return text or "default"
@@ -139,7 +155,7 @@ def _resolve_source_path(raw_src: Any, repo_root: str, render_root: str) -> Opti
         if rel:
             parts = [part for part in rel.split("/") if part]
             if len(parts) >= 2:
-                safe_scope = _safe_scope(parts[0])
+                safe_scope = safe_scope_key(parts[0])
                 safe_name = os.path.basename(parts[1])
                 full = _safe_real_join(render_root, safe_scope, safe_name)
                 return full if full and os.path.isfile(full) else None
@@ -547,42 +563,558 @@ def _collect_audio_events(
     return out
 
 
-def _build_timeline_layers_ffmpeg_command(
-    plan: Dict[str, Any],
-    manifest: Dict[str, Any],
-    output_path: str,
-    render_root: str,
-) -> Tuple[List[str], Dict[str, Any]]:
+def _output_settings(plan: Dict[str, Any]) -> Dict[str, Any]:
     output = plan.get("output") if isinstance(plan.get("output"), dict) else {}
     ffmpeg = plan.get("ffmpeg") if isinstance(plan.get("ffmpeg"), dict) else {}
+    audio_channels = "mono" if str(output.get("audioChannels") or "").strip().lower() == "mono" else "stereo"
+    return {
+        "width": max(16, _to_int(output.get("width"), 1920)),
+        "height": max(16, _to_int(output.get("height"), 1080)),
+        "fps": max(1.0, min(240.0, _to_float(output.get("fps"), 30.0))),
+        "duration_sec": max(0.1, _to_float(output.get("durationSec"), 1.0)),
+        "audio_rate": max(8000, min(192000, _to_int(output.get("audioRate"), 48000))),
+        "channel_layout": "mono" if audio_channels == "mono" else "stereo",
+        "video_args": [str(arg) for arg in list(ffmpeg.get("video") or [])],
+        "audio_args": [str(arg) for arg in list(ffmpeg.get("audio") or [])],
+    }
+
+
+_SHARED_WINDOW_EPS = 1e-6
+
+
+class _SharedInputs:
+    """ffmpeg inputs for one filter graph, de-duplicated by resolved source path.
+
+    Uses of a file are chained onto a single `-i` (fanned out with `split` /
+    `asplit`) while each use starts after the previous one in both timeline and
+    source time: the shared decoder then only runs forward and split branches
+    never hold frames for a later clip. A linked audio/video pair (same windows)
+    shares its input as well. Stills are decoded once and looped per use.
+
+    With `seek`, an input starts at its first use (`-ss`); later uses are only
+    chained when the source gap is at most `max_seek_gap_sec`, since decoding the
+    gap would cost more than a fresh seek.
+    """
+
+    def __init__(self, first_index: int, *, seek: bool = False, max_seek_gap_sec: float = 30.0) -> None:
+        self._first_index = int(first_index)
+        self._seek = bool(seek)
+        self._max_seek_gap_sec = float(max_seek_gap_sec)
+        self._uses: List[Dict[str, Any]] = []
+        self._inputs: List[Dict[str, Any]] = []
+
+    def add(
+        self,
+        path: str,
+        media: str,
+        *,
+        start_sec: float,
+        end_sec: float,
+        source_start_sec: float = 0.0,
+    ) -> int:
+        """Register one clip use (`media`: "v", "a" or "still"); returns its use id."""
+        self._uses.append(
+            {
+                "path": str(path),
+                "media": media,
+                "start": float(start_sec),
+                "end": float(end_sec),
+                "source_start": max(0.0, float(source_start_sec)),
+                "source_end": max(0.0, float(source_start_sec)) + max(0.0, float(end_sec) - float(start_sec)),
+            }
+        )
+        return len(self._uses) - 1
+
+    def finalize(self) -> Tuple[List[str], List[str]]:
+        """Assign uses to inputs; returns (`-i` arguments, split filter parts)."""
+        by_path: Dict[Tuple[str, bool], List[Dict[str, Any]]] = {}
+        order = sorted(range(len(self._uses)), key=lambda use_id: (self._uses[use_id]["start"], use_id))
+        for use_id in order:
+            use = self._uses[use_id]
+            still = use["media"] == "still"
+            chains = by_path.setdefault((use["path"], still), [])
+            chain = next((row for row in chains if still or self._accepts(row, use)), None)
+            if chain is None:
+                chain = {
+                    "path": use["path"],
+                    "still": still,
+                    "index": self._first_index + len(self._inputs),
+                    "seek": use["source_start"] if self._seek and not still else 0.0,
+                    "uses": {},
+                    "tails": {},
+                }
+                chains.append(chain)
+                self._inputs.append(chain)
+            stream = "a" if use["media"] == "a" else "v"
+            members = chain["uses"].setdefault(stream, [])
+            use["input"] = chain
+            use["stream"] = stream
+            use["slot"] = len(members)
+            members.append(use_id)
+            chain["tails"][stream] = use
+        args: List[str] = []
+        splits: List[str] = []
+        for chain in self._inputs:
+            if chain["seek"] > 0:
+                args.extend(["-ss", f"{chain['seek']:.6f}"])
+            args.extend(["-i", chain["path"]])
+            for stream, members in chain["uses"].items():
+                if len(members) < 2:
+                    continue
+                fan_out = "asplit" if stream == "a" else "split"
+                outputs = "".join(f"[in{chain['index']}{stream}{slot}]" for slot in range(len(members)))
+                splits.append(f"[{chain['index']}:{stream}]{fan_out}={len(members)}{outputs}")
+        return args, splits
+
+    def label(self, use_id: int) -> str:
+        use = self._uses[use_id]
+        chain = use["input"]
+        if len(chain["uses"][use["stream"]]) < 2:
+            return f"{chain['index']}:{use['stream']}"
+        return f"in{chain['index']}{use['stream']}{use['slot']}"
+
+    def source_offset(self, use_id: int) -> float:
+        """Trim start for a use, relative to where its input starts decoding."""
+        use = self._uses[use_id]
+        return max(0.0, use["source_start"] - use["input"]["seek"])
+
+    @property
+    def input_count(self) -> int:
+        return len(self._inputs)
+
+    @property
+    def use_count(self) -> int:
+        return len(self._uses)
+
+    def _accepts(self, chain: Dict[str, Any], use: Dict[str, Any]) -> bool:
+        stream = "a" if use["media"] == "a" else "v"
+        for tail_stream, tail in chain["tails"].items():
+            after = (
+                use["start"] >= tail["end"] - _SHARED_WINDOW_EPS
+                and use["source_start"] >= tail["source_end"] - _SHARED_WINDOW_EPS
+            )
+            linked = (
+                tail_stream != stream
+                and abs(use["start"] - tail["start"]) <= _SHARED_WINDOW_EPS
+                and abs(use["source_start"] - tail["source_start"]) <= _SHARED_WINDOW_EPS
+            )
+            if not (after or linked):
+                return False
+        if not self._seek:
+            return True
+        reach = max(tail["source_end"] for tail in chain["tails"].values())
+        return (
+            use["source_start"] >= chain["seek"] - _SHARED_WINDOW_EPS
+            and use["source_start"] - reach <= self._max_seek_gap_sec
+        )
+
+
+def _visual_clip_filters(
+    event: Dict[str, Any],
+    *,
+    src_label: str,
+    clip_label: str,
+    fps: float,
+    width: int,
+    height: int,
+    trim_start_sec: float,
+    trim_duration_sec: float,
+    clip_duration_sec: float,
+    skip_sec: float = 0.0,
+    still: bool = False,
+) -> str:
+    """Per-clip video chain. `skip_sec` > 0 renders a clip from mid-way (segment cut).
+
+    Timestamps are shifted by `skip_sec` so fades stay relative to the clip start,
+    then reset so the caller's overlay window starts at 0. `still` sources are a
+    single decoded frame, looped here for the clip length.
+    """
+    target_w = max(2, _to_int(event.get("target_w"), width))
+    target_h = max(2, _to_int(event.get("target_h"), height))
+    rotate_deg = _to_number(event.get("rotate_deg"), 0.0)
+    rotate_rad = (rotate_deg * math.pi) / 180.0
+    opacity = _clamp((_to_number(event.get("opacity_pct"), 100.0) / 100.0), 0.0, 1.0)
+    fade_in_sec = _clamp(_to_number(event.get("fade_in_sec"), 0.0), 0.0, 30.0)
+    fade_out_sec = _clamp(_to_number(event.get("fade_out_sec"), 0.0), 0.0, 30.0)
+    blur_sigma = _clamp(_to_number(event.get("blur_sigma"), 0.0), 0.0, 20.0)
+    eq_saturation = _clamp(_to_number(event.get("eq_saturation"), 1.0), 0.0, 4.0)
+    eq_contrast = _clamp(_to_number(event.get("eq_contrast"), 1.0), 0.0, 4.0)
+    eq_brightness = _clamp(_to_number(event.get("eq_brightness"), 0.0), -1.0, 1.0)
+    setpts = f"setpts=PTS-STARTPTS+{skip_sec:.6f}/TB" if skip_sec > 0 else "setpts=PTS-STARTPTS"
+    clip_filters = (
+        f"[{src_label}]"
+        f"{'loop=loop=-1:size=1,' if still else ''}"
+        f"trim=start={trim_start_sec:.6f}:duration={trim_duration_sec:.6f},"
+        f"{setpts},"
+        f"fps={fps:.6f},"
+        f"scale={target_w}:{target_h}:force_original_aspect_ratio=decrease,"
+        f"pad={target_w}:{target_h}:(ow-iw)/2:(oh-ih)/2:color=black@0,"
+        f"format=rgba"
+    )
+    if abs(rotate_rad) > 1e-9:
+        clip_filters += f",rotate={rotate_rad:.9f}:c=none:ow=rotw(iw):oh=roth(ih)"
+    if blur_sigma > 0.01:
+        clip_filters += f",boxblur={blur_sigma:.3f}:1"
+    if (
+        abs(eq_saturation - 1.0) > 1e-6
+        or abs(eq_contrast - 1.0) > 1e-6
+        or abs(eq_brightness) > 1e-6
+    ):
+        clip_filters += (
+            f",eq=saturation={eq_saturation:.4f}:"
+            f"contrast={eq_contrast:.4f}:brightness={eq_brightness:.4f}"
+        )
+    if fade_in_sec > 0.01 and skip_sec < fade_in_sec:
+        fade_in_applied = min(fade_in_sec, max(0.02, clip_duration_sec - 0.01))
+        clip_filters += f",fade=t=in:st=0:d={fade_in_applied:.6f}:alpha=1"
+    if fade_out_sec > 0.01 and clip_duration_sec > 0.03:
+        fade_out_applied = min(fade_out_sec, max(0.02, clip_duration_sec - 0.01))
+        fade_out_start = max(0.0, clip_duration_sec - fade_out_applied)
+        if fade_out_start < skip_sec + trim_duration_sec:
+            clip_filters += f",fade=t=out:st={fade_out_start:.6f}:d={fade_out_applied:.6f}:alpha=1"
+    if opacity < 0.999:
+        clip_filters += f",colorchannelmixer=aa={opacity:.6f}"
+    if skip_sec > 0:
+        clip_filters += ",setpts=PTS-STARTPTS"
+    return clip_filters + f"[{clip_label}]"
+
+
+_MAX_OVERLAY_DEPTH = 8
+_MAX_ENABLE_WINDOWS = 64
+
+
+def _lane_overlaps(intervals: List[Tuple[int, int]], start: int, end: int) -> bool:
+    position = bisect_left(intervals, (start, end))
+    if position < len(intervals) and intervals[position][0] < end:
+        return True
+    return position > 0 and intervals[position - 1][1] > start
+
+
+def _assign_overlay_lanes(windows: List[Tuple[int, int]]) -> List[int]:
+    """Pack clips (compositing order, `[start, end)` frame windows) into lanes.
+
+    A clip lands one lane above the highest lane holding an earlier clip that
+    overlaps it, so stacking order is preserved and clips in a lane never overlap.
+    The lane count is the peak number of simultaneously stacked clips.
+    """
+    lanes: List[List[Tuple[int, int]]] = []
+    out: List[int] = []
+    for start, end in windows:
+        target = 0
+        for index in range(len(lanes) - 1, -1, -1):
+            if _lane_overlaps(lanes[index], start, end):
+                target = index + 1
+                break
+        if target == len(lanes):
+            lanes.append([])
+        insort(lanes[target], (start, end))
+        out.append(target)
+    return out
+
+
+def _enable_expression(windows: List[Tuple[int, int]], fps: float) -> str:
+    merged: List[List[int]] = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    if not merged or len(merged) > _MAX_ENABLE_WINDOWS:
+        return ""
+    terms = "+".join(f"between(t,{start / fps:.6f},{(end - 0.5) / fps:.6f})" for start, end in merged)
+    return f":enable='{terms}'"
+
+
+def _transparent_filler(label: str, frames: int, width: int, height: int, fps: float) -> str:
+    return (
+        f"color=c=black@0:s={width}x{height}:r={fps:.6f}:d={(frames + 1) / fps:.6f},"
+        f"format=rgba,trim=end_frame={frames},setsar=1[{label}]"
+    )
+
+
+def _placed_clip_filter(
+    item: Dict[str, Any],
+    *,
+    clip_label: str,
+    piece_label: str,
+    frames: int,
+    width: int,
+    height: int,
+    fps: float,
+) -> str:
+    """Place a clip on a full-frame transparent piece lasting exactly `frames` frames.
+
+    Unrotated clips that fit inside the frame are placed with `pad` (+ `tpad` for
+    sources shorter than their slot); others are overlaid on a clip-length canvas.
+    """
+    event = item["event"]
+    target_w = max(2, _to_int(event.get("target_w"), width))
+    target_h = max(2, _to_int(event.get("target_h"), height))
+    offset_x = _to_number(event.get("offset_x_px"), 0.0)
+    offset_y = _to_number(event.get("offset_y_px"), 0.0)
+    pad_x = int(round((width - target_w) / 2.0 + offset_x))
+    pad_y = int(round((height - target_h) / 2.0 + offset_y))
+    rotated = abs(_to_number(event.get("rotate_deg"), 0.0)) > 1e-9
+    slot_sec = frames / fps
+    tail = f"trim=end_frame={frames},setpts=PTS-STARTPTS,setsar=1[{piece_label}]"
+    if not rotated and 0 <= pad_x <= width - target_w and 0 <= pad_y <= height - target_h:
+        placed = f"[{clip_label}]"
+        if (target_w, target_h) != (width, height):
+            placed += f"pad={width}:{height}:{pad_x}:{pad_y}:color=black@0,"
+        return placed + f"tpad=stop_mode=add:stop_duration={slot_sec:.6f}:color=black@0," + tail
+    return (
+        f"color=c=black@0:s={width}x{height}:r={fps:.6f}:d={slot_sec + 1.0 / fps:.6f},format=rgba[{piece_label}_canvas];"
+        f"[{piece_label}_canvas][{clip_label}]"
+        f"overlay=x='(W-w)/2+({offset_x:.3f})':y='(H-h)/2+({offset_y:.3f})':eof_action=pass,"
+        + tail
+    )
+
+
+def _composite_visual_layers(
+    items: List[Dict[str, Any]],
+    *,
+    width: int,
+    height: int,
+    fps: float,
+    length_sec: float,
+    base_label: str,
+) -> Tuple[List[str], str, Dict[str, int]]:
+    """Composite clips onto `base_label` through packed lanes instead of one overlay per clip.
+
+    Each lane is a single full-length stream: transparent fillers and placed clips
+    joined with `concat`, so a clip is only decoded/filtered for its own window.
+    Lanes are overlaid in stacking order with `enable` limited to their active
+    windows; beyond `_MAX_OVERLAY_DEPTH` lanes, adjacent lanes are first merged
+    pairwise so the chain onto the base stays bounded.
+    """
+    total_frames = max(1, int(round(length_sec * fps)))
+    windows: List[Tuple[int, int]] = []
+    for item in items:
+        start = min(total_frames - 1, max(0, int(round(item["start_sec"] * fps))))
+        end = min(total_frames, max(start + 1, int(round((item["start_sec"] + item["duration_sec"]) * fps))))
+        windows.append((start, end))
+    lane_of = _assign_overlay_lanes(windows)
+    lane_count = (max(lane_of) + 1) if lane_of else 0
+    filter_parts: List[str] = []
+    lanes: List[Tuple[str, List[Tuple[int, int]]]] = []
+    for lane in range(lane_count):
+        members = sorted((windows[index], index) for index in range(len(items)) if lane_of[index] == lane)
+        pieces: List[str] = []
+        cursor = 0
+        for (start, end), index in members:
+            item = items[index]
+            if start > cursor:
+                gap_label = f"l{lane}gap{len(pieces)}"
+                filter_parts.append(_transparent_filler(gap_label, start - cursor, width, height, fps))
+                pieces.append(gap_label)
+            clip_label = f"vclip{index}"
+            filter_parts.append(
+                _visual_clip_filters(
+                    item["event"],
+                    src_label=item["input_label"],
+                    clip_label=clip_label,
+                    fps=fps,
+                    width=width,
+                    height=height,
+                    trim_start_sec=item["trim_start_sec"],
+                    trim_duration_sec=item["trim_duration_sec"],
+                    clip_duration_sec=item["clip_duration_sec"],
+                    skip_sec=item.get("skip_sec", 0.0),
+                    still=bool(item.get("still")),
+                )
+            )
+            piece_label = f"l{lane}piece{len(pieces)}"
+            filter_parts.append(
+                _placed_clip_filter(
+                    item,
+                    clip_label=clip_label,
+                    piece_label=piece_label,
+                    frames=end - start,
+                    width=width,
+                    height=height,
+                    fps=fps,
+                )
+            )
+            pieces.append(piece_label)
+            cursor = end
+        if cursor < total_frames:
+            gap_label = f"l{lane}gap{len(pieces)}"
+            filter_parts.append(_transparent_filler(gap_label, total_frames - cursor, width, height, fps))
+            pieces.append(gap_label)
+        lane_label = f"lane{lane}"
+        # Pieces are whole frames; restamp on the output grid, concat's duration math drifts.
+        filter_parts.append(
+            "".join(f"[{label}]" for label in pieces)
+            + f"concat=n={len(pieces)}:v=1:a=0,setpts=N/({fps:.6f}*TB)[{lane_label}]"
+        )
+        lanes.append((lane_label, [window for window, _index in members]))
+    merge_round = 0
+    while len(lanes) > _MAX_OVERLAY_DEPTH:
+        merged: List[Tuple[str, List[Tuple[int, int]]]] = []
+        for position in range(0, len(lanes), 2):
+            if position + 1 >= len(lanes):
+                merged.append(lanes[position])
+                continue
+            (lower, lower_windows), (upper, upper_windows) = lanes[position], lanes[position + 1]
+            label = f"lanes{merge_round}_{position // 2}"
+            filter_parts.append(f"[{lower}][{upper}]overlay=0:0:format=rgb:eof_action=pass[{label}]")
+            merged.append((label, lower_windows + upper_windows))
+        lanes = merged
+        merge_round += 1
+    for position, (lane_label, lane_windows) in enumerate(lanes):
+        out_label = f"{base_label}_l{position}"
+        filter_parts.append(
+            f"[{base_label}][{lane_label}]overlay=0:0:eof_action=pass{_enable_expression(lane_windows, fps)}[{out_label}]"
+        )
+        base_label = out_label
+    return filter_parts, base_label, {"lane_count": lane_count, "overlay_depth": len(lanes)}
+
+
+def _audio_event_filter(event: Dict[str, Any], src_label: str, label: str) -> str:
+    time_sec = max(0.0, _to_number(event.get("time_sec"), 0.0))
+    delay_ms = max(0, int(round(time_sec * 1000.0)))
+    start_offset_sec = max(0.0, _to_number(event.get("start_offset_sec"), 0.0))
+    event_duration = max(0.02, _to_float(event.get("duration_sec"), 0.1))
+    fade_in_sec = _clamp(_to_number(event.get("fade_in_sec"), 0.0), 0.0, 30.0)
+    fade_out_sec = _clamp(_to_number(event.get("fade_out_sec"), 0.0), 0.0, 30.0)
+    volume_gain = _clamp(_to_number(event.get("volume_gain"), 1.0), 0.0, 8.0)
+    audio_chain = (
+        f"[{src_label}]"
+        f"atrim=start={start_offset_sec:.6f}:duration={event_duration:.6f},"
+        f"asetpts=PTS-STARTPTS"
+    )
+    if fade_in_sec > 0.01:
+        fade_in_applied = min(fade_in_sec, max(0.02, event_duration - 0.01))
+        audio_chain += f",afade=t=in:st=0:d={fade_in_applied:.6f}"
+    if fade_out_sec > 0.01 and event_duration > 0.03:
+        fade_out_applied = min(fade_out_sec, max(0.02, event_duration - 0.01))
+        fade_out_start = max(0.0, event_duration - fade_out_applied)
+        audio_chain += f",afade=t=out:st={fade_out_start:.6f}:d={fade_out_applied:.6f}"
+    if abs(volume_gain - 1.0) > 1e-6:
+        audio_chain += f",volume={volume_gain:.6f}"
+    return f"{audio_chain},adelay={delay_ms}:all=1[{label}]"
+
+
+def _add_audio_uses(sources: _SharedInputs, audio_events: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], int]]:
+    audio_uses: List[Tuple[Dict[str, Any], int]] = []
+    for event in audio_events:
+        source_path = str(event.get("src_path") or "")
+        if not source_path:
+            continue
+        time_sec = max(0.0, _to_number(event.get("time_sec"), 0.0))
+        use_id = sources.add(
+            source_path,
+            "a",
+            start_sec=time_sec,
+            end_sec=time_sec + max(0.02, _to_float(event.get("duration_sec"), 0.1)),
+            source_start_sec=max(0.0, _to_number(event.get("start_offset_sec"), 0.0)),
+        )
+        audio_uses.append((event, use_id))
+    return audio_uses
+
+
+def _audio_mix_filter(labels: List[str], settings: Dict[str, Any], silence_label: str, pad: bool = False) -> str:
+    audio_rate = settings["audio_rate"]
+    channel_layout = settings["channel_layout"]
+    duration_sec = settings["duration_sec"]
+    if not labels:
+        return (
+            f"[{silence_label}]atrim=duration={duration_sec:.6f},"
+            f"aformat=sample_rates={audio_rate}:channel_layouts={channel_layout}"
+            f"[aout]"
+        )
+    chain = "".join([f"[{label}]" for label in labels])
+    if len(labels) > 1:
+        chain += f"amix=inputs={len(labels)}:duration=longest:normalize=0:dropout_transition=0,"
+    chain += f"aformat=sample_rates={audio_rate}:channel_layouts={channel_layout},"
+    if pad:
+        chain += f"apad=whole_dur={duration_sec:.6f},"
+    return chain + f"atrim=duration={duration_sec:.6f}[aout]"
+
+
+def _preview_plan(plan: Dict[str, Any], max_height: int) -> Dict[str, Any]:
+    """Cap the output to `max_height` lines (aspect kept, even sizes) and speed up the encoder."""
+    preview = _json_clone(plan, {})
+    output = preview.get("output") if isinstance(preview.get("output"), dict) else {}
     width = max(16, _to_int(output.get("width"), 1920))
     height = max(16, _to_int(output.get("height"), 1080))
-    fps = max(1.0, min(240.0, _to_float(output.get("fps"), 30.0)))
-    duration_sec = max(0.1, _to_float(output.get("durationSec"), 1.0))
-    audio_rate = max(8000, min(192000, _to_int(output.get("audioRate"), 48000)))
-    audio_channels = "mono" if str(output.get("audioChannels") or "").strip().lower() == "mono" else "stereo"
-    channel_layout = "mono" if audio_channels == "mono" else "stereo"
+    if height > max_height:
+        output["width"] = max(16, int(round(width * max_height / float(height) / 2.0)) * 2)
+        output["height"] = max(16, int(max_height) // 2 * 2)
+    preview["output"] = output
+    ffmpeg = preview.get("ffmpeg") if isinstance(preview.get("ffmpeg"), dict) else {}
     video_args = [str(arg) for arg in list(ffmpeg.get("video") or [])]
-    audio_args = [str(arg) for arg in list(ffmpeg.get("audio") or [])]
+    codec = video_args[video_args.index("-c:v") + 1] if "-c:v" in video_args[:-1] else ""
+    ffmpeg["video"] = video_args + list(_PREVIEW_ENCODER_ARGS.get(codec, []))
+    preview["ffmpeg"] = ffmpeg
+    preview["quality"] = "preview"
+    return preview
+
+
+def _apply_proxies(visual_events: List[Dict[str, Any]], proxies: Any, diagnostics: Dict[str, Any]) -> None:
+    """Point visual events at ready proxies; missing ones are scheduled and the original is kept."""
+    ready = 0
+    pending = 0
+    for event in visual_events:
+        source_path = str(event.get("src_path") or "")
+        if not source_path:
+            continue
+        proxy_path = proxies.proxy_for(source_path)
+        if proxy_path:
+            event["original_src_path"] = source_path
+            event["src_path"] = proxy_path
+            ready += 1
+        elif (proxies.status(source_path) or {}).get("state") in ("pending", "running"):
+            pending += 1
+            _diag_push(diagnostics, "notes", {"reason": "proxy_pending", "src_path": source_path})
+    execution_meta = diagnostics.setdefault("execution", {})
+    execution_meta["proxy_events_used"] = int(ready)
+    execution_meta["proxy_events_pending"] = int(pending)
+
+
+def _collect_timeline_events(
+    plan: Dict[str, Any],
+    manifest: Dict[str, Any],
+    render_root: str,
+    proxies: Any = None,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, Any]]:
+    settings = _output_settings(plan)
     repo_root = _get_repo_root()
     diagnostics = _diagnostics_bucket()
     manifest_maps = _collect_manifest_maps(manifest if isinstance(manifest, dict) else {})
     visual_events = _collect_visual_events(
         manifest_maps=manifest_maps,
-        output_duration_sec=duration_sec,
-        output_width=width,
-        output_height=height,
+        output_duration_sec=settings["duration_sec"],
+        output_width=settings["width"],
+        output_height=settings["height"],
         repo_root=repo_root,
         render_root=render_root,
         diagnostics=diagnostics,
     )
     audio_events = _collect_audio_events(
         manifest_maps=manifest_maps,
-        output_duration_sec=duration_sec,
+        output_duration_sec=settings["duration_sec"],
         repo_root=repo_root,
         render_root=render_root,
         diagnostics=diagnostics,
     )
+    if proxies is not None:
+        _apply_proxies(visual_events, proxies, diagnostics)
+    return settings, visual_events, audio_events, diagnostics
+
+
+def _build_timeline_layers_ffmpeg_command(
+    plan: Dict[str, Any],
+    manifest: Dict[str, Any],
+    output_path: str,
+    render_root: str,
+    proxies: Any = None,
+) -> Tuple[List[str], Dict[str, Any]]:
+    settings, visual_events, audio_events, diagnostics = _collect_timeline_events(plan, manifest, render_root, proxies)
+    width = settings["width"]
+    height = settings["height"]
+    fps = settings["fps"]
+    duration_sec = settings["duration_sec"]
     if not visual_events and not audio_events:
         _diag_push(
             diagnostics,
@@ -594,6 +1126,9 @@ def _build_timeline_layers_ffmpeg_command(
             "visual_events_used": 0,
             "audio_events_used": 0,
             "diagnostics": diagnostics,
+            "settings": settings,
+            "visual_events": [],
+            "audio_events": [],
         }
     inputs: List[str] = [
         "-f",
@@ -603,138 +1138,60 @@ def _build_timeline_layers_ffmpeg_command(
         "-f",
         "lavfi",
         "-i",
-        f"anullsrc=r={audio_rate}:cl={channel_layout}",
+        f"anullsrc=r={settings['audio_rate']}:cl={settings['channel_layout']}",
     ]
-    filter_parts: List[str] = [f"[0:v]trim=duration={duration_sec:.6f},setpts=PTS-STARTPTS,format=rgba[base0]"]
-    base_label = "base0"
-    next_input_index = 2
-    visual_used = 0
+    sources = _SharedInputs(2)
+    items: List[Dict[str, Any]] = []
     for event in visual_events:
         source_path = str(event.get("src_path") or "")
         if not source_path:
             continue
         event_duration = max(0.02, _to_float(event.get("duration_sec"), 0.1))
-        if bool(event.get("is_image")):
-            inputs.extend(["-loop", "1", "-t", f"{event_duration + 0.05:.6f}", "-i", source_path])
-        else:
-            inputs.extend(["-i", source_path])
-        input_idx = next_input_index
-        next_input_index += 1
-        src_label = f"{input_idx}:v"
-        clip_label = f"vclip{visual_used}"
-        out_label = f"base{visual_used + 1}"
-        start_offset_sec = max(0.0, _to_number(event.get("start_offset_sec"), 0.0))
         time_sec = max(0.0, _to_number(event.get("time_sec"), 0.0))
-        end_sec = min(duration_sec, time_sec + event_duration)
-        target_w = max(2, _to_int(event.get("target_w"), width))
-        target_h = max(2, _to_int(event.get("target_h"), height))
-        rotate_deg = _to_number(event.get("rotate_deg"), 0.0)
-        rotate_rad = (rotate_deg * math.pi) / 180.0
-        opacity = _clamp((_to_number(event.get("opacity_pct"), 100.0) / 100.0), 0.0, 1.0)
-        fade_in_sec = _clamp(_to_number(event.get("fade_in_sec"), 0.0), 0.0, 30.0)
-        fade_out_sec = _clamp(_to_number(event.get("fade_out_sec"), 0.0), 0.0, 30.0)
-        blur_sigma = _clamp(_to_number(event.get("blur_sigma"), 0.0), 0.0, 20.0)
-        eq_saturation = _clamp(_to_number(event.get("eq_saturation"), 1.0), 0.0, 4.0)
-        eq_contrast = _clamp(_to_number(event.get("eq_contrast"), 1.0), 0.0, 4.0)
-        eq_brightness = _clamp(_to_number(event.get("eq_brightness"), 0.0), -1.0, 1.0)
-        offset_x = _to_number(event.get("offset_x_px"), 0.0)
-        offset_y = _to_number(event.get("offset_y_px"), 0.0)
-        clip_filters = (
-            f"[{src_label}]"
-            f"trim=start={start_offset_sec:.6f}:duration={event_duration:.6f},"
-            f"setpts=PTS-STARTPTS,"
-            f"fps={fps:.6f},"
-            f"scale={target_w}:{target_h}:force_original_aspect_ratio=decrease,"
-            f"pad={target_w}:{target_h}:(ow-iw)/2:(oh-ih)/2:color=black@0,"
-            f"format=rgba"
-        )
-        if abs(rotate_rad) > 1e-9:
-            clip_filters += f",rotate={rotate_rad:.9f}:c=none:ow=rotw(iw):oh=roth(ih)"
-        if blur_sigma > 0.01:
-            clip_filters += f",boxblur={blur_sigma:.3f}:1"
-        if (
-            abs(eq_saturation - 1.0) > 1e-6
-            or abs(eq_contrast - 1.0) > 1e-6
-            or abs(eq_brightness) > 1e-6
-        ):
-            clip_filters += (
-                f",eq=saturation={eq_saturation:.4f}:"
-                f"contrast={eq_contrast:.4f}:brightness={eq_brightness:.4f}"
-            )
-        if fade_in_sec > 0.01:
-            fade_in_applied = min(fade_in_sec, max(0.02, event_duration - 0.01))
-            clip_filters += f",fade=t=in:st=0:d={fade_in_applied:.6f}:alpha=1"
-        if fade_out_sec > 0.01 and event_duration > 0.03:
-            fade_out_applied = min(fade_out_sec, max(0.02, event_duration - 0.01))
-            fade_out_start = max(0.0, event_duration - fade_out_applied)
-            clip_filters += f",fade=t=out:st={fade_out_start:.6f}:d={fade_out_applied:.6f}:alpha=1"
-        if opacity < 0.999:
-            clip_filters += f",colorchannelmixer=aa={opacity:.6f}"
-        clip_filters += f"[{clip_label}]"
-        filter_parts.append(clip_filters)
-        filter_parts.append(
-            f"[{base_label}][{clip_label}]"
-            f"overlay=x='(W-w)/2+({offset_x:.3f})':y='(H-h)/2+({offset_y:.3f})':"
-            f"enable='between(t,{time_sec:.6f},{end_sec:.6f})':eof_action=pass"
-            f"[{out_label}]"
+        still = bool(event.get("is_image"))
+        items.append(
+            {
+                "event": event,
+                "use": sources.add(
+                    source_path,
+                    "still" if still else "v",
+                    start_sec=time_sec,
+                    end_sec=time_sec + event_duration,
+                    source_start_sec=max(0.0, _to_number(event.get("start_offset_sec"), 0.0)),
+                ),
+                "still": still,
+                "start_sec": time_sec,
+                "duration_sec": min(duration_sec, time_sec + event_duration) - time_sec,
+                "trim_duration_sec": event_duration,
+                "clip_duration_sec": event_duration,
+            }
         )
-        base_label = out_label
-        visual_used += 1
-    filter_parts.append(f"[{base_label}]trim=duration={duration_sec:.6f},setpts=PTS-STARTPTS,format=yuv420p[vout]")
+    audio_uses = _add_audio_uses(sources, audio_events)
+    source_args, split_parts = sources.finalize()
+    inputs.extend(source_args)
+    filter_parts: List[str] = [f"[0:v]trim=duration={duration_sec:.6f},setpts=PTS-STARTPTS,format=rgba[base0]"]
+    filter_parts.extend(split_parts)
+    for item in items:
+        item["input_label"] = sources.label(item["use"])
+        item["trim_start_sec"] = sources.source_offset(item["use"])
+    visual_used = len(items)
+    layer_parts, base_label, layer_stats = _composite_visual_layers(
+        items,
+        width=width,
+        height=height,
+        fps=fps,
+        length_sec=duration_sec,
+        base_label="base0",
+    )
+    filter_parts.extend(layer_parts)
+    # `setpts` drops the stream frame rate; without `fps` the encoder falls back to 25 fps.
+    filter_parts.append(f"[{base_label}]trim=duration={duration_sec:.6f},setpts=PTS-STARTPTS,fps={fps:.6f},format=yuv420p[vout]")
     audio_labels: List[str] = []
-    audio_used = 0
-    for event in audio_events:
-        source_path = str(event.get("src_path") or "")
-        if not source_path:
-            continue
-        inputs.extend(["-i", source_path])
-        input_idx = next_input_index
-        next_input_index += 1
-        label = f"aevt{audio_used}"
-        time_sec = max(0.0, _to_number(event.get("time_sec"), 0.0))
-        delay_ms = max(0, int(round(time_sec * 1000.0)))
-        start_offset_sec = max(0.0, _to_number(event.get("start_offset_sec"), 0.0))
-        event_duration = max(0.02, _to_float(event.get("duration_sec"), 0.1))
-        fade_in_sec = _clamp(_to_number(event.get("fade_in_sec"), 0.0), 0.0, 30.0)
-        fade_out_sec = _clamp(_to_number(event.get("fade_out_sec"), 0.0), 0.0, 30.0)
-        volume_gain = _clamp(_to_number(event.get("volume_gain"), 1.0), 0.0, 8.0)
-        audio_chain = (
-            f"[{input_idx}:a]"
-            f"atrim=start={start_offset_sec:.6f}:duration={event_duration:.6f},"
-            f"asetpts=PTS-STARTPTS"
-        )
-        if fade_in_sec > 0.01:
-            fade_in_applied = min(fade_in_sec, max(0.02, event_duration - 0.01))
-            audio_chain += f",afade=t=in:st=0:d={fade_in_applied:.6f}"
-        if fade_out_sec > 0.01 and event_duration > 0.03:
-            fade_out_applied = min(fade_out_sec, max(0.02, event_duration - 0.01))
-            fade_out_start = max(0.0, event_duration - fade_out_applied)
-            audio_chain += f",afade=t=out:st={fade_out_start:.6f}:d={fade_out_applied:.6f}"
-        if abs(volume_gain - 1.0) > 1e-6:
-            audio_chain += f",volume={volume_gain:.6f}"
-        filter_parts.append(
-            f"{audio_chain},adelay={delay_ms}:all=1[{label}]"
-        )
+    for event, use_id in audio_uses:
+        label = f"aevt{len(audio_labels)}"
+        filter_parts.append(_audio_event_filter(event, sources.label(use_id), label))
         audio_labels.append(label)
-        audio_used += 1
-    if audio_labels:
-        chain = "".join([f"[{label}]" for label in audio_labels])
-        if len(audio_labels) > 1:
-            chain += (
-                f"amix=inputs={len(audio_labels)}:duration=longest:normalize=0:dropout_transition=0,"
-            )
-        chain += (
-            f"aformat=sample_rates={audio_rate}:channel_layouts={channel_layout},"
-            f"atrim=duration={duration_sec:.6f}"
-            f"[aout]"
-        )
-        filter_parts.append(chain)
-    else:
-        filter_parts.append(
-            f"[1:a]atrim=duration={duration_sec:.6f},"
-            f"aformat=sample_rates={audio_rate}:channel_layouts={channel_layout}"
-            f"[aout]"
-        )
+    filter_parts.append(_audio_mix_filter(audio_labels, settings, "1:a"))
     filter_complex = ";".join(filter_parts)
     command = [
         "ffmpeg",
@@ -748,34 +1205,524 @@ def _build_timeline_layers_ffmpeg_command(
         "-map",
         "[aout]",
         "-shortest",
-        *video_args,
-        *audio_args,
+        *settings["video_args"],
+        *settings["audio_args"],
         output_path,
     ]
     execution_meta = diagnostics.get("execution")
     if not isinstance(execution_meta, dict):
         execution_meta = {}
         diagnostics["execution"] = execution_meta
-    execution_meta["input_count"] = int(next_input_index)
+    execution_meta["input_count"] = int(2 + sources.input_count)
+    execution_meta["source_use_count"] = int(sources.use_count)
     execution_meta["filter_part_count"] = int(len(filter_parts))
     execution_meta["audio_mix_input_count"] = int(len(audio_labels))
     execution_meta["video_overlay_count"] = int(visual_used)
+    execution_meta["video_lane_count"] = int(layer_stats["lane_count"])
+    execution_meta["video_overlay_depth"] = int(layer_stats["overlay_depth"])
     execution_meta["command_mode"] = "timeline_layers"
     execution_meta["duration_sec"] = float(duration_sec)
     return command, {
         "render_mode": "timeline_layers",
         "visual_events_used": int(visual_used),
-        "audio_events_used": int(audio_used),
+        "audio_events_used": int(len(audio_labels)),
         "diagnostics": diagnostics,
+        "settings": settings,
+        "visual_events": visual_events,
+        "audio_events": audio_events,
+    }
+
+
+_MUXER_OPTIONS = frozenset({"-movflags", "-brand", "-write_tmcd"})
+
+
+def _split_muxer_args(args: List[str]) -> Tuple[List[str], List[str]]:
+    encoder: List[str] = []
+    muxer: List[str] = []
+    index = 0
+    while index < len(args):
+        target = muxer if args[index] in _MUXER_OPTIONS else encoder
+        target.extend(args[index : index + 2])
+        index += 2
+    return encoder, muxer
+
+
+def _segment_boundaries(
+    duration_sec: float,
+    visual_events: List[Dict[str, Any]],
+    segment_count: int,
+    fps: float,
+) -> List[float]:
+    """Cut `[0, duration_sec]` into ~equal slices, snapping cuts to nearby clip boundaries.
+
+    Cuts land on the frame grid; cutting at a clip edge avoids decoding that clip
+    in two segments.
+    """
+    frame = 1.0 / fps
+
+    def snap(value: float) -> float:
+        return round(value * fps) / fps
+
+    candidates = sorted(
+        {
+            snap(edge)
+            for event in visual_events
+            for edge in (
+                _to_number(event.get("time_sec"), 0.0),
+                _to_number(event.get("time_sec"), 0.0) + _to_number(event.get("duration_sec"), 0.0),
+            )
+            if frame <= snap(edge) <= duration_sec - frame
+        }
+    )
+    target = duration_sec / max(1, segment_count)
+    cuts = [0.0]
+    for index in range(1, segment_count):
+        ideal = index * target
+        near = [
+            value
+            for value in candidates
+            if abs(value - ideal) <= target * 0.25 and value - cuts[-1] >= target * 0.5
+        ]
+        cut = min(near, key=lambda value: abs(value - ideal)) if near else snap(ideal)
+        if cut - cuts[-1] >= frame and duration_sec - cut >= frame:
+            cuts.append(cut)
+    return cuts + [float(duration_sec)]
+
+
+def _segment_video_command(
+    settings: Dict[str, Any],
+    visual_events: List[Dict[str, Any]],
+    start_sec: float,
+    end_sec: float,
+    output_path: str,
+    encoder_args: List[str],
+) -> Tuple[List[str], int]:
+    width = settings["width"]
+    height = settings["height"]
+    fps = settings["fps"]
+    length = end_sec - start_sec
+    inputs: List[str] = ["-f", "lavfi", "-i", f"color=c=black:s={width}x{height}:r={fps}:d={length:.6f}"]
+    filter_parts: List[str] = [f"[0:v]trim=duration={length:.6f},setpts=PTS-STARTPTS,format=rgba[base0]"]
+    sources = _SharedInputs(1, seek=True)
+    items: List[Dict[str, Any]] = []
+    for event in visual_events:
+        source_path = str(event.get("src_path") or "")
+        time_sec = max(0.0, _to_number(event.get("time_sec"), 0.0))
+        event_duration = max(0.02, _to_float(event.get("duration_sec"), 0.1))
+        event_end = min(settings["duration_sec"], time_sec + event_duration)
+        if not source_path or event_end <= start_sec or time_sec >= end_sec:
+            continue
+        skip_sec = max(0.0, start_sec - time_sec)
+        local_duration = min(event_end, end_sec) - max(time_sec, start_sec)
+        seek_sec = max(0.0, _to_number(event.get("start_offset_sec"), 0.0)) + skip_sec
+        local_start = max(0.0, time_sec - start_sec)
+        still = bool(event.get("is_image"))
+        items.append(
+            {
+                "event": event,
+                "use": sources.add(
+                    source_path,
+                    "still" if still else "v",
+                    start_sec=local_start,
+                    end_sec=local_start + local_duration,
+                    source_start_sec=0.0 if still else seek_sec,
+                ),
+                "still": still,
+                "start_sec": local_start,
+                "duration_sec": local_duration,
+                "trim_duration_sec": local_duration,
+                "clip_duration_sec": event_duration,
+                "skip_sec": skip_sec,
+            }
+        )
+    source_args, split_parts = sources.finalize()
+    inputs.extend(source_args)
+    filter_parts.extend(split_parts)
+    for item in items:
+        item["input_label"] = sources.label(item["use"])
+        item["trim_start_sec"] = sources.source_offset(item["use"])
+    used = len(items)
+    layer_parts, base_label, _layer_stats = _composite_visual_layers(
+        items,
+        width=width,
+        height=height,
+        fps=fps,
+        length_sec=length,
+        base_label="base0",
+    )
+    filter_parts.extend(layer_parts)
+    filter_parts.append(f"[{base_label}]trim=duration={length:.6f},setpts=PTS-STARTPTS,fps={fps:.6f},format=yuv420p[vout]")
+    command = [
+        "ffmpeg",
+        "-hide_banner",
+        "-y",
+        *inputs,
+        "-filter_complex",
+        ";".join(filter_parts),
+        "-map",
+        "[vout]",
+        "-an",
+        *encoder_args,
+        output_path,
+    ]
+    return command, used
+
+
+def _audio_only_command(settings: Dict[str, Any], audio_events: List[Dict[str, Any]], output_path: str) -> List[str]:
+    inputs: List[str] = ["-f", "lavfi", "-i", f"anullsrc=r={settings['audio_rate']}:cl={settings['channel_layout']}"]
+    sources = _SharedInputs(1)
+    audio_uses = _add_audio_uses(sources, audio_events)
+    source_args, filter_parts = sources.finalize()
+    inputs.extend(source_args)
+    labels: List[str] = []
+    for event, use_id in audio_uses:
+        label = f"aevt{len(labels)}"
+        filter_parts.append(_audio_event_filter(event, sources.label(use_id), label))
+        labels.append(label)
+    filter_parts.append(_audio_mix_filter(labels, settings, "0:a", pad=True))
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-y",
+        *inputs,
+        "-filter_complex",
+        ";".join(filter_parts),
+        "-map",
+        "[aout]",
+        "-vn",
+        "-c:a",
+        "pcm_f32le",
+        "-rf64",
+        "auto",
+        output_path,
+    ]
+
+
+def _concat_list_line(path: str) -> str:
+    return "file '" + str(path).replace("'", "'\\''") + "'"
+
+
+def _build_segmented_render(
+    render_meta: Dict[str, Any],
+    output_path: str,
+    work_dir: str,
+    segment_count: int,
+) -> Optional[Dict[str, Any]]:
+    """Plan a segment-parallel render: video slices + one audio pass, then a concat stitch.
+
+    Each slice is an independent ffmpeg process over the clips that overlap it.
+    Audio is mixed once for the whole timeline (lossless PCM) and encoded only in
+    the stitch, so slice boundaries never produce encoder priming gaps or clicks.
+    Returns None when the timeline is too short to split.
+    """
+    settings = render_meta.get("settings") if isinstance(render_meta.get("settings"), dict) else None
+    if not settings or render_meta.get("render_mode") != "timeline_layers":
+        return None
+    visual_events = list(render_meta.get("visual_events") or [])
+    audio_events = list(render_meta.get("audio_events") or [])
+    boundaries = _segment_boundaries(settings["duration_sec"], visual_events, segment_count, settings["fps"])
+    if len(boundaries) < 3:
+        return None
+    encoder_args, muxer_args = _split_muxer_args(settings["video_args"])
+    segments: List[Dict[str, Any]] = []
+    for index, (start_sec, end_sec) in enumerate(zip(boundaries[:-1], boundaries[1:])):
+        segment_path = os.path.join(work_dir, f"segment_{index:03d}.mkv")
+        command, overlays = _segment_video_command(settings, visual_events, start_sec, end_sec, segment_path, encoder_args)
+        segments.append(
+            {
+                "index": index,
+                "start_sec": float(start_sec),
+                "end_sec": float(end_sec),
+                "overlay_count": int(overlays),
+                "output_path": segment_path,
+                "command": command,
+            }
+        )
+    audio_path = os.path.join(work_dir, "audio.wav")
+    concat_path = os.path.join(work_dir, "segments.txt")
+    stitch_command = [
+        "ffmpeg",
+        "-hide_banner",
+        "-y",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        concat_path,
+        "-i",
+        audio_path,
+        "-map",
+        "0:v:0",
+        "-map",
+        "1:a:0",
+        "-c:v",
+        "copy",
+        *settings["audio_args"],
+        *muxer_args,
+        "-t",
+        f"{settings['duration_sec']:.6f}",
+        output_path,
+    ]
+    return {
+        "work_dir": work_dir,
+        "segments": segments,
+        "audio": {"output_path": audio_path, "command": _audio_only_command(settings, audio_events, audio_path)},
+        "stitch": {
+            "concat_path": concat_path,
+            "concat_list": [_concat_list_line(row["output_path"]) for row in segments],
+            "command": stitch_command,
+        },
     }
 
 
+_PROGRESS_POLL_SEC = 0.2
+_OUTPUT_TAIL_CHARS = 4000
+
+
+def parse_ffmpeg_progress(lines: List[str], duration_sec: float = 0.0) -> Dict[str, Any]:
+    """Fold ffmpeg `-progress` key=value lines into a progress snapshot.
+
+    `out_time_us` (falling back to `out_time_ms`, which ffmpeg also reports in
+    microseconds) is divided by `duration_sec` to get `fraction`.
+    """
+    fields: Dict[str, str] = {}
+    for line in lines:
+        key, sep, value = str(line or "").strip().partition("=")
+        if sep:
+            fields[key.strip()] = value.strip()
+    out_time_us = _to_number(fields.get("out_time_us", fields.get("out_time_ms")), -1.0)
+    out_time_sec = max(0.0, out_time_us / 1_000_000.0) if out_time_us >= 0 else 0.0
+    speed_text = str(fields.get("speed") or "").strip().rstrip("x")
+    speed = _to_number(speed_text, 0.0) if speed_text and speed_text != "N/A" else 0.0
+    finished = fields.get("progress") == "end"
+    fraction = 1.0 if finished else 0.0
+    if not finished and duration_sec > 0:
+        fraction = _clamp(out_time_sec / float(duration_sec), 0.0, 0.999)
+    return {
+        "fraction": float(fraction),
+        "out_time_sec": float(out_time_sec),
+        "frame": int(_to_number(fields.get("frame"), 0.0)),
+        "speed": float(speed),
+        "finished": bool(finished),
+    }
+
+
+def _with_progress_pipe(command: List[str]) -> List[str]:
+    if "-progress" in command or not command:
+        return list(command)
+    return [command[0], "-progress", "pipe:1", "-nostats", *command[1:]]
+
+
+def _run_ffmpeg_process(
+    command: List[str],
+    *,
+    timeout_sec: float,
+    duration_sec: float = 0.0,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """Run `command`, streaming `-progress` blocks from stdout to `on_progress`.
+
+    Returns `returncode`, `stdout_tail`, `stderr_tail` and `error` (None,
+    "timeout" or "cancelled"). The process is killed on timeout/cancellation.
+    """
+    proc = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    stdout_tail: Deque[str] = deque()
+    stderr_tail: Deque[str] = deque()
+
+    def _keep_tail(tail: Deque[str], line: str) -> None:
+        tail.append(line)
+        while len(tail) > 1 and sum(len(row) for row in tail) > _OUTPUT_TAIL_CHARS:
+            tail.popleft()
+
+    def _read_stdout() -> None:
+        block: List[str] = []
+        for line in proc.stdout:
+            _keep_tail(stdout_tail, line)
+            block.append(line)
+            if line.startswith("progress="):
+                if on_progress is not None:
+                    try:
+                        on_progress(parse_ffmpeg_progress(block, duration_sec))
+                    except Exception:
+                        pass
+                block = []
+
+    def _read_stderr() -> None:
+        for line in proc.stderr:
+            _keep_tail(stderr_tail, line)
+
+    readers = [
+        threading.Thread(target=_read_stdout, daemon=True),
+        threading.Thread(target=_read_stderr, daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    deadline = time.time() + max(1.0, float(timeout_sec))
+    error: Optional[str] = None
+    while True:
+        try:
+            proc.wait(timeout=_PROGRESS_POLL_SEC)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        if cancel_event is not None and cancel_event.is_set():
+            error = "cancelled"
+        elif time.time() >= deadline:
+            error = "timeout"
+        if error:
+            proc.kill()
+            proc.wait()
+            break
+    for reader in readers:
+        reader.join(timeout=5.0)
+    return {
+        "returncode": int(proc.returncode),
+        "stdout_tail": "".join(stdout_tail)[-_OUTPUT_TAIL_CHARS:],
+        "stderr_tail": "".join(stderr_tail)[-_OUTPUT_TAIL_CHARS:],
+        "error": error,
+    }
+
+
+class _AnyEvent:
+    def __init__(self, *events: Optional[threading.Event]) -> None:
+        self._events = [event for event in events if event is not None]
+
+    def is_set(self) -> bool:
+        return any(event.is_set() for event in self._events)
+
+
+def _run_segmented_render(
+    segmented: Dict[str, Any],
+    *,
+    timeout_sec: float,
+    duration_sec: float,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """Run segment + audio processes in parallel, then stitch them with the concat demuxer.
+
+    A failing process aborts its siblings. Progress is the rendered share of
+    the timeline (90%) plus the stitch pass (10%). The work dir is always removed.
+    """
+    work_dir = str(segmented.get("work_dir") or "")
+    segments = list(segmented.get("segments") or [])
+    audio = segmented.get("audio") if isinstance(segmented.get("audio"), dict) else {}
+    stitch = segmented.get("stitch") if isinstance(segmented.get("stitch"), dict) else {}
+    deadline = time.time() + max(1.0, float(timeout_sec))
+    abort = threading.Event()
+    stop = _AnyEvent(abort, cancel_event)
+    rendered_sec = [0.0] * len(segments)
+    progress_lock = threading.Lock()
+
+    def _report(stitch_fraction: float) -> None:
+        if on_progress is None:
+            return
+        with progress_lock:
+            rendered = sum(rendered_sec)
+        fraction = 0.9 * _clamp(rendered / max(duration_sec, 1e-6), 0.0, 1.0) + 0.1 * stitch_fraction
+        try:
+            on_progress(
+                {
+                    "fraction": float(min(fraction, 0.999)),
+                    "out_time_sec": float(rendered),
+                    "frame": 0,
+                    "speed": 0.0,
+                    "finished": False,
+                    "segments": len(segments),
+                }
+            )
+        except Exception:
+            pass
+
+    def _segment_progress(index: int, length: float) -> Callable[[Dict[str, Any]], None]:
+        def _update(progress: Dict[str, Any]) -> None:
+            done = length if progress.get("finished") else min(length, _to_number(progress.get("out_time_sec"), 0.0))
+            with progress_lock:
+                rendered_sec[index] = done
+            _report(0.0)
+
+        return _update
+
+    try:
+        os.makedirs(work_dir, exist_ok=True)
+        jobs = [
+            (row["command"], float(row["end_sec"]) - float(row["start_sec"]), _segment_progress(index, float(row["end_sec"]) - float(row["start_sec"])))
+            for index, row in enumerate(segments)
+        ]
+        jobs.append((audio.get("command") or [], duration_sec, None))
+        failure: Optional[Dict[str, Any]] = None
+        with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="lemouf-composition-segment") as pool:
+            futures = [
+                pool.submit(
+                    _run_ffmpeg_process,
+                    _with_progress_pipe([str(part) for part in command]),
+                    timeout_sec=max(1.0, deadline - time.time()),
+                    duration_sec=length,
+                    on_progress=callback,
+                    cancel_event=stop,
+                )
+                for command, length, callback in jobs
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                if result["error"] or result["returncode"] != 0:
+                    abort.set()
+                    # Siblings killed by `abort` report "cancelled"; keep the root cause.
+                    if failure is None or (failure["error"] == "cancelled" and result["error"] != "cancelled"):
+                        failure = result
+        if cancel_event is not None and cancel_event.is_set():
+            return dict(failure or {"returncode": -1, "stdout_tail": "", "stderr_tail": ""}, error="cancelled")
+        if failure is not None:
+            return failure
+        with open(str(stitch.get("concat_path") or ""), "w", encoding="utf-8") as fh:
+            fh.write("\n".join(stitch.get("concat_list") or []) + "\n")
+        return _run_ffmpeg_process(
+            _with_progress_pipe([str(part) for part in list(stitch.get("command") or [])]),
+            timeout_sec=max(1.0, deadline - time.time()),
+            duration_sec=duration_sec,
+            on_progress=lambda progress: _report(_to_number(progress.get("fraction"), 0.0)),
+            cancel_event=cancel_event,
+        )
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
 class CompositionRenderExecutionService:
-    """Thread-safe executor for composition render export jobs."""
+    """Thread-safe executor for composition render export jobs.
+
+    `plan` builds the ffmpeg command and output path; `run` executes a plan.
+    Runs do not share a lock, so renders in different scopes (or driven by
+    `CompositionRenderJobQueue`) proceed concurrently. With `max_segments > 1`,
+    timelines of at least `2 * min_segment_sec` are rendered as parallel slices.
+    Finished renders are indexed per scope by `_render_cache_key`, so an
+    unchanged timeline is served from the existing file without running ffmpeg.
+    `quality="preview"` renders at the proxy height from `proxies` (see
+    `CompositionProxyStore`) with a fast encoder preset.
+    """
 
-    def __init__(self, path: str, max_files_per_scope: int = 120) -> None:
+    def __init__(
+        self,
+        path: str,
+        max_files_per_scope: int = 120,
+        max_segments: int = 1,
+        min_segment_sec: float = 20.0,
+        proxies: Optional[CompositionProxyStore] = None,
+    ) -> None:
         self._path = os.path.realpath(path)
         self._max_files_per_scope = max(10, int(max_files_per_scope or 120))
+        self._max_segments = max(1, int(max_segments or 1))
+        self._min_segment_sec = max(1.0, float(min_segment_sec or 20.0))
+        self._proxies = proxies
         self._lock = threading.Lock()
 
     @property
@@ -783,7 +1730,66 @@ class CompositionRenderExecutionService:
         return self._path
 
     def _scope_dir(self, scope_key: str) -> str:
-        return os.path.join(self._path, _safe_scope(scope_key))
+        return os.path.join(self._path, safe_scope_key(scope_key))
+
+    def _index_path(self, scope_key: str) -> str:
+        return os.path.join(self._scope_dir(scope_key), _RENDER_INDEX_FILE)
+
+    def _read_index_locked(self, scope_key: str) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._index_path(scope_key), "r", encoding="utf-8") as fh:
+                parsed = json.load(fh)
+        except Exception:
+            return {}
+        entries = parsed.get("entries") if isinstance(parsed, dict) else None
+        return {str(key): value for key, value in (entries or {}).items() if isinstance(value, dict)}
+
+    def _write_index_locked(self, scope_key: str, entries: Dict[str, Dict[str, Any]]) -> None:
+        path = self._index_path(scope_key)
+        if not entries and not os.path.isfile(path):
+            return
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump({"version": _RENDER_CACHE_VERSION, "entries": entries}, fh, sort_keys=True)
+            os.replace(tmp_path, path)
+        except Exception:
+            _remove_quietly(tmp_path)
+
+    def _lookup_cached_locked(self, scope_key: str, render_key: str) -> Optional[str]:
+        entries = self._read_index_locked(scope_key)
+        entry = entries.get(render_key)
+        if not entry:
+            return None
+        full = _safe_real_join(self._scope_dir(scope_key), os.path.basename(str(entry.get("file_name") or "")))
+        try:
+            valid = bool(full) and os.path.getsize(str(full)) == int(entry.get("size_bytes") or -1)
+        except (OSError, TypeError, ValueError):
+            valid = False
+        if not valid:
+            entries.pop(render_key, None)
+            self._write_index_locked(scope_key, entries)
+            return None
+        # Bump mtime so `_prune_scope_locked` treats a cache hit as recently used.
+        try:
+            os.utime(str(full), None)
+        except OSError:
+            pass
+        return str(full)
+
+    def _record_cached_locked(self, scope_key: str, render_key: str, output_path: str) -> None:
+        try:
+            size_bytes = int(os.path.getsize(output_path))
+        except OSError:
+            return
+        entries = self._read_index_locked(scope_key)
+        entries[render_key] = {
+            "file_name": os.path.basename(output_path),
+            "size_bytes": size_bytes,
+            "created_at": time.time(),
+        }
+        self._write_index_locked(scope_key, entries)
 
     def _prune_scope_locked(self, scope_dir: str) -> None:
         if not os.path.isdir(scope_dir):
@@ -791,7 +1797,7 @@ class CompositionRenderExecutionService:
         files: List[tuple[float, str, str]] = []
         for name in os.listdir(scope_dir):
             full = os.path.join(scope_dir, name)
-            if not os.path.isfile(full):
+            if name == _RENDER_INDEX_FILE or name.endswith(".tmp") or not os.path.isfile(full):
                 continue
             try:
                 mtime = os.path.getmtime(full)
@@ -801,14 +1807,21 @@ class CompositionRenderExecutionService:
         if len(files) <= self._max_files_per_scope:
             return
         files.sort(key=lambda row: (row[0], row[1]), reverse=True)
-        for _, _, full in files[self._max_files_per_scope :]:
+        removed = set()
+        for _, name, full in files[self._max_files_per_scope :]:
             try:
                 os.remove(full)
+                removed.add(name)
             except Exception:
                 pass
+        scope_key = os.path.basename(scope_dir)
+        entries = self._read_index_locked(scope_key)
+        kept = {key: entry for key, entry in entries.items() if entry.get("file_name") not in removed}
+        if len(kept) != len(entries):
+            self._write_index_locked(scope_key, kept)
 
     def _new_output_path(self, scope_key: str, extension: str) -> str:
-        safe_scope = _safe_scope(scope_key)
+        safe_scope = safe_scope_key(scope_key)
         ext = str(extension or "").strip().lower()
         if not ext.startswith("."):
             ext = f".{ext}" if ext else ".mp4"
@@ -820,105 +1833,273 @@ class CompositionRenderExecutionService:
         os.makedirs(scope_dir, exist_ok=True)
         return os.path.join(scope_dir, f"render_{safe_scope}_{stamp}_{nonce}{ext}")
 
-    def execute(
+    def plan(
         self,
         *,
         scope_key: str,
         manifest: Dict[str, Any],
         export_plan: Dict[str, Any],
         execute: bool = False,
-        timeout_sec: float = 300.0,
+        use_cache: bool = True,
+        quality: str = "final",
     ) -> Dict[str, Any]:
-        safe_scope = _safe_scope(scope_key)
+        """Resolve the manifest into an ffmpeg command (`status="planned"`).
+
+        On a render-cache hit `output_path` points at the existing file and
+        `render_strategy` is `"cached"`; `run` then returns without ffmpeg.
+        Preview plans read ready proxies and schedule missing ones (the original
+        source is used until its proxy exists).
+        """
+        safe_scope = safe_scope_key(scope_key)
         plan = _json_clone(export_plan, {}) if isinstance(export_plan, dict) else {}
         if not isinstance(plan, dict):
             plan = {}
+        quality = str(quality or "final").strip().lower()
+        if quality not in RENDER_QUALITIES:
+            quality = "final"
+        proxies = self._proxies if quality == "preview" else None
+        if proxies is not None:
+            plan = _preview_plan(plan, proxies.max_height)
         profile = plan.get("profile") if isinstance(plan.get("profile"), dict) else {}
         extension = str(profile.get("file_extension") or ".mp4")
+        output = plan.get("output") if isinstance(plan.get("output"), dict) else {}
         output_path = self._new_output_path(safe_scope, extension)
         command, render_meta = _build_timeline_layers_ffmpeg_command(
             plan,
             manifest if isinstance(manifest, dict) else {},
             output_path,
             self._path,
+            proxies,
         )
+        render_key = _render_cache_key(plan, command, output_path, render_meta)
+        cached_path = None
+        if use_cache:
+            with self._lock:
+                cached_path = self._lookup_cached_locked(safe_scope, render_key)
+        if cached_path:
+            command = [cached_path if part == output_path else part for part in command]
+            output_path = cached_path
         ffmpeg_path = shutil.which("ffmpeg")
         out: Dict[str, Any] = {
             "schema_version": RENDER_EXEC_SCHEMA_VERSION,
             "scope_key": safe_scope,
             "execute_requested": bool(execute),
+            "quality": "preview" if proxies is not None else "final",
             "command": command,
             "output_path": output_path,
             "ffmpeg_found": bool(ffmpeg_path),
             "status": "planned",
             "error": None,
             "duration_sec": None,
+            "output_duration_sec": max(0.1, _to_float(output.get("durationSec"), 1.0)),
             "render_mode": str(render_meta.get("render_mode") or "fallback"),
             "visual_events_used": int(render_meta.get("visual_events_used") or 0),
             "audio_events_used": int(render_meta.get("audio_events_used") or 0),
             "diagnostics": _json_clone(render_meta.get("diagnostics"), _diagnostics_bucket()),
         }
-        diagnostics = out.get("diagnostics")
-        if not isinstance(diagnostics, dict):
-            diagnostics = _diagnostics_bucket()
-            out["diagnostics"] = diagnostics
-        execution_meta = diagnostics.get("execution")
-        if not isinstance(execution_meta, dict):
-            execution_meta = {}
-            diagnostics["execution"] = execution_meta
+        execution_meta = _execution_meta(out)
         execution_meta["ffmpeg_found"] = bool(ffmpeg_path)
         execution_meta["execute_requested"] = bool(execute)
         execution_meta["output_path"] = output_path
         execution_meta["scope_key"] = safe_scope
-        if not execute:
-            return out
-        if not ffmpeg_path:
-            out["status"] = "failed"
-            out["error"] = "ffmpeg_not_found"
-            execution_meta["status"] = "failed"
-            execution_meta["error"] = "ffmpeg_not_found"
+        out["cache"] = {"key": render_key, "hit": bool(cached_path), "enabled": bool(use_cache)}
+        execution_meta["cache_hit"] = bool(cached_path)
+        if cached_path:
+            out["render_strategy"] = "cached"
+            execution_meta["segment_count"] = 0
             return out
-        start = time.time()
-        try:
+        segment_count = min(self._max_segments, int(out["output_duration_sec"] // self._min_segment_sec))
+        segmented = None
+        if segment_count >= 2:
+            segmented = _build_segmented_render(
+                render_meta,
+                output_path,
+                f"{os.path.splitext(output_path)[0]}_segments",
+                segment_count,
+            )
+        out["render_strategy"] = "segmented" if segmented else "single"
+        execution_meta["segment_count"] = len(segmented["segments"]) if segmented else 1
+        if segmented:
+            out["segmented"] = segmented
+        return out
+
+    def run(
+        self,
+        planned: Dict[str, Any],
+        *,
+        timeout_sec: float = 300.0,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Dict[str, Any]:
+        """Execute a `plan` result; blocking, so call it off the event loop."""
+        out = dict(planned)
+        out["diagnostics"] = _json_clone(out.get("diagnostics"), _diagnostics_bucket())
+        execution_meta = _execution_meta(out)
+        output_path = str(out.get("output_path") or "")
+        safe_scope = safe_scope_key(str(out.get("scope_key") or ""))
+        cache = out.get("cache") if isinstance(out.get("cache"), dict) else {}
+        render_key = str(cache.get("key") or "")
+        if render_key and cache.get("enabled", True):
+            # Re-check at run time: an identical job queued earlier may have finished meanwhile.
             with self._lock:
-                proc = subprocess.run(
-                    command,
-                    capture_output=True,
-                    text=True,
-                    timeout=max(1.0, float(timeout_sec)),
-                    check=False,
-                )
-            elapsed = max(0.0, time.time() - start)
-            out["duration_sec"] = elapsed
-            out["returncode"] = int(proc.returncode)
-            out["stdout_tail"] = str((proc.stdout or "")[-4000:])
-            out["stderr_tail"] = str((proc.stderr or "")[-4000:])
-            execution_meta["duration_sec"] = float(elapsed)
-            execution_meta["returncode"] = int(proc.returncode)
-            if proc.returncode != 0:
-                out["status"] = "failed"
-                out["error"] = "ffmpeg_failed"
-                execution_meta["status"] = "failed"
-                execution_meta["error"] = "ffmpeg_failed"
+                cached_path = self._lookup_cached_locked(safe_scope, render_key)
+            if cached_path:
+                return self._cached_result(out, cached_path)
+        if not shutil.which("ffmpeg"):
+            return _mark_failed(out, "ffmpeg_not_found")
+        start = time.time()
+        segmented = out.get("segmented") if isinstance(out.get("segmented"), dict) else None
+        if segmented:
+            proc = _run_segmented_render(
+                segmented,
+                timeout_sec=timeout_sec,
+                duration_sec=_to_float(out.get("output_duration_sec"), 0.0),
+                on_progress=on_progress,
+                cancel_event=cancel_event,
+            )
+        else:
+            proc = _run_ffmpeg_process(
+                _with_progress_pipe([str(part) for part in list(out.get("command") or [])]),
+                timeout_sec=timeout_sec,
+                duration_sec=_to_float(out.get("output_duration_sec"), 0.0),
+                on_progress=on_progress,
+                cancel_event=cancel_event,
+            )
+        elapsed = max(0.0, time.time() - start)
+        out["duration_sec"] = elapsed
+        out["returncode"] = int(proc["returncode"])
+        out["stdout_tail"] = str(proc["stdout_tail"])
+        out["stderr_tail"] = str(proc["stderr_tail"])
+        execution_meta["duration_sec"] = float(elapsed)
+        execution_meta["returncode"] = int(proc["returncode"])
+        if proc["error"]:
+            _remove_quietly(output_path)
+            if proc["error"] == "cancelled":
+                _mark_failed(out, "cancelled")
+                out["status"] = "cancelled"
+                execution_meta["status"] = "cancelled"
                 return out
-            out["status"] = "ok"
-            execution_meta["status"] = "ok"
-            if os.path.isfile(output_path):
-                try:
-                    out["size_bytes"] = int(os.path.getsize(output_path))
-                    execution_meta["size_bytes"] = int(out["size_bytes"])
-                except Exception:
-                    pass
-            self._prune_scope_locked(self._scope_dir(safe_scope))
-            return out
-        except subprocess.TimeoutExpired:
-            out["status"] = "failed"
-            out["error"] = "timeout"
-            execution_meta["status"] = "failed"
-            execution_meta["error"] = "timeout"
+            return _mark_failed(out, str(proc["error"]))
+        if proc["returncode"] != 0:
+            return _mark_failed(out, "ffmpeg_failed")
+        out["status"] = "ok"
+        execution_meta["status"] = "ok"
+        if os.path.isfile(output_path):
             try:
-                if os.path.isfile(output_path):
-                    os.remove(output_path)
+                out["size_bytes"] = int(os.path.getsize(output_path))
+                execution_meta["size_bytes"] = int(out["size_bytes"])
             except Exception:
                 pass
+        with self._lock:
+            if render_key and os.path.isfile(output_path):
+                self._record_cached_locked(safe_scope, render_key, output_path)
+            self._prune_scope_locked(self._scope_dir(safe_scope))
+        return out
+
+    def _cached_result(self, out: Dict[str, Any], cached_path: str) -> Dict[str, Any]:
+        execution_meta = _execution_meta(out)
+        previous_path = str(out.get("output_path") or "")
+        out["command"] = [cached_path if part == previous_path else part for part in list(out.get("command") or [])]
+        out["output_path"] = cached_path
+        out["render_strategy"] = "cached"
+        out.pop("segmented", None)
+        out["cache"] = dict(out.get("cache") or {}, hit=True)
+        out["status"] = "ok"
+        out["duration_sec"] = 0.0
+        execution_meta.update({"status": "ok", "cache_hit": True, "output_path": cached_path, "duration_sec": 0.0})
+        try:
+            out["size_bytes"] = int(os.path.getsize(cached_path))
+            execution_meta["size_bytes"] = int(out["size_bytes"])
+        except OSError:
+            pass
+        return out
+
+    def execute(
+        self,
+        *,
+        scope_key: str,
+        manifest: Dict[str, Any],
+        export_plan: Dict[str, Any],
+        execute: bool = False,
+        timeout_sec: float = 300.0,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        use_cache: bool = True,
+        quality: str = "final",
+    ) -> Dict[str, Any]:
+        out = self.plan(
+            scope_key=scope_key,
+            manifest=manifest,
+            export_plan=export_plan,
+            execute=execute,
+            use_cache=use_cache,
+            quality=quality,
+        )
+        if not execute:
             return out
+        return self.run(
+            out,
+            timeout_sec=timeout_sec,
+            on_progress=on_progress,
+            cancel_event=cancel_event,
+        )
+
+
+def _source_identity(path: str) -> Dict[str, Any]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {"path": path, "missing": True}
+    return {"path": path, "size": int(stat.st_size), "mtime_ns": int(stat.st_mtime_ns)}
+
+
+def _render_cache_key(plan: Dict[str, Any], command: List[str], output_path: str, render_meta: Dict[str, Any]) -> str:
+    """Hash of the export plan, the filter graph/command and every source file's identity.
+
+    The output path is replaced by a placeholder so identical renders share a key;
+    editing a source file changes its size/mtime and therefore the key.
+    """
+    sources = sorted(
+        {
+            str(event.get("src_path") or "")
+            for event in list(render_meta.get("visual_events") or []) + list(render_meta.get("audio_events") or [])
+            if str(event.get("src_path") or "")
+        }
+    )
+    payload = {
+        "version": _RENDER_CACHE_VERSION,
+        "plan": plan,
+        "command": [_OUTPUT_PLACEHOLDER if part == output_path else str(part) for part in command],
+        "sources": [_source_identity(path) for path in sources],
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _execution_meta(out: Dict[str, Any]) -> Dict[str, Any]:
+    diagnostics = out.get("diagnostics")
+    if not isinstance(diagnostics, dict):
+        diagnostics = _diagnostics_bucket()
+        out["diagnostics"] = diagnostics
+    execution_meta = diagnostics.get("execution")
+    if not isinstance(execution_meta, dict):
+        execution_meta = {}
+        diagnostics["execution"] = execution_meta
+    return execution_meta
+
+
+def _mark_failed(out: Dict[str, Any], error: str) -> Dict[str, Any]:
+    execution_meta = _execution_meta(out)
+    out["status"] = "failed"
+    out["error"] = error
+    execution_meta["status"] = "failed"
+    execution_meta["error"] = error
+    return out
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        if path and os.path.isfile(path):
+            os.remove(path)
+    except Exception:
+        pass
@@ -0,0 +1,224 @@
+"""Asynchronous composition render jobs (bounded pool, per-scope FIFO queues).
+
+- `submit` plans the render immediately (output path, command) and queues the
+  ffmpeg run; planning touches the filesystem, so HTTP handlers call it through
+  `run_in_executor` and return the job id instead of blocking.
+- At most `max_workers` renders run at once (default: CPU cores), and at most
+  one per scope, so one user's export queue never starves another scope.
+- Progress comes from ffmpeg `-progress`; `cancel` drops queued jobs and kills
+  running ones.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from .render_execute import CompositionRenderExecutionService, safe_scope_key
+
+RENDER_JOB_STATES = ("queued", "running", "ok", "failed", "cancelled")
+_FINAL_STATES = frozenset({"ok", "failed", "cancelled"})
+
+
+@dataclass
+class _RenderJob:
+    job_id: str
+    scope_key: str
+    planned: Dict[str, Any]
+    timeout_sec: float
+    state: str = "queued"
+    progress: Dict[str, Any] = field(default_factory=lambda: {"fraction": 0.0, "out_time_sec": 0.0, "speed": 0.0})
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class CompositionRenderJobQueue:
+    """Thread-safe render job registry on top of `CompositionRenderExecutionService`."""
+
+    def __init__(
+        self,
+        service: CompositionRenderExecutionService,
+        max_workers: Optional[int] = None,
+        max_finished_jobs: int = 200,
+    ) -> None:
+        self._service = service
+        self._max_workers = max(1, int(max_workers or os.cpu_count() or 1))
+        self._max_finished_jobs = max(1, int(max_finished_jobs or 1))
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, _RenderJob] = {}
+        self._queues: Dict[str, Deque[str]] = {}
+        self._running_scopes: set[str] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def submit(
+        self,
+        *,
+        scope_key: str,
+        manifest: Dict[str, Any],
+        export_plan: Dict[str, Any],
+        timeout_sec: float = 300.0,
+        use_cache: bool = True,
+        quality: str = "final",
+    ) -> Dict[str, Any]:
+        planned = self._service.plan(
+            scope_key=scope_key,
+            manifest=manifest,
+            export_plan=export_plan,
+            execute=True,
+            use_cache=use_cache,
+            quality=quality,
+        )
+        safe_scope = safe_scope_key(scope_key)
+        job = _RenderJob(
+            job_id=uuid.uuid4().hex,
+            scope_key=safe_scope,
+            planned=planned,
+            timeout_sec=max(1.0, float(timeout_sec)),
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._queues.setdefault(safe_scope, deque()).append(job.job_id)
+            self._dispatch_locked()
+            return self._status_locked(job)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(str(job_id or ""))
+            return self._status_locked(job) if job is not None else None
+
+    def list_jobs(self, scope_key: str = "") -> List[Dict[str, Any]]:
+        safe_scope = safe_scope_key(scope_key) if scope_key else ""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if not safe_scope or job.scope_key == safe_scope]
+            jobs.sort(key=lambda job: job.submitted_at)
+            return [self._status_locked(job) for job in jobs]
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a job; queued jobs stop immediately, running ones once ffmpeg is killed."""
+        with self._lock:
+            job = self._jobs.get(str(job_id or ""))
+            if job is None:
+                return None
+            if job.state == "queued":
+                queue = self._queues.get(job.scope_key)
+                if queue is not None and job.job_id in queue:
+                    queue.remove(job.job_id)
+                self._finish_locked(job, "cancelled", None, "cancelled")
+            elif job.state == "running":
+                job.cancel_event.set()
+            return self._status_locked(job)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until the job is final (worker threads/tests only; never on the event loop)."""
+        deadline = None if timeout is None else time.time() + max(0.0, float(timeout))
+        while True:
+            current = self.status(job_id)
+            if current is None or current["state"] in _FINAL_STATES:
+                return current
+            if deadline is not None and time.time() >= deadline:
+                return current
+            time.sleep(0.05)
+
+    def _dispatch_locked(self) -> None:
+        while len(self._running_scopes) < self._max_workers:
+            ready = [
+                self._jobs[queue[0]]
+                for scope, queue in self._queues.items()
+                if queue and scope not in self._running_scopes
+            ]
+            if not ready:
+                return
+            job = min(ready, key=lambda row: row.submitted_at)
+            self._queues[job.scope_key].popleft()
+            self._running_scopes.add(job.scope_key)
+            job.state = "running"
+            job.started_at = time.time()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="lemouf-composition-render",
+                )
+            self._executor.submit(self._run, job)
+
+    def _run(self, job: _RenderJob) -> None:
+        def _on_progress(progress: Dict[str, Any]) -> None:
+            with self._lock:
+                job.progress = dict(progress)
+
+        try:
+            result = self._service.run(
+                job.planned,
+                timeout_sec=job.timeout_sec,
+                on_progress=_on_progress,
+                cancel_event=job.cancel_event,
+            )
+            state = str(result.get("status") or "failed")
+            error = result.get("error")
+        except Exception as exc:
+            result, state, error = None, "failed", f"render_exception:{exc}"
+        with self._lock:
+            self._finish_locked(job, state if state in _FINAL_STATES else "failed", result, error)
+            self._running_scopes.discard(job.scope_key)
+            self._dispatch_locked()
+
+    def _finish_locked(
+        self,
+        job: _RenderJob,
+        state: str,
+        result: Optional[Dict[str, Any]],
+        error: Optional[str],
+    ) -> None:
+        job.state = state
+        job.result = result
+        job.error = str(error) if error else None
+        job.finished_at = time.time()
+        if state == "ok":
+            job.progress = dict(job.progress, fraction=1.0)
+        self._prune_locked()
+
+    def _status_locked(self, job: _RenderJob) -> Dict[str, Any]:
+        queue_position = None
+        if job.state == "queued":
+            queue = self._queues.get(job.scope_key) or deque()
+            queue_position = list(queue).index(job.job_id) if job.job_id in queue else None
+        # A run-time cache hit points the result at the cached file, not the planned one.
+        execution = job.result if job.result is not None else job.planned
+        elapsed = None
+        if job.started_at is not None:
+            elapsed = max(0.0, (job.finished_at or time.time()) - job.started_at)
+        return {
+            "job_id": job.job_id,
+            "scope_key": job.scope_key,
+            "state": job.state,
+            "queue_position": queue_position,
+            "progress": dict(job.progress),
+            "error": job.error,
+            "output_path": str(execution.get("output_path") or ""),
+            "execution": execution,
+            "submitted_at": job.submitted_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "elapsed_sec": elapsed,
+        }
+
+    def _prune_locked(self) -> None:
+        finished = sorted(
+            (job for job in self._jobs.values() if job.state in _FINAL_STATES),
+            key=lambda job: job.finished_at or job.submitted_at,
+        )
+        for job in finished[: max(0, len(finished) - self._max_finished_jobs)]:
+            self._jobs.pop(job.job_id, None)
@@ -1,6 +1,7 @@
 """Loop backend domain package."""
 
+from .manifest import LoopManifest
 from .media_cache import LoopMediaCacheStore
 from .runtime_state import LoopRuntimeStateStore
 
-__all__ = ["LoopRuntimeStateStore", "LoopMediaCacheStore"]
+__all__ = ["LoopRuntimeStateStore", "LoopMediaCacheStore", "LoopManifest"]
@@ -0,0 +1,315 @@
+"""Indexed manifest container for loop cycles/retries.
+
+`LoopManifest` keeps the manifest's insertion order (what the API returns and
+what ties between duplicate entries resolve on) and maintains, per mutation:
+
+- `prompt_id -> entries` for return routing,
+- `(cycle, retry) -> entries` slots,
+- per-cycle counts of retry slots whose latest entry is approved / actionable
+  (duplicates of a retry resolve to the latest `updated_at`, later entry on ties),
+- the set of queued/running entries,
+- per-cycle retry counts for queued/running and usable returned entries,
+- a cursor on the first cycle without an approved retry (`_frontier` plus a
+  heap of cycles that lost their approval behind it).
+
+`progression(total_cycles)` answers the loop state machine from those
+aggregates: one event costs O(retries of the touched cycle) (O(log cycles) when
+an approval is withdrawn), independent of how many cycles the loop has.
+
+Entries stay plain objects; they report changes to indexed attributes through
+`LoopManifest.reindex` (see `LoopManifestEntry.__setattr__` in `nodes.py`), so
+existing `entry.status = ...` style updates keep the indexes exact.
+"""
+
+from __future__ import annotations
+
+import heapq
+from bisect import insort
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+APPROVED_DECISIONS = {"approve", "approved"}
+RETRY_DECISIONS = {"replay", "reject"}
+NON_ACTIONABLE_DECISIONS = {"reject", "replay", "discard"}
+QUEUE_RUNNING_STATUSES = {"queued", "running"}
+INDEXED_FIELDS = frozenset({"cycle_index", "retry_index", "prompt_id", "status", "decision", "updated_at"})
+
+_OWNER_ATTR = "_manifest"
+_SEQ_ATTR = "_manifest_seq"
+
+
+def normalize_decision(value: Any) -> str:
+    return str(value or "").strip().lower()
+
+
+def normalize_status(value: Any) -> str:
+    return str(value or "").strip().lower()
+
+
+def entry_is_actionable(entry: Any) -> bool:
+    status = normalize_status(entry.status)
+    if status in QUEUE_RUNNING_STATUSES:
+        return True
+    return status == "returned" and normalize_decision(entry.decision) not in NON_ACTIONABLE_DECISIONS
+
+
+def _slot_key(entry: Any) -> Tuple[int, int]:
+    return int(entry.cycle_index), int(entry.retry_index)
+
+
+def _seq(entry: Any) -> int:
+    return entry.__dict__[_SEQ_ATTR]
+
+
+class LoopManifest:
+    """List-like manifest (iteration, `len`, indexing) with secondary indexes."""
+
+    def __init__(self, entries: Iterable[Any] = ()) -> None:
+        self._entries: List[Any] = []
+        self._next_seq = 0
+        self._by_prompt: Dict[str, List[Tuple[int, Any]]] = {}
+        self._slots: Dict[Tuple[int, int], List[Tuple[int, Any]]] = {}
+        self._cycle_retries: Dict[int, Dict[int, None]] = {}
+        self._approved: Dict[int, int] = {}
+        self._actionable: Dict[int, int] = {}
+        self._pending: Dict[int, Any] = {}
+        self._running_retries: Dict[int, Dict[int, int]] = {}
+        self._usable_retries: Dict[int, Dict[int, int]] = {}
+        self._frontier = 0
+        self._gaps: List[int] = []
+        for entry in entries:
+            self.append(entry)
+
+    # -- list protocol --------------------------------------------------
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, index: Any) -> Any:
+        return self._entries[index]
+
+    def __repr__(self) -> str:
+        return f"LoopManifest({self._entries!r})"
+
+    def append(self, entry: Any) -> Any:
+        owner = entry.__dict__.get(_OWNER_ATTR)
+        if owner is not None and owner is not self:
+            owner.remove(entry)
+        object.__setattr__(entry, _SEQ_ATTR, self._next_seq)
+        object.__setattr__(entry, _OWNER_ATTR, self)
+        self._next_seq += 1
+        self._entries.append(entry)
+        self._update_slots([_slot_key(entry)], lambda: self._index(entry))
+        return entry
+
+    def remove(self, entry: Any) -> None:
+        # Identity, not `==`: dataclass entries with equal fields are distinct records.
+        position = next(idx for idx, item in enumerate(self._entries) if item is entry)
+        del self._entries[position]
+        self._forget(entry)
+
+    def drop_oldest(self, count: int) -> List[Any]:
+        """Remove and return the `count` oldest entries (manifest size cap)."""
+        count = max(0, min(int(count), len(self._entries)))
+        dropped = self._entries[:count]
+        del self._entries[:count]
+        for entry in dropped:
+            self._forget(entry)
+        return dropped
+
+    def clear(self) -> None:
+        for entry in self._entries:
+            if entry.__dict__.get(_OWNER_ATTR) is self:
+                object.__setattr__(entry, _OWNER_ATTR, None)
+        self.__init__()
+
+    # -- queries --------------------------------------------------------
+
+    def find_prompt(self, prompt_id: Any) -> Optional[Any]:
+        """First entry (manifest order) carrying `prompt_id`."""
+        if not prompt_id:
+            return None
+        matches = self._by_prompt.get(prompt_id)
+        return matches[0][1] if matches else None
+
+    def slot(self, cycle_index: int, retry_index: int) -> List[Any]:
+        """Entries for one (cycle, retry), in manifest order."""
+        return [entry for _, entry in self._slots.get((int(cycle_index), int(retry_index)), ())]
+
+    def cycle_entries(self, cycle_index: int) -> List[Any]:
+        """Entries of one cycle, in manifest order."""
+        cycle_index = int(cycle_index)
+        pairs: List[Tuple[int, Any]] = []
+        for retry in self._cycle_retries.get(cycle_index, ()):
+            pairs.extend(self._slots[(cycle_index, retry)])
+        pairs.sort(key=lambda pair: pair[0])
+        return [entry for _, entry in pairs]
+
+    def cycle_retries(self, cycle_index: int) -> List[int]:
+        return list(self._cycle_retries.get(int(cycle_index), ()))
+
+    def approved_count(self, cycle_index: int) -> int:
+        """Retry slots of the cycle whose latest entry is approved."""
+        return self._approved.get(int(cycle_index), 0)
+
+    def actionable_count(self, cycle_index: int) -> int:
+        """Retry slots of the cycle whose latest entry is queued/running or a usable return."""
+        return self._actionable.get(int(cycle_index), 0)
+
+    def pending(self) -> List[Any]:
+        """Queued/running entries, in manifest order."""
+        return [self._pending[seq] for seq in sorted(self._pending)]
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def first_unapproved_cycle(self) -> int:
+        """Smallest cycle index >= 0 without an approved retry slot."""
+        while self._gaps and self._approved.get(self._gaps[0], 0):
+            heapq.heappop(self._gaps)
+        return self._gaps[0] if self._gaps else self._frontier
+
+    def next_retry_index(self, cycle_index: int, needs_generation: bool) -> int:
+        cycle_index = int(cycle_index)
+        retries = self._cycle_retries.get(cycle_index)
+        if not retries:
+            return 0
+        max_retry = max(retries)
+        if needs_generation:
+            return max_retry + 1
+        running = self._running_retries.get(cycle_index)
+        if running:
+            return max(running)
+        usable = self._usable_retries.get(cycle_index)
+        if usable:
+            return max(usable)
+        return max_retry + 1
+
+    def progression(self, total_cycles: int) -> Dict[str, Any]:
+        """Next cycle/retry to work on and the loop status, from the maintained aggregates."""
+        total_cycles = max(1, int(total_cycles or 1))
+        next_cycle_index = self.first_unapproved_cycle()
+        if next_cycle_index >= total_cycles:
+            return {
+                "next_cycle_index": None,
+                "next_retry_index": None,
+                "needs_generation": False,
+                "status": "complete",
+            }
+        needs_generation = not self.actionable_count(next_cycle_index)
+        return {
+            "next_cycle_index": next_cycle_index,
+            "next_retry_index": self.next_retry_index(next_cycle_index, needs_generation),
+            "needs_generation": needs_generation,
+            "status": "running" if self._pending else "idle",
+        }
+
+    # -- maintenance ----------------------------------------------------
+
+    def reindex(self, entry: Any, name: str, value: Any) -> None:
+        """Set an indexed attribute on a member entry and update the indexes."""
+        old_key = _slot_key(entry)
+        new_key = (
+            int(value) if name == "cycle_index" else old_key[0],
+            int(value) if name == "retry_index" else old_key[1],
+        )
+
+        def mutate() -> None:
+            self._unindex(entry)
+            object.__setattr__(entry, name, value)
+            self._index(entry)
+
+        self._update_slots([old_key] if new_key == old_key else [old_key, new_key], mutate)
+
+    def _forget(self, entry: Any) -> None:
+        self._update_slots([_slot_key(entry)], lambda: self._unindex(entry))
+        if entry.__dict__.get(_OWNER_ATTR) is self:
+            object.__setattr__(entry, _OWNER_ATTR, None)
+
+    def _index(self, entry: Any) -> None:
+        seq = _seq(entry)
+        key = _slot_key(entry)
+        # Sequence numbers are unique, so tuple ordering never compares entries.
+        insort(self._slots.setdefault(key, []), (seq, entry))
+        self._cycle_retries.setdefault(key[0], {})[key[1]] = None
+        if entry.prompt_id:
+            insort(self._by_prompt.setdefault(entry.prompt_id, []), (seq, entry))
+        status = normalize_status(entry.status)
+        if status in QUEUE_RUNNING_STATUSES:
+            self._pending[seq] = entry
+            self._bump(self._running_retries.setdefault(key[0], {}), key[1], 1)
+        elif status == "returned" and normalize_decision(entry.decision) not in NON_ACTIONABLE_DECISIONS:
+            self._bump(self._usable_retries.setdefault(key[0], {}), key[1], 1)
+
+    def _unindex(self, entry: Any) -> None:
+        seq = _seq(entry)
+        key = _slot_key(entry)
+        slot = self._slots.get(key)
+        if slot is not None:
+            slot[:] = [pair for pair in slot if pair[0] != seq]
+            if not slot:
+                del self._slots[key]
+                retries = self._cycle_retries.get(key[0])
+                if retries is not None:
+                    retries.pop(key[1], None)
+                    if not retries:
+                        del self._cycle_retries[key[0]]
+        if entry.prompt_id:
+            matches = self._by_prompt.get(entry.prompt_id)
+            if matches is not None:
+                matches[:] = [pair for pair in matches if pair[0] != seq]
+                if not matches:
+                    del self._by_prompt[entry.prompt_id]
+        status = normalize_status(entry.status)
+        if status in QUEUE_RUNNING_STATUSES:
+            self._pending.pop(seq, None)
+            self._drop_retry(self._running_retries, key)
+        elif status == "returned" and normalize_decision(entry.decision) not in NON_ACTIONABLE_DECISIONS:
+            self._drop_retry(self._usable_retries, key)
+
+    def _slot_flags(self, key: Tuple[int, int]) -> Tuple[bool, bool]:
+        slot = self._slots.get(key)
+        if not slot:
+            return False, False
+        # Latest by updated_at; later manifest position wins ties (`>=` in the dedupe).
+        latest = max(slot, key=lambda pair: (float(pair[1].updated_at), pair[0]))[1]
+        return normalize_decision(latest.decision) in APPROVED_DECISIONS, entry_is_actionable(latest)
+
+    def _update_slots(self, keys: List[Tuple[int, int]], mutate: Callable[[], None]) -> None:
+        before = [self._slot_flags(key) for key in keys]
+        mutate()
+        for key, (was_approved, was_actionable) in zip(keys, before):
+            approved, actionable = self._slot_flags(key)
+            if approved != was_approved:
+                self._move_cursor(key[0], self._approved.get(key[0], 0), int(approved) - int(was_approved))
+            self._bump(self._actionable, key[0], int(actionable) - int(was_actionable))
+
+    def _move_cursor(self, cycle_index: int, before: int, delta: int) -> None:
+        self._bump(self._approved, cycle_index, delta)
+        after = self._approved.get(cycle_index, 0)
+        if before and not after and 0 <= cycle_index < self._frontier:
+            heapq.heappush(self._gaps, cycle_index)
+        elif after and not before and cycle_index == self._frontier:
+            # The frontier only moves forward, so each cycle is stepped over once.
+            while self._approved.get(self._frontier, 0):
+                self._frontier += 1
+
+    def _drop_retry(self, counts: Dict[int, Dict[int, int]], key: Tuple[int, int]) -> None:
+        retries = counts.get(key[0])
+        if retries is None:
+            return
+        self._bump(retries, key[1], -1)
+        if not retries:
+            del counts[key[0]]
+
+    @staticmethod
+    def _bump(counts: Dict[int, int], cycle_index: int, delta: int) -> None:
+        if not delta:
+            return
+        value = counts.get(cycle_index, 0) + delta
+        if value:
+            counts[cycle_index] = value
+        else:
+            counts.pop(cycle_index, None)
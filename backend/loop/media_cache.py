@@ -1,4 +1,14 @@
-"""Repo-local media cache for loop/composition manual resources."""
+"""Repo-local media cache for loop/composition manual resources.
+
+- File bytes live once in a global blob store (`.blobs/<sha[:2]>/<sha256>`);
+  each loop directory holds hard links named `<sha16>_<name>`, so the same
+  asset in several loops takes its size once and loop URLs stay plain files.
+  Where hard links are refused, the loop entry becomes a plain copy and the
+  blob is dropped, so bytes are never kept twice (no cross-loop sharing there).
+- A blob is referenced while any loop entry carries its hash prefix. Unreferenced
+  blobs stay around for re-upload short-circuits (`store_known`) until the
+  background collector evicts them, oldest first, to fit `max_total_bytes`.
+"""
 
 from __future__ import annotations
 
@@ -6,13 +16,18 @@ import os
 import re
 import shutil
 import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from hashlib import sha256
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional
 
 
 _SAFE_TOKEN_RE = re.compile(r"[^a-zA-Z0-9._:-]+")
 _SAFE_FILE_RE = re.compile(r"[^a-zA-Z0-9._-]+")
 _SAFE_FILE_ID_RE = re.compile(r"[^a-zA-Z0-9._-]+")
+_UPLOAD_DIR = ".uploads"
+_BLOB_DIR = ".blobs"
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
 
 
 def _sanitize_loop_token(value: Any, fallback: str = "default") -> str:
@@ -46,14 +61,100 @@ def _sanitize_file_id(value: Any) -> str:
     return cleaned[:180]
 
 
+class MediaCacheUpload:
+    """One streamed upload: chunks go to a temp file while the SHA-256 is updated.
+
+    `commit` renames the temp file to its content-addressed name (or drops it
+    when that file already exists); the loop id may be given only then, since
+    multipart fields can follow the file. `abort` discards the temp file.
+    `write` returns False once the store's size limit is exceeded.
+    """
+
+    def __init__(self, store: "LoopMediaCacheStore", loop_id: Any, filename: Any, content_type: Any) -> None:
+        self._store = store
+        self._loop_id = _sanitize_loop_token(loop_id)
+        self._filename = _sanitize_file_name(filename)
+        self._mime = str(content_type or "").strip()
+        self._digest = sha256()
+        self._size = 0
+        upload_dir = os.path.join(store.path, _UPLOAD_DIR)
+        os.makedirs(upload_dir, exist_ok=True)
+        self._tmp_path = os.path.join(upload_dir, f"{uuid.uuid4().hex}.tmp")
+        self._fh: Optional[Any] = open(self._tmp_path, "wb")
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def write(self, chunk: bytes) -> bool:
+        if self._fh is None:
+            return False
+        if not chunk:
+            return True
+        self._size += len(chunk)
+        if self._size > self._store.max_file_bytes:
+            self.abort()
+            return False
+        self._digest.update(chunk)
+        self._fh.write(chunk)
+        return True
+
+    def commit(self, loop_id: Any = None) -> Optional[Dict[str, Any]]:
+        if self._fh is None:
+            return None
+        if loop_id is not None:
+            self._loop_id = _sanitize_loop_token(loop_id)
+        self._fh.close()
+        self._fh = None
+        if self._size <= 0:
+            _remove_quietly(self._tmp_path)
+            return None
+        return self._store._adopt_file(self._loop_id, self._filename, self._mime, self._digest.hexdigest(), self._tmp_path)
+
+    def abort(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        _remove_quietly(self._tmp_path)
+
+
+def _listdir(path: str) -> list:
+    try:
+        return os.listdir(path)
+    except OSError:
+        return []
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
 class LoopMediaCacheStore:
-    """Thread-safe file cache keyed by loop_id + deterministic file_id."""
+    """Thread-safe file cache keyed by loop_id + deterministic file_id, backed by shared blobs."""
 
-    def __init__(self, path: str, max_files_per_loop: int = 512, max_file_bytes: int = 512 * 1024 * 1024) -> None:
+    def __init__(
+        self,
+        path: str,
+        max_files_per_loop: int = 512,
+        max_file_bytes: int = 512 * 1024 * 1024,
+        max_total_bytes: int = 10 * 1024 * 1024 * 1024,
+    ) -> None:
         self._path = os.path.realpath(path)
         self._max_files_per_loop = max(1, int(max_files_per_loop or 1))
         self._max_file_bytes = max(1, int(max_file_bytes or 1))
+        self._max_total_bytes = max(0, int(max_total_bytes or 0))
         self._lock = threading.Lock()
+        self._gc_pending = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Leftovers from uploads interrupted by a restart.
+        shutil.rmtree(os.path.join(self._path, _UPLOAD_DIR), ignore_errors=True)
+
+    @property
+    def path(self) -> str:
+        return self._path
 
     @property
     def max_file_bytes(self) -> int:
@@ -66,11 +167,64 @@ class LoopMediaCacheStore:
     def _clear_marker_path(self, loop_dir: str) -> str:
         return os.path.join(loop_dir, ".cleared")
 
-    def _persist_file_atomic(self, path: str, data: bytes) -> None:
-        # Keep write path simple and ACL-resilient on Windows custom-node workspaces.
-        # This cache is ephemeral and can tolerate non-atomic writes.
-        with open(path, "wb") as fh:
-            fh.write(data)
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._path, _BLOB_DIR, digest[:2], digest)
+
+    def _persist_file_atomic(self, path: str, tmp_path: str) -> None:
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # Renames can be refused by ACLs on Windows custom-node workspaces;
+            # this cache is ephemeral and can tolerate a non-atomic copy.
+            shutil.copyfile(tmp_path, path)
+            _remove_quietly(tmp_path)
+
+    def _link_locked(self, loop_id: str, filename: str, mime: str, digest: str) -> Dict[str, Any]:
+        blob_path = self._blob_path(digest)
+        file_id = f"{digest[:16]}_{filename}"
+        loop_dir = self._loop_dir(loop_id)
+        marker_path = self._clear_marker_path(loop_dir)
+        path = os.path.join(loop_dir, file_id)
+        os.makedirs(loop_dir, exist_ok=True)
+        if os.path.isfile(marker_path):
+            try:
+                os.remove(marker_path)
+            except Exception:
+                pass
+        if not os.path.isfile(path):
+            try:
+                os.link(blob_path, path)
+            except OSError:
+                shutil.copyfile(blob_path, path)
+                # The copy would pin the blob (hash-prefix reference) forever.
+                _remove_quietly(blob_path)
+        # Shared inode: also refreshes the entry for `_prune_loop_locked`, and
+        # tells a concurrent `collect_garbage` the blob was just referenced.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self._prune_loop_locked(loop_dir)
+        return {
+            "loop_id": loop_id,
+            "file_id": file_id,
+            "filename": filename,
+            "size": int(os.path.getsize(path)),
+            "mime": mime,
+            "sha256": digest,
+        }
+
+    def _adopt_file(self, loop_id: str, filename: str, mime: str, digest: str, tmp_path: str) -> Dict[str, Any]:
+        blob_path = self._blob_path(digest)
+        with self._lock:
+            if os.path.isfile(blob_path):
+                _remove_quietly(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                self._persist_file_atomic(blob_path, tmp_path)
+            saved = self._link_locked(loop_id, filename, mime, digest)
+        self.schedule_gc()
+        return saved
 
     def _prune_loop_locked(self, loop_dir: str) -> None:
         try:
@@ -98,35 +252,119 @@ class LoopMediaCacheStore:
     def store(self, loop_id: Any, filename: Any, content_type: Any, data: bytes) -> Optional[Dict[str, Any]]:
         if not isinstance(data, (bytes, bytearray)):
             return None
-        payload = bytes(data)
-        if not payload or len(payload) > self._max_file_bytes:
+        if not data or len(data) > self._max_file_bytes:
             return None
-        safe_loop_id = _sanitize_loop_token(loop_id)
-        safe_name = _sanitize_file_name(filename)
-        mime = str(content_type or "").strip()
-        digest = sha256(payload).hexdigest()
-        file_id = f"{digest[:16]}_{safe_name}"
-        loop_dir = self._loop_dir(safe_loop_id)
-        marker_path = self._clear_marker_path(loop_dir)
-        path = os.path.join(loop_dir, file_id)
+        return self.store_stream(loop_id, filename, content_type, (data,))
+
+    def open_upload(self, loop_id: Any, filename: Any, content_type: Any) -> MediaCacheUpload:
+        """Start a streamed upload; feed it with `write` (e.g. from an async reader) then `commit`."""
+        return MediaCacheUpload(self, loop_id, filename, content_type)
+
+    def store_stream(
+        self,
+        loop_id: Any,
+        filename: Any,
+        content_type: Any,
+        chunks: Iterable[bytes],
+    ) -> Optional[Dict[str, Any]]:
+        """Store `chunks` without holding the file in memory; None if empty or too large."""
+        upload = self.open_upload(loop_id, filename, content_type)
+        try:
+            for chunk in chunks:
+                if not upload.write(chunk):
+                    return None
+        except BaseException:
+            upload.abort()
+            raise
+        return upload.commit()
+
+    def has_blob(self, digest: Any) -> bool:
+        text = str(digest or "").strip().lower()
+        return bool(_SHA256_RE.match(text)) and os.path.isfile(self._blob_path(text))
+
+    def store_known(self, loop_id: Any, filename: Any, content_type: Any, digest: Any) -> Optional[Dict[str, Any]]:
+        """Add an already-stored blob (by full SHA-256) to a loop without uploading it; None if unknown."""
+        text = str(digest or "").strip().lower()
+        if not _SHA256_RE.match(text):
+            return None
+        with self._lock:
+            if not os.path.isfile(self._blob_path(text)):
+                return None
+            return self._link_locked(
+                _sanitize_loop_token(loop_id),
+                _sanitize_file_name(filename),
+                str(content_type or "").strip(),
+                text,
+            )
+
+    def schedule_gc(self) -> None:
+        """Run `collect_garbage` on the background worker (coalesced)."""
+        with self._lock:
+            if self._gc_pending:
+                return
+            self._gc_pending = True
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lemouf-media-cache-gc")
+            self._executor.submit(self._run_gc)
+
+    def _run_gc(self) -> None:
         with self._lock:
-            os.makedirs(loop_dir, exist_ok=True)
-            if os.path.isfile(marker_path):
+            self._gc_pending = False
+        try:
+            self.collect_garbage()
+        except Exception:
+            pass
+
+    def collect_garbage(self) -> Dict[str, int]:
+        """Evict unreferenced blobs, least recently used first, until the store fits `max_total_bytes`.
+
+        Referenced blobs are never removed, so the budget can be exceeded by live media.
+        The directory scan runs without the lock (uploads keep committing); each
+        candidate is re-checked under the lock before it is unlinked.
+        """
+        referenced = set()
+        for loop_name in _listdir(self._path):
+            loop_dir = os.path.join(self._path, loop_name)
+            if loop_name.startswith(".") or not os.path.isdir(loop_dir):
+                continue
+            for name in _listdir(loop_dir):
+                referenced.add(name.split("_", 1)[0])
+        blobs = []
+        total = 0
+        blob_root = os.path.join(self._path, _BLOB_DIR)
+        for shard in _listdir(blob_root):
+            shard_dir = os.path.join(blob_root, shard)
+            for name in _listdir(shard_dir):
+                full = os.path.join(shard_dir, name)
                 try:
-                    os.remove(marker_path)
-                except Exception:
-                    pass
-            if not os.path.isfile(path):
-                self._persist_file_atomic(path, payload)
-            self._prune_loop_locked(loop_dir)
-        return {
-            "loop_id": safe_loop_id,
-            "file_id": file_id,
-            "filename": safe_name,
-            "size": len(payload),
-            "mime": mime,
-            "sha256": digest,
-        }
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                total += int(st.st_size)
+                if name[:16] not in referenced:
+                    blobs.append((float(st.st_mtime), name, full, int(st.st_size)))
+        removed = 0
+        freed = 0
+        for mtime, _name, full, size in sorted(blobs):
+            if total <= self._max_total_bytes:
+                break
+            with self._lock:
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    total -= size
+                    continue
+                # Linked since the scan: `_link_locked` bumps the shared mtime and adds a link.
+                if float(st.st_mtime) != mtime or st.st_nlink > 1:
+                    continue
+                try:
+                    os.remove(full)
+                except OSError:
+                    continue
+            total -= size
+            removed += 1
+            freed += size
+        return {"blob_bytes": total, "removed_blobs": removed, "freed_bytes": freed}
 
     def resolve(self, loop_id: Any, file_id: Any) -> Optional[str]:
         safe_loop_id = _sanitize_loop_token(loop_id)
@@ -145,29 +383,36 @@ class LoopMediaCacheStore:
         return candidate
 
     def clear_loop(self, loop_id: Any) -> bool:
+        """Drop a loop's entries; blob bytes are reclaimed later by `collect_garbage`."""
         loop_dir = self._loop_dir(loop_id)
         with self._lock:
-            if not os.path.isdir(loop_dir):
-                return False
-            def _on_rm_error(func, path, _exc):
-                try:
-                    os.chmod(path, 0o666)
-                    func(path)
-                except Exception:
-                    pass
+            cleared = self._clear_loop_locked(loop_dir)
+        if cleared:
+            self.schedule_gc()
+        return cleared
+
+    def _clear_loop_locked(self, loop_dir: str) -> bool:
+        if not os.path.isdir(loop_dir):
+            return False
+        def _on_rm_error(func, path, _exc):
             try:
-                shutil.rmtree(loop_dir, ignore_errors=False, onerror=_on_rm_error)
+                os.chmod(path, 0o666)
+                func(path)
             except Exception:
-                try:
-                    shutil.rmtree(loop_dir, ignore_errors=True, onerror=_on_rm_error)
-                except Exception:
-                    pass
-            if not os.path.isdir(loop_dir):
-                return True
-            marker = self._clear_marker_path(loop_dir)
+                pass
+        try:
+            shutil.rmtree(loop_dir, ignore_errors=False, onerror=_on_rm_error)
+        except Exception:
             try:
-                with open(marker, "w", encoding="utf-8") as fh:
-                    fh.write("cleared\n")
-                return True
+                shutil.rmtree(loop_dir, ignore_errors=True, onerror=_on_rm_error)
             except Exception:
-                return False
+                pass
+        if not os.path.isdir(loop_dir):
+            return True
+        marker = self._clear_marker_path(loop_dir)
+        try:
+            with open(marker, "w", encoding="utf-8") as fh:
+                fh.write("cleared\n")
+            return True
+        except Exception:
+            return False
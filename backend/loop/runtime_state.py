@@ -1,11 +1,35 @@
-"""Local persisted runtime state for loop/composition UI sessions."""
+"""Local persisted runtime state for loop/composition UI sessions.
+
+Each loop's state lives in its own shard file (`runtime_state/<key>.json`,
+written with an atomic replace). A small index (`updated_at`, `updated_seq`
+per loop, used for pruning) is kept as a snapshot (`runtime_state.json`) plus
+an append-only journal (`runtime_state.json.journal`, one JSON line per save):
+
+- Startup reads only the index, so it does not grow with state sizes; shards
+  are parsed on first `get` and kept in a bounded LRU of parsed states that
+  are never mutated in place (`get` hands out copies).
+- A save rewrites one shard and appends one index line; `fsync` of the journal
+  is batched on a short debounce timer.
+- Once the journal outgrows the snapshot it is compacted in the background:
+  the live journal is rotated to `.journal.compacting`, the snapshot is
+  rewritten from memory and the rotated journal is deleted. Loading replays
+  snapshot, `.compacting`, then the journal; a torn trailing line is ignored.
+- `patch` applies a JSON merge patch (RFC 7386) guarded by `updated_seq` and
+  appends it to the shard's `.patches` log, so an edit costs O(patch); the log
+  is folded into the shard once it outgrows it, and replayed on shard load
+  (records at or below the shard's `updated_seq` are already folded).
+- Stores written by older versions (all states inline in `runtime_state.json`,
+  or journal lines carrying a `state`) are split into shards on load.
+"""
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import threading
 import time
+from collections import OrderedDict
 from typing import Any, Dict, Optional
 
 
@@ -16,121 +40,425 @@ def _json_clone(value: Any, fallback: Any) -> Any:
         return fallback
 
 
+def _shard_name(loop_id: str) -> str:
+    return f"{hashlib.sha256(loop_id.encode('utf-8')).hexdigest()[:24]}.json"
+
+
+def _patch_log_name(loop_id: str) -> str:
+    return f"{_shard_name(loop_id)[:-5]}.patches"
+
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """RFC 7386 merge patch; copies only the dicts on patched paths (`target` is not mutated)."""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+
 class LoopRuntimeStateStore:
     """Thread-safe, repo-local JSON store keyed by loop_id."""
 
-    def __init__(self, path: str, max_entries: int = 100) -> None:
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 100,
+        max_resident: int = 8,
+        sync_interval_sec: float = 0.5,
+        compact_min_bytes: int = 256 * 1024,
+    ) -> None:
         self._path = os.path.realpath(path)
+        self._shard_dir = os.path.splitext(self._path)[0]
+        self._journal_path = f"{self._path}.journal"
+        self._compacting_path = f"{self._path}.journal.compacting"
         self._max_entries = max(1, int(max_entries or 1))
+        self._max_resident = max(1, int(max_resident or 1))
+        self._sync_interval_sec = max(0.0, float(sync_interval_sec or 0.0))
+        self._compact_min_bytes = max(0, int(compact_min_bytes or 0))
         self._lock = threading.Lock()
-        self._states: Dict[str, Dict[str, Any]] = {}
+        self._compact_lock = threading.Lock()
+        self._index: Dict[str, Dict[str, Any]] = {}
+        # Parsed states, never mutated in place (`patch` copies on write).
+        self._resident: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._patch_bytes: Dict[str, int] = {}
         self._seq = 0
+        self._journal: Optional[Any] = None
+        self._journal_bytes = 0
+        self._snapshot_bytes = 0
+        self._sync_timer: Optional[threading.Timer] = None
+        self._compacting = False
+        self._migrated = False
         self._load_locked()
+        if self._journal_bytes or self._migrated or os.path.isfile(self._compacting_path):
+            self.compact()
+
+    @property
+    def resident_count(self) -> int:
+        with self._lock:
+            return len(self._resident)
 
     def _load_locked(self) -> None:
         with self._lock:
-            self._states = {}
-            if not os.path.isfile(self._path):
-                return
-            try:
-                with open(self._path, "r", encoding="utf-8") as fh:
-                    payload = json.load(fh)
-            except Exception:
-                return
-            if not isinstance(payload, dict):
-                return
-            raw_states = payload.get("states")
-            if not isinstance(raw_states, dict):
-                return
+            self._index = {}
+            self._resident.clear()
+            payload = None
+            if os.path.isfile(self._path):
+                try:
+                    self._snapshot_bytes = int(os.path.getsize(self._path))
+                    with open(self._path, "r", encoding="utf-8") as fh:
+                        payload = json.load(fh)
+                except Exception:
+                    payload = None
+            payload = payload if isinstance(payload, dict) else {}
             now = float(time.time())
+            raw_index = payload.get("index")
+            for raw_loop_id, raw_entry in (raw_index.items() if isinstance(raw_index, dict) else []):
+                loop_id = str(raw_loop_id or "").strip()
+                if loop_id and isinstance(raw_entry, dict):
+                    self._index_put_locked(loop_id, raw_entry.get("updated_at") or now, raw_entry.get("updated_seq"))
+            raw_states = payload.get("states")
             seq_cursor = 0
-            for raw_loop_id, raw_state in raw_states.items():
+            for raw_loop_id, raw_state in (raw_states.items() if isinstance(raw_states, dict) else []):
+                # Version 1 snapshot: every state inline.
                 loop_id = str(raw_loop_id or "").strip()
                 if not loop_id or not isinstance(raw_state, dict):
                     continue
-                state = _json_clone(raw_state, {})
-                if not isinstance(state, dict):
-                    continue
-                state["updated_at"] = float(state.get("updated_at") or now)
                 seq_cursor += 1
-                stored_seq = int(state.get("updated_seq") or seq_cursor)
-                state["updated_seq"] = max(1, stored_seq)
-                if state["updated_seq"] > self._seq:
-                    self._seq = state["updated_seq"]
-                self._states[loop_id] = state
+                self._migrate_state_locked(
+                    loop_id,
+                    raw_state,
+                    raw_state.get("updated_at") or now,
+                    raw_state.get("updated_seq") or seq_cursor,
+                )
+            for journal_path in (self._compacting_path, self._journal_path):
+                self._replay_journal_locked(journal_path)
             self._prune_locked()
+            self._remove_orphan_shards_locked()
 
-    def _persist_locked(self) -> None:
+    def _remove_orphan_shards_locked(self) -> None:
+        # Shards of loops dropped by a crash mid-clear/prune; only names are listed.
+        try:
+            names = os.listdir(self._shard_dir)
+        except OSError:
+            return
+        live = {_shard_name(loop_id) for loop_id in self._index}
+        for name in names:
+            if name not in live and f"{name[:-8]}.json" not in live:
+                try:
+                    os.remove(os.path.join(self._shard_dir, name))
+                except OSError:
+                    pass
+
+    def _index_put_locked(self, loop_id: str, updated_at: Any, updated_seq: Any) -> Dict[str, Any]:
+        entry = {
+            "updated_at": float(updated_at or time.time()),
+            "updated_seq": max(1, int(updated_seq or self._seq + 1)),
+        }
+        self._seq = max(self._seq, entry["updated_seq"])
+        self._index[loop_id] = entry
+        return entry
+
+    def _migrate_state_locked(self, loop_id: str, state: Dict[str, Any], updated_at: Any, updated_seq: Any) -> None:
+        entry = self._index_put_locked(loop_id, updated_at, updated_seq)
+        state.update(entry)
+        self._write_shard_locked(loop_id, json.dumps(state, ensure_ascii=True))
+        self._migrated = True
+
+    def _replay_journal_locked(self, journal_path: str) -> None:
+        if not os.path.isfile(journal_path):
+            return
+        try:
+            with open(journal_path, "r", encoding="utf-8") as fh:
+                lines = fh.readlines()
+        except Exception:
+            return
+        if journal_path == self._journal_path:
+            self._journal_bytes = sum(len(line.encode("utf-8")) for line in lines)
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn write from a crash
+            if not isinstance(record, dict):
+                continue
+            loop_id = str(record.get("loop_id") or "").strip()
+            if not loop_id:
+                continue
+            if record.get("op") == "clear":
+                self._index.pop(loop_id, None)
+                continue
+            if record.get("op") != "set":
+                continue
+            if isinstance(record.get("state"), dict):
+                self._migrate_state_locked(loop_id, record["state"], record.get("updated_at"), record.get("updated_seq"))
+            else:
+                self._index_put_locked(loop_id, record.get("updated_at"), record.get("updated_seq"))
+
+    def _shard_path(self, loop_id: str) -> str:
+        return os.path.join(self._shard_dir, _shard_name(loop_id))
+
+    def _patch_log_path(self, loop_id: str) -> str:
+        return os.path.join(self._shard_dir, _patch_log_name(loop_id))
+
+    def _write_shard_locked(self, loop_id: str, encoded: str) -> None:
+        os.makedirs(self._shard_dir, exist_ok=True)
+        path = self._shard_path(loop_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            fh.write(encoded)
+        try:
+            os.replace(tmp_path, path)
+        except PermissionError:
+            # Windows sandbox/workspace ACLs can deny atomic replace in some setups.
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(encoded)
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+        self._resident.pop(loop_id, None)
+        # Everything in the patch log is folded into (or superseded by) the new shard.
+        self._patch_bytes.pop(loop_id, None)
+        try:
+            os.remove(self._patch_log_path(loop_id))
+        except OSError:
+            pass
+
+    def _drop_shard_locked(self, loop_id: str) -> None:
+        self._resident.pop(loop_id, None)
+        self._patch_bytes.pop(loop_id, None)
+        for path in (self._shard_path(loop_id), self._patch_log_path(loop_id)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remember_locked(self, loop_id: str, state: Dict[str, Any]) -> None:
+        self._resident[loop_id] = state
+        self._resident.move_to_end(loop_id)
+        while len(self._resident) > self._max_resident:
+            self._resident.popitem(last=False)
+
+    def _read_shard_locked(self, loop_id: str) -> Optional[Dict[str, Any]]:
+        state = self._resident.get(loop_id)
+        if state is not None:
+            self._resident.move_to_end(loop_id)
+            return state
+        try:
+            with open(self._shard_path(loop_id), "r", encoding="utf-8") as fh:
+                state = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(state, dict):
+            return None
+        patch_bytes = 0
+        try:
+            with open(self._patch_log_path(loop_id), "r", encoding="utf-8") as fh:
+                lines = fh.readlines()
+        except OSError:
+            lines = []
+        for line in lines:
+            patch_bytes += len(line.encode("utf-8"))
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn write from a crash
+            if not isinstance(record, dict) or int(record.get("updated_seq") or 0) <= int(state.get("updated_seq") or 0):
+                continue
+            state = apply_merge_patch(state, record.get("patch"))
+            state["updated_at"] = float(record.get("updated_at") or state.get("updated_at") or 0.0)
+            state["updated_seq"] = int(record["updated_seq"])
+        self._patch_bytes[loop_id] = patch_bytes
+        self._remember_locked(loop_id, state)
+        return state
+
+    def _write_snapshot(self, index: Dict[str, Dict[str, Any]]) -> int:
         folder = os.path.dirname(self._path)
         if folder:
             os.makedirs(folder, exist_ok=True)
         payload = {
-            "version": 1,
+            "version": 2,
             "saved_at": time.time(),
-            "states": self._states,
+            "index": index,
         }
-        tmp_path = f"{self._path}.tmp"
+        encoded = json.dumps(payload, ensure_ascii=True, sort_keys=True, separators=(",", ":"))
+        tmp_path = f"{self._path}.{os.getpid()}.{threading.get_ident()}.tmp"
         with open(tmp_path, "w", encoding="utf-8") as fh:
-            json.dump(payload, fh, ensure_ascii=True, sort_keys=True, indent=2)
+            fh.write(encoded)
+            fh.flush()
+            os.fsync(fh.fileno())
         try:
             os.replace(tmp_path, self._path)
         except PermissionError:
             # Windows sandbox/workspace ACLs can deny atomic replace in some setups.
             with open(self._path, "w", encoding="utf-8") as fh:
-                json.dump(payload, fh, ensure_ascii=True, sort_keys=True, indent=2)
+                fh.write(encoded)
             try:
                 os.remove(tmp_path)
             except Exception:
                 pass
+        return len(encoded)
+
+    def _append_locked(self, line: str) -> None:
+        if self._journal is None:
+            folder = os.path.dirname(self._journal_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._journal = open(self._journal_path, "a", encoding="utf-8")
+        self._journal.write(line)
+        self._journal.flush()
+        self._journal_bytes += len(line)
+        if self._sync_timer is None:
+            self._sync_timer = threading.Timer(self._sync_interval_sec, self.flush)
+            self._sync_timer.daemon = True
+            self._sync_timer.start()
+        if not self._compacting and self._journal_bytes > max(self._compact_min_bytes, self._snapshot_bytes):
+            self._compacting = True
+            threading.Thread(target=self.compact, name="lemouf-runtime-state-compact", daemon=True).start()
+
+    def flush(self) -> None:
+        """fsync pending journal appends (normally run by the debounce timer)."""
+        with self._lock:
+            self._sync_timer = None
+            if self._journal is not None:
+                os.fsync(self._journal.fileno())
+
+    def compact(self) -> None:
+        """Fold the journal into a fresh index snapshot; saves keep appending meanwhile."""
+        with self._compact_lock:
+            with self._lock:
+                index = {loop_id: dict(entry) for loop_id, entry in self._index.items()}
+                if self._journal is not None:
+                    self._journal.close()
+                    self._journal = None
+                if os.path.isfile(self._journal_path) and not os.path.isfile(self._compacting_path):
+                    os.replace(self._journal_path, self._compacting_path)
+                self._journal_bytes = 0
+            try:
+                snapshot_bytes = self._write_snapshot(index)
+                try:
+                    os.remove(self._compacting_path)
+                except FileNotFoundError:
+                    pass
+            finally:
+                with self._lock:
+                    self._compacting = False
+            with self._lock:
+                self._snapshot_bytes = snapshot_bytes
+                self._migrated = False
 
     def _prune_locked(self) -> None:
-        if len(self._states) <= self._max_entries:
+        if len(self._index) <= self._max_entries:
             return
         ordered = sorted(
-            self._states.items(),
+            self._index.items(),
             key=lambda item: (
-                float((item[1] or {}).get("updated_at") or 0.0),
-                int((item[1] or {}).get("updated_seq") or 0),
+                float(item[1].get("updated_at") or 0.0),
+                int(item[1].get("updated_seq") or 0),
                 str(item[0] or ""),
             ),
             reverse=True,
         )
-        keep = dict(ordered[: self._max_entries])
-        self._states = keep
+        for loop_id, _entry in ordered[self._max_entries :]:
+            self._index.pop(loop_id, None)
+            self._drop_shard_locked(loop_id)
 
     def get(self, loop_id: str) -> Optional[Dict[str, Any]]:
         key = str(loop_id or "").strip()
         if not key:
             return None
         with self._lock:
-            state = self._states.get(key)
-            if not isinstance(state, dict):
+            if key not in self._index:
                 return None
-            return _json_clone(state, None)
+            state = self._read_shard_locked(key)
+        return _json_clone(state, None) if state is not None else None
 
     def set(self, loop_id: str, runtime_state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         key = str(loop_id or "").strip()
         if not key or not isinstance(runtime_state, dict):
             return None
-        cloned = _json_clone(runtime_state, None)
-        if not isinstance(cloned, dict):
+        saved = _json_clone(runtime_state, None)
+        if not isinstance(saved, dict):
             return None
         with self._lock:
-            cloned["updated_at"] = float(time.time())
             self._seq += 1
-            cloned["updated_seq"] = int(self._seq)
-            self._states[key] = cloned
+            entry = self._index_put_locked(key, time.time(), self._seq)
+            saved.update(entry)
+            encoded = json.dumps(saved, ensure_ascii=True)
+            self._write_shard_locked(key, encoded)
+            self._remember_locked(key, json.loads(encoded))
             self._prune_locked()
-            self._persist_locked()
-            return _json_clone(cloned, None)
+            self._append_locked(
+                f'{{"op":"set","loop_id":{json.dumps(key)},"updated_at":{entry["updated_at"]!r},'
+                f'"updated_seq":{entry["updated_seq"]}}}\n'
+            )
+        return saved
+
+    def patch(self, loop_id: str, merge_patch: Dict[str, Any], base_seq: Optional[int] = None) -> Dict[str, Any]:
+        """Apply a merge patch to a stored state; `base_seq` must match its current `updated_seq`.
+
+        Returns `{"ok": True, "updated_seq", "updated_at"}` or `{"ok": False, "error", "updated_seq"}`
+        with `error` in `invalid_patch`, `not_found` and `seq_conflict`.
+        """
+        key = str(loop_id or "").strip()
+        try:
+            encoded_patch = json.dumps(merge_patch, ensure_ascii=True)
+        except Exception:
+            encoded_patch = ""
+        if not key or not isinstance(merge_patch, dict) or not encoded_patch:
+            return {"ok": False, "error": "invalid_patch", "updated_seq": None}
+        # A private copy: parts of the patch become part of the stored state.
+        merge_patch = json.loads(encoded_patch)
+        merge_patch.pop("updated_at", None)
+        merge_patch.pop("updated_seq", None)
+        with self._lock:
+            entry = self._index.get(key)
+            state = self._read_shard_locked(key) if entry is not None else None
+            if entry is None or state is None:
+                return {"ok": False, "error": "not_found", "updated_seq": None}
+            current_seq = int(entry.get("updated_seq") or 0)
+            if base_seq is not None and int(base_seq) != current_seq:
+                return {"ok": False, "error": "seq_conflict", "updated_seq": current_seq}
+            self._seq += 1
+            entry = self._index_put_locked(key, time.time(), self._seq)
+            state = apply_merge_patch(state, merge_patch)
+            state.update(entry)
+            self._remember_locked(key, state)
+            line = (
+                f'{{"updated_at":{entry["updated_at"]!r},"updated_seq":{entry["updated_seq"]},'
+                f'"patch":{encoded_patch}}}\n'
+            )
+            patch_bytes = self._patch_bytes.get(key, 0) + len(line)
+            try:
+                shard_bytes = os.path.getsize(self._shard_path(key))
+            except OSError:
+                shard_bytes = 0
+            if patch_bytes > max(self._compact_min_bytes // 4, shard_bytes):
+                self._write_shard_locked(key, json.dumps(state, ensure_ascii=True))
+                self._remember_locked(key, state)
+            else:
+                with open(self._patch_log_path(key), "a", encoding="utf-8") as fh:
+                    fh.write(line)
+                self._patch_bytes[key] = patch_bytes
+            self._append_locked(
+                f'{{"op":"set","loop_id":{json.dumps(key)},"updated_at":{entry["updated_at"]!r},'
+                f'"updated_seq":{entry["updated_seq"]}}}\n'
+            )
+        return {"ok": True, "updated_seq": entry["updated_seq"], "updated_at": entry["updated_at"]}
 
     def clear(self, loop_id: str) -> bool:
         key = str(loop_id or "").strip()
         if not key:
             return False
         with self._lock:
-            if key not in self._states:
+            if key not in self._index:
                 return False
-            self._states.pop(key, None)
-            self._persist_locked()
+            self._index.pop(key, None)
+            self._drop_shard_locked(key)
+            self._append_locked(f'{{"op":"clear","loop_id":{json.dumps(key)}}}\n')
             return True
@@ -1,2 +1,5 @@
 """Song2DAW backend domain package."""
 
+from .asset_jobs import Song2DawAssetJobQueue
+
+__all__ = ["Song2DawAssetJobQueue"]
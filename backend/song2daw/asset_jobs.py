@@ -0,0 +1,128 @@
+"""Background job queue for song2daw asset preparation (preview mix, etc.)."""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class _AssetJob:
+    key: str
+    state: str = "pending"
+    eta_sec: float = 0.0
+    result: Any = None
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class Song2DawAssetJobQueue:
+    """Thread-safe keyed job queue; duplicate submissions coalesce onto one job.
+
+    Jobs run on a small worker pool so HTTP handlers never synthesize audio on
+    the event loop: they submit (or look up) a job and report its status.
+    """
+
+    def __init__(self, max_workers: int = 1, max_jobs: int = 256) -> None:
+        self._max_workers = max(1, int(max_workers or 1))
+        self._max_jobs = max(1, int(max_jobs or 1))
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, _AssetJob] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, key: str, fn: Callable[[], Any], *, eta_sec: float = 0.0) -> Dict[str, Any]:
+        """Queue `fn` under `key` unless a pending/running/done job already exists."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.state != "error":
+                return self._status_locked(job)
+            job = _AssetJob(key=key, eta_sec=max(0.0, float(eta_sec or 0.0)))
+            self._jobs[key] = job
+            self._prune_locked()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="lemouf-song2daw-assets",
+                )
+            self._executor.submit(self._run, job, fn)
+            return self._status_locked(job)
+
+    def status(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(key)
+            return self._status_locked(job) if job is not None else None
+
+    def wait(self, key: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Block until the job for `key` finishes (tests/CLI only; never call on the event loop)."""
+        deadline = None if timeout is None else time.time() + max(0.0, float(timeout))
+        while True:
+            current = self.status(key)
+            if current is None or current["state"] in ("done", "error"):
+                return current
+            if deadline is not None and time.time() >= deadline:
+                return current
+            time.sleep(0.01)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.state in ("done", "error"):
+                self._jobs.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in [key for key, job in self._jobs.items() if job.state in ("done", "error")]:
+                self._jobs.pop(key, None)
+
+    def _run(self, job: _AssetJob, fn: Callable[[], Any]) -> None:
+        with self._lock:
+            job.state = "running"
+            job.started_at = time.time()
+        try:
+            result = fn()
+        except Exception as exc:
+            with self._lock:
+                job.state = "error"
+                job.error = str(exc)
+                job.finished_at = time.time()
+            return
+        with self._lock:
+            job.state = "done"
+            job.result = result
+            job.finished_at = time.time()
+
+    def _status_locked(self, job: _AssetJob) -> Dict[str, Any]:
+        if job.state == "running" and job.started_at is not None:
+            eta = max(0.0, job.eta_sec - (time.time() - job.started_at))
+        elif job.state == "pending":
+            eta = job.eta_sec + sum(
+                other.eta_sec
+                for other in self._jobs.values()
+                if other is not job and other.state == "pending" and other.submitted_at < job.submitted_at
+            ) / self._max_workers
+        else:
+            eta = 0.0
+        return {
+            "key": job.key,
+            "state": job.state,
+            "eta_sec": round(eta, 3),
+            "result": job.result,
+            "error": job.error,
+            "submitted_at": job.submitted_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+
+    def _prune_locked(self) -> None:
+        finished = sorted(
+            (job for job in self._jobs.values() if job.state in ("done", "error")),
+            key=lambda job: job.finished_at or job.submitted_at,
+        )
+        overflow = len(self._jobs) - self._max_jobs
+        for job in finished[: max(0, overflow)]:
+            self._jobs.pop(job.key, None)
@@ -0,0 +1,84 @@
+"""Benchmark TempoAnalysis beat tracking on the song2daw WAV fixture.
+
+Usage:
+    python -m features.song2daw.benchmarks.bench_tempo
+    python -m features.song2daw.benchmarks.bench_tempo --tile-sec 300 --channels 2
+
+`--tile-sec` repeats the fixture into a temporary WAV of that length (e.g. a
+5-minute stereo song) to check throughput on long inputs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+from features.song2daw.core import dsp
+
+ROOT = Path(__file__).resolve().parents[3]
+FIXTURE = ROOT / "examples" / "song2daw" / "test_audio" / "mix.wav"
+
+
+def _tiled_fixture(target: Path, *, tile_sec: float, channels: int) -> None:
+    with wave.open(str(FIXTURE), "rb") as src:
+        sample_rate = src.getframerate()
+        width = src.getsampwidth()
+        src_channels = src.getnchannels()
+        frames = src.readframes(src.getnframes())
+    if src_channels != 1 and channels != src_channels:
+        raise SystemExit("channel conversion is only supported from a mono fixture")
+    if channels > 1 and src_channels == 1:
+        samples = [frames[index : index + width] for index in range(0, len(frames), width)]
+        frames = b"".join(sample * channels for sample in samples)
+    total_frames = int(tile_sec * sample_rate)
+    frame_bytes = width * channels
+    with wave.open(str(target), "wb") as dst:
+        dst.setnchannels(channels)
+        dst.setsampwidth(width)
+        dst.setframerate(sample_rate)
+        written = 0
+        while written < total_frames:
+            chunk = frames[: (total_frames - written) * frame_bytes]
+            dst.writeframes(chunk)
+            written += len(chunk) // frame_bytes
+
+
+def run_benchmark(path: Path, *, repeat: int) -> None:
+    info = dsp.read_wav_info(path)
+    timings = []
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        envelope = dsp.onset_strength_envelope(path)
+        bpm, confidence = dsp.estimate_tempo(envelope)
+        beats = dsp.track_beats(envelope, bpm)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"file: {path}")
+    print(f"audio: {info.duration_sec:.1f}s, {info.channels}ch @ {info.sample_rate}Hz")
+    print(f"bpm: {bpm:.2f} (confidence {confidence:.3f}), beats: {beats.size}")
+    print(f"best of {len(timings)}: {best * 1000.0:.1f} ms ({info.duration_sec / best:.0f}x real time)")
+
+
+def main() -> None:
+    if not dsp.numpy_available():
+        raise SystemExit("numpy is required for this benchmark")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tile-sec", type=float, default=0.0)
+    parser.add_argument("--channels", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.tile_sec <= 0:
+        run_benchmark(FIXTURE, repeat=args.repeat)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / "tiled.wav"
+        _tiled_fixture(target, tile_sec=args.tile_sec, channels=args.channels)
+        run_benchmark(target, repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
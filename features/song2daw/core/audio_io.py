@@ -0,0 +1,182 @@
+"""Bounded-memory audio file helpers for song2daw steps.
+
+- Content hashing streams the file in fixed-size chunks (optionally over mmap).
+- WAV metadata is read from the RIFF header only; PCM data is never loaded whole.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import stat
+import struct
+from contextlib import contextmanager
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+@dataclass(frozen=True)
+class WavInfo:
+    """Decoded WAV header fields plus the location of the PCM data chunk."""
+
+    sample_rate: int
+    channels: int
+    sample_width: int
+    encoding: str
+    frames: int
+    data_offset: int
+    data_bytes: int
+
+    @property
+    def duration_sec(self) -> float:
+        return self.frames / float(self.sample_rate)
+
+
+def hash_file(path: str | Path, *, chunk_size: int = DEFAULT_CHUNK_SIZE, use_mmap: bool = False) -> str:
+    """Return the SHA-256 hex digest of a file's content, reading `chunk_size` bytes at a time."""
+    chunk_size = max(4096, int(chunk_size))
+    digest = sha256()
+    with open(path, "rb") as fh:
+        if use_mmap and os.fstat(fh.fileno()).st_size > 0:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for start in range(0, len(view), chunk_size):
+                        digest.update(view[start : start + chunk_size])
+                finally:
+                    view.release()
+            return digest.hexdigest()
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_signature(path: str | Path) -> Dict[str, int] | None:
+    """Return a cheap `{size, mtime_ns}` change signature, or None when the file is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return {"size": int(st.st_size), "mtime_ns": int(st.st_mtime_ns)}
+
+
+def read_wav_info(path: str | Path) -> WavInfo:
+    """Parse RIFF/WAVE headers (PCM, IEEE float, extensible) without reading PCM data."""
+    with open(path, "rb") as fh:
+        header = fh.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            raise ValueError(f"not a RIFF/WAVE file: {path}")
+        fmt: Dict[str, Any] | None = None
+        while True:
+            chunk_header = fh.read(8)
+            if len(chunk_header) < 8:
+                raise ValueError(f"WAV data chunk not found: {path}")
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+            if chunk_id == b"fmt ":
+                fmt = _parse_fmt_chunk(fh.read(chunk_size), path)
+                if chunk_size % 2:
+                    fh.seek(1, os.SEEK_CUR)
+                continue
+            if chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"WAV fmt chunk missing before data: {path}")
+                data_offset = fh.tell()
+                file_size = os.fstat(fh.fileno()).st_size
+                data_bytes = min(int(chunk_size), max(0, file_size - data_offset))
+                frame_bytes = fmt["channels"] * fmt["sample_width"]
+                return WavInfo(
+                    sample_rate=fmt["sample_rate"],
+                    channels=fmt["channels"],
+                    sample_width=fmt["sample_width"],
+                    encoding=fmt["encoding"],
+                    frames=data_bytes // frame_bytes,
+                    data_offset=data_offset,
+                    data_bytes=data_bytes,
+                )
+            fh.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+
+
+@contextmanager
+def open_wav_pcm(path: str | Path, info: WavInfo | None = None) -> Iterator[memoryview]:
+    """Yield a read-only memoryview over the WAV PCM bytes, memory-mapped from disk."""
+    info = info or read_wav_info(path)
+    with open(path, "rb") as fh:
+        if info.data_bytes <= 0:
+            yield memoryview(b"")
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)[info.data_offset : info.data_offset + info.data_bytes]
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+def probe_audio_file(
+    path: str | Path,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    use_mmap: bool = False,
+) -> Dict[str, Any]:
+    """Return content hash and decoded metadata for an audio file.
+
+    WAV files get `sample_rate`/`channels`/`frames`/`duration_sec`; other
+    formats only get the content hash and size.
+    """
+    file_path = Path(path)
+    probe: Dict[str, Any] = {
+        "sha256": hash_file(file_path, chunk_size=chunk_size, use_mmap=use_mmap),
+        "size_bytes": int(file_path.stat().st_size),
+        "format": file_path.suffix.lower().lstrip(".") or "unknown",
+    }
+    try:
+        info = read_wav_info(file_path)
+    except ValueError:
+        return probe
+    probe.update(
+        {
+            "format": "wav",
+            "encoding": info.encoding,
+            "sample_rate": info.sample_rate,
+            "channels": info.channels,
+            "sample_width": info.sample_width,
+            "frames": info.frames,
+            "duration_sec": round(info.duration_sec, 6),
+        }
+    )
+    return probe
+
+
+def _parse_fmt_chunk(raw: bytes, path: str | Path) -> Dict[str, Any]:
+    if len(raw) < 16:
+        raise ValueError(f"WAV fmt chunk too short: {path}")
+    format_tag, channels, sample_rate, _byte_rate, _block_align, bits = struct.unpack("<HHIIHH", raw[:16])
+    if format_tag == _WAVE_FORMAT_EXTENSIBLE and len(raw) >= 26:
+        format_tag = struct.unpack("<H", raw[24:26])[0]
+    if format_tag == _WAVE_FORMAT_PCM:
+        encoding = "pcm"
+    elif format_tag == _WAVE_FORMAT_IEEE_FLOAT:
+        encoding = "float"
+    else:
+        raise ValueError(f"unsupported WAV format tag {format_tag:#06x}: {path}")
+    if channels < 1 or sample_rate < 1 or bits < 8 or bits % 8:
+        raise ValueError(f"invalid WAV fmt chunk: {path}")
+    return {
+        "encoding": encoding,
+        "channels": int(channels),
+        "sample_rate": int(sample_rate),
+        "sample_width": int(bits // 8),
+    }
@@ -1,10 +1,15 @@
-"""Deterministic cache key helpers for song2daw pipeline steps."""
+"""Deterministic cache key helpers and step result store for song2daw pipeline steps."""
 
 from __future__ import annotations
 
 import hashlib
 import json
-from typing import Any, Mapping
+import os
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+STEP_RESULT_CACHE_SCHEMA_VERSION = 1
 
 
 def build_step_cache_key(
@@ -35,3 +40,168 @@ def build_step_cache_key(
 
     return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
 
+
+class StepResultCache:
+    """Thread-safe on-disk store of step outputs keyed by `build_step_cache_key`.
+
+    Entries are JSON files named after their SHA-256 key. Reads refresh the entry
+    mtime so eviction is least-recently-used once `max_bytes` is exceeded; entries
+    older than `max_age_sec` (by last use) are dropped regardless of size.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_bytes: int = 1024 * 1024 * 1024,
+        max_age_sec: float = 14 * 24 * 3600.0,
+    ) -> None:
+        self._path = os.path.realpath(path)
+        self._max_bytes = max(1, int(max_bytes or 1))
+        self._max_age_sec = max(1.0, float(max_age_sec or 1.0))
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Tuple[float, int]]] = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _entry_path(self, cache_key: str) -> str:
+        return os.path.join(self._path, cache_key[:2], f"{cache_key}.json")
+
+    def _ensure_index_locked(self) -> Dict[str, Tuple[float, int]]:
+        if self._index is not None:
+            return self._index
+        index: Dict[str, Tuple[float, int]] = {}
+        if os.path.isdir(self._path):
+            for folder, _dirs, files in os.walk(self._path):
+                for name in files:
+                    if not name.endswith(".json"):
+                        continue
+                    try:
+                        st = os.stat(os.path.join(folder, name))
+                    except OSError:
+                        continue
+                    index[name[: -len(".json")]] = (float(st.st_mtime), int(st.st_size))
+        self._index = index
+        return index
+
+    def _drop_locked(self, cache_key: str) -> None:
+        index = self._ensure_index_locked()
+        index.pop(cache_key, None)
+        try:
+            os.remove(self._entry_path(cache_key))
+        except OSError:
+            pass
+
+    def _evict_locked(self, now: float) -> None:
+        index = self._ensure_index_locked()
+        for cache_key, (last_used, _size) in list(index.items()):
+            if now - last_used > self._max_age_sec:
+                self._drop_locked(cache_key)
+        total = sum(size for _last_used, size in index.values())
+        if total <= self._max_bytes:
+            return
+        for cache_key, (_last_used, size) in sorted(index.items(), key=lambda item: (item[1][0], item[0])):
+            if total <= self._max_bytes:
+                break
+            self._drop_locked(cache_key)
+            total -= size
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored step output mapping for `cache_key`, or None on miss."""
+        key = str(cache_key or "").strip()
+        if len(key) != 64:
+            return None
+        with self._lock:
+            index = self._ensure_index_locked()
+            if key not in index:
+                return None
+            now = time.time()
+            if now - index[key][0] > self._max_age_sec:
+                self._drop_locked(key)
+                return None
+            path = self._entry_path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    payload = json.load(fh)
+            except Exception:
+                self._drop_locked(key)
+                return None
+            if not isinstance(payload, dict) or payload.get("cache_key") != key:
+                self._drop_locked(key)
+                return None
+            produced = payload.get("produced")
+            if not isinstance(produced, dict):
+                self._drop_locked(key)
+                return None
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+            index[key] = (now, index[key][1])
+            return produced
+
+    def put(
+        self,
+        cache_key: str,
+        produced: Mapping[str, Any],
+        *,
+        step_name: str = "",
+        step_version: str = "",
+    ) -> bool:
+        """Persist one step output mapping; returns False when it cannot be stored."""
+        key = str(cache_key or "").strip()
+        if len(key) != 64 or not isinstance(produced, Mapping):
+            return False
+        now = time.time()
+        payload = {
+            "schema_version": STEP_RESULT_CACHE_SCHEMA_VERSION,
+            "cache_key": key,
+            "step": {"name": step_name, "version": step_version},
+            "stored_at": now,
+            "produced": dict(produced),
+        }
+        try:
+            encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+        except (TypeError, ValueError):
+            return False
+        if len(encoded) > self._max_bytes:
+            return False
+
+        path = self._entry_path(key)
+        with self._lock:
+            index = self._ensure_index_locked()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as fh:
+                    fh.write(encoded)
+                os.replace(tmp_path, path)
+            except OSError:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return False
+            index[key] = (now, len(encoded))
+            self._evict_locked(now)
+            return key in index
+
+    def clear(self) -> None:
+        """Drop every stored entry."""
+        with self._lock:
+            for cache_key in list(self._ensure_index_locked().keys()):
+                self._drop_locked(cache_key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count and byte usage for diagnostics."""
+        with self._lock:
+            index = self._ensure_index_locked()
+            return {
+                "path": self._path,
+                "entries": len(index),
+                "bytes": sum(size for _last_used, size in index.values()),
+                "max_bytes": self._max_bytes,
+                "max_age_sec": self._max_age_sec,
+            }
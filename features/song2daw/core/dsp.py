@@ -0,0 +1,452 @@
+"""NumPy signal-analysis helpers for song2daw steps.
+
+- Deterministic behavior:
+  - WAV PCM is decoded block by block from a memory map (bounded memory).
+  - If `numpy` is not installed, `numpy_available()` is False and steps keep
+    their deterministic placeholder output.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Tuple
+
+from features.song2daw.core.audio_io import WavInfo, open_wav_pcm, read_wav_info
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+def iter_wav_mono_blocks(
+    path: str | Path,
+    *,
+    block_frames: int,
+    info: WavInfo | None = None,
+) -> Iterator["np.ndarray"]:
+    """Yield consecutive float32 mono blocks (channel mean) of at most `block_frames` frames."""
+    info = info or read_wav_info(path)
+    block_frames = max(1, int(block_frames))
+    frame_bytes = info.channels * info.sample_width
+    with open_wav_pcm(path, info) as pcm:
+        for start in range(0, info.frames, block_frames):
+            stop = min(info.frames, start + block_frames)
+            raw = pcm[start * frame_bytes : stop * frame_bytes]
+            try:
+                samples = _decode_pcm(raw, info)
+            finally:
+                raw.release()
+            yield samples.reshape(-1, info.channels).mean(axis=1, dtype=np.float32)
+
+
+def read_wav_frames(
+    path: str | Path,
+    start: int,
+    stop: int,
+    *,
+    info: WavInfo | None = None,
+) -> "np.ndarray":
+    """Return frames `[start, stop)` as a float32 `(frames, channels)` array."""
+    info = info or read_wav_info(path)
+    start = max(0, min(int(start), info.frames))
+    stop = max(start, min(int(stop), info.frames))
+    frame_bytes = info.channels * info.sample_width
+    with open_wav_pcm(path, info) as pcm:
+        raw = pcm[start * frame_bytes : stop * frame_bytes]
+        try:
+            samples = _decode_pcm(raw, info)
+        finally:
+            raw.release()
+    return samples.reshape(-1, info.channels)
+
+
+@dataclass(frozen=True)
+class OnsetEnvelope:
+    """Onset-strength curve sampled every `hop_length` samples at `sample_rate`."""
+
+    values: "np.ndarray"
+    sample_rate: float
+    hop_length: int
+
+    @property
+    def frame_rate(self) -> float:
+        return self.sample_rate / float(self.hop_length)
+
+    def frames_to_seconds(self, frames: "np.ndarray") -> "np.ndarray":
+        return np.asarray(frames, dtype=np.float64) / self.frame_rate
+
+
+def analysis_sample_rate(info: WavInfo, target_sample_rate: int) -> Tuple[int, float]:
+    """Return `(decimation, sample_rate)` used when analysing `info` near `target_sample_rate`."""
+    decimation = max(1, int(round(info.sample_rate / float(target_sample_rate))))
+    return decimation, info.sample_rate / float(decimation)
+
+
+def iter_magnitude_blocks(
+    path: str | Path,
+    *,
+    n_fft: int,
+    hop_length: int,
+    block_sec: float = 30.0,
+    target_sample_rate: int = 22050,
+    info: WavInfo | None = None,
+) -> Iterator["np.ndarray"]:
+    """Yield consecutive `(frames, n_fft // 2 + 1)` float32 STFT magnitude blocks.
+
+    Audio is decimated by an integer factor towards `target_sample_rate`, framed
+    with a strided view (frame `i` is centred on sample `i * hop_length`) and
+    transformed one block of frames at a time, so memory stays bounded by
+    `block_sec` regardless of file length.
+    """
+    info = info or read_wav_info(path)
+    decimation, sample_rate = analysis_sample_rate(info, target_sample_rate)
+    block_samples = max(n_fft, int(block_sec * sample_rate)) // hop_length * hop_length
+    window = np.hanning(n_fft + 1)[:-1].astype(np.float32)
+
+    carry = np.zeros(n_fft // 2, dtype=np.float32)
+    for block in _decimated_blocks(path, info, decimation, block_samples * decimation):
+        carry, magnitudes = _frame_magnitudes(np.concatenate([carry, block]), window, n_fft, hop_length)
+        if magnitudes.size:
+            yield magnitudes
+    tail = np.concatenate([carry, np.zeros(n_fft // 2, dtype=np.float32)])
+    _carry, magnitudes = _frame_magnitudes(tail, window, n_fft, hop_length)
+    if magnitudes.size:
+        yield magnitudes
+
+
+def onset_strength_envelope(
+    path: str | Path,
+    *,
+    n_fft: int = 2048,
+    hop_length: int = 512,
+    block_sec: float = 30.0,
+    target_sample_rate: int = 22050,
+) -> OnsetEnvelope:
+    """Compute a log-magnitude spectral-flux onset envelope for a WAV file."""
+    info = read_wav_info(path)
+    _decimation, sample_rate = analysis_sample_rate(info, target_sample_rate)
+    previous_spectrum = None
+    flux_blocks = []
+    for magnitudes in iter_magnitude_blocks(
+        path,
+        n_fft=n_fft,
+        hop_length=hop_length,
+        block_sec=block_sec,
+        target_sample_rate=target_sample_rate,
+        info=info,
+    ):
+        spectrum = np.log1p(100.0 * magnitudes)
+        if previous_spectrum is None:
+            previous_spectrum = spectrum[:1]
+        diff = np.diff(np.concatenate([previous_spectrum, spectrum]), axis=0)
+        flux_blocks.append(np.maximum(diff, 0.0).mean(axis=1))
+        previous_spectrum = spectrum[-1:]
+
+    values = np.concatenate(flux_blocks) if flux_blocks else np.zeros(0, dtype=np.float32)
+    values = _normalize_onsets(values, sample_rate / float(hop_length))
+    return OnsetEnvelope(values=values, sample_rate=sample_rate, hop_length=hop_length)
+
+
+def estimate_tempo(
+    envelope: OnsetEnvelope,
+    *,
+    min_bpm: float = 60.0,
+    max_bpm: float = 200.0,
+    prior_bpm: float = 120.0,
+) -> Tuple[float, float]:
+    """Return `(bpm, confidence)` from the onset autocorrelation.
+
+    Lags are weighted by a log-normal prior around `prior_bpm` (one octave wide)
+    to resolve octave ambiguity; confidence is the normalized autocorrelation at
+    the selected lag.
+    """
+    values = envelope.values.astype(np.float64)
+    count = values.size
+    if count < 4 or not np.any(values):
+        return 0.0, 0.0
+    size = 1 << int(np.ceil(np.log2(2 * count)))
+    spectrum = np.fft.rfft(values, size)
+    autocorr = np.fft.irfft(spectrum * np.conj(spectrum), size)[:count]
+    if autocorr[0] <= 0:
+        return 0.0, 0.0
+    autocorr /= autocorr[0]
+
+    frame_rate = envelope.frame_rate
+    min_lag = max(1, int(np.floor(60.0 * frame_rate / max_bpm)))
+    max_lag = min(count - 2, int(np.ceil(60.0 * frame_rate / min_bpm)))
+    if max_lag <= min_lag:
+        return 0.0, 0.0
+    lags = np.arange(min_lag, max_lag + 1)
+    bpms = 60.0 * frame_rate / lags
+    weights = np.exp(-0.5 * np.log2(bpms / prior_bpm) ** 2)
+    scores = np.clip(autocorr[lags], 0.0, None) * weights
+    best = int(np.argmax(scores))
+    lag = float(lags[best])
+    if 0 < best < lags.size - 1:
+        left, centre, right = autocorr[lags[best] - 1], autocorr[lags[best]], autocorr[lags[best] + 1]
+        denominator = left - 2.0 * centre + right
+        if denominator < 0:
+            lag += float(np.clip(0.5 * (left - right) / denominator, -0.5, 0.5))
+    confidence = float(np.clip(autocorr[lags[best]], 0.0, 1.0))
+    return 60.0 * frame_rate / lag, confidence
+
+
+def track_beats(
+    envelope: OnsetEnvelope,
+    bpm: float,
+    *,
+    tightness: float = 100.0,
+) -> "np.ndarray":
+    """Return beat frame indexes using dynamic-programming beat tracking (Ellis, 2007)."""
+    values = envelope.values.astype(np.float64)
+    if values.size == 0 or bpm <= 0:
+        return np.zeros(0, dtype=np.int64)
+    period = 60.0 * envelope.frame_rate / bpm
+    offsets = np.arange(-int(period), int(period) + 1)
+    local_score = np.convolve(values, np.exp(-0.5 * (offsets * 32.0 / period) ** 2), mode="same")
+
+    window = np.arange(-int(round(2 * period)), -int(round(period / 2)) + 1)
+    penalty = -tightness * np.log(-window / period) ** 2
+    cumulative = local_score.copy()
+    backlink = np.full(values.size, -1, dtype=np.int64)
+    for frame in range(values.size):
+        candidates = frame + window
+        valid = candidates >= 0
+        if not np.any(valid):
+            continue
+        scores = cumulative[candidates[valid]] + penalty[valid]
+        best = int(np.argmax(scores))
+        cumulative[frame] = local_score[frame] + scores[best]
+        backlink[frame] = candidates[valid][best]
+
+    tail = cumulative[max(0, values.size - int(np.ceil(period))) :]
+    frame = values.size - tail.size + int(np.argmax(tail))
+    beats = []
+    while frame >= 0:
+        beats.append(frame)
+        frame = int(backlink[frame])
+    beats = np.asarray(beats[::-1], dtype=np.int64)
+
+    threshold = 0.5 * float(np.sqrt(np.mean(local_score[beats] ** 2))) if beats.size else 0.0
+    strong = np.flatnonzero(local_score[beats] >= threshold)
+    if strong.size:
+        beats = beats[strong[0] : strong[-1] + 1]
+    return beats
+
+
+def pick_downbeat_phase(envelope: OnsetEnvelope, beats: "np.ndarray", *, beats_per_bar: int = 4) -> int:
+    """Return the beat offset (0..beats_per_bar-1) whose beats carry the most onset energy."""
+    if beats.size == 0:
+        return 0
+    strengths = envelope.values[beats]
+    totals = [float(np.mean(strengths[phase::beats_per_bar])) for phase in range(min(beats_per_bar, beats.size))]
+    return int(np.argmax(totals))
+
+
+def beat_sync_features(
+    path: str | Path,
+    beats_sec: "np.ndarray",
+    *,
+    n_fft: int = 4096,
+    hop_length: int = 1024,
+    block_sec: float = 30.0,
+    target_sample_rate: int = 22050,
+) -> "np.ndarray":
+    """Return one L2-normalized chroma + timbre feature row per beat interval.
+
+    Row `k` averages the STFT frames between `beats_sec[k]` and `beats_sec[k + 1]`.
+    Chroma folds 55 Hz-5 kHz bins onto 12 pitch classes; timbre is a 12-coefficient
+    cepstrum of 24 log-spaced band energies. Frames are accumulated per beat as
+    they stream in, so memory is O(beats) plus one STFT block.
+    """
+    info = read_wav_info(path)
+    _decimation, sample_rate = analysis_sample_rate(info, target_sample_rate)
+    beats = np.asarray(beats_sec, dtype=np.float64)
+    intervals = max(0, beats.size - 1)
+    chroma_map, band_map = _feature_maps(n_fft, sample_rate)
+    dct = _dct_matrix(band_map.shape[1], 13)[1:]
+    sums = np.zeros((intervals, 12 + dct.shape[0]), dtype=np.float64)
+    counts = np.zeros(intervals, dtype=np.int64)
+
+    frame_offset = 0
+    for magnitudes in iter_magnitude_blocks(
+        path,
+        n_fft=n_fft,
+        hop_length=hop_length,
+        block_sec=block_sec,
+        target_sample_rate=target_sample_rate,
+        info=info,
+    ):
+        times = (frame_offset + np.arange(magnitudes.shape[0])) * (hop_length / sample_rate)
+        frame_offset += magnitudes.shape[0]
+        owner = np.searchsorted(beats, times, side="right") - 1
+        keep = (owner >= 0) & (owner < intervals)
+        if not np.any(keep):
+            continue
+        power = magnitudes[keep].astype(np.float64) ** 2
+        chroma = power @ chroma_map
+        chroma /= np.maximum(chroma.max(axis=1, keepdims=True), 1e-12)
+        timbre = np.log1p(power @ band_map) @ dct.T
+        np.add.at(sums, owner[keep], np.hstack([chroma, timbre]))
+        np.add.at(counts, owner[keep], 1)
+
+    features = sums / np.maximum(counts, 1)[:, None]
+    if intervals:
+        timbre = features[:, 12:]
+        timbre = (timbre - timbre.mean(axis=0)) / np.maximum(timbre.std(axis=0), 1e-9)
+        chroma = features[:, :12] - features[:, :12].mean(axis=1, keepdims=True)
+        features = np.hstack([chroma / np.sqrt(12.0), timbre / np.sqrt(timbre.shape[1])])
+        features /= np.maximum(np.linalg.norm(features, axis=1, keepdims=True), 1e-12)
+    return features.astype(np.float32)
+
+
+def banded_self_similarity(features: "np.ndarray", bandwidth: int) -> "np.ndarray":
+    """Return `band[i, d + bandwidth] = cos(features[i], features[i + d])` for |d| <= bandwidth.
+
+    Only the `2 * bandwidth + 1` diagonals around the main one are stored, so
+    memory is O(n * bandwidth) instead of O(n^2). Out-of-range pairs are 0.
+    """
+    count = features.shape[0]
+    band = np.zeros((count, 2 * bandwidth + 1), dtype=np.float32)
+    for offset in range(0, min(bandwidth, count - 1) + 1):
+        values = np.einsum("ij,ij->i", features[: count - offset], features[offset:])
+        band[: count - offset, bandwidth + offset] = values
+        band[offset:, bandwidth - offset] = values
+    return band
+
+
+def checkerboard_novelty(band: "np.ndarray", kernel_half: int) -> "np.ndarray":
+    """Foote novelty along the diagonal from a banded similarity matrix.
+
+    `novelty[c]` scores a boundary between beat intervals `c - 1` and `c` with a
+    Gaussian-tapered checkerboard kernel spanning `kernel_half` intervals per
+    side; `band` needs a bandwidth of at least `2 * kernel_half`. Values are
+    divided by the total kernel weight, so they are comparable across songs
+    (0 = no contrast, 1 = orthogonal-to-identical contrast at full weight).
+    """
+    count, width = band.shape
+    bandwidth = (width - 1) // 2
+    if 2 * kernel_half > bandwidth:
+        raise ValueError("band is too narrow for kernel_half")
+    offsets = np.arange(-kernel_half, kernel_half)
+    taper = np.exp(-0.5 * ((offsets + 0.5) / (0.5 * kernel_half)) ** 2)
+    signs = np.where(offsets < 0, -1.0, 1.0)
+    centres = np.arange(count)
+    novelty = np.zeros(count, dtype=np.float64)
+    for row_offset, row_sign, row_taper in zip(offsets, signs, taper):
+        rows = centres + row_offset
+        valid = (rows >= 0) & (rows < count)
+        for col_offset, col_sign, col_taper in zip(offsets, signs, taper):
+            weight = row_sign * col_sign * row_taper * col_taper
+            novelty[valid] += weight * band[rows[valid], bandwidth + col_offset - row_offset]
+    novelty[0] = 0.0
+    return np.clip(novelty / float(np.sum(taper) ** 2), 0.0, 1.0)
+
+
+def pick_boundaries(novelty: "np.ndarray", *, min_spacing: int, threshold: float = 0.2) -> "np.ndarray":
+    """Greedily pick the strongest novelty peaks at least `min_spacing` apart (and from the edges)."""
+    count = novelty.size
+    min_spacing = max(1, int(min_spacing))
+    picked: list[int] = []
+    for index in np.argsort(-novelty, kind="stable"):
+        index = int(index)
+        if novelty[index] < threshold:
+            break
+        if index < min_spacing or count - index < min_spacing:
+            continue
+        if any(abs(index - other) < min_spacing for other in picked):
+            continue
+        left = novelty[max(0, index - 1)]
+        right = novelty[min(count - 1, index + 1)]
+        if novelty[index] < left or novelty[index] < right:
+            continue
+        picked.append(index)
+    return np.asarray(sorted(picked), dtype=np.int64)
+
+
+def _feature_maps(n_fft: int, sample_rate: float) -> Tuple["np.ndarray", "np.ndarray"]:
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    chroma_map = np.zeros((freqs.size, 12), dtype=np.float64)
+    audible = (freqs >= 55.0) & (freqs <= 5000.0)
+    pitch_class = np.round(12.0 * np.log2(freqs[audible] / 440.0) + 69.0).astype(np.int64) % 12
+    chroma_map[np.flatnonzero(audible), pitch_class] = 1.0
+
+    edges = np.geomspace(40.0, sample_rate / 2.0, 25)
+    band_index = np.searchsorted(edges, freqs, side="right") - 1
+    band_map = np.zeros((freqs.size, 24), dtype=np.float64)
+    inside = (band_index >= 0) & (band_index < 24)
+    band_map[np.flatnonzero(inside), band_index[inside]] = 1.0
+    return chroma_map, band_map
+
+
+def _dct_matrix(size: int, coefficients: int) -> "np.ndarray":
+    positions = (np.arange(size) + 0.5) * np.pi / size
+    return np.cos(np.outer(np.arange(coefficients), positions)) * np.sqrt(2.0 / size)
+
+
+def _decimated_blocks(
+    path: str | Path,
+    info: WavInfo,
+    decimation: int,
+    block_frames: int,
+) -> Iterator["np.ndarray"]:
+    remainder = np.zeros(0, dtype=np.float32)
+    for block in iter_wav_mono_blocks(path, block_frames=block_frames, info=info):
+        if decimation == 1:
+            yield block
+            continue
+        block = np.concatenate([remainder, block])
+        usable = block.size // decimation * decimation
+        remainder = block[usable:]
+        yield block[:usable].reshape(-1, decimation).mean(axis=1)
+
+
+def _frame_magnitudes(
+    buffer: "np.ndarray",
+    window: "np.ndarray",
+    n_fft: int,
+    hop_length: int,
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    if buffer.size < n_fft:
+        return buffer, np.zeros((0, n_fft // 2 + 1), dtype=np.float32)
+    count = (buffer.size - n_fft) // hop_length + 1
+    frames = np.lib.stride_tricks.sliding_window_view(buffer, n_fft)[::hop_length][:count]
+    magnitudes = np.abs(np.fft.rfft(frames * window, axis=1)).astype(np.float32)
+    return buffer[count * hop_length :], magnitudes
+
+
+def _normalize_onsets(values: "np.ndarray", frame_rate: float) -> "np.ndarray":
+    if values.size == 0:
+        return values.astype(np.float32)
+    width = max(1, int(round(frame_rate)))
+    kernel = np.ones(width, dtype=np.float64) / width
+    detrended = np.maximum(values - np.convolve(values, kernel, mode="same"), 0.0)
+    scale = float(np.std(detrended))
+    if scale > 0:
+        detrended = detrended / scale
+    return detrended.astype(np.float32)
+
+
+def _decode_pcm(raw: memoryview, info: WavInfo) -> "np.ndarray":
+    width = info.sample_width
+    if info.encoding == "float":
+        dtype = "<f4" if width == 4 else "<f8"
+        return np.frombuffer(raw, dtype=dtype).astype(np.float32)
+    if width == 1:
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    if width == 2:
+        return np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    if width == 3:
+        packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = packed[:, 0] | (packed[:, 1] << 8) | (packed[:, 2] << 16)
+        values = np.where(values >= 1 << 23, values - (1 << 24), values)
+        return values.astype(np.float32) / float(1 << 23)
+    if width == 4:
+        return np.frombuffer(raw, dtype="<i4").astype(np.float32) / float(1 << 31)
+    raise ValueError(f"unsupported PCM sample width: {width}")
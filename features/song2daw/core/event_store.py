@@ -0,0 +1,201 @@
+"""Columnar `.npy` sidecar storage for song2daw event artifacts.
+
+- `artifacts.events["items"]` (one dict per event) is written once as a
+  structured NumPy array next to `SongGraph.json`; JSON payloads then carry a
+  small reference (`format`, `sidecar`, string tables and a summary).
+- Readers memory-map the sidecar (`np.load(..., mmap_mode="r")`), so dense
+  transcriptions are paged in on demand instead of parsed from JSON.
+- Items whose ids do not follow `evt:<source_id>:<ordinal>` stay inline.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Mapping
+
+from features.song2daw.core import dsp
+
+np = dsp.np
+
+EVENTS_SIDECAR_FILE = "events.npy"
+EVENTS_COLUMNAR_FORMAT = "columnar_npy_v1"
+
+_ITEM_KEYS = frozenset({"id", "source_id", "kind", "t0_sec", "t1_sec", "velocity", "midi_note", "midi_channel"})
+
+_FIELDS = (
+    ("t0_sec", "<f8"),
+    ("t1_sec", "<f8"),
+    ("ordinal", "<u4"),
+    ("source", "<u2"),
+    ("kind", "u1"),
+    ("velocity", "u1"),
+    ("midi_note", "u1"),
+    ("midi_channel", "u1"),
+)
+
+
+def is_columnar_events(events_ref: Any) -> bool:
+    return isinstance(events_ref, Mapping) and events_ref.get("format") == EVENTS_COLUMNAR_FORMAT
+
+
+def write_events_sidecar(events_ref: Any, run_dir: str | Path) -> Dict[str, Any] | None:
+    """Write `events_ref` as `<run_dir>/events.npy` and return its JSON reference.
+
+    Returns None (keep the artifact inline) when NumPy is missing or the items
+    cannot be represented losslessly. An existing columnar reference is copied
+    into `run_dir` when it points elsewhere.
+    """
+    if not dsp.numpy_available() or not isinstance(events_ref, Mapping):
+        return None
+    target = Path(run_dir) / EVENTS_SIDECAR_FILE
+    if is_columnar_events(events_ref):
+        source = resolve_sidecar_path(events_ref)
+        if source is None:
+            return None
+        if os.path.realpath(source) != os.path.realpath(target):
+            _atomic_copy(source, target)
+        return dict(events_ref, path=str(target))
+
+    items = events_ref.get("items")
+    if not isinstance(items, list) or not items:
+        return None
+    table = _to_table(items)
+    if table is None:
+        return None
+    records, sources, kinds = table
+    if not _sidecar_matches(target, records):
+        tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as handle:
+            np.save(handle, records, allow_pickle=False)
+        os.replace(tmp_path, target)
+
+    reference = {key: value for key, value in events_ref.items() if key != "items"}
+    reference.update(
+        {
+            "format": EVENTS_COLUMNAR_FORMAT,
+            "sidecar": EVENTS_SIDECAR_FILE,
+            "path": str(target),
+            "sources": sources,
+            "kinds": kinds,
+            "summary": _summary(records, sources),
+        }
+    )
+    return reference
+
+
+def resolve_sidecar_path(events_ref: Mapping[str, Any], run_dir: str | Path | None = None) -> str | None:
+    """Return the sidecar file for a columnar reference, preferring `run_dir/<sidecar>`."""
+    candidates = []
+    if run_dir:
+        candidates.append(os.path.join(str(run_dir), str(events_ref.get("sidecar") or EVENTS_SIDECAR_FILE)))
+    if isinstance(events_ref.get("path"), str):
+        candidates.append(events_ref["path"])
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def open_events_sidecar(events_ref: Mapping[str, Any], run_dir: str | Path | None = None) -> "np.ndarray | None":
+    """Memory-map the structured event array behind a columnar reference."""
+    if not dsp.numpy_available() or not is_columnar_events(events_ref):
+        return None
+    path = resolve_sidecar_path(events_ref, run_dir)
+    if path is None:
+        return None
+    return np.load(path, mmap_mode="r", allow_pickle=False)
+
+
+def load_event_items(events_ref: Any, run_dir: str | Path | None = None) -> List[Dict[str, Any]]:
+    """Return event dicts from an inline artifact or a columnar reference."""
+    if not is_columnar_events(events_ref):
+        items = events_ref.get("items") if isinstance(events_ref, Mapping) else None
+        return list(items) if isinstance(items, list) else []
+    records = open_events_sidecar(events_ref, run_dir)
+    if records is None:
+        return []
+    sources = list(events_ref.get("sources") or [])
+    kinds = list(events_ref.get("kinds") or [])
+    columns = {name: records[name].tolist() for name, _dtype in _FIELDS}
+    items = []
+    for index in range(len(records)):
+        source_id = sources[columns["source"][index]]
+        items.append(
+            {
+                "id": f"evt:{source_id}:{columns['ordinal'][index]:03}",
+                "source_id": source_id,
+                "kind": kinds[columns["kind"][index]],
+                "t0_sec": columns["t0_sec"][index],
+                "t1_sec": columns["t1_sec"][index],
+                "velocity": columns["velocity"][index],
+                "midi_note": columns["midi_note"][index],
+                "midi_channel": columns["midi_channel"][index],
+            }
+        )
+    return items
+
+
+def _to_table(items: List[Any]) -> tuple["np.ndarray", List[str], List[str]] | None:
+    sources: Dict[str, int] = {}
+    kinds: Dict[str, int] = {}
+    rows = []
+    for item in items:
+        if not isinstance(item, Mapping) or set(item) != _ITEM_KEYS:
+            return None
+        source_id = item.get("source_id")
+        kind = item.get("kind")
+        event_id = item.get("id")
+        if not isinstance(source_id, str) or not isinstance(kind, str) or not isinstance(event_id, str):
+            return None
+        prefix = f"evt:{source_id}:"
+        ordinal = event_id[len(prefix) :]
+        if not event_id.startswith(prefix) or not ordinal.isdigit() or event_id != f"{prefix}{int(ordinal):03}":
+            return None
+        try:
+            row = (
+                float(item["t0_sec"]),
+                float(item["t1_sec"]),
+                int(ordinal),
+                sources.setdefault(source_id, len(sources)),
+                kinds.setdefault(kind, len(kinds)),
+                int(item["velocity"]),
+                int(item["midi_note"]),
+                int(item["midi_channel"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not (0 <= row[5] <= 255 and 0 <= row[6] <= 255 and 0 <= row[7] <= 255):
+            return None
+        rows.append(row)
+    if len(sources) > 0xFFFF or len(kinds) > 0xFF:
+        return None
+    return np.array(rows, dtype=list(_FIELDS)), list(sources), list(kinds)
+
+
+def _summary(records: "np.ndarray", sources: List[str]) -> Dict[str, Any]:
+    per_source = np.bincount(records["source"], minlength=len(sources))
+    return {
+        "count": int(len(records)),
+        "t0_sec": float(records["t0_sec"].min()),
+        "t1_sec": float(records["t1_sec"].max()),
+        "by_source": {source_id: int(count) for source_id, count in zip(sources, per_source)},
+    }
+
+
+def _sidecar_matches(target: Path, records: "np.ndarray") -> bool:
+    # Run folders are content-addressed, so an existing sidecar is normally identical.
+    if not target.is_file():
+        return False
+    try:
+        existing = np.load(target, mmap_mode="r", allow_pickle=False)
+    except (OSError, ValueError):
+        return False
+    return existing.dtype == records.dtype and bool(np.array_equal(existing, records))
+
+
+def _atomic_copy(source: str, target: Path) -> None:
+    tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, target)
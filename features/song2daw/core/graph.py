@@ -11,7 +11,7 @@ from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
 import json
-from typing import Any, Dict
+from typing import Any, Dict, Mapping
 
 try:
     from jsonschema import Draft202012Validator
@@ -36,6 +36,67 @@ class SongGraph:
         return self.data
 
 
+class SongGraphBuilder:
+    """Copy-on-write editor producing the next SongGraph snapshot from a base one.
+
+    The base graph is never mutated: the top-level mapping and the containers a
+    step edits (`nodes`, `node_versions`, `artifacts`) are shallow-copied, while
+    node dicts and untouched values are shared with the base snapshot. Nodes are
+    indexed by id so `upsert_node` is O(1). `build()` returns a plain dict equal
+    to what the former deepcopy + linear-upsert merge produced.
+    """
+
+    def __init__(self, base_graph: Any, *, pipeline_version: str) -> None:
+        if isinstance(base_graph, Mapping):
+            self._graph: Dict[str, Any] = dict(base_graph)
+        else:
+            self._graph = {
+                "schema_version": "1.0.0",
+                "pipeline_version": pipeline_version,
+                "timebase": {"audio": {"sr": 44100}, "musical": {"ppq": 960}},
+                "nodes": [],
+                "edges": [],
+            }
+        self._copied: set[str] = set()
+        self._node_index: Dict[str, int] | None = None
+
+    def _own(self, key: str, factory: type) -> Any:
+        if key not in self._copied:
+            value = self._graph.get(key)
+            self._graph[key] = factory(value) if isinstance(value, factory) else factory()
+            self._copied.add(key)
+        return self._graph[key]
+
+    def set_step_version(self, step_name: str, step_version: str) -> None:
+        """Record `step_version` as pipeline version and as `node_versions[step_name]`."""
+        self._graph["pipeline_version"] = step_version
+        self._own("node_versions", dict)[step_name] = step_version
+
+    def set_artifact(self, key: str, value: Any) -> None:
+        self._own("artifacts", dict)[key] = value
+
+    def upsert_node(self, node: Mapping[str, Any]) -> None:
+        """Replace the node sharing `node["id"]`, or append it."""
+        nodes = self._own("nodes", list)
+        if self._node_index is None:
+            self._node_index = {}
+            for index, existing in enumerate(nodes):
+                if isinstance(existing, Mapping):
+                    self._node_index.setdefault(existing.get("id"), index)
+        node_id = node.get("id")
+        index = self._node_index.get(node_id)
+        if index is None:
+            self._node_index[node_id] = len(nodes)
+            nodes.append(dict(node))
+        else:
+            nodes[index] = dict(node)
+
+    def build(self) -> Dict[str, Any]:
+        self._own("nodes", list)
+        self._own("edges", list)
+        return self._graph
+
+
 def validate_songgraph(d: Dict[str, Any]) -> bool:
     """Return True if dict looks like a valid SongGraph.
 
@@ -2,13 +2,14 @@
 
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Callable, Dict, Mapping, Sequence, Tuple
 
 import yaml
 
-from features.song2daw.core.cache import build_step_cache_key
+from features.song2daw.core.cache import StepResultCache, build_step_cache_key
 
 
 class PipelineValidationError(ValueError):
@@ -77,68 +78,47 @@ def run_pipeline(
     songgraph: Dict[str, Any] | None = None,
     step_configs: Mapping[str, Mapping[str, Any]] | None = None,
     model_versions: Mapping[str, str] | None = None,
+    cache: StepResultCache | None = None,
 ) -> Dict[str, Any]:
-    """Execute deterministic step handlers using validated manifests."""
+    """Execute deterministic step handlers using validated manifests.
+
+    When `cache` is provided, a step whose cache key was stored by a previous run
+    reuses the stored outputs/SongGraph instead of calling its handler.
+    """
     context: Dict[str, Any] = dict(inputs or {})
     artifacts: Dict[str, Any] = dict(initial_artifacts or {})
     current_songgraph = songgraph
     step_results = []
 
     for index, step in enumerate(steps):
-        handler = handlers.get(step.name)
-        if handler is None:
-            raise PipelineExecutionError(f"missing handler for step: {step.name}")
-
-        step_inputs = _resolve_inputs(
+        handler = require_handler(handlers, step)
+        step_inputs = resolve_step_inputs(
             step=step,
             context=context,
             artifacts=artifacts,
             songgraph=current_songgraph,
         )
         step_config = dict((step_configs or {}).get(step.name) or {})
-        try:
-            cache_key = build_step_cache_key(
-                step_name=step.name,
-                step_version=step.version,
-                inputs=step_inputs,
-                config=step_config,
-                model_versions=model_versions,
-            )
-        except ValueError as exc:
-            raise PipelineExecutionError(f"step {step.name} cache key error: {exc}") from exc
-
-        produced = handler(step_inputs, step)
-        if not isinstance(produced, Mapping):
-            raise PipelineExecutionError(f"step {step.name} returned non-mapping output")
+        cache_key = step_cache_key(step, step_inputs, step_config, model_versions)
 
-        step_output = {}
-        for output_name in step.outputs:
-            if output_name not in produced:
-                raise PipelineExecutionError(
-                    f"step {step.name} missing declared output: {output_name}"
-                )
-            value = produced[output_name]
-            step_output[output_name] = value
-            context[output_name] = value
-            if output_name.startswith("artifacts."):
-                artifact_key = output_name.split(".", 1)[1]
-                artifacts[artifact_key] = value
-
-        if step.updates_songgraph and "songgraph" in produced:
-            next_songgraph = produced["songgraph"]
-            if not isinstance(next_songgraph, dict):
-                raise PipelineExecutionError(f"step {step.name} produced invalid songgraph")
-            current_songgraph = next_songgraph
+        produced = load_cached_output(cache, cache_key, step)
+        cache_hit = produced is not None
+        if produced is None:
+            produced = handler(step_inputs, step)
 
-        step_results.append(
-            {
-                "index": index,
-                "name": step.name,
-                "version": step.version,
-                "cache_key": cache_key,
-                "outputs": step_output,
-            }
+        step_output, next_songgraph, step_result = finalize_step(
+            index=index,
+            step=step,
+            produced=produced,
+            cache_key=cache_key,
+            step_config=step_config,
+            cache=cache,
+            cache_hit=cache_hit,
         )
+        publish_outputs(step_output, context, artifacts)
+        if next_songgraph is not None:
+            current_songgraph = next_songgraph
+        step_results.append(step_result)
 
     return {
         "artifacts": artifacts,
@@ -147,13 +127,136 @@ def run_pipeline(
     }
 
 
-def _resolve_inputs(
+# Per-step building blocks shared by `run_pipeline` and the wave scheduler
+# (`features.song2daw.core.scheduler`): resolve inputs, compute the cache key,
+# reuse or produce outputs, then finalize and publish them.
+
+
+def require_handler(handlers: Mapping[str, PipelineHandler], step: PipelineStep) -> PipelineHandler:
+    """Return the handler registered for `step`, or raise `PipelineExecutionError`."""
+    handler = handlers.get(step.name)
+    if handler is None:
+        raise PipelineExecutionError(f"missing handler for step: {step.name}")
+    return handler
+
+
+def step_cache_key(
+    step: PipelineStep,
+    step_inputs: Mapping[str, Any],
+    step_config: Mapping[str, Any],
+    model_versions: Mapping[str, str] | None,
+) -> str:
+    """Cache key of one step execution (name, version, resolved inputs, config, model versions)."""
+    try:
+        return build_step_cache_key(
+            step_name=step.name,
+            step_version=step.version,
+            inputs=step_inputs,
+            config=step_config,
+            model_versions=model_versions,
+        )
+    except ValueError as exc:
+        raise PipelineExecutionError(f"step {step.name} cache key error: {exc}") from exc
+
+
+def finalize_step(
+    *,
+    index: int,
+    step: PipelineStep,
+    produced: Any,
+    cache_key: str,
+    step_config: Dict[str, Any],
+    cache: StepResultCache | None,
+    cache_hit: bool,
+) -> Tuple[Dict[str, Any], Dict[str, Any] | None, Dict[str, Any]]:
+    """Validate one step output and return (declared outputs, songgraph, step result)."""
+    if not isinstance(produced, Mapping):
+        raise PipelineExecutionError(f"step {step.name} returned non-mapping output")
+
+    step_output = {}
+    for output_name in step.outputs:
+        if output_name not in produced:
+            raise PipelineExecutionError(
+                f"step {step.name} missing declared output: {output_name}"
+            )
+        step_output[output_name] = produced[output_name]
+
+    next_songgraph = None
+    if step.updates_songgraph and "songgraph" in produced:
+        next_songgraph = produced["songgraph"]
+        if not isinstance(next_songgraph, dict):
+            raise PipelineExecutionError(f"step {step.name} produced invalid songgraph")
+
+    step_result = {
+        "index": index,
+        "name": step.name,
+        "version": step.version,
+        "cache_key": cache_key,
+        "config": step_config,
+        "outputs": step_output,
+    }
+    if cache is not None:
+        if not cache_hit:
+            cached_payload = dict(step_output)
+            if next_songgraph is not None:
+                cached_payload["songgraph"] = next_songgraph
+            cache.put(cache_key, cached_payload, step_name=step.name, step_version=step.version)
+        step_result["cache_hit"] = cache_hit
+    return step_output, next_songgraph, step_result
+
+
+def publish_outputs(
+    step_output: Mapping[str, Any],
+    context: Dict[str, Any],
+    artifacts: Dict[str, Any],
+) -> None:
+    """Expose a step's declared outputs to later steps (`artifacts.*` also by short name)."""
+    for output_name, value in step_output.items():
+        context[output_name] = value
+        if output_name.startswith("artifacts."):
+            artifacts[output_name.split(".", 1)[1]] = value
+
+
+def load_cached_output(
+    cache: StepResultCache | None,
+    cache_key: str,
+    step: PipelineStep,
+) -> Dict[str, Any] | None:
+    """Cached outputs for `cache_key`, or None when absent, stale or pointing at deleted files."""
+    if cache is None:
+        return None
+    cached = cache.get(cache_key)
+    if cached is None:
+        return None
+    # Entries written before a manifest gained an output are treated as misses.
+    if any(output_name not in cached for output_name in step.outputs):
+        return None
+    if outputs_have_missing_files(cached):
+        return None
+    return cached
+
+
+def outputs_have_missing_files(outputs: Mapping[str, Any]) -> bool:
+    """Return True when an output lists `items` whose `path` no longer exists on disk."""
+    for value in outputs.values():
+        items = value.get("items") if isinstance(value, Mapping) else None
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            path = item.get("path") if isinstance(item, Mapping) else None
+            if isinstance(path, str) and path and not os.path.isfile(path):
+                return True
+    return False
+
+
+def resolve_step_inputs(
     *,
     step: PipelineStep,
     context: Mapping[str, Any],
     artifacts: Mapping[str, Any],
     songgraph: Dict[str, Any] | None,
 ) -> Dict[str, Any]:
+    """Resolve a step's manifest inputs from the run context, artifacts and SongGraph."""
     resolved: Dict[str, Any] = {}
     for input_name in step.inputs:
         if input_name == "songgraph":
@@ -3,11 +3,23 @@
 from __future__ import annotations
 
 import json
+from concurrent.futures import Executor
 from hashlib import sha256
 from pathlib import Path
 from typing import Any, Dict, Mapping, Sequence
 
-from features.song2daw.core.pipeline import PipelineHandler, load_pipeline_steps, run_pipeline
+from features.song2daw.core.audio_io import file_signature
+from features.song2daw.core.cache import StepResultCache
+from features.song2daw.core.event_store import write_events_sidecar
+from features.song2daw.core.pipeline import (
+    PipelineExecutionError,
+    PipelineHandler,
+    PipelineStep,
+    load_pipeline_steps,
+    outputs_have_missing_files,
+    run_pipeline,
+)
+from features.song2daw.core.scheduler import run_pipeline_parallel
 from features.song2daw.core.steps import (
     make_effect_estimation_handler,
     make_event_extraction_handler,
@@ -36,14 +48,25 @@ def get_default_pipeline_paths(pipelines_dir: str | Path | None = None) -> tuple
     return tuple(base / name for name in DEFAULT_PIPELINE_MANIFESTS)
 
 
-def build_default_handlers() -> Dict[str, PipelineHandler]:
-    """Return deterministic built-in handler mapping for the default chain."""
+def build_default_handlers(
+    *,
+    stems_output_dir: str | None = None,
+    max_workers: int = 1,
+    stem_executor: Executor | None = None,
+) -> Dict[str, PipelineHandler]:
+    """Return deterministic built-in handler mapping for the default chain.
+
+    `stems_output_dir` lets SourceSeparation write real stem WAVs there;
+    `max_workers` bounds per-stem parallelism inside SourceSeparation and
+    EventExtraction. EventExtraction transcribes on `stem_executor` when given
+    (a long-lived `stem_process_pool`) instead of a pool per call.
+    """
     return {
         "Ingest": make_ingest_handler(),
         "TempoAnalysis": make_tempo_handler(),
         "StructureSegmentation": make_structure_handler(),
-        "SourceSeparation": make_source_separation_handler(),
-        "EventExtraction": make_event_extraction_handler(),
+        "SourceSeparation": make_source_separation_handler(output_dir=stems_output_dir, max_workers=max_workers),
+        "EventExtraction": make_event_extraction_handler(max_workers=max_workers, executor=stem_executor),
         "EffectEstimation": make_effect_estimation_handler(),
         "ProjectionReaper": make_projection_reaper_handler(),
     }
@@ -59,33 +82,268 @@ def run_default_song2daw_pipeline(
     model_versions: Mapping[str, str] | None = None,
     initial_artifacts: Mapping[str, Any] | None = None,
     initial_songgraph: Dict[str, Any] | None = None,
+    cache: StepResultCache | None = None,
+    max_workers: int = 1,
+    executor: Executor | None = None,
+    stem_workers: int | None = None,
+    stem_executor: Executor | None = None,
+    stems_output_dir: str | None = None,
 ) -> Dict[str, Any]:
-    """Execute the full default song2daw chain deterministically."""
+    """Execute the full default song2daw chain deterministically.
+
+    With `max_workers > 1` (or an explicit `executor`), independent steps run
+    concurrently in dependency waves; see `run_pipeline_parallel`. `stem_workers`
+    bounds per-stem parallelism inside SourceSeparation/EventExtraction (default:
+    `max_workers`), with stems transcribed on `stem_executor` when given. With
+    `stems_output_dir`, SourceSeparation writes separated stem WAVs there.
+    """
     paths: Sequence[Path] = get_default_pipeline_paths(pipelines_dir)
     steps = load_pipeline_steps(paths)
+    step_configs = _with_audio_signature(step_configs, audio_path)
+    step_configs = _with_stems_output_dir(step_configs, stems_output_dir)
 
-    handlers = build_default_handlers()
+    handlers = build_default_handlers(
+        stems_output_dir=stems_output_dir,
+        max_workers=_stem_workers(stem_workers, max_workers),
+        stem_executor=stem_executor,
+    )
     if handlers_override:
         handlers.update(dict(handlers_override))
 
-    return run_pipeline(
+    return _execute_steps(
         steps,
-        handlers=handlers,
+        handlers,
         inputs={"audio_path": audio_path, "stems_dir": stems_dir},
         initial_artifacts=initial_artifacts,
         songgraph=initial_songgraph,
         step_configs=step_configs,
         model_versions=model_versions,
+        cache=cache,
+        max_workers=max_workers,
+        executor=executor,
+    )
+
+
+def resume_pipeline(
+    previous_result: Mapping[str, Any],
+    *,
+    changed_step_configs: Mapping[str, Mapping[str, Any]] | None = None,
+    audio_path: str | None = None,
+    stems_dir: str | None = None,
+    pipelines_dir: str | Path | None = None,
+    handlers_override: Mapping[str, PipelineHandler] | None = None,
+    model_versions: Mapping[str, str] | None = None,
+    cache: StepResultCache | None = None,
+    max_workers: int = 1,
+    executor: Executor | None = None,
+    stem_workers: int | None = None,
+    stem_executor: Executor | None = None,
+    stems_output_dir: str | None = None,
+) -> Dict[str, Any]:
+    """Re-execute only the default chain suffix invalidated by `changed_step_configs`.
+
+    Steps before the first step whose config (or manifest version) differs from
+    `previous_result["steps"]` are reused as-is. The SongGraph snapshot needed at
+    the resume point comes from `cache` (or from the previous final SongGraph when
+    no later step updates it); when no snapshot is available the resume point
+    moves back to the step that produced it. Inputs and `model_versions` are
+    assumed identical to the previous run. Per-step snapshots of a wave-parallel
+    run (`"waves"` in the result) are not sequential states and are not reused.
+    The suffix runs like `run_default_song2daw_pipeline` (`max_workers`,
+    `executor`, `stem_workers`, `stem_executor`), wave-parallel when requested.
+    """
+    steps = load_pipeline_steps(get_default_pipeline_paths(pipelines_dir))
+    previous_steps = previous_result.get("steps")
+    if not isinstance(previous_steps, list):
+        raise PipelineExecutionError("previous result has no steps to resume from")
+
+    step_configs: Dict[str, Dict[str, Any]] = {}
+    for previous_step in previous_steps:
+        if isinstance(previous_step, Mapping) and isinstance(previous_step.get("name"), str):
+            step_configs[previous_step["name"]] = dict(previous_step.get("config") or {})
+    for name, config in (changed_step_configs or {}).items():
+        step_configs[str(name)] = dict(config or {})
+    if audio_path is not None:
+        step_configs = _with_audio_signature(step_configs, audio_path)
+    step_configs = _with_stems_output_dir(step_configs, stems_output_dir)
+
+    resume_index = _first_invalidated_step_index(steps, previous_steps, step_configs)
+    if resume_index >= len(steps):
+        reused = dict(previous_result)
+        reused["steps"] = [dict(step, cache_hit=True) for step in previous_steps]
+        return reused
+
+    resume_index, songgraph = _resolve_resume_snapshot(
+        steps,
+        previous_steps,
+        previous_result,
+        resume_index,
+        cache,
+    )
+
+    context: Dict[str, Any] = {}
+    if audio_path is not None:
+        context["audio_path"] = audio_path
+    if stems_dir is not None:
+        context["stems_dir"] = stems_dir
+    for previous_step in previous_steps[:resume_index]:
+        context.update(dict(previous_step.get("outputs") or {}))
+    artifacts = dict(previous_result.get("artifacts") or {})
+
+    handlers = build_default_handlers(
+        stems_output_dir=stems_output_dir,
+        max_workers=_stem_workers(stem_workers, max_workers),
+        stem_executor=stem_executor,
+    )
+    if handlers_override:
+        handlers.update(dict(handlers_override))
+
+    suffix = _execute_steps(
+        steps[resume_index:],
+        handlers,
+        inputs=context,
+        initial_artifacts=artifacts,
+        songgraph=songgraph,
+        step_configs=step_configs,
+        model_versions=model_versions,
+        cache=cache,
+        max_workers=max_workers,
+        executor=executor,
     )
 
+    step_results = [dict(step, cache_hit=True) for step in previous_steps[:resume_index]]
+    for step_result in suffix["steps"]:
+        step_result = dict(step_result)
+        step_result["index"] = resume_index + int(step_result["index"])
+        step_result.setdefault("cache_hit", False)
+        step_results.append(step_result)
+
+    resumed = {
+        "artifacts": suffix["artifacts"],
+        "songgraph": suffix["songgraph"],
+        "steps": step_results,
+    }
+    if "waves" in suffix:
+        # Marks the suffix snapshots as wave-local for the next resume.
+        resumed["waves"] = suffix["waves"]
+    return resumed
+
+
+def _stem_workers(stem_workers: int | None, max_workers: int) -> int:
+    return max(1, int(stem_workers if stem_workers is not None else max_workers or 1))
+
+
+def _execute_steps(
+    steps: Sequence[PipelineStep],
+    handlers: Mapping[str, PipelineHandler],
+    *,
+    max_workers: int,
+    executor: Executor | None,
+    **run_kwargs: Any,
+) -> Dict[str, Any]:
+    """Run `steps` wave-parallel when `max_workers > 1` or an `executor` is given, else sequentially."""
+    if executor is not None or int(max_workers or 1) > 1:
+        return run_pipeline_parallel(steps, handlers, max_workers=max_workers, executor=executor, **run_kwargs)
+    return run_pipeline(steps, handlers, **run_kwargs)
+
+
+def _with_audio_signature(
+    step_configs: Mapping[str, Mapping[str, Any]] | None,
+    audio_path: str,
+) -> Dict[str, Dict[str, Any]]:
+    """Key Ingest on the audio file's size/mtime so content changes invalidate it."""
+    configs = {str(name): dict(config or {}) for name, config in (step_configs or {}).items()}
+    signature = file_signature(audio_path)
+    if signature is None:
+        configs.get("Ingest", {}).pop("audio_signature", None)
+        return configs
+    configs.setdefault("Ingest", {})["audio_signature"] = signature
+    return configs
+
+
+def _with_stems_output_dir(
+    step_configs: Mapping[str, Mapping[str, Any]],
+    stems_output_dir: str | None,
+) -> Dict[str, Dict[str, Any]]:
+    """Key SourceSeparation on where stems are written (placeholder vs. real files)."""
+    configs = {str(name): dict(config or {}) for name, config in step_configs.items()}
+    if stems_output_dir:
+        configs.setdefault("SourceSeparation", {})["stems_output_dir"] = str(stems_output_dir)
+    else:
+        configs.get("SourceSeparation", {}).pop("stems_output_dir", None)
+    return configs
+
+
+def _first_invalidated_step_index(
+    steps: Sequence[PipelineStep],
+    previous_steps: Sequence[Any],
+    step_configs: Mapping[str, Mapping[str, Any]],
+) -> int:
+    for index, step in enumerate(steps):
+        if index >= len(previous_steps) or not isinstance(previous_steps[index], Mapping):
+            return index
+        previous_step = previous_steps[index]
+        if previous_step.get("name") != step.name or previous_step.get("version") != step.version:
+            return index
+        if dict(previous_step.get("config") or {}) != dict(step_configs.get(step.name) or {}):
+            return index
+        if outputs_have_missing_files(previous_step.get("outputs") or {}):
+            return index
+    return len(steps)
+
+
+def _resolve_resume_snapshot(
+    steps: Sequence[PipelineStep],
+    previous_steps: Sequence[Mapping[str, Any]],
+    previous_result: Mapping[str, Any],
+    resume_index: int,
+    cache: StepResultCache | None,
+) -> tuple[int, Dict[str, Any] | None]:
+    last_updating_index = max(
+        (index for index, step in enumerate(steps) if step.updates_songgraph),
+        default=-1,
+    )
+    while resume_index > 0:
+        producer_index = max(
+            (index for index in range(resume_index) if steps[index].updates_songgraph),
+            default=-1,
+        )
+        if producer_index < 0:
+            return resume_index, None
+        if producer_index == last_updating_index and isinstance(previous_result.get("songgraph"), dict):
+            return resume_index, previous_result["songgraph"]
+        if cache is not None and "waves" not in previous_result:
+            cached = cache.get(str(previous_steps[producer_index].get("cache_key") or ""))
+            if cached is not None and isinstance(cached.get("songgraph"), dict):
+                return resume_index, cached["songgraph"]
+        resume_index = producer_index
+    return 0, None
+
 
 def save_run_outputs(
     result: Mapping[str, Any],
     output_dir: str | Path,
     *,
     run_id: str | None = None,
+    columnar_events: bool = True,
 ) -> Path:
-    """Write deterministic run outputs (SongGraph/artifacts/run JSON) to disk."""
+    """Write deterministic run outputs (SongGraph/artifacts/run JSON) to disk.
+
+    With `columnar_events` (and NumPy), `artifacts.events` is stored once as an
+    `events.npy` sidecar and the JSON files carry a reference instead of items.
+    """
+    run_dir, _written = write_run_outputs(result, output_dir, run_id=run_id, columnar_events=columnar_events)
+    return run_dir
+
+
+def write_run_outputs(
+    result: Mapping[str, Any],
+    output_dir: str | Path,
+    *,
+    run_id: str | None = None,
+    columnar_events: bool = True,
+) -> tuple[Path, Dict[str, Any]]:
+    """Like `save_run_outputs`, but also return the result as written (events compacted)."""
     raw_output_dir = str(output_dir).strip()
     if not raw_output_dir:
         raise ValueError("output_dir must be a non-empty path")
@@ -95,6 +353,8 @@ def save_run_outputs(
     run_dir = base / f"song2daw_run_{resolved_run_id}"
     run_dir.mkdir(parents=True, exist_ok=True)
 
+    if columnar_events:
+        result = compact_run_result(result, run_dir)
     songgraph_payload = result.get("songgraph", {})
     artifacts_payload = result.get("artifacts", {})
     run_payload = dict(result)
@@ -111,7 +371,48 @@ def save_run_outputs(
         json.dumps(run_payload, indent=2, sort_keys=True, ensure_ascii=True),
         encoding="utf-8",
     )
-    return run_dir
+    return run_dir, run_payload
+
+
+def compact_run_result(result: Mapping[str, Any], run_dir: str | Path) -> Dict[str, Any]:
+    """Return `result` with every copy of `artifacts.events` replaced by a sidecar reference.
+
+    The sidecar is (re)written under `run_dir`. SongGraph EventNodes are kept;
+    only the artifact copies (top-level, step outputs, SongGraph artifacts) move.
+    Results that cannot be stored columnar are returned unchanged.
+    """
+    artifacts = result.get("artifacts")
+    events_ref = artifacts.get("events") if isinstance(artifacts, Mapping) else None
+    reference = write_events_sidecar(events_ref, run_dir)
+    if reference is None:
+        return dict(result)
+
+    compacted = dict(result)
+    compacted["artifacts"] = dict(artifacts, events=dict(reference))
+    steps = result.get("steps")
+    if isinstance(steps, list):
+        compacted["steps"] = [_with_events_output(step, reference) for step in steps]
+    songgraph = result.get("songgraph")
+    extraction = _nested_mapping(songgraph, ("artifacts", "event_extraction"))
+    if extraction is not None and "events" in extraction:
+        graph_artifacts = dict(songgraph["artifacts"], event_extraction=dict(extraction, events=dict(reference)))
+        compacted["songgraph"] = dict(songgraph, artifacts=graph_artifacts)
+    return compacted
+
+
+def _with_events_output(step: Any, reference: Mapping[str, Any]) -> Any:
+    outputs = step.get("outputs") if isinstance(step, Mapping) else None
+    if not isinstance(outputs, Mapping) or "artifacts.events" not in outputs:
+        return step
+    return dict(step, outputs=dict(outputs, **{"artifacts.events": dict(reference)}))
+
+
+def _nested_mapping(raw: Any, path: tuple[str, ...]) -> Mapping[str, Any] | None:
+    for key in path:
+        if not isinstance(raw, Mapping):
+            return None
+        raw = raw.get(key)
+    return raw if isinstance(raw, Mapping) else None
 
 
 def _build_run_id(result: Mapping[str, Any]) -> str:
@@ -0,0 +1,258 @@
+"""Dependency-wave scheduler for song2daw pipeline steps.
+
+Steps are grouped into waves from the manifests' declared `inputs`/`outputs`:
+every step in a wave only depends on steps from earlier waves, so a wave can run
+concurrently. Each step of a wave receives the same SongGraph snapshot and the
+per-step updates are merged back in manifest order, which keeps the merged graph
+identical to sequential execution as long as concurrent steps touch disjoint
+nodes/artifacts (true for the built-in chain).
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from features.song2daw.core.cache import StepResultCache
+from features.song2daw.core.pipeline import (
+    PipelineExecutionError,
+    PipelineHandler,
+    PipelineStep,
+    finalize_step,
+    load_cached_output,
+    publish_outputs,
+    require_handler,
+    resolve_step_inputs,
+    step_cache_key,
+)
+
+_NodeRank = Tuple[int, int]
+
+
+def build_step_dependencies(steps: Sequence[PipelineStep]) -> Tuple[Tuple[int, ...], ...]:
+    """Return, per step index, the indexes of earlier steps it must wait for."""
+    dependencies: List[set[int]] = [set() for _ in steps]
+    last_producer: Dict[str, int] = {}
+    readers: Dict[str, List[int]] = {}
+    last_graph_writer: int | None = None
+    graph_readers: List[int] = []
+
+    for index, step in enumerate(steps):
+        for input_name in step.inputs:
+            if input_name == "songgraph":
+                if last_graph_writer is not None:
+                    dependencies[index].add(last_graph_writer)
+                graph_readers.append(index)
+                continue
+            producer = last_producer.get(input_name)
+            if producer is not None:
+                dependencies[index].add(producer)
+            readers.setdefault(input_name, []).append(index)
+
+        for output_name in step.outputs:
+            # Overwriting an output must wait for its previous producer and readers.
+            producer = last_producer.get(output_name)
+            if producer is not None:
+                dependencies[index].add(producer)
+            dependencies[index].update(reader for reader in readers.get(output_name, []) if reader != index)
+            last_producer[output_name] = index
+            readers[output_name] = []
+
+        if step.updates_songgraph:
+            dependencies[index].update(reader for reader in graph_readers if reader != index)
+            graph_readers = []
+            last_graph_writer = index
+
+    return tuple(tuple(sorted(items)) for items in dependencies)
+
+
+def build_execution_waves(steps: Sequence[PipelineStep]) -> Tuple[Tuple[int, ...], ...]:
+    """Group step indexes into waves of mutually independent steps."""
+    dependencies = build_step_dependencies(steps)
+    depth: List[int] = []
+    for index in range(len(steps)):
+        depth.append(1 + max((depth[dep] for dep in dependencies[index]), default=-1))
+    waves: Dict[int, List[int]] = {}
+    for index, level in enumerate(depth):
+        waves.setdefault(level, []).append(index)
+    return tuple(tuple(waves[level]) for level in sorted(waves))
+
+
+def run_pipeline_parallel(
+    steps: Sequence[PipelineStep],
+    handlers: Mapping[str, PipelineHandler],
+    *,
+    inputs: Mapping[str, Any] | None = None,
+    initial_artifacts: Mapping[str, Any] | None = None,
+    songgraph: Dict[str, Any] | None = None,
+    step_configs: Mapping[str, Mapping[str, Any]] | None = None,
+    model_versions: Mapping[str, str] | None = None,
+    cache: StepResultCache | None = None,
+    max_workers: int | None = None,
+    executor: Executor | None = None,
+) -> Dict[str, Any]:
+    """Execute steps wave by wave, running independent steps concurrently.
+
+    Handlers run on `executor` when given (for example a `ProcessPoolExecutor`;
+    handlers, steps and inputs must then be picklable), otherwise on a thread pool
+    of `max_workers`. The result mirrors `run_pipeline` plus a `waves` listing.
+    """
+    waves = build_execution_waves(steps)
+    context: Dict[str, Any] = dict(inputs or {})
+    artifacts: Dict[str, Any] = dict(initial_artifacts or {})
+    current_songgraph = songgraph
+    node_ranks = _initial_node_ranks(songgraph)
+    step_results: Dict[int, Dict[str, Any]] = {}
+
+    owned_executor = None
+    if executor is None:
+        widest = max((len(wave) for wave in waves), default=1)
+        owned_executor = ThreadPoolExecutor(max_workers=max(1, min(int(max_workers or widest), widest)))
+        executor = owned_executor
+
+    try:
+        for wave in waves:
+            pending: List[Tuple[int, PipelineStep, Dict[str, Any], str, Any, bool]] = []
+            for index in wave:
+                step = steps[index]
+                handler = require_handler(handlers, step)
+                step_inputs = resolve_step_inputs(
+                    step=step,
+                    context=context,
+                    artifacts=artifacts,
+                    songgraph=current_songgraph,
+                )
+                step_config = dict((step_configs or {}).get(step.name) or {})
+                cache_key = step_cache_key(step, step_inputs, step_config, model_versions)
+                produced: Any = load_cached_output(cache, cache_key, step)
+                cache_hit = produced is not None
+                if produced is None:
+                    produced = executor.submit(handler, step_inputs, step)
+                pending.append((index, step, step_config, cache_key, produced, cache_hit))
+
+            updates: List[Tuple[int, Dict[str, Any]]] = []
+            for index, step, step_config, cache_key, produced, cache_hit in pending:
+                if isinstance(produced, Future):
+                    produced = produced.result()
+                step_output, next_songgraph, step_result = finalize_step(
+                    index=index,
+                    step=step,
+                    produced=produced,
+                    cache_key=cache_key,
+                    step_config=step_config,
+                    cache=cache,
+                    cache_hit=cache_hit,
+                )
+                publish_outputs(step_output, context, artifacts)
+                if next_songgraph is not None:
+                    updates.append((index, next_songgraph))
+                step_results[index] = step_result
+
+            if updates:
+                current_songgraph = merge_songgraph_updates(current_songgraph, updates, node_ranks)
+    finally:
+        if owned_executor is not None:
+            owned_executor.shutdown(wait=True)
+
+    return {
+        "artifacts": artifacts,
+        "songgraph": current_songgraph,
+        "steps": [step_results[index] for index in sorted(step_results)],
+        "waves": [[steps[index].name for index in wave] for wave in waves],
+    }
+
+
+def merge_songgraph_updates(
+    base: Mapping[str, Any] | None,
+    updates: Sequence[Tuple[int, Mapping[str, Any]]],
+    node_ranks: Dict[str, _NodeRank],
+) -> Dict[str, Any]:
+    """Merge SongGraphs produced from the same `base` snapshot, in step order.
+
+    Top-level keys and one level of nested mappings (`node_versions`,
+    `artifacts`, ...) changed by a step are applied on top of `base`; nodes are
+    upserted by id and ordered by the step that first introduced them, matching
+    sequential insertion order. `node_ranks` is updated in place.
+    """
+    if len(updates) == 1 and base is None:
+        index, graph = updates[0]
+        _rank_new_nodes(graph, index, node_ranks)
+        return dict(graph)
+
+    base_graph: Mapping[str, Any] = base or {}
+    merged: Dict[str, Any] = dict(base_graph)
+    nested_copies: set[str] = set()
+    base_nodes = _nodes_by_id(base_graph)
+    nodes = dict(base_nodes)
+    base_edges = [edge for edge in base_graph.get("edges") or [] if isinstance(edge, Mapping)]
+    edges = list(base_edges)
+
+    for index, graph in sorted(updates, key=lambda item: item[0]):
+        for key, value in graph.items():
+            if key in ("nodes", "edges"):
+                continue
+            base_value = base_graph.get(key)
+            if key in base_graph and (value is base_value or value == base_value):
+                continue
+            if isinstance(value, Mapping) and isinstance(base_value, Mapping):
+                if key not in nested_copies:
+                    current = merged.get(key)
+                    merged[key] = dict(current) if isinstance(current, Mapping) else {}
+                    nested_copies.add(key)
+                for sub_key, sub_value in value.items():
+                    if sub_key in base_value and (
+                        sub_value is base_value[sub_key] or sub_value == base_value[sub_key]
+                    ):
+                        continue
+                    merged[key][sub_key] = sub_value
+                for sub_key in base_value:
+                    if sub_key not in value:
+                        merged[key].pop(sub_key, None)
+                continue
+            merged[key] = value
+        for key in base_graph:
+            if key not in graph and key not in ("nodes", "edges"):
+                merged.pop(key, None)
+
+        graph_nodes = _nodes_by_id(graph)
+        for node_id, node in graph_nodes.items():
+            base_node = base_nodes.get(node_id)
+            if base_node is None or not (node is base_node or node == base_node):
+                nodes[node_id] = node
+        for node_id in base_nodes:
+            if node_id not in graph_nodes:
+                nodes.pop(node_id, None)
+        _rank_new_nodes(graph, index, node_ranks)
+
+        for edge in graph.get("edges") or []:
+            if isinstance(edge, Mapping) and edge not in base_edges and edge not in edges:
+                edges.append(edge)
+
+    merged["nodes"] = [
+        nodes[node_id]
+        for node_id in sorted(nodes, key=lambda node_id: node_ranks.get(node_id, (len(node_ranks), 0)))
+    ]
+    merged["edges"] = edges
+    return merged
+
+
+def _nodes_by_id(graph: Mapping[str, Any]) -> Dict[str, Any]:
+    nodes: Dict[str, Any] = {}
+    for node in graph.get("nodes") or []:
+        if isinstance(node, Mapping) and isinstance(node.get("id"), str):
+            nodes[node["id"]] = node
+    return nodes
+
+
+def _initial_node_ranks(graph: Mapping[str, Any] | None) -> Dict[str, _NodeRank]:
+    ranks: Dict[str, _NodeRank] = {}
+    if isinstance(graph, Mapping):
+        for position, node_id in enumerate(_nodes_by_id(graph)):
+            ranks[node_id] = (-1, position)
+    return ranks
+
+
+def _rank_new_nodes(graph: Mapping[str, Any], index: int, node_ranks: Dict[str, _NodeRank]) -> None:
+    for position, node_id in enumerate(_nodes_by_id(graph)):
+        if node_id not in node_ranks:
+            node_ranks[node_id] = (index, position)
@@ -0,0 +1,289 @@
+"""Chunked overlap-add source separation for song2daw.
+
+- Audio is read in fixed-size chunks that overlap by `overlap_sec`; each chunk is
+  passed to a pluggable `SeparationModel` and the per-role outputs are
+  cross-faded back together (linear ramps summing to 1 over every overlap).
+- Stems are streamed to 16-bit WAV files as chunks complete, so only the chunks
+  in flight are held in memory.
+- `SpectralMaskSeparator` is a pure-NumPy reference model (HPSS + frequency-band
+  soft masks) whose stems sum back to the input mix.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping, Protocol, Sequence, Tuple
+
+from features.song2daw.core import dsp
+from features.song2daw.core.audio_io import WavInfo, read_wav_info
+
+np = dsp.np
+
+
+class SeparationModel(Protocol):
+    """Callable separating one `(frames, channels)` float32 chunk into per-role chunks."""
+
+    name: str
+
+    def __call__(self, chunk: "np.ndarray", sample_rate: int, roles: Sequence[str]) -> Mapping[str, "np.ndarray"]:
+        ...
+
+
+@dataclass(frozen=True)
+class StemFile:
+    role: str
+    path: str
+    sample_rate: int
+    channels: int
+    frames: int
+
+
+class SpectralMaskSeparator:
+    """Reference separator: percussive/harmonic split, then frequency bands per role.
+
+    `drums` takes the percussive part (median-filter HPSS); `bass`, `vocals` and
+    `harmonic` split the harmonic part by band. Unknown role sets split the
+    harmonic part into equal log-spaced bands. Masks sum to 1 per bin.
+    """
+
+    name = "spectral_mask_v1"
+
+    _ROLE_BANDS: Dict[str, Tuple[float, float]] = {
+        "bass": (0.0, 200.0),
+        "vocals": (300.0, 3400.0),
+    }
+
+    def __init__(self, *, n_fft: int = 2048, hop_length: int = 512, kernel: int = 9) -> None:
+        self.n_fft = int(n_fft)
+        self.hop_length = int(hop_length)
+        self.kernel = int(kernel) | 1
+
+    def __call__(self, chunk: "np.ndarray", sample_rate: int, roles: Sequence[str]) -> Dict[str, "np.ndarray"]:
+        length = chunk.shape[0]
+        stems = {role: np.zeros_like(chunk) for role in roles}
+        if length == 0:
+            return stems
+        for channel in range(chunk.shape[1]):
+            spectrum = _stft(chunk[:, channel], self.n_fft, self.hop_length)
+            masks = self._masks(np.abs(spectrum), sample_rate, roles)
+            for role, mask in masks.items():
+                stems[role][:, channel] = _istft(spectrum * mask, self.n_fft, self.hop_length, length)
+        return stems
+
+    def _masks(self, magnitude: "np.ndarray", sample_rate: int, roles: Sequence[str]) -> Dict[str, "np.ndarray"]:
+        power = magnitude.astype(np.float32) ** 2
+        harmonic = _median_filter(power, self.kernel, axis=0)
+        percussive = _median_filter(power, self.kernel, axis=1)
+        total = harmonic**2 + percussive**2
+        percussive_mask = np.divide(percussive**2, total, out=np.full_like(total, 0.5), where=total > 0)
+        harmonic_mask = 1.0 - percussive_mask
+
+        freqs = np.fft.rfftfreq(self.n_fft, 1.0 / sample_rate)
+        tonal_roles = [role for role in roles if role != "drums"]
+        masks: Dict[str, "np.ndarray"] = {}
+        if "drums" in roles:
+            masks["drums"] = percussive_mask
+        else:
+            harmonic_mask = np.ones_like(harmonic_mask)
+        if not tonal_roles:
+            masks["drums"] = np.ones_like(percussive_mask)
+            return masks
+
+        band_weights = self._band_weights(freqs, tonal_roles)
+        for role, weight in band_weights.items():
+            masks[role] = harmonic_mask * weight[None, :]
+        return masks
+
+    def _band_weights(self, freqs: "np.ndarray", roles: Sequence[str]) -> Dict[str, "np.ndarray"]:
+        weights: Dict[str, "np.ndarray"] = {}
+        if set(roles) <= {"bass", "vocals", "harmonic"}:
+            remaining = np.ones_like(freqs)
+            for role in roles:
+                if role in self._ROLE_BANDS:
+                    low, high = self._ROLE_BANDS[role]
+                    weights[role] = ((freqs >= low) & (freqs < high)).astype(np.float64)
+                    remaining -= weights[role]
+            if "harmonic" in roles:
+                weights["harmonic"] = remaining
+            else:
+                # Without a catch-all role, hand uncovered bins to the last role.
+                weights[roles[-1]] = weights[roles[-1]] + remaining
+            return weights
+        edges = np.geomspace(20.0, max(freqs[-1], 21.0), len(roles) + 1)
+        edges[0], edges[-1] = -np.inf, np.inf
+        for index, role in enumerate(roles):
+            weights[role] = ((freqs >= edges[index]) & (freqs < edges[index + 1])).astype(np.float64)
+        return weights
+
+
+def separate_to_stems(
+    audio_path: str | Path,
+    output_dir: str | Path,
+    roles: Sequence[str],
+    *,
+    model: SeparationModel | None = None,
+    chunk_sec: float = 10.0,
+    overlap_sec: float = 0.5,
+    max_workers: int = 1,
+) -> Dict[str, StemFile]:
+    """Separate `audio_path` into one WAV per role under `output_dir`.
+
+    Chunks are separated on a thread pool of `max_workers` (NumPy FFTs release
+    the GIL) with at most `max_workers + 1` chunks in flight, then written in
+    order. Files are written under a temporary name and renamed once complete.
+    """
+    if not dsp.numpy_available():
+        raise RuntimeError("numpy is required for source separation")
+    model = model or SpectralMaskSeparator()
+    info = read_wav_info(audio_path)
+    overlap = max(0, int(overlap_sec * info.sample_rate))
+    chunk = max(overlap * 2 + 1, int(chunk_sec * info.sample_rate))
+    starts = list(range(0, max(1, info.frames - overlap), chunk - overlap))
+
+    target_dir = Path(output_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    writers = {role: _StemWriter(role, target_dir / f"{role}.wav", info) for role in roles}
+    pending_tail: Dict[str, "np.ndarray"] = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as pool:
+            in_flight: List[Tuple[int, Future]] = []
+            for index, start in enumerate(starts):
+                in_flight.append((index, pool.submit(_separate_chunk, model, audio_path, info, start, chunk, roles)))
+                while len(in_flight) > max(1, int(max_workers)):
+                    _write_next_chunk(in_flight, len(starts), overlap, info, writers, pending_tail)
+            while in_flight:
+                _write_next_chunk(in_flight, len(starts), overlap, info, writers, pending_tail)
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    return {role: writer.finish() for role, writer in writers.items()}
+
+
+def _separate_chunk(
+    model: SeparationModel,
+    audio_path: str | Path,
+    info: WavInfo,
+    start: int,
+    chunk: int,
+    roles: Sequence[str],
+) -> Mapping[str, "np.ndarray"]:
+    samples = dsp.read_wav_frames(audio_path, start, start + chunk, info=info)
+    separated = model(samples, info.sample_rate, roles)
+    missing = [role for role in roles if role not in separated]
+    if missing:
+        raise ValueError(f"separation model {model.name} did not return roles: {missing}")
+    return separated
+
+
+def _write_next_chunk(
+    in_flight: List[Tuple[int, Future]],
+    chunk_count: int,
+    overlap: int,
+    info: WavInfo,
+    writers: Mapping[str, "_StemWriter"],
+    pending_tail: Dict[str, "np.ndarray"],
+) -> None:
+    index, future = in_flight.pop(0)
+    separated = future.result()
+    is_first = index == 0
+    is_last = index == chunk_count - 1
+    for role, writer in writers.items():
+        block = np.asarray(separated[role], dtype=np.float32).reshape(-1, info.channels)
+        if overlap and block.shape[0] > overlap:
+            block = block.copy()
+            ramp = (np.arange(overlap, dtype=np.float32) + 0.5) / overlap
+            if not is_first:
+                block[:overlap] *= ramp[:, None]
+                block[:overlap] += pending_tail.pop(role)
+            if not is_last:
+                block[-overlap:] *= ramp[::-1, None]
+                pending_tail[role] = block[-overlap:]
+                block = block[:-overlap]
+        writer.write(block)
+
+
+class _StemWriter:
+    def __init__(self, role: str, path: Path, info: WavInfo) -> None:
+        self._role = role
+        self._path = path
+        self._tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        self._sample_rate = info.sample_rate
+        self._channels = info.channels
+        self._frames = 0
+        self._handle = wave.open(str(self._tmp_path), "wb")
+        self._handle.setnchannels(info.channels)
+        self._handle.setsampwidth(2)
+        self._handle.setframerate(info.sample_rate)
+
+    def write(self, block: "np.ndarray") -> None:
+        pcm = np.clip(np.round(block * 32767.0), -32768, 32767).astype("<i2")
+        self._handle.writeframes(pcm.tobytes())
+        self._frames += block.shape[0]
+
+    def finish(self) -> StemFile:
+        self._handle.close()
+        os.replace(self._tmp_path, self._path)
+        return StemFile(
+            role=self._role,
+            path=str(self._path),
+            sample_rate=self._sample_rate,
+            channels=self._channels,
+            frames=self._frames,
+        )
+
+    def abort(self) -> None:
+        try:
+            self._handle.close()
+        finally:
+            try:
+                os.remove(self._tmp_path)
+            except OSError:
+                pass
+
+
+def _stft(signal: "np.ndarray", n_fft: int, hop_length: int) -> "np.ndarray":
+    padded = np.pad(signal, (n_fft // 2, n_fft // 2 + n_fft))
+    count = (padded.size - n_fft) // hop_length + 1
+    frames = np.lib.stride_tricks.sliding_window_view(padded, n_fft)[::hop_length][:count]
+    return np.fft.rfft(frames * _hann(n_fft), axis=1)
+
+
+def _istft(spectrum: "np.ndarray", n_fft: int, hop_length: int, length: int) -> "np.ndarray":
+    window = _hann(n_fft)
+    frames = np.fft.irfft(spectrum, n_fft, axis=1) * window
+    total = (frames.shape[0] - 1) * hop_length + n_fft
+    output = np.zeros(total, dtype=np.float64)
+    norm = np.zeros(total, dtype=np.float64)
+    for index in range(frames.shape[0]):
+        offset = index * hop_length
+        output[offset : offset + n_fft] += frames[index]
+        norm[offset : offset + n_fft] += window**2
+    output = np.divide(output, norm, out=np.zeros_like(output), where=norm > 1e-8)
+    return output[n_fft // 2 : n_fft // 2 + length].astype(np.float32)
+
+
+def _median_filter(values: "np.ndarray", size: int, *, axis: int) -> "np.ndarray":
+    half = size // 2
+    pad = [(0, 0), (0, 0)]
+    pad[axis] = (half, half)
+    padded = np.pad(values, pad, mode="edge")
+    result = np.empty_like(values)
+    step = 256
+    for start in range(0, values.shape[0], step):
+        stop = min(values.shape[0], start + step)
+        if axis == 0:
+            window = np.lib.stride_tricks.sliding_window_view(padded[start : stop + 2 * half], size, axis=0)
+        else:
+            window = np.lib.stride_tricks.sliding_window_view(padded[start:stop], size, axis=1)
+        result[start:stop] = np.median(window, axis=-1)
+    return result
+
+
+def _hann(n_fft: int) -> "np.ndarray":
+    return np.hanning(n_fft + 1)[:-1]
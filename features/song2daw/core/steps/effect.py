@@ -3,9 +3,12 @@
 from __future__ import annotations
 
 from copy import deepcopy
+from functools import partial
 from hashlib import sha256
 from typing import Any, Callable, Dict, Mapping, Protocol
 
+from features.song2daw.core.graph import SongGraphBuilder
+
 
 class StepLike(Protocol):
     """Minimal step contract used by built-in handlers."""
@@ -19,9 +22,8 @@ def make_effect_estimation_handler(
     default_mix: float = 0.2,
 ) -> Callable[[Mapping[str, Any], StepLike], Dict[str, Any]]:
     """Return a two-argument handler compatible with `run_pipeline`."""
-    return lambda step_inputs, step: run_effect_estimation_step(
-        step_inputs,
-        step,
+    return partial(
+        run_effect_estimation_step,
         default_mix=default_mix,
     )
 
@@ -128,37 +130,15 @@ def _merge_songgraph(
     step_version: str,
     fx_artifact: Mapping[str, Any],
 ) -> Dict[str, Any]:
-    if isinstance(base_graph, Mapping):
-        graph = deepcopy(dict(base_graph))
-    else:
-        graph = {
-            "schema_version": "1.0.0",
-            "pipeline_version": step_version,
-            "timebase": {"audio": {"sr": 44100}, "musical": {"ppq": 960}},
-            "nodes": [],
-            "edges": [],
-        }
-
-    graph["pipeline_version"] = step_version
-    node_versions = graph.get("node_versions")
-    if not isinstance(node_versions, dict):
-        node_versions = {}
-    node_versions["EffectEstimation"] = step_version
-    graph["node_versions"] = node_versions
-
-    artifacts = graph.get("artifacts")
-    if not isinstance(artifacts, dict):
-        artifacts = {}
-    artifacts["effect_estimation"] = {"fx_suggestions": deepcopy(fx_artifact)}
-    graph["artifacts"] = artifacts
-
-    nodes = graph.get("nodes")
-    if not isinstance(nodes, list):
-        nodes = []
+    builder = SongGraphBuilder(base_graph, pipeline_version=step_version)
+    builder.set_step_version("EffectEstimation", step_version)
+    builder.set_artifact(
+        "effect_estimation",
+        {"fx_suggestions": deepcopy(fx_artifact)},
+    )
     for item in fx_artifact["items"]:
         source_id = item["source_id"]
-        _upsert_node(
-            nodes,
+        builder.upsert_node(
             {
                 "id": f"fx:{source_id}",
                 "type": "EffectNode",
@@ -168,20 +148,4 @@ def _merge_songgraph(
                 },
             },
         )
-    graph["nodes"] = nodes
-
-    edges = graph.get("edges")
-    if not isinstance(edges, list):
-        edges = []
-    graph["edges"] = edges
-    return graph
-
-
-def _upsert_node(nodes: list[Any], node: Mapping[str, Any]) -> None:
-    node_id = node.get("id")
-    for index, existing in enumerate(nodes):
-        if isinstance(existing, Mapping) and existing.get("id") == node_id:
-            nodes[index] = dict(node)
-            return
-    nodes.append(dict(node))
-
+    return builder.build()
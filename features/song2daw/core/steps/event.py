@@ -2,10 +2,17 @@
 
 from __future__ import annotations
 
+import os
 from copy import deepcopy
+from concurrent.futures import Executor
+from functools import partial
 from hashlib import sha256
 from typing import Any, Callable, Dict, Mapping, Protocol
 
+from features.song2daw.core import dsp
+from features.song2daw.core.graph import SongGraphBuilder
+from features.song2daw.core.transcription import EventColumns, StemJob, extract_stem_events
+
 
 class StepLike(Protocol):
     """Minimal step contract used by built-in handlers."""
@@ -18,13 +25,24 @@ def make_event_extraction_handler(
     *,
     midi_channel_start: int = 1,
     max_events_per_source: int | None = None,
+    analyze_audio: bool = True,
+    max_workers: int = 1,
+    executor: Executor | None = None,
+    onset_threshold: float = 1.0,
 ) -> Callable[[Mapping[str, Any], StepLike], Dict[str, Any]]:
-    """Return a two-argument handler compatible with `run_pipeline`."""
-    return lambda step_inputs, step: run_event_extraction_step(
-        step_inputs,
-        step,
+    """Return a two-argument handler compatible with `run_pipeline`.
+
+    A long-lived `executor` (see `transcription.stem_process_pool`) is reused by
+    every call; the handler is then no longer picklable.
+    """
+    return partial(
+        run_event_extraction_step,
         midi_channel_start=midi_channel_start,
         max_events_per_source=max_events_per_source,
+        analyze_audio=analyze_audio,
+        max_workers=max_workers,
+        executor=executor,
+        onset_threshold=onset_threshold,
     )
 
 
@@ -34,8 +52,19 @@ def run_event_extraction_step(
     *,
     midi_channel_start: int = 1,
     max_events_per_source: int | None = None,
+    analyze_audio: bool = True,
+    max_workers: int = 1,
+    executor: Executor | None = None,
+    onset_threshold: float = 1.0,
 ) -> Dict[str, Any]:
-    """Build deterministic event and MIDI proxy artifacts from sources + beatgrid."""
+    """Build deterministic event and MIDI proxy artifacts from sources + beatgrid.
+
+    When every source has a readable stem WAV in `artifacts.stems_generated` (and
+    NumPy is available), events come from per-stem onset detection and
+    monophonic pitch tracking, with stems processed on `executor` or on
+    `max_workers` spawned processes.
+    Otherwise one placeholder event per beat and source is emitted.
+    """
     if not isinstance(midi_channel_start, int) or not (1 <= midi_channel_start <= 16):
         raise ValueError("midi_channel_start must be in [1, 16]")
     if max_events_per_source is not None and (
@@ -48,38 +77,34 @@ def run_event_extraction_step(
     if len(beat_points) < 2:
         raise ValueError("artifacts.beatgrid must contain at least two beat timestamps")
 
-    if max_events_per_source is None:
-        limited_beats = beat_points
+    stem_paths = _stem_paths(step_inputs.get("artifacts.stems_generated"), source_items) if analyze_audio else None
+    if stem_paths is not None:
+        columns = extract_stem_events(
+            [
+                StemJob(path=path, channel=_midi_channel(midi_channel_start, index), default_note=60 + (index % 12))
+                for index, path in enumerate(stem_paths)
+            ],
+            max_workers=max_workers,
+            executor=executor,
+            onset_threshold=onset_threshold,
+        )
+        method = "onset_acf_pitch_v1"
     else:
-        limited_beats = beat_points[: max_events_per_source + 1]
+        columns = [_placeholder_columns(source, index, beat_points, midi_channel_start) for index, source in enumerate(source_items)]
+        method = "deterministic_placeholder_v1"
+
     events = []
     midi_tracks = []
-    for source_index, source in enumerate(source_items):
-        source_id = source["id"]
-        channel = ((midi_channel_start - 1 + source_index) % 16) + 1
-        track_events = []
-        for beat_index in range(len(limited_beats) - 1):
-            t0 = limited_beats[beat_index]
-            t1 = limited_beats[beat_index + 1]
-            velocity = _deterministic_velocity(source_id, beat_index)
-            event = {
-                "id": f"evt:{source_id}:{beat_index:03}",
-                "source_id": source_id,
-                "kind": "onset",
-                "t0_sec": t0,
-                "t1_sec": t1,
-                "velocity": velocity,
-                "midi_note": 60 + (source_index % 12),
-                "midi_channel": channel,
-            }
-            events.append(event)
-            track_events.append(event["id"])
-
+    for source, source_columns in zip(source_items, columns):
+        if max_events_per_source is not None:
+            source_columns = source_columns.head(max_events_per_source)
+        track_events = _event_items(source["id"], source_columns)
+        events.extend(track_events)
         midi_tracks.append(
             {
-                "source_id": source_id,
-                "channel": channel,
-                "event_ids": track_events,
+                "source_id": source["id"],
+                "channel": _midi_channel(midi_channel_start, len(midi_tracks)),
+                "event_ids": [event["id"] for event in track_events],
             }
         )
 
@@ -87,7 +112,7 @@ def run_event_extraction_step(
     events_artifact = {
         "items": events,
         "source_fingerprint": source_fingerprint,
-        "method": "deterministic_placeholder_v1",
+        "method": method,
     }
     midi_artifact = {
         "tracks": midi_tracks,
@@ -109,6 +134,62 @@ def run_event_extraction_step(
     }
 
 
+def _midi_channel(midi_channel_start: int, source_index: int) -> int:
+    return ((midi_channel_start - 1 + source_index) % 16) + 1
+
+
+def _stem_paths(stems_ref: Any, source_items: list[Dict[str, Any]]) -> list[str] | None:
+    if not dsp.numpy_available() or not isinstance(stems_ref, Mapping):
+        return None
+    by_source: Dict[str, str] = {}
+    for item in stems_ref.get("items") or []:
+        if isinstance(item, Mapping) and isinstance(item.get("path"), str) and item.get("format", "wav") == "wav":
+            by_source[str(item.get("source_id"))] = item["path"]
+    paths = [by_source.get(source["id"]) for source in source_items]
+    if not all(path and os.path.isfile(path) for path in paths):
+        return None
+    return paths
+
+
+def _placeholder_columns(
+    source: Mapping[str, Any],
+    source_index: int,
+    beat_points: list[float],
+    midi_channel_start: int,
+) -> EventColumns:
+    count = len(beat_points) - 1
+    return EventColumns(
+        t0=list(beat_points[:-1]),
+        t1=list(beat_points[1:]),
+        note=[60 + (source_index % 12)] * count,
+        velocity=[_deterministic_velocity(source["id"], beat_index) for beat_index in range(count)],
+        channel=[_midi_channel(midi_channel_start, source_index)] * count,
+        pitched=[False] * count,
+    )
+
+
+def _event_items(source_id: str, columns: EventColumns) -> list[Dict[str, Any]]:
+    # Columns are expanded once here; NumPy columns become plain Python values.
+    fields = [_as_list(getattr(columns, name)) for name in ("t0", "t1", "note", "velocity", "channel", "pitched")]
+    return [
+        {
+            "id": f"evt:{source_id}:{index:03}",
+            "source_id": source_id,
+            "kind": "note" if pitched else "onset",
+            "t0_sec": t0,
+            "t1_sec": t1,
+            "velocity": int(velocity),
+            "midi_note": int(note),
+            "midi_channel": int(channel),
+        }
+        for index, (t0, t1, note, velocity, channel, pitched) in enumerate(zip(*fields))
+    ]
+
+
+def _as_list(values: Any) -> list[Any]:
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
 def _extract_sources(sources_ref: Any) -> list[Dict[str, Any]]:
     if isinstance(sources_ref, Mapping):
         items = sources_ref.get("items")
@@ -164,39 +245,17 @@ def _merge_songgraph(
     events_artifact: Mapping[str, Any],
     midi_artifact: Mapping[str, Any],
 ) -> Dict[str, Any]:
-    if isinstance(base_graph, Mapping):
-        graph = deepcopy(dict(base_graph))
-    else:
-        graph = {
-            "schema_version": "1.0.0",
-            "pipeline_version": step_version,
-            "timebase": {"audio": {"sr": 44100}, "musical": {"ppq": 960}},
-            "nodes": [],
-            "edges": [],
-        }
-
-    graph["pipeline_version"] = step_version
-    node_versions = graph.get("node_versions")
-    if not isinstance(node_versions, dict):
-        node_versions = {}
-    node_versions["EventExtraction"] = step_version
-    graph["node_versions"] = node_versions
-
-    artifacts = graph.get("artifacts")
-    if not isinstance(artifacts, dict):
-        artifacts = {}
-    artifacts["event_extraction"] = {
-        "events": deepcopy(events_artifact),
-        "midi_optional": deepcopy(midi_artifact),
-    }
-    graph["artifacts"] = artifacts
-
-    nodes = graph.get("nodes")
-    if not isinstance(nodes, list):
-        nodes = []
+    builder = SongGraphBuilder(base_graph, pipeline_version=step_version)
+    builder.set_step_version("EventExtraction", step_version)
+    builder.set_artifact(
+        "event_extraction",
+        {
+            "events": deepcopy(events_artifact),
+            "midi_optional": deepcopy(midi_artifact),
+        },
+    )
     for event in events_artifact["items"]:
-        _upsert_node(
-            nodes,
+        builder.upsert_node(
             {
                 "id": event["id"],
                 "type": "EventNode",
@@ -213,19 +272,4 @@ def _merge_songgraph(
                 },
             },
         )
-    graph["nodes"] = nodes
-
-    edges = graph.get("edges")
-    if not isinstance(edges, list):
-        edges = []
-    graph["edges"] = edges
-    return graph
-
-
-def _upsert_node(nodes: list[Any], node: Mapping[str, Any]) -> None:
-    node_id = node.get("id")
-    for index, existing in enumerate(nodes):
-        if isinstance(existing, Mapping) and existing.get("id") == node_id:
-            nodes[index] = dict(node)
-            return
-    nodes.append(dict(node))
+    return builder.build()
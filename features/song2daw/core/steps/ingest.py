@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+import os
+from functools import partial
 from hashlib import sha256
 from typing import Any, Callable, Dict, Mapping, Protocol
 
+from features.song2daw.core.audio_io import DEFAULT_CHUNK_SIZE, probe_audio_file
+
 
 class StepLike(Protocol):
     """Minimal step contract used by built-in handlers."""
@@ -18,14 +22,17 @@ def make_ingest_handler(
     sample_rate: int = 44100,
     ppq: int = 960,
     schema_version: str = "1.0.0",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    use_mmap: bool = False,
 ) -> Callable[[Mapping[str, Any], StepLike], Dict[str, Any]]:
     """Return a two-argument handler compatible with `run_pipeline`."""
-    return lambda step_inputs, step: run_ingest_step(
-        step_inputs,
-        step,
+    return partial(
+        run_ingest_step,
         sample_rate=sample_rate,
         ppq=ppq,
         schema_version=schema_version,
+        chunk_size=chunk_size,
+        use_mmap=use_mmap,
     )
 
 
@@ -36,8 +43,15 @@ def run_ingest_step(
     sample_rate: int = 44100,
     ppq: int = 960,
     schema_version: str = "1.0.0",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    use_mmap: bool = False,
 ) -> Dict[str, Any]:
-    """Build canonical ingest artifacts and a seeded SongGraph fragment."""
+    """Build canonical ingest artifacts and a seeded SongGraph fragment.
+
+    When `audio_path` points to a readable file, the audio is fingerprinted by
+    streaming its content (SHA-256) and WAV metadata is decoded from the header;
+    otherwise the normalized path string is hashed as before.
+    """
     if not isinstance(sample_rate, int) or sample_rate < 1:
         raise ValueError("sample_rate must be a positive integer")
     if not isinstance(ppq, int) or ppq < 1:
@@ -48,15 +62,19 @@ def run_ingest_step(
     audio_path = _require_non_empty_str(step_inputs, "audio_path")
     stems_dir = _require_non_empty_str(step_inputs, "stems_dir")
 
-    audio_hash = _stable_text_hash(audio_path)
+    audio_probe = _probe_audio(audio_path, chunk_size=chunk_size, use_mmap=use_mmap)
+    audio_hash = audio_probe["sha256"] if audio_probe is not None else _stable_text_hash(audio_path)
     stems_hash = _stable_text_hash(stems_dir)
 
     audio_artifact = {
         "source": _normalize_text_path(audio_path),
         "id": f"audio:{audio_hash[:16]}",
         "sha256": audio_hash,
+        "fingerprint": "content" if audio_probe is not None else "path",
         "normalization": "none",
     }
+    if audio_probe is not None:
+        audio_artifact.update({key: value for key, value in audio_probe.items() if key != "sha256"})
     stems_artifact = {
         "source": _normalize_text_path(stems_dir),
         "id": f"stems:{stems_hash[:16]}",
@@ -99,3 +117,11 @@ def _normalize_text_path(text: str) -> str:
 def _stable_text_hash(text: str) -> str:
     return sha256(_normalize_text_path(text).encode("utf-8")).hexdigest()
 
+
+def _probe_audio(audio_path: str, *, chunk_size: int, use_mmap: bool) -> Dict[str, Any] | None:
+    if not os.path.isfile(audio_path):
+        return None
+    try:
+        return probe_audio_file(audio_path, chunk_size=chunk_size, use_mmap=use_mmap)
+    except OSError:
+        return None
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from functools import partial
 from hashlib import sha256
 from typing import Any, Callable, Dict, Mapping, Protocol
 
@@ -18,9 +19,8 @@ def make_projection_reaper_handler(
     project_name: str = "song2daw_project",
 ) -> Callable[[Mapping[str, Any], StepLike], Dict[str, Any]]:
     """Return a two-argument handler compatible with `run_pipeline`."""
-    return lambda step_inputs, step: run_projection_reaper_step(
-        step_inputs,
-        step,
+    return partial(
+        run_projection_reaper_step,
         project_name=project_name,
     )
 
@@ -2,10 +2,19 @@
 
 from __future__ import annotations
 
+import json
+import os
 from copy import deepcopy
+from functools import partial
 from hashlib import sha256
+from pathlib import Path
 from typing import Any, Callable, Dict, Mapping, Protocol
 
+from features.song2daw.core import dsp
+from features.song2daw.core.audio_io import read_wav_info
+from features.song2daw.core.graph import SongGraphBuilder
+from features.song2daw.core.separation import SeparationModel, SpectralMaskSeparator, StemFile, separate_to_stems
+
 
 class StepLike(Protocol):
     """Minimal step contract used by built-in handlers."""
@@ -17,12 +26,21 @@ class StepLike(Protocol):
 def make_source_separation_handler(
     *,
     source_roles: tuple[str, ...] = ("drums", "bass", "harmonic", "vocals"),
+    output_dir: str | None = None,
+    model: SeparationModel | None = None,
+    chunk_sec: float = 10.0,
+    overlap_sec: float = 0.5,
+    max_workers: int = 1,
 ) -> Callable[[Mapping[str, Any], StepLike], Dict[str, Any]]:
     """Return a two-argument handler compatible with `run_pipeline`."""
-    return lambda step_inputs, step: run_source_separation_step(
-        step_inputs,
-        step,
+    return partial(
+        run_source_separation_step,
         source_roles=source_roles,
+        output_dir=output_dir,
+        model=model,
+        chunk_sec=chunk_sec,
+        overlap_sec=overlap_sec,
+        max_workers=max_workers,
     )
 
 
@@ -31,18 +49,56 @@ def run_source_separation_step(
     step: StepLike,
     *,
     source_roles: tuple[str, ...] = ("drums", "bass", "harmonic", "vocals"),
+    output_dir: str | None = None,
+    model: SeparationModel | None = None,
+    chunk_sec: float = 10.0,
+    overlap_sec: float = 0.5,
+    max_workers: int = 1,
 ) -> Dict[str, Any]:
-    """Build deterministic source layer artifacts and SongGraph updates."""
+    """Build deterministic source layer artifacts and SongGraph updates.
+
+    With an `output_dir`, NumPy and a readable canonical WAV, the audio is
+    separated chunk by chunk with `model` (default `SpectralMaskSeparator`) and
+    one WAV per role is written under
+    `output_dir/<audio fingerprint>-<model>-<settings hash>/`;
+    `artifacts.stems_generated` then lists the real paths. Otherwise only
+    `path_hint`s are emitted.
+    """
     if not isinstance(source_roles, tuple) or not source_roles:
         raise ValueError("source_roles must be a non-empty tuple")
     if not all(isinstance(role, str) and role.strip() for role in source_roles):
         raise ValueError("source_roles must contain non-empty strings")
+    if not isinstance(chunk_sec, (int, float)) or float(chunk_sec) <= 0:
+        raise ValueError("chunk_sec must be positive")
+    if not isinstance(overlap_sec, (int, float)) or not (0.0 <= float(overlap_sec) < float(chunk_sec) / 2):
+        raise ValueError("overlap_sec must be in [0, chunk_sec / 2)")
 
     audio_ref = step_inputs.get("artifacts.audio_canonical")
     audio_fingerprint = _audio_fingerprint(audio_ref)
     if audio_fingerprint is None:
         raise ValueError("artifacts.audio_canonical must be a string or mapping")
 
+    stem_files = None
+    separation_model = model or SpectralMaskSeparator()
+    audio_file = _audio_source_path(audio_ref) if output_dir else None
+    if audio_file is not None:
+        stem_files = _separate(
+            audio_file,
+            Path(str(output_dir)) / _stem_folder_name(
+                audio_fingerprint,
+                separation_model,
+                source_roles,
+                chunk_sec=float(chunk_sec),
+                overlap_sec=float(overlap_sec),
+            ),
+            source_roles,
+            model=separation_model,
+            chunk_sec=float(chunk_sec),
+            overlap_sec=float(overlap_sec),
+            max_workers=int(max_workers),
+        )
+    method = "chunked_overlap_add_v1" if stem_files is not None else "deterministic_placeholder_v1"
+
     sources = []
     stems = []
     for role in source_roles:
@@ -55,25 +111,37 @@ def run_source_separation_step(
             "source_audio_fingerprint": audio_fingerprint,
         }
         sources.append(source_entry)
-        stems.append(
-            {
-                "source_id": source_id,
-                "stem_id": stem_id,
-                "path_hint": f"stems/{stem_id}.wav",
-                "format": "wav",
-            }
-        )
+        stem_entry = {
+            "source_id": source_id,
+            "stem_id": stem_id,
+            "path_hint": f"stems/{stem_id}.wav",
+            "format": "wav",
+        }
+        if stem_files is not None:
+            stem_file = stem_files[role]
+            stem_entry.update(
+                {
+                    "path_hint": stem_file.path,
+                    "path": stem_file.path,
+                    "sample_rate": stem_file.sample_rate,
+                    "channels": stem_file.channels,
+                    "frames": stem_file.frames,
+                }
+            )
+        stems.append(stem_entry)
 
     sources_artifact = {
         "items": sources,
         "source_audio_fingerprint": audio_fingerprint,
-        "method": "deterministic_placeholder_v1",
+        "method": method,
     }
     stems_artifact = {
         "items": stems,
         "source_audio_fingerprint": audio_fingerprint,
-        "method": "deterministic_placeholder_v1",
+        "method": method,
     }
+    if stem_files is not None:
+        stems_artifact["model"] = separation_model.name
 
     songgraph = _merge_songgraph(
         step_inputs.get("songgraph"),
@@ -90,6 +158,87 @@ def run_source_separation_step(
     }
 
 
+def _audio_source_path(audio_ref: Any) -> str | None:
+    if not dsp.numpy_available():
+        return None
+    if isinstance(audio_ref, Mapping):
+        if audio_ref.get("format") not in (None, "wav"):
+            return None
+        audio_ref = audio_ref.get("source")
+    if isinstance(audio_ref, str) and audio_ref.strip() and os.path.isfile(audio_ref):
+        return audio_ref
+    return None
+
+
+def _stem_folder_name(
+    audio_fingerprint: str,
+    model: SeparationModel,
+    roles: tuple[str, ...],
+    *,
+    chunk_sec: float,
+    overlap_sec: float,
+) -> str:
+    # Stems depend on the model's parameters, the role set (band split) and the
+    # chunking, so all of them key the folder alongside audio content + model.
+    params = {key: value for key, value in sorted(vars(model).items()) if not key.startswith("_")}
+    settings = json.dumps(
+        {"params": params, "roles": list(roles), "chunk_sec": chunk_sec, "overlap_sec": overlap_sec},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=repr,
+    )
+    settings_hash = sha256(settings.encode("utf-8")).hexdigest()[:8]
+    return f"{audio_fingerprint[:16]}-{model.name}-{settings_hash}"
+
+
+def _separate(
+    audio_file: str,
+    target_dir: Path,
+    roles: tuple[str, ...],
+    *,
+    model: SeparationModel,
+    chunk_sec: float,
+    overlap_sec: float,
+    max_workers: int,
+) -> Dict[str, StemFile] | None:
+    existing = _existing_stems(target_dir, roles)
+    if existing is not None:
+        return existing
+    try:
+        return separate_to_stems(
+            audio_file,
+            target_dir,
+            roles,
+            model=model,
+            chunk_sec=chunk_sec,
+            overlap_sec=overlap_sec,
+            max_workers=max_workers,
+        )
+    except ValueError:
+        return None
+
+
+def _existing_stems(target_dir: Path, roles: tuple[str, ...]) -> Dict[str, StemFile] | None:
+    # Stems are renamed into place only once complete, and the folder is keyed by
+    # audio content, model and separation settings, so a full set on disk can be
+    # reused as-is.
+    stems = {}
+    for role in roles:
+        path = target_dir / f"{role}.wav"
+        try:
+            info = read_wav_info(path)
+        except (OSError, ValueError):
+            return None
+        stems[role] = StemFile(
+            role=role,
+            path=str(path),
+            sample_rate=info.sample_rate,
+            channels=info.channels,
+            frames=info.frames,
+        )
+    return stems
+
+
 def _audio_fingerprint(audio_ref: Any) -> str | None:
     if isinstance(audio_ref, str):
         normalized = audio_ref.strip().replace("\\", "/")
@@ -114,40 +263,18 @@ def _merge_songgraph(
     stems_artifact: Mapping[str, Any],
     audio_fingerprint: str,
 ) -> Dict[str, Any]:
-    if isinstance(base_graph, Mapping):
-        graph = deepcopy(dict(base_graph))
-    else:
-        graph = {
-            "schema_version": "1.0.0",
-            "pipeline_version": step_version,
-            "timebase": {"audio": {"sr": 44100}, "musical": {"ppq": 960}},
-            "nodes": [],
-            "edges": [],
-        }
-
-    graph["pipeline_version"] = step_version
-    node_versions = graph.get("node_versions")
-    if not isinstance(node_versions, dict):
-        node_versions = {}
-    node_versions["SourceSeparation"] = step_version
-    graph["node_versions"] = node_versions
-
-    artifacts = graph.get("artifacts")
-    if not isinstance(artifacts, dict):
-        artifacts = {}
-    artifacts["source_separation"] = {
-        "sources": deepcopy(sources_artifact),
-        "stems_generated": deepcopy(stems_artifact),
-    }
-    graph["artifacts"] = artifacts
-
-    nodes = graph.get("nodes")
-    if not isinstance(nodes, list):
-        nodes = []
+    builder = SongGraphBuilder(base_graph, pipeline_version=step_version)
+    builder.set_step_version("SourceSeparation", step_version)
+    builder.set_artifact(
+        "source_separation",
+        {
+            "sources": deepcopy(sources_artifact),
+            "stems_generated": deepcopy(stems_artifact),
+        },
+    )
     for source in sources_artifact["items"]:
         node_id = f"source:{audio_fingerprint[:12]}:{source['role']}"
-        _upsert_node(
-            nodes,
+        builder.upsert_node(
             {
                 "id": node_id,
                 "type": "SourceNode",
@@ -158,20 +285,4 @@ def _merge_songgraph(
                 },
             },
         )
-    graph["nodes"] = nodes
-
-    edges = graph.get("edges")
-    if not isinstance(edges, list):
-        edges = []
-    graph["edges"] = edges
-    return graph
-
-
-def _upsert_node(nodes: list[Any], node: Mapping[str, Any]) -> None:
-    node_id = node.get("id")
-    for index, existing in enumerate(nodes):
-        if isinstance(existing, Mapping) and existing.get("id") == node_id:
-            nodes[index] = dict(node)
-            return
-    nodes.append(dict(node))
-
+    return builder.build()
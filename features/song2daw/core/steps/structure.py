@@ -2,10 +2,15 @@
 
 from __future__ import annotations
 
+import os
 from copy import deepcopy
+from functools import partial
 from hashlib import sha256
 from typing import Any, Callable, Dict, Mapping, Protocol
 
+from features.song2daw.core import dsp
+from features.song2daw.core.graph import SongGraphBuilder
+
 
 class StepLike(Protocol):
     """Minimal step contract used by built-in handlers."""
@@ -18,13 +23,20 @@ def make_structure_handler(
     *,
     section_span_beats: int = 8,
     confidence: float = 1.0,
+    analyze_audio: bool = True,
+    kernel_beats: int = 8,
+    novelty_threshold: float = 0.3,
+    block_sec: float = 30.0,
 ) -> Callable[[Mapping[str, Any], StepLike], Dict[str, Any]]:
     """Return a two-argument handler compatible with `run_pipeline`."""
-    return lambda step_inputs, step: run_structure_segmentation_step(
-        step_inputs,
-        step,
+    return partial(
+        run_structure_segmentation_step,
         section_span_beats=section_span_beats,
         confidence=confidence,
+        analyze_audio=analyze_audio,
+        kernel_beats=kernel_beats,
+        novelty_threshold=novelty_threshold,
+        block_sec=block_sec,
     )
 
 
@@ -34,12 +46,27 @@ def run_structure_segmentation_step(
     *,
     section_span_beats: int = 8,
     confidence: float = 1.0,
+    analyze_audio: bool = True,
+    kernel_beats: int = 8,
+    novelty_threshold: float = 0.3,
+    block_sec: float = 30.0,
 ) -> Dict[str, Any]:
-    """Build deterministic structure sections and SongGraph updates."""
+    """Build deterministic structure sections and SongGraph updates.
+
+    When the canonical audio is a readable WAV file and NumPy is available,
+    boundaries are novelty peaks of a banded beat-synchronous chroma/timbre
+    self-similarity matrix (`beat_chroma_novelty_v1`), at least
+    `section_span_beats` apart. Otherwise the beatgrid is sliced into fixed
+    `section_span_beats` windows (`deterministic_placeholder_v1`).
+    """
     if not isinstance(section_span_beats, int) or section_span_beats < 1:
         raise ValueError("section_span_beats must be a positive integer")
     if not isinstance(confidence, (int, float)) or not (0.0 <= float(confidence) <= 1.0):
         raise ValueError("confidence must be in [0.0, 1.0]")
+    if not isinstance(kernel_beats, int) or kernel_beats < 1:
+        raise ValueError("kernel_beats must be a positive integer")
+    if not isinstance(novelty_threshold, (int, float)) or not (0.0 <= float(novelty_threshold) <= 1.0):
+        raise ValueError("novelty_threshold must be in [0.0, 1.0]")
 
     audio_ref = step_inputs.get("artifacts.audio_canonical")
     audio_fingerprint = _audio_fingerprint(audio_ref)
@@ -50,15 +77,30 @@ def run_structure_segmentation_step(
     if len(beat_points) < 2:
         raise ValueError("artifacts.beatgrid must contain at least two beat timestamps")
 
-    sections = _build_sections(
-        beat_points=beat_points,
-        section_span_beats=section_span_beats,
-        confidence=float(confidence),
-    )
+    sections = None
+    audio_file = _audio_source_path(audio_ref) if analyze_audio else None
+    if audio_file is not None:
+        sections = _analyze_sections(
+            audio_file,
+            beat_points=beat_points,
+            min_section_beats=section_span_beats,
+            kernel_beats=kernel_beats,
+            novelty_threshold=float(novelty_threshold),
+            default_confidence=float(confidence),
+            block_sec=float(block_sec),
+        )
+    method = "beat_chroma_novelty_v1"
+    if sections is None:
+        sections = _build_sections(
+            beat_points=beat_points,
+            section_span_beats=section_span_beats,
+            confidence=float(confidence),
+        )
+        method = "deterministic_placeholder_v1"
     sections_artifact = {
         "sections": sections,
         "source_audio_fingerprint": audio_fingerprint,
-        "method": "deterministic_placeholder_v1",
+        "method": method,
     }
 
     songgraph = _merge_songgraph(
@@ -106,21 +148,78 @@ def _build_sections(
         if end <= start:
             break
         section_index += 1
-        sections.append(
-            {
-                "id": f"section_{section_index:03}",
-                "label": f"Section {section_index}",
-                "t0_sec": beat_points[start],
-                "t1_sec": beat_points[end],
-                "start_beat_index": start,
-                "end_beat_index": end,
-                "confidence": confidence,
-            }
-        )
+        sections.append(_section(section_index, beat_points, start, end, confidence))
         start = end
     return sections
 
 
+def _section(
+    section_index: int,
+    beat_points: list[float],
+    start: int,
+    end: int,
+    confidence: float,
+) -> Dict[str, Any]:
+    return {
+        "id": f"section_{section_index:03}",
+        "label": f"Section {section_index}",
+        "t0_sec": beat_points[start],
+        "t1_sec": beat_points[end],
+        "start_beat_index": start,
+        "end_beat_index": end,
+        "confidence": confidence,
+    }
+
+
+def _audio_source_path(audio_ref: Any) -> str | None:
+    if not dsp.numpy_available():
+        return None
+    if isinstance(audio_ref, Mapping):
+        if audio_ref.get("format") not in (None, "wav"):
+            return None
+        audio_ref = audio_ref.get("source")
+    if isinstance(audio_ref, str) and audio_ref.strip() and os.path.isfile(audio_ref):
+        return audio_ref
+    return None
+
+
+def _analyze_sections(
+    audio_file: str,
+    *,
+    beat_points: list[float],
+    min_section_beats: int,
+    kernel_beats: int,
+    novelty_threshold: float,
+    default_confidence: float,
+    block_sec: float,
+) -> list[Dict[str, Any]] | None:
+    try:
+        features = dsp.beat_sync_features(audio_file, dsp.np.asarray(beat_points), block_sec=block_sec)
+    except (OSError, ValueError):
+        return None
+    if features.shape[0] < 2:
+        return None
+    band = dsp.banded_self_similarity(features, 2 * kernel_beats)
+    novelty = dsp.checkerboard_novelty(band, kernel_beats)
+    boundaries = [int(index) for index in dsp.pick_boundaries(
+        novelty,
+        min_spacing=min_section_beats,
+        threshold=novelty_threshold,
+    )]
+
+    edges = [0, *boundaries, len(beat_points) - 1]
+    sections = []
+    for section_index, (start, end) in enumerate(zip(edges, edges[1:]), start=1):
+        if start > 0:
+            score = float(novelty[start])
+        elif end < len(beat_points) - 1:
+            score = float(novelty[end])
+        else:
+            score = default_confidence
+        sections.append(_section(section_index, beat_points, start, end, round(min(1.0, score), 4)))
+    return sections
+
+
 def _audio_fingerprint(audio_ref: Any) -> str | None:
     if isinstance(audio_ref, str):
         normalized = audio_ref.strip().replace("\\", "/")
@@ -144,37 +243,15 @@ def _merge_songgraph(
     sections_artifact: Mapping[str, Any],
     audio_fingerprint: str,
 ) -> Dict[str, Any]:
-    if isinstance(base_graph, Mapping):
-        graph = deepcopy(dict(base_graph))
-    else:
-        graph = {
-            "schema_version": "1.0.0",
-            "pipeline_version": step_version,
-            "timebase": {"audio": {"sr": 44100}, "musical": {"ppq": 960}},
-            "nodes": [],
-            "edges": [],
-        }
-
-    graph["pipeline_version"] = step_version
-    node_versions = graph.get("node_versions")
-    if not isinstance(node_versions, dict):
-        node_versions = {}
-    node_versions["StructureSegmentation"] = step_version
-    graph["node_versions"] = node_versions
-
-    artifacts = graph.get("artifacts")
-    if not isinstance(artifacts, dict):
-        artifacts = {}
-    artifacts["structure_segmentation"] = {"sections": deepcopy(sections_artifact)}
-    graph["artifacts"] = artifacts
-
-    nodes = graph.get("nodes")
-    if not isinstance(nodes, list):
-        nodes = []
+    builder = SongGraphBuilder(base_graph, pipeline_version=step_version)
+    builder.set_step_version("StructureSegmentation", step_version)
+    builder.set_artifact(
+        "structure_segmentation",
+        {"sections": deepcopy(sections_artifact)},
+    )
     for section in sections_artifact["sections"]:
         node_id = f"struct:{audio_fingerprint[:12]}:{section['id']}"
-        _upsert_node(
-            nodes,
+        builder.upsert_node(
             {
                 "id": node_id,
                 "type": "StructureNode",
@@ -189,20 +266,4 @@ def _merge_songgraph(
                 },
             },
         )
-    graph["nodes"] = nodes
-
-    edges = graph.get("edges")
-    if not isinstance(edges, list):
-        edges = []
-    graph["edges"] = edges
-    return graph
-
-
-def _upsert_node(nodes: list[Any], node: Mapping[str, Any]) -> None:
-    node_id = node.get("id")
-    for index, existing in enumerate(nodes):
-        if isinstance(existing, Mapping) and existing.get("id") == node_id:
-            nodes[index] = dict(node)
-            return
-    nodes.append(dict(node))
-
+    return builder.build()
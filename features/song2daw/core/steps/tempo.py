@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
-from copy import deepcopy
+import os
+from functools import partial
 from hashlib import sha256
 from typing import Any, Callable, Dict, Mapping, Protocol
 
+from features.song2daw.core import dsp
+from features.song2daw.core.graph import SongGraphBuilder
+
 
 class StepLike(Protocol):
     """Minimal step contract used by built-in handlers."""
@@ -19,14 +23,25 @@ def make_tempo_handler(
     default_bpm: float = 120.0,
     beat_interval_sec: float = 0.5,
     beats_count: int = 16,
+    analyze_audio: bool = True,
+    min_bpm: float = 60.0,
+    max_bpm: float = 200.0,
+    n_fft: int = 2048,
+    hop_length: int = 512,
+    block_sec: float = 30.0,
 ) -> Callable[[Mapping[str, Any], StepLike], Dict[str, Any]]:
     """Return a two-argument handler compatible with `run_pipeline`."""
-    return lambda step_inputs, step: run_tempo_analysis_step(
-        step_inputs,
-        step,
+    return partial(
+        run_tempo_analysis_step,
         default_bpm=default_bpm,
         beat_interval_sec=beat_interval_sec,
         beats_count=beats_count,
+        analyze_audio=analyze_audio,
+        min_bpm=min_bpm,
+        max_bpm=max_bpm,
+        n_fft=n_fft,
+        hop_length=hop_length,
+        block_sec=block_sec,
     )
 
 
@@ -37,29 +52,67 @@ def run_tempo_analysis_step(
     default_bpm: float = 120.0,
     beat_interval_sec: float = 0.5,
     beats_count: int = 16,
+    analyze_audio: bool = True,
+    min_bpm: float = 60.0,
+    max_bpm: float = 200.0,
+    n_fft: int = 2048,
+    hop_length: int = 512,
+    block_sec: float = 30.0,
 ) -> Dict[str, Any]:
-    """Build deterministic tempo/beatgrid artifacts and SongGraph updates."""
+    """Build deterministic tempo/beatgrid artifacts and SongGraph updates.
+
+    When the canonical audio is a readable WAV file and NumPy is available, tempo
+    and beats come from onset autocorrelation + dynamic-programming beat tracking
+    (`onset_autocorr_dp_v1`). Otherwise a fixed grid of `beats_count` beats every
+    `beat_interval_sec` is emitted (`deterministic_placeholder_v1`).
+    """
     if not isinstance(default_bpm, (int, float)) or float(default_bpm) <= 0:
         raise ValueError("default_bpm must be positive")
     if not isinstance(beat_interval_sec, (int, float)) or float(beat_interval_sec) <= 0:
         raise ValueError("beat_interval_sec must be positive")
     if not isinstance(beats_count, int) or beats_count < 2:
         raise ValueError("beats_count must be an integer >= 2")
+    if not isinstance(min_bpm, (int, float)) or not isinstance(max_bpm, (int, float)):
+        raise ValueError("min_bpm and max_bpm must be numbers")
+    if float(min_bpm) <= 0 or float(max_bpm) <= float(min_bpm):
+        raise ValueError("bpm range must satisfy 0 < min_bpm < max_bpm")
+    if not isinstance(hop_length, int) or hop_length < 1:
+        raise ValueError("hop_length must be a positive integer")
+    if not isinstance(n_fft, int) or n_fft < hop_length:
+        raise ValueError("n_fft must be an integer >= hop_length")
 
     audio_ref = step_inputs.get("artifacts.audio_canonical")
     audio_fingerprint = _audio_fingerprint(audio_ref)
     if audio_fingerprint is None:
         raise ValueError("artifacts.audio_canonical must be a string or mapping")
 
-    beatgrid_points = [round(i * float(beat_interval_sec), 6) for i in range(beats_count)]
-    downbeats = [point for index, point in enumerate(beatgrid_points) if index % 4 == 0]
-    bpm = round(float(default_bpm), 4)
+    analysis = None
+    audio_file = _audio_source_path(audio_ref) if analyze_audio else None
+    if audio_file is not None:
+        analysis = _analyze_beats(
+            audio_file,
+            min_bpm=float(min_bpm),
+            max_bpm=float(max_bpm),
+            n_fft=n_fft,
+            hop_length=hop_length,
+            block_sec=float(block_sec),
+        )
+
+    if analysis is not None:
+        bpm, confidence, beatgrid_points, downbeats = analysis
+        method = "onset_autocorr_dp_v1"
+    else:
+        beatgrid_points = [round(i * float(beat_interval_sec), 6) for i in range(beats_count)]
+        downbeats = [point for index, point in enumerate(beatgrid_points) if index % 4 == 0]
+        bpm = round(float(default_bpm), 4)
+        confidence = 1.0
+        method = "deterministic_placeholder_v1"
 
     tempo_artifact = {
         "bpm": bpm,
-        "confidence": 1.0,
+        "confidence": confidence,
         "source_audio_fingerprint": audio_fingerprint,
-        "method": "deterministic_placeholder_v1",
+        "method": method,
     }
     beatgrid_artifact = {
         "beats_sec": beatgrid_points,
@@ -82,6 +135,47 @@ def run_tempo_analysis_step(
     }
 
 
+def _audio_source_path(audio_ref: Any) -> str | None:
+    if not dsp.numpy_available():
+        return None
+    if isinstance(audio_ref, Mapping):
+        if audio_ref.get("format") not in (None, "wav"):
+            return None
+        audio_ref = audio_ref.get("source")
+    if isinstance(audio_ref, str) and audio_ref.strip() and os.path.isfile(audio_ref):
+        return audio_ref
+    return None
+
+
+def _analyze_beats(
+    audio_file: str,
+    *,
+    min_bpm: float,
+    max_bpm: float,
+    n_fft: int,
+    hop_length: int,
+    block_sec: float,
+) -> tuple[float, float, list[float], list[float]] | None:
+    try:
+        envelope = dsp.onset_strength_envelope(
+            audio_file,
+            n_fft=n_fft,
+            hop_length=hop_length,
+            block_sec=block_sec,
+        )
+    except (OSError, ValueError):
+        return None
+    bpm, confidence = dsp.estimate_tempo(envelope, min_bpm=min_bpm, max_bpm=max_bpm)
+    if bpm <= 0:
+        return None
+    beats = dsp.track_beats(envelope, bpm)
+    if beats.size < 2:
+        return None
+    phase = dsp.pick_downbeat_phase(envelope, beats)
+    beats_sec = [round(float(value), 6) for value in envelope.frames_to_seconds(beats)]
+    return round(bpm, 4), round(confidence, 4), beats_sec, beats_sec[phase::4]
+
+
 def _audio_fingerprint(audio_ref: Any) -> str | None:
     if isinstance(audio_ref, str):
         normalized = audio_ref.strip().replace("\\", "/")
@@ -106,36 +200,15 @@ def _merge_songgraph(
     beatgrid_artifact: Mapping[str, Any],
     node_id: str,
 ) -> Dict[str, Any]:
-    if isinstance(base_graph, Mapping):
-        graph = deepcopy(dict(base_graph))
-    else:
-        graph = {
-            "schema_version": "1.0.0",
-            "pipeline_version": step_version,
-            "timebase": {"audio": {"sr": 44100}, "musical": {"ppq": 960}},
-            "nodes": [],
-            "edges": [],
-        }
-
-    graph["pipeline_version"] = step_version
-    node_versions = graph.get("node_versions")
-    if not isinstance(node_versions, dict):
-        node_versions = {}
-    node_versions["TempoAnalysis"] = step_version
-    graph["node_versions"] = node_versions
-
-    artifacts = graph.get("artifacts")
-    if not isinstance(artifacts, dict):
-        artifacts = {}
-    artifacts["tempo_analysis"] = {
-        "tempo": dict(tempo_artifact),
-        "beatgrid": dict(beatgrid_artifact),
-    }
-    graph["artifacts"] = artifacts
-
-    nodes = graph.get("nodes")
-    if not isinstance(nodes, list):
-        nodes = []
+    builder = SongGraphBuilder(base_graph, pipeline_version=step_version)
+    builder.set_step_version("TempoAnalysis", step_version)
+    builder.set_artifact(
+        "tempo_analysis",
+        {
+            "tempo": dict(tempo_artifact),
+            "beatgrid": dict(beatgrid_artifact),
+        },
+    )
     tempo_node = {
         "id": node_id,
         "type": "TimeNode",
@@ -145,21 +218,5 @@ def _merge_songgraph(
             "beat_count": len(beatgrid_artifact["beats_sec"]),
         },
     }
-    _upsert_node(nodes, tempo_node)
-    graph["nodes"] = nodes
-
-    edges = graph.get("edges")
-    if not isinstance(edges, list):
-        edges = []
-    graph["edges"] = edges
-    return graph
-
-
-def _upsert_node(nodes: list[Any], node: Mapping[str, Any]) -> None:
-    node_id = node.get("id")
-    for index, existing in enumerate(nodes):
-        if isinstance(existing, Mapping) and existing.get("id") == node_id:
-            nodes[index] = dict(node)
-            return
-    nodes.append(dict(node))
-
+    builder.upsert_node(tempo_node)
+    return builder.build()
@@ -0,0 +1,264 @@
+"""Onset + monophonic pitch event extraction for song2daw stems.
+
+- Each stem is streamed twice: a short-window spectral-flux pass places onsets,
+  a long-window pass yields frame energy (velocity) and an FFT autocorrelation
+  pitch track (MIDI note). Both share `hop_length`, so frames line up.
+- Events are kept in `EventColumns` (one NumPy array per field, ~19 bytes per
+  event) and only expanded to dicts when artifacts are built.
+- Stems are independent, so `extract_stem_events` fans them out over a process
+  pool; workers receive paths and return columns. Pools spawn their workers
+  (`stem_process_pool`): forking the threaded host process can deadlock them.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from bisect import bisect_left
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+from features.song2daw.core import dsp
+from features.song2daw.core.audio_io import WavInfo, read_wav_info
+
+np = dsp.np
+
+_TARGET_SAMPLE_RATE = 22050
+
+
+@dataclass(frozen=True)
+class EventColumns:
+    """Columnar note events: `t0`/`t1` seconds, MIDI `note`/`velocity`/`channel`, `pitched` flag.
+
+    Columns are NumPy arrays; plain lists are accepted so placeholder events can
+    share the same shape without NumPy.
+    """
+
+    t0: "np.ndarray"
+    t1: "np.ndarray"
+    note: "np.ndarray"
+    velocity: "np.ndarray"
+    channel: "np.ndarray"
+    pitched: "np.ndarray"
+
+    def __len__(self) -> int:
+        return len(self.t0)
+
+    @classmethod
+    def empty(cls) -> "EventColumns":
+        return cls(
+            t0=np.zeros(0, dtype=np.float64),
+            t1=np.zeros(0, dtype=np.float64),
+            note=np.zeros(0, dtype=np.uint8),
+            velocity=np.zeros(0, dtype=np.uint8),
+            channel=np.zeros(0, dtype=np.uint8),
+            pitched=np.zeros(0, dtype=np.bool_),
+        )
+
+    def head(self, count: int) -> "EventColumns":
+        return EventColumns(
+            t0=self.t0[:count],
+            t1=self.t1[:count],
+            note=self.note[:count],
+            velocity=self.velocity[:count],
+            channel=self.channel[:count],
+            pitched=self.pitched[:count],
+        )
+
+
+@dataclass(frozen=True)
+class StemJob:
+    """One stem to transcribe; `default_note` is used for unpitched (e.g. drum) onsets."""
+
+    path: str
+    channel: int
+    default_note: int = 60
+
+
+def stem_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Return a process pool for `extract_stem_events` whose workers are spawned, not forked.
+
+    Callers that transcribe repeatedly should keep one pool and pass it as `executor`.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max(1, int(max_workers or 1)),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def extract_stem_events(
+    jobs: Sequence[StemJob],
+    *,
+    max_workers: int = 1,
+    executor: Executor | None = None,
+    onset_threshold: float = 1.0,
+    min_gap_sec: float = 0.05,
+    onset_n_fft: int = 1024,
+    n_fft: int = 2048,
+    hop_length: int = 256,
+    min_hz: float = 40.0,
+    max_hz: float = 1000.0,
+    voicing_threshold: float = 0.6,
+) -> List[EventColumns]:
+    """Transcribe every stem in `jobs`, returning columns in job order.
+
+    With `max_workers > 1` (or an explicit `executor`) stems are processed in
+    parallel; each worker streams its stem from disk, so memory per worker stays
+    bounded by one analysis block. Without `executor`, a `stem_process_pool` is
+    started for this call only.
+    """
+    options = {
+        "onset_threshold": float(onset_threshold),
+        "min_gap_sec": float(min_gap_sec),
+        "onset_n_fft": int(onset_n_fft),
+        "n_fft": int(n_fft),
+        "hop_length": int(hop_length),
+        "min_hz": float(min_hz),
+        "max_hz": float(max_hz),
+        "voicing_threshold": float(voicing_threshold),
+    }
+    if executor is None and (int(max_workers or 1) <= 1 or len(jobs) <= 1):
+        return [_transcribe_stem(job, options) for job in jobs]
+    if executor is not None:
+        return list(executor.map(_transcribe_stem, jobs, [options] * len(jobs)))
+    with stem_process_pool(min(int(max_workers), len(jobs))) as pool:
+        return list(pool.map(_transcribe_stem, jobs, [options] * len(jobs)))
+
+
+def _transcribe_stem(job: StemJob, options: dict) -> EventColumns:
+    path = Path(job.path)
+    info = read_wav_info(path)
+    envelope = dsp.onset_strength_envelope(
+        path,
+        n_fft=options["onset_n_fft"],
+        hop_length=options["hop_length"],
+        target_sample_rate=_TARGET_SAMPLE_RATE,
+    )
+    energy, midi, voicing = _pitch_features(path, info, envelope.sample_rate, options)
+    frame_count = min(envelope.values.size, energy.size)
+    frame_rate = envelope.frame_rate
+    min_gap = max(1, int(round(options["min_gap_sec"] * frame_rate)))
+    onsets = _pick_onsets(envelope.values[:frame_count], threshold=options["onset_threshold"], min_gap=min_gap)
+    peak_db = 10.0 * np.log10(np.maximum(energy[:frame_count], 1e-12))
+    if frame_count == 0:
+        return EventColumns.empty()
+    reference_db = float(peak_db.max())
+    # Flux cannot see a note already sounding at the first frame.
+    if (onsets.size == 0 or onsets[0] >= min_gap) and float(peak_db[:min_gap].max()) > reference_db - 30.0:
+        onsets = np.insert(onsets, 0, 0)
+    # A hard cut at the end of the file reads as a last, very short onset.
+    if onsets.size and frame_count - onsets[-1] < min_gap:
+        onsets = onsets[:-1]
+    if onsets.size == 0:
+        return EventColumns.empty()
+    ends = np.append(onsets[1:], frame_count)
+
+    notes = np.full(onsets.size, job.default_note, dtype=np.uint8)
+    velocities = np.empty(onsets.size, dtype=np.uint8)
+    pitched = np.zeros(onsets.size, dtype=np.bool_)
+    voiced = voicing >= options["voicing_threshold"]
+    for index, (start, stop) in enumerate(zip(onsets, ends)):
+        # Level and pitch are read just after the attack, where they are most stable.
+        body = slice(start, max(start + 1, min(stop, start + int(frame_rate * 0.25))))
+        level = float(peak_db[body].max()) - reference_db
+        velocities[index] = int(np.clip(round(127.0 + level * 2.0), 1, 127))
+        body_voiced = voiced[body]
+        if body_voiced.sum() * 2 >= body_voiced.size:
+            notes[index] = int(np.clip(round(float(np.median(midi[body][body_voiced]))), 0, 127))
+            pitched[index] = True
+
+    return EventColumns(
+        t0=np.round(onsets / frame_rate, 6),
+        t1=np.round(ends / frame_rate, 6),
+        note=notes,
+        velocity=velocities,
+        channel=np.full(onsets.size, job.channel, dtype=np.uint8),
+        pitched=pitched,
+    )
+
+
+def _pitch_features(
+    path: Path,
+    info: WavInfo,
+    sample_rate: float,
+    options: dict,
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    n_fft = options["n_fft"]
+    min_lag = max(2, int(sample_rate / options["max_hz"]))
+    max_lag = min(n_fft // 2 - 1, int(np.ceil(sample_rate / options["min_hz"])))
+    # Hann-window autocorrelation bias, divided out so voicing is ~1 for periodic frames.
+    window = np.hanning(n_fft + 1)[:-1]
+    window_acf = np.fft.irfft(np.abs(np.fft.rfft(window, 2 * n_fft)) ** 2)[: max_lag + 2]
+    window_acf = window_acf / window_acf[0]
+
+    energy, midi, voicing = [], [], []
+    for magnitudes in dsp.iter_magnitude_blocks(
+        path,
+        n_fft=n_fft,
+        hop_length=options["hop_length"],
+        target_sample_rate=_TARGET_SAMPLE_RATE,
+        info=info,
+    ):
+        power = magnitudes.astype(np.float64) ** 2
+        energy.append(power.sum(axis=1))
+        acf = np.fft.irfft(power, n_fft, axis=1)[:, : max_lag + 2]
+        zero = acf[:, :1]
+        acf = np.divide(acf, zero * window_acf, out=np.zeros_like(acf), where=zero > 1e-12)
+        block_midi, block_voicing = _acf_pitch(acf, min_lag, max_lag, sample_rate)
+        midi.append(block_midi)
+        voicing.append(block_voicing)
+
+    if not energy:
+        empty = np.zeros(0, dtype=np.float64)
+        return empty, empty, empty
+    return np.concatenate(energy), np.concatenate(midi), np.concatenate(voicing)
+
+
+def _acf_pitch(
+    acf: "np.ndarray",
+    min_lag: int,
+    max_lag: int,
+    sample_rate: float,
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    search = acf[:, min_lag : max_lag + 1]
+    peak = np.argmax(search, axis=1)
+    strength = search[np.arange(search.shape[0]), peak]
+    # Prefer the shortest lag whose peak is close to the best (avoids octave-down errors).
+    candidates = search >= (strength[:, None] * 0.9)
+    is_local_max = np.zeros_like(candidates)
+    is_local_max[:, 1:-1] = (search[:, 1:-1] >= search[:, :-2]) & (search[:, 1:-1] >= search[:, 2:])
+    first = np.argmax(candidates & is_local_max, axis=1)
+    has_first = (candidates & is_local_max).any(axis=1)
+    peak = np.where(has_first, first, peak)
+    strength = search[np.arange(search.shape[0]), peak]
+
+    lag = (peak + min_lag).astype(np.float64)
+    rows = np.arange(acf.shape[0])
+    inner = (lag > min_lag) & (lag < max_lag)
+    left = acf[rows, np.clip(lag.astype(int) - 1, 0, acf.shape[1] - 1)]
+    centre = acf[rows, lag.astype(int)]
+    right = acf[rows, np.clip(lag.astype(int) + 1, 0, acf.shape[1] - 1)]
+    denominator = left - 2.0 * centre + right
+    offset = np.divide(0.5 * (left - right), denominator, out=np.zeros_like(lag), where=inner & (denominator < 0))
+    frequency = sample_rate / np.maximum(lag + np.clip(offset, -0.5, 0.5), 1.0)
+    midi = 69.0 + 12.0 * np.log2(frequency / 440.0)
+    return midi, np.clip(strength, 0.0, 1.0)
+
+
+def _pick_onsets(envelope: "np.ndarray", *, threshold: float, min_gap: int) -> "np.ndarray":
+    if envelope.size < 3:
+        return np.zeros(0, dtype=np.int64)
+    is_peak = np.zeros(envelope.size, dtype=bool)
+    is_peak[1:-1] = (envelope[1:-1] > envelope[:-2]) & (envelope[1:-1] >= envelope[2:])
+    candidates = np.flatnonzero(is_peak & (envelope >= threshold))
+    picked: List[int] = []
+    for frame in candidates[np.argsort(-envelope[candidates], kind="stable")]:
+        frame = int(frame)
+        position = bisect_left(picked, frame)
+        if position > 0 and frame - picked[position - 1] < min_gap:
+            continue
+        if position < len(picked) and picked[position] - frame < min_gap:
+            continue
+        picked.insert(position, frame)
+    return np.array(picked, dtype=np.int64)
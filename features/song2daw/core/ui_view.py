@@ -8,6 +8,11 @@ from hashlib import sha256
 from pathlib import Path
 from typing import Any, Dict, Iterable, Mapping
 
+from features.song2daw.core import dsp
+from features.song2daw.core.event_store import is_columnar_events, open_events_sidecar
+
+np = dsp.np
+
 try:
     from jsonschema import Draft202012Validator
 except ImportError:  # pragma: no cover
@@ -20,8 +25,14 @@ def build_ui_view(
     run_id: str = "",
     audio_path: str = "",
     stems_dir: str = "",
+    run_dir: str = "",
 ) -> Dict[str, Any]:
-    """Build a deterministic UI view-model from a pipeline run result."""
+    """Build a deterministic UI view-model from a pipeline run result.
+
+    Columnar `artifacts.events` references are read from their `events.npy`
+    sidecar (memory-mapped, looked up in `run_dir` first) column by column; only
+    the emitted MIDI notes become dicts.
+    """
     artifacts = _as_mapping(run_result.get("artifacts"))
     songgraph = _as_mapping(run_result.get("songgraph"))
 
@@ -45,10 +56,18 @@ def build_ui_view(
     ]
 
     sections = _extract_sections(artifacts.get("sections"))
-    events = _extract_events(artifacts.get("events"))
-    events_by_source = _group_events_by_source(events)
+    events_ref = artifacts.get("events")
+    if is_columnar_events(events_ref):
+        events_by_source = _sidecar_event_columns(events_ref, run_dir or None)
+    else:
+        events_by_source = _event_columns(_group_events_by_source(_extract_events(events_ref)))
 
-    duration_sec = _compute_duration(beats=beats, downbeats=downbeats, sections=sections, events=events)
+    duration_sec = _compute_duration(
+        beats=beats,
+        downbeats=downbeats,
+        sections=sections,
+        events_t1=[max(columns["t1_sec"]) for columns in events_by_source.values()],
+    )
 
     sources = _extract_sources(artifacts.get("sources"))
     stems_by_source = _extract_stem_map(artifacts.get("stems_generated"))
@@ -157,7 +176,7 @@ def _build_tracks(
     duration_sec: float,
     sources: list[Dict[str, Any]],
     stems_by_source: Mapping[str, str],
-    events_by_source: Mapping[str, list[Dict[str, Any]]],
+    events_by_source: Mapping[str, Mapping[str, list[Any]]],
     artifacts: Mapping[str, Any],
     audio_path: str,
 ) -> list[Dict[str, Any]]:
@@ -189,7 +208,7 @@ def _build_tracks(
         source_id = source["id"]
         source_name = source["name"]
         stem_asset = _normalize_path(stems_by_source.get(source_id, ""))
-        source_events = list(events_by_source.get(source_id, []))
+        source_events = events_by_source.get(source_id)
 
         clip_t0, clip_t1 = _events_bounds(source_events, duration_sec=duration_sec)
         audio_tracks.append(
@@ -215,18 +234,24 @@ def _build_tracks(
         )
 
         if source_events:
-            notes = []
-            for event in source_events:
-                notes.append(
-                    {
-                        "t0_sec": event["t0_sec"],
-                        "dur_sec": max(0.01, event["t1_sec"] - event["t0_sec"]),
-                        "pitch": event["midi_note"],
-                        "vel": event["velocity"],
-                        "chan": event["midi_channel"],
-                        "label": event["kind"],
-                    }
+            notes = [
+                {
+                    "t0_sec": t0,
+                    "dur_sec": max(0.01, t1 - t0),
+                    "pitch": pitch,
+                    "vel": vel,
+                    "chan": chan,
+                    "label": label,
+                }
+                for t0, t1, pitch, vel, chan, label in zip(
+                    source_events["t0_sec"],
+                    source_events["t1_sec"],
+                    source_events["midi_note"],
+                    source_events["velocity"],
+                    source_events["midi_channel"],
+                    source_events["kind"],
                 )
+            ]
             midi_tracks.append(
                 {
                     "id": f"trk_{_safe_id(source_id)}_midi",
@@ -403,28 +428,76 @@ def _group_events_by_source(events: Iterable[Dict[str, Any]]) -> Dict[str, list[
     return grouped
 
 
+def _event_columns(grouped: Mapping[str, list[Dict[str, Any]]]) -> Dict[str, Dict[str, list[Any]]]:
+    keys = ("t0_sec", "t1_sec", "midi_note", "velocity", "midi_channel", "kind")
+    return {
+        source_id: {key: [event[key] for event in events] for key in keys}
+        for source_id, events in grouped.items()
+    }
+
+
+def _sidecar_event_columns(events_ref: Mapping[str, Any], run_dir: str | None) -> Dict[str, Dict[str, list[Any]]]:
+    """Per-source event columns from the memory-mapped sidecar, filtered and sorted like `_extract_events`."""
+    records = open_events_sidecar(events_ref, run_dir)
+    if records is None or not len(records):
+        return {}
+    source_indexes: Dict[str, list[int]] = {}
+    for source_index, source_id in enumerate(events_ref.get("sources") or []):
+        source_id = str(source_id or "").strip()
+        if source_id:
+            source_indexes.setdefault(source_id, []).append(source_index)
+    kinds = [str(kind or "event") for kind in events_ref.get("kinds") or []]
+    t0 = np.asarray(records["t0_sec"], dtype=np.float64)
+    t1 = np.asarray(records["t1_sec"], dtype=np.float64)
+    source = np.asarray(records["source"])
+    valid = (t0 >= 0) & (t1 >= t0)
+    t0 = np.round(t0, 6)
+    t1 = np.round(t1, 6)
+    # Ids are `evt:<source>:<ordinal:03>`; within a source they order by the padded ordinal text.
+    ordinal_text = np.char.zfill(np.asarray(records["ordinal"]).astype("U10"), 3)
+    velocity = np.clip(np.asarray(records["velocity"], dtype=np.int64), 1, 127)
+    midi_note = np.clip(np.asarray(records["midi_note"], dtype=np.int64), 0, 127)
+    midi_channel = np.clip(np.asarray(records["midi_channel"], dtype=np.int64), 1, 16)
+    kind = np.asarray(records["kind"])
+
+    grouped: Dict[str, Dict[str, list[Any]]] = {}
+    for source_id in sorted(source_indexes):
+        rows = np.flatnonzero(valid & np.isin(source, source_indexes[source_id]))
+        if not len(rows):
+            continue
+        rows = rows[np.lexsort((ordinal_text[rows], t1[rows], t0[rows]))]
+        grouped[source_id] = {
+            "t0_sec": t0[rows].tolist(),
+            "t1_sec": t1[rows].tolist(),
+            "midi_note": midi_note[rows].tolist(),
+            "velocity": velocity[rows].tolist(),
+            "midi_channel": midi_channel[rows].tolist(),
+            "kind": [kinds[index] for index in kind[rows].tolist()],
+        }
+    return grouped
+
+
 def _compute_duration(
     *,
     beats: list[float],
     downbeats: list[float],
     sections: list[Mapping[str, Any]],
-    events: list[Mapping[str, Any]],
+    events_t1: list[float],
 ) -> float:
     candidates: list[float] = [1.0]
     candidates.extend(beats)
     candidates.extend(downbeats)
     for section in sections:
         candidates.append(float(section.get("t1_sec", 0.0)))
-    for event in events:
-        candidates.append(float(event.get("t1_sec", 0.0)))
+    candidates.extend(float(value) for value in events_t1)
     return round(max(candidates), 6)
 
 
-def _events_bounds(events: list[Dict[str, Any]], *, duration_sec: float) -> tuple[float, float]:
-    if not events:
+def _events_bounds(events: Mapping[str, list[Any]] | None, *, duration_sec: float) -> tuple[float, float]:
+    if not events or not events["t0_sec"]:
         return 0.0, duration_sec
-    t0 = min(event["t0_sec"] for event in events)
-    t1 = max(event["t1_sec"] for event in events)
+    t0 = min(events["t0_sec"])
+    t1 = max(events["t1_sec"])
     if t1 <= t0:
         t1 = min(duration_sec, t0 + 0.01)
     return round(t0, 6), round(max(t1, t0 + 0.01), 6)
@@ -1,4 +1,22 @@
-from backend.composition.render_execute import CompositionRenderExecutionService
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from backend.composition import render_execute
+from backend.composition.render_execute import (
+    CompositionRenderExecutionService,
+    _MAX_OVERLAY_DEPTH,
+    _assign_overlay_lanes,
+    _run_ffmpeg_process,
+    parse_ffmpeg_progress,
+)
+from backend.composition.proxy_media import CompositionProxyStore
+from backend.composition.render_jobs import CompositionRenderJobQueue
 
 
 def _build_plan(duration_sec: float = 4.0):
@@ -189,3 +207,524 @@ def test_render_execute_applies_optional_effects_and_exposes_execution_diagnosti
     assert int(execution.get("video_overlay_count") or 0) >= 1
     assert int(execution.get("audio_mix_input_count") or 0) >= 1
     assert str(execution.get("command_mode") or "") == "timeline_layers"
+
+
+def test_parse_ffmpeg_progress_reports_fraction_speed_and_end():
+    running = parse_ffmpeg_progress(
+        ["frame=60", "out_time_us=2000000", "out_time=00:00:02.000000", "speed=1.5x", "progress=continue"],
+        duration_sec=4.0,
+    )
+    assert running["fraction"] == 0.5
+    assert running["out_time_sec"] == 2.0
+    assert running["frame"] == 60
+    assert running["speed"] == 1.5
+    assert running["finished"] is False
+    done = parse_ffmpeg_progress(["out_time_us=N/A", "speed=N/A", "progress=end"], duration_sec=4.0)
+    assert done["fraction"] == 1.0
+    assert done["finished"] is True
+
+
+def test_run_ffmpeg_process_streams_progress_and_can_be_cancelled():
+    script = (
+        "import sys, time\n"
+        "for step in range(1, 3):\n"
+        "    print(f'out_time_us={step * 1000000}'); print('progress=continue'); sys.stdout.flush()\n"
+        "time.sleep(30)\n"
+    )
+    seen = []
+    cancel = threading.Event()
+
+    def _on_progress(progress):
+        seen.append(progress["fraction"])
+        if len(seen) == 2:
+            cancel.set()
+
+    started = time.time()
+    out = _run_ffmpeg_process(
+        [sys.executable, "-c", script],
+        timeout_sec=60.0,
+        duration_sec=4.0,
+        on_progress=_on_progress,
+        cancel_event=cancel,
+    )
+    assert seen == [0.25, 0.5]
+    assert out["error"] == "cancelled"
+    assert time.time() - started < 10.0
+
+
+class _FakeRenderService:
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.running = []
+        self.peak_by_scope = {}
+        self.peak_total = 0
+
+    def plan(self, *, scope_key, manifest, export_plan, execute=False, use_cache=True, quality="final"):
+        return {"scope_key": scope_key, "status": "planned", "output_path": f"/tmp/{manifest['name']}.mp4"}
+
+    def run(self, planned, *, timeout_sec, on_progress=None, cancel_event=None):
+        with self.lock:
+            self.running.append(planned["scope_key"])
+            self.peak_total = max(self.peak_total, len(self.running))
+            scope_count = self.running.count(planned["scope_key"])
+            self.peak_by_scope[planned["scope_key"]] = max(self.peak_by_scope.get(planned["scope_key"], 0), scope_count)
+        if on_progress is not None:
+            on_progress({"fraction": 0.5, "out_time_sec": 1.0, "speed": 1.0})
+        self.release.wait(5.0)
+        with self.lock:
+            self.running.remove(planned["scope_key"])
+        return dict(planned, status="ok")
+
+
+def test_render_job_queue_runs_scopes_in_parallel_and_each_scope_in_order():
+    service = _FakeRenderService()
+    queue = CompositionRenderJobQueue(service, max_workers=4)
+    submit = lambda scope, name: queue.submit(scope_key=scope, manifest={"name": name}, export_plan={})
+    a1 = submit("scope-a", "a1")
+    a2 = submit("scope-a", "a2")
+    b1 = submit("scope-b", "b1")
+    a3 = submit("scope-a", "a3")
+
+    assert a1["state"] == "running"
+    assert b1["state"] == "running"
+    assert queue.status(a2["job_id"])["queue_position"] == 0
+    assert queue.status(a3["job_id"])["queue_position"] == 1
+    cancelled = queue.cancel(a3["job_id"])
+    assert cancelled["state"] == "cancelled"
+
+    service.release.set()
+    for job in (a1, a2, b1):
+        assert queue.wait(job["job_id"], timeout=5.0)["state"] == "ok"
+    assert service.peak_by_scope == {"scope-a": 1, "scope-b": 1}
+    assert service.peak_total == 2
+    assert queue.status(a1["job_id"])["progress"]["fraction"] == 1.0
+    assert [job["scope_key"] for job in queue.list_jobs("scope-a")] == ["scope-a"] * 3
+    assert queue.status("missing") is None
+
+
+def test_render_job_status_reports_output_path_of_run_time_cache_hit():
+    class _CachedRenderService(_FakeRenderService):
+        def run(self, planned, *, timeout_sec, on_progress=None, cancel_event=None):
+            return dict(planned, status="ok", render_strategy="cached", output_path="/tmp/cached.mp4")
+
+    queue = CompositionRenderJobQueue(_CachedRenderService(), max_workers=1)
+    job = queue.submit(scope_key="Scope A", manifest={"name": "fresh"}, export_plan={})
+    assert job["scope_key"] == "scope_a"
+    assert job["output_path"] in {"/tmp/fresh.mp4", "/tmp/cached.mp4"}
+
+    finished = queue.wait(job["job_id"], timeout=5.0)
+    assert finished["state"] == "ok"
+    assert finished["output_path"] == "/tmp/cached.mp4"
+    assert finished["execution"]["render_strategy"] == "cached"
+
+
+def _long_timeline_manifest():
+    return {
+        "timeline": {
+            "tracks": [
+                {"name": "Video 1", "kind": "video"},
+                {"name": "Audio S1", "kind": "audio"},
+            ],
+            "eventsByTrack": {
+                "Video 1": [
+                    {"clipId": "v1", "src": "intro.mp4", "time": 0.0, "duration": 31.0},
+                    {"clipId": "v2", "src": "long.mp4", "time": 31.0, "duration": 59.0, "startOffsetSec": 2.0},
+                ],
+                "Audio S1": [
+                    {"clipId": "a1", "src": "music.mp3", "time": 0.0, "duration": 80.0},
+                ],
+            },
+        },
+        "snapshot": {
+            "placements": {
+                "v2": {"clipId": "v2", "effectFadeInSec": 1.0, "effectFadeOutSec": 2.0},
+            }
+        },
+    }
+
+
+def test_assign_overlay_lanes_packs_sequential_clips_and_keeps_stacking_order():
+    # Back-to-back clips share lane 0; an overlapping clip stacks above every earlier overlap.
+    assert _assign_overlay_lanes([(0, 10), (10, 20), (20, 30)]) == [0, 0, 0]
+    assert _assign_overlay_lanes([(0, 30), (5, 10), (12, 18), (8, 14)]) == [0, 1, 1, 2]
+    # A later clip under nothing still goes back to the bottom lane.
+    assert _assign_overlay_lanes([(0, 10), (2, 8), (20, 30)]) == [0, 1, 0]
+
+
+def test_render_execute_composites_many_clips_through_bounded_overlay_lanes(monkeypatch):
+    service = CompositionRenderExecutionService(".")
+    monkeypatch.setattr(service, "_new_output_path", lambda _scope, _ext: "/render/out.mp4")
+    monkeypatch.setattr(
+        "backend.composition.render_execute._resolve_source_path",
+        lambda raw_src, _repo_root, _render_root: f"/media/{str(raw_src).split('/')[-1]}",
+    )
+    sequential = [
+        {"clipId": f"seq{index}", "src": f"seq{index}.mp4", "time": index * 0.5, "duration": 0.5}
+        for index in range(40)
+    ]
+    stacked = [
+        {"clipId": f"stack{index}", "src": f"stack{index}.png", "time": 1.0, "duration": 2.0}
+        for index in range(12)
+    ]
+    manifest = {
+        "timeline": {
+            "tracks": [{"name": "Video 1", "kind": "video"}, {"name": "Image 1", "kind": "image"}],
+            "eventsByTrack": {"Video 1": sequential, "Image 1": stacked},
+        }
+    }
+    out = service.execute(scope_key="scope-lanes", manifest=manifest, export_plan=_build_plan(20.0))
+    execution = out["diagnostics"]["execution"]
+    assert execution["video_overlay_count"] == 52
+    # 40 sequential clips collapse into one lane; the 12-deep stack adds 12 more.
+    assert execution["video_lane_count"] == 13
+    assert execution["video_overlay_depth"] <= _MAX_OVERLAY_DEPTH
+    filter_graph = out["command"][out["command"].index("-filter_complex") + 1]
+    assert filter_graph.count("overlay=0:0:eof_action=pass") == execution["video_overlay_depth"]
+    # Lanes are restamped on the output frame grid, and the output keeps the plan frame rate.
+    assert filter_graph.count("setpts=N/(30.000000*TB)[lane") == execution["video_lane_count"]
+    assert "fps=30.000000,format=yuv420p[vout]" in filter_graph
+
+
+def test_render_execute_shares_one_input_per_source_run(monkeypatch):
+    service = CompositionRenderExecutionService(".")
+    monkeypatch.setattr(service, "_new_output_path", lambda _scope, _ext: "/render/out.mp4")
+    monkeypatch.setattr(
+        "backend.composition.render_execute._resolve_source_path",
+        lambda raw_src, _repo_root, _render_root: f"/media/{str(raw_src).split('/')[-1]}",
+    )
+    take = {"src": "take.mp4", "sourceDurationSec": 30.0}
+    manifest = {
+        "timeline": {
+            "tracks": [
+                {"name": "Image 1", "kind": "image"},
+                {"name": "Video 1", "kind": "video"},
+                {"name": "Audio S1", "kind": "audio"},
+            ],
+            "eventsByTrack": {
+                "Image 1": [
+                    {"clipId": "logo1", "src": "logo.png", "time": 0.0, "duration": 3.0},
+                    {"clipId": "logo2", "src": "logo.png", "time": 5.0, "duration": 2.0},
+                ],
+                "Video 1": [
+                    dict(take, clipId="v1", time=0.0, duration=2.0),
+                    dict(take, clipId="v2", time=2.0, duration=2.0, startOffsetSec=4.0),
+                    # Jumps back in the source: a shared decoder would have to buffer it.
+                    dict(take, clipId="v3", time=4.0, duration=2.0, startOffsetSec=1.0),
+                ],
+                "Audio S1": [dict(take, clipId="a1", time=0.0, duration=2.0)],
+            },
+        }
+    }
+    out = service.execute(scope_key="scope-shared", manifest=manifest, export_plan=_build_plan(10.0))
+    command = [str(part) for part in out["command"]]
+    sources = [command[index + 1] for index, part in enumerate(command) if part == "-i"][2:]
+    assert sources == ["/media/take.mp4", "/media/logo.png", "/media/take.mp4"]
+    assert "-loop" not in command
+    filter_graph = command[command.index("-filter_complex") + 1]
+    assert "[2:v]split=2[in2v0][in2v1]" in filter_graph
+    assert "[3:v]split=2[in3v0][in3v1]" in filter_graph
+    assert filter_graph.count("loop=loop=-1:size=1,") == 2
+    assert "[in2v1]trim=start=4.000000:duration=2.000000" in filter_graph
+    assert "[4:v]trim=start=1.000000" in filter_graph
+    # The linked audio clip reads the same input as its video.
+    assert "[2:a]atrim=start=0.000000:duration=2.000000" in filter_graph
+    execution = out["diagnostics"]["execution"]
+    assert execution["input_count"] == 5
+    assert execution["source_use_count"] == 6
+
+
+def test_render_execute_plans_segmented_render_at_clip_boundaries(monkeypatch):
+    service = CompositionRenderExecutionService(".", max_segments=3, min_segment_sec=20.0)
+    monkeypatch.setattr(service, "_new_output_path", lambda _scope, _ext: "/render/out.mp4")
+    monkeypatch.setattr(
+        "backend.composition.render_execute._resolve_source_path",
+        lambda raw_src, _repo_root, _render_root: f"/media/{str(raw_src).split('/')[-1]}",
+    )
+    plan = _build_plan(duration_sec=90.0)
+    plan["ffmpeg"]["video"] += ["-movflags", "+faststart"]
+
+    out = service.execute(scope_key="scope-long", manifest=_long_timeline_manifest(), export_plan=plan)
+    assert out["render_strategy"] == "segmented"
+    segmented = out["segmented"]
+    segments = segmented["segments"]
+    # The first cut snaps from the ideal 30.0 s to the v1/v2 clip boundary.
+    assert [(row["start_sec"], row["end_sec"]) for row in segments] == [(0.0, 31.0), (31.0, 60.0), (60.0, 90.0)]
+    assert [row["overlay_count"] for row in segments] == [1, 1, 1]
+    middle = [str(part) for part in segments[1]["command"]]
+    assert "-an" in middle and "-movflags" not in middle
+    assert middle[middle.index("-ss") + 1] == "2.000000"
+    assert "fade=t=in:st=0" in " ".join(middle)
+    last = " ".join(str(part) for part in segments[2]["command"])
+    # The last slice starts 29 s into v2 (57 s long after its 2 s offset): timestamps
+    # are shifted so the fade-out stays clip-relative, and the passed fade-in is dropped.
+    assert "-ss 31.000000" in last
+    assert "trim=start=0.000000:duration=28.000000,setpts=PTS-STARTPTS+29.000000/TB" in last
+    assert "fade=t=in" not in last
+    assert "fade=t=out:st=55.000000" in last
+    audio = " ".join(str(part) for part in segmented["audio"]["command"])
+    assert "pcm_f32le" in audio and "apad=whole_dur=90.000000" in audio
+    stitch = [str(part) for part in segmented["stitch"]["command"]]
+    assert stitch[stitch.index("-f") + 1] == "concat"
+    assert stitch[stitch.index("-c:v") + 1] == "copy"
+    assert "-movflags" in stitch and "aac" in stitch
+    assert out["diagnostics"]["execution"]["segment_count"] == 3
+
+
+def test_default_render_settings_segment_long_timelines(monkeypatch):
+    import nodes
+
+    service = nodes.COMPOSITION_RENDER_EXECUTOR
+    assert nodes.COMPOSITION_RENDER_WORKERS * nodes.COMPOSITION_RENDER_SEGMENTS <= max(4, 2 * (os.cpu_count() or 1))
+    monkeypatch.setattr(service, "_new_output_path", lambda _scope, _ext: "/render/out.mp4")
+    monkeypatch.setattr(
+        "backend.composition.render_execute._resolve_source_path",
+        lambda raw_src, _repo_root, _render_root: f"/media/{str(raw_src).split('/')[-1]}",
+    )
+    out = service.execute(
+        scope_key="scope-defaults",
+        manifest=_long_timeline_manifest(),
+        export_plan=_build_plan(duration_sec=90.0),
+        use_cache=False,
+    )
+    assert out["render_strategy"] == "segmented"
+    assert len(out["segmented"]["segments"]) >= 2
+
+
+def test_render_execute_keeps_single_pass_for_short_timelines(monkeypatch):
+    service = CompositionRenderExecutionService(".", max_segments=8, min_segment_sec=20.0)
+    monkeypatch.setattr(service, "_new_output_path", lambda _scope, _ext: "/render/out.mp4")
+    monkeypatch.setattr(
+        "backend.composition.render_execute._resolve_source_path",
+        lambda raw_src, _repo_root, _render_root: f"/media/{str(raw_src).split('/')[-1]}",
+    )
+    out = service.execute(scope_key="scope-short", manifest=_long_timeline_manifest(), export_plan=_build_plan(30.0))
+    assert out["render_strategy"] == "single"
+    assert "segmented" not in out
+
+
+def test_segmented_render_stitches_after_parallel_passes_and_cleans_up(monkeypatch):
+    case_dir = Path(__file__).resolve().parent / f"_tmp_render_segments_{uuid.uuid4().hex}"
+    case_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        service = CompositionRenderExecutionService(str(case_dir), max_segments=3, min_segment_sec=20.0)
+        monkeypatch.setattr(
+            "backend.composition.render_execute._resolve_source_path",
+            lambda raw_src, _repo_root, _render_root: f"/media/{str(raw_src).split('/')[-1]}",
+        )
+        monkeypatch.setattr("backend.composition.render_execute.shutil.which", lambda _name: "/usr/bin/ffmpeg")
+        calls = []
+        concat_lists = []
+
+        def _fake_process(command, *, timeout_sec, duration_sec=0.0, on_progress=None, cancel_event=None):
+            calls.append(command)
+            if "concat" in command:
+                concat_lists.append(Path(command[command.index("-i") + 1]).read_text(encoding="utf-8"))
+                Path(command[-1]).write_bytes(b"stitched")
+            elif on_progress is not None:
+                on_progress({"fraction": 1.0, "out_time_sec": duration_sec, "finished": True})
+            return {"returncode": 0, "stdout_tail": "", "stderr_tail": "", "error": None}
+
+        monkeypatch.setattr(render_execute, "_run_ffmpeg_process", _fake_process)
+        progress = []
+        out = service.execute(
+            scope_key="scope-long",
+            manifest=_long_timeline_manifest(),
+            export_plan=_build_plan(duration_sec=90.0),
+            execute=True,
+            on_progress=progress.append,
+        )
+        assert out["status"] == "ok"
+        assert out["size_bytes"] == len(b"stitched")
+        assert len(calls) == 5
+        assert "concat" in calls[-1]
+        assert all("-progress" in command for command in calls)
+        assert concat_lists[0].count("file '") == 3
+        assert progress and max(row["fraction"] for row in progress) <= 0.999
+        assert not os.path.exists(out["segmented"]["work_dir"])
+
+        def _failing_process(command, *, timeout_sec, duration_sec=0.0, on_progress=None, cancel_event=None):
+            if command[-1].endswith("segment_001.mkv"):
+                return {"returncode": 1, "stdout_tail": "", "stderr_tail": "bad input", "error": None}
+            return _fake_process(command, timeout_sec=timeout_sec, duration_sec=duration_sec, on_progress=on_progress)
+
+        calls.clear()
+        monkeypatch.setattr(render_execute, "_run_ffmpeg_process", _failing_process)
+        failed = service.execute(
+            scope_key="scope-long",
+            manifest=_long_timeline_manifest(),
+            export_plan=_build_plan(duration_sec=90.0),
+            execute=True,
+            use_cache=False,
+        )
+        assert failed["status"] == "failed"
+        assert failed["error"] == "ffmpeg_failed"
+        assert failed["stderr_tail"] == "bad input"
+        assert not any("concat" in command for command in calls)
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+
+def test_render_execute_reuses_cached_render_for_unchanged_timeline(monkeypatch):
+    case_dir = Path(__file__).resolve().parent / f"_tmp_render_cache_{uuid.uuid4().hex}"
+    media_dir = case_dir / "media"
+    media_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        (media_dir / "clip_a.mp4").write_bytes(b"clip-a")
+        (media_dir / "mix_a.mp3").write_bytes(b"mix-a")
+        service = CompositionRenderExecutionService(str(case_dir / "renders"), max_files_per_scope=10)
+        monkeypatch.setattr(
+            "backend.composition.render_execute._resolve_source_path",
+            lambda raw_src, _repo_root, _render_root: str(media_dir / str(raw_src)),
+        )
+        monkeypatch.setattr("backend.composition.render_execute.shutil.which", lambda _name: "/usr/bin/ffmpeg")
+        runs = []
+
+        def _fake_process(command, *, timeout_sec, duration_sec=0.0, on_progress=None, cancel_event=None):
+            runs.append(command)
+            Path(command[-1]).write_bytes(b"rendered")
+            return {"returncode": 0, "stdout_tail": "", "stderr_tail": "", "error": None}
+
+        monkeypatch.setattr(render_execute, "_run_ffmpeg_process", _fake_process)
+        manifest = {
+            "timeline": {
+                "tracks": [{"name": "Video 1", "kind": "video"}, {"name": "Audio S1", "kind": "audio"}],
+                "eventsByTrack": {
+                    "Video 1": [{"clipId": "v1", "src": "clip_a.mp4", "time": 0, "duration": 2.0}],
+                    "Audio S1": [{"clipId": "a1", "src": "mix_a.mp3", "time": 0, "duration": 2.0}],
+                },
+            }
+        }
+        render = lambda **kwargs: service.execute(
+            scope_key="scope-cache", manifest=manifest, export_plan=_build_plan(), execute=True, **kwargs
+        )
+
+        first = render()
+        assert first["status"] == "ok" and first["cache"]["hit"] is False
+        second = render()
+        assert second["status"] == "ok"
+        assert second["render_strategy"] == "cached"
+        assert second["output_path"] == first["output_path"]
+        assert len(runs) == 1
+
+        # Editing a source changes its identity, so the timeline renders again.
+        (media_dir / "mix_a.mp3").write_bytes(b"mix-a-edited")
+        third = render()
+        assert third["cache"]["hit"] is False
+        assert third["output_path"] != first["output_path"]
+        assert len(runs) == 2
+
+        # A pruned/deleted render is dropped from the index instead of being served.
+        os.remove(third["output_path"])
+        fourth = render()
+        assert fourth["cache"]["hit"] is False
+        assert len(runs) == 3
+        scope_dir = case_dir / "renders" / "scope-cache"
+        index = json.loads((scope_dir / ".render_index.json").read_text(encoding="utf-8"))
+        assert {entry["file_name"] for entry in index["entries"].values()} == {
+            os.path.basename(first["output_path"]),
+            os.path.basename(fourth["output_path"]),
+        }
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+
+def test_render_execute_preview_reads_proxies_at_capped_resolution(monkeypatch):
+    case_dir = Path(__file__).resolve().parent / f"_tmp_render_proxy_{uuid.uuid4().hex}"
+    media_dir = case_dir / "media"
+    proxy_dir = case_dir / "proxies"
+    media_dir.mkdir(parents=True, exist_ok=True)
+    proxy_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        # Media cache ids carry the content hash, so the existing proxy is found without hashing.
+        (media_dir / "0123456789abcdef_take.mp4").write_bytes(b"take")
+        (media_dir / "logo.png").write_bytes(b"logo")
+        (proxy_dir / "0123456789abcdef_360p.mp4").write_bytes(b"take-proxy")
+        monkeypatch.setattr("backend.composition.proxy_media.shutil.which", lambda _name: None)
+        proxies = CompositionProxyStore(str(proxy_dir), max_height=360)
+        service = CompositionRenderExecutionService(str(case_dir / "renders"), proxies=proxies)
+        monkeypatch.setattr(service, "_new_output_path", lambda _scope, _ext: "/render/out.mp4")
+        monkeypatch.setattr(
+            "backend.composition.render_execute._resolve_source_path",
+            lambda raw_src, _repo_root, _render_root: str(media_dir / str(raw_src)),
+        )
+        manifest = {
+            "timeline": {
+                "tracks": [{"name": "Image 1", "kind": "image"}, {"name": "Video 1", "kind": "video"}],
+                "eventsByTrack": {
+                    "Image 1": [{"clipId": "logo", "src": "logo.png", "time": 0.0, "duration": 2.0}],
+                    "Video 1": [{"clipId": "v1", "src": "0123456789abcdef_take.mp4", "time": 0.0, "duration": 2.0}],
+                },
+            }
+        }
+        final = service.plan(scope_key="scope-proxy", manifest=manifest, export_plan=_build_plan())
+        preview = service.plan(scope_key="scope-proxy", manifest=manifest, export_plan=_build_plan(), quality="preview")
+
+        assert final["quality"] == "final"
+        assert str(proxy_dir) not in " ".join(final["command"])
+        assert preview["quality"] == "preview"
+        assert preview["cache"]["key"] != final["cache"]["key"]
+        command = [str(part) for part in preview["command"]]
+        sources = [command[index + 1] for index, part in enumerate(command) if part == "-i"][2:]
+        assert sources == [str(proxy_dir / "0123456789abcdef_360p.mp4"), str(media_dir / "logo.png")]
+        assert "color=c=black:s=640x360" in " ".join(command)
+        assert command[command.index("-preset") + 1] == "ultrafast"
+        execution = preview["diagnostics"]["execution"]
+        assert execution["proxy_events_used"] == 1
+
+        # The logo proxy was scheduled; without ffmpeg it fails and the original stays in use.
+        status = proxies.wait(str(media_dir / "logo.png"), timeout=5.0)
+        assert status["state"] == "failed" and status["error"] == "ffmpeg_not_found"
+        assert proxies.proxy_for(str(media_dir / "0123456789abcdef_take.mp4")) == str(
+            proxy_dir / "0123456789abcdef_360p.mp4"
+        )
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+
+def test_proxy_store_keeps_failures_for_cooldown_and_prunes_lru(monkeypatch):
+    case_dir = Path(__file__).resolve().parent / f"_tmp_render_proxy_{uuid.uuid4().hex}"
+    media_dir = case_dir / "media"
+    media_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        calls = []
+
+        def fake_generate(self, source, kind, proxy_path):
+            calls.append(os.path.basename(source))
+            if source.endswith("bad.png"):
+                return "proxy_ffmpeg_failed:1"
+            Path(proxy_path).parent.mkdir(parents=True, exist_ok=True)
+            Path(proxy_path).write_bytes(b"x" * 100)
+            return None
+
+        monkeypatch.setattr(CompositionProxyStore, "_generate", fake_generate)
+        proxies = CompositionProxyStore(str(case_dir / "proxies"), max_total_bytes=250)
+        bad = media_dir / "bad.png"
+        bad.write_bytes(b"bad")
+        proxies.schedule(str(bad))
+        assert proxies.wait(str(bad), timeout=5.0)["state"] == "failed"
+        assert proxies.schedule(str(bad))["state"] == "failed"
+        assert calls == ["bad.png"]
+        # A changed source is retried despite the cooldown.
+        bad.write_bytes(b"bad-but-longer")
+        proxies.schedule(str(bad))
+        proxies.wait(str(bad), timeout=5.0)
+        assert calls == ["bad.png", "bad.png"]
+
+        sources = []
+        for index in range(3):
+            source = media_dir / f"{index:016x}_clip.png"
+            source.write_bytes(b"clip")
+            proxies.schedule(str(source))
+            assert proxies.wait(str(source), timeout=5.0)["state"] == "ready"
+            proxy_path = proxies.status(str(source))["proxy_path"]
+            os.utime(proxy_path, (1000.0 + index, 1000.0 + index))
+            sources.append((source, proxy_path))
+        # 3 x 100 bytes > 250: the least recently used proxy was evicted and is regenerated on demand.
+        assert not os.path.isfile(sources[0][1])
+        assert all(os.path.isfile(path) for _, path in sources[1:])
+        assert proxies.proxy_for(str(sources[0][0])) is None
+        assert proxies.wait(str(sources[0][0]), timeout=5.0)["state"] == "ready"
+        assert os.path.isfile(sources[0][1])
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
@@ -1,4 +1,10 @@
-from features.song2daw.core.cache import build_step_cache_key
+import hashlib
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from features.song2daw.core.cache import StepResultCache, build_step_cache_key
 
 
 def test_build_step_cache_key_is_stable_with_mapping_order():
@@ -56,3 +62,73 @@ def test_build_step_cache_key_changes_when_model_version_changes():
     )
 
     assert baseline != changed
+
+
+def _case_dir() -> Path:
+    base = Path(__file__).resolve().parent / "_tmp_step_cache"
+    base.mkdir(parents=True, exist_ok=True)
+    case_dir = base / f"case_{uuid.uuid4().hex}"
+    case_dir.mkdir(parents=True, exist_ok=True)
+    return case_dir
+
+
+def _key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def test_step_result_cache_roundtrip_and_reload():
+    case_dir = _case_dir()
+    try:
+        cache = StepResultCache(str(case_dir))
+        produced = {"artifacts.tempo": {"bpm": 120.0}, "songgraph": {"nodes": []}}
+        assert cache.get(_key("a")) is None
+        assert cache.put(_key("a"), produced, step_name="TempoAnalysis", step_version="0.1.0") is True
+        assert cache.get(_key("a")) == produced
+
+        reloaded = StepResultCache(str(case_dir))
+        assert reloaded.get(_key("a")) == produced
+        assert reloaded.stats()["entries"] == 1
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+
+def test_step_result_cache_evicts_least_recently_used():
+    case_dir = _case_dir()
+    try:
+        payload = {"artifacts.blob": "x" * 400}
+        cache = StepResultCache(str(case_dir), max_bytes=1200)
+        assert cache.put(_key("a"), payload)
+        assert cache.put(_key("b"), payload)
+        time.sleep(0.01)
+        assert cache.get(_key("a")) is not None
+        time.sleep(0.01)
+        assert cache.put(_key("c"), payload)
+
+        assert cache.get(_key("a")) is not None
+        assert cache.get(_key("b")) is None
+        assert cache.get(_key("c")) is not None
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+
+def test_step_result_cache_expires_entries_by_age(monkeypatch):
+    case_dir = _case_dir()
+    try:
+        cache = StepResultCache(str(case_dir), max_age_sec=60.0)
+        assert cache.put(_key("a"), {"artifacts.tempo": {"bpm": 90.0}})
+        now = time.time()
+        monkeypatch.setattr("features.song2daw.core.cache.time.time", lambda: now + 120.0)
+        assert cache.get(_key("a")) is None
+        assert cache.stats()["entries"] == 0
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+
+def test_step_result_cache_rejects_non_serializable_output():
+    case_dir = _case_dir()
+    try:
+        cache = StepResultCache(str(case_dir))
+        assert cache.put(_key("a"), {"artifacts.blob": object()}) is False
+        assert cache.get(_key("a")) is None
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
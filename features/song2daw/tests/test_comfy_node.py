@@ -3,6 +3,7 @@ import os
 import shutil
 import sys
 import types
+import uuid
 from pathlib import Path
 
 import pytest
@@ -141,6 +142,58 @@ def test_song2daw_node_run_invokes_default_runner(monkeypatch):
     assert runs[0].summary["step_count"] == 0
 
 
+def test_song2daw_node_run_resumes_previous_matching_run(monkeypatch):
+    nodes.SONG2DAW_RUNS.clear()
+    nodes.SONG2DAW_RUNS.add(
+        nodes.Song2DawRunState(
+            run_id="run_previous",
+            status="ok",
+            audio_path="song.wav",
+            stems_dir="stems",
+            model_versions={"tempo_model": "1.0.0"},
+            result={
+                "songgraph": {},
+                "artifacts": {},
+                "steps": [
+                    {"name": "TempoAnalysis", "config": {"window": 1024}},
+                    {"name": "EffectEstimation", "config": {}},
+                ],
+            },
+        )
+    )
+    captured = {}
+
+    def _fake_resume_pipeline(previous_result, **kwargs):
+        captured["previous_result"] = previous_result
+        captured.update(kwargs)
+        return {"songgraph": {}, "artifacts": {}, "steps": []}
+
+    def _fail_run_default_song2daw_pipeline(**_kwargs):
+        raise AssertionError("full run should not be used when a matching run exists")
+
+    from features.song2daw.core import runner as runner_module
+
+    monkeypatch.setattr(runner_module, "resume_pipeline", _fake_resume_pipeline)
+    monkeypatch.setattr(runner_module, "run_default_song2daw_pipeline", _fail_run_default_song2daw_pipeline)
+    # Wave parallelism no longer disables resume.
+    monkeypatch.setattr(nodes, "SONG2DAW_MAX_WORKERS", 3)
+    monkeypatch.setattr(nodes, "SONG2DAW_STEM_WORKERS", 2)
+    stem_pool = object()
+    monkeypatch.setattr(nodes, "_song2daw_stem_executor", lambda: stem_pool)
+
+    node = nodes.Song2DawRun()
+    node.run("song.wav", "stems", '{"EffectEstimation": {"default_mix": 0.5}}', '{"tempo_model": "1.0.0"}')
+
+    assert captured["changed_step_configs"] == {
+        "TempoAnalysis": {},
+        "EffectEstimation": {"default_mix": 0.5},
+    }
+    assert captured["previous_result"]["steps"][0]["name"] == "TempoAnalysis"
+    assert (captured["max_workers"], captured["stem_workers"]) == (3, 2)
+    assert captured["stem_executor"] is stem_pool
+    nodes.SONG2DAW_RUNS.clear()
+
+
 def test_song2daw_node_rejects_invalid_step_configs_json():
     nodes.SONG2DAW_RUNS.clear()
     node = nodes.Song2DawRun()
@@ -156,16 +209,16 @@ def test_song2daw_node_writes_outputs_when_output_dir_set(monkeypatch):
     def _fake_run_default_song2daw_pipeline(**kwargs):
         return {"songgraph": {}, "artifacts": {}, "steps": []}
 
-    def _fake_save_run_outputs(result, output_dir, run_id=None):
+    def _fake_write_run_outputs(result, output_dir, run_id=None):
         captured["result"] = result
         captured["output_dir"] = output_dir
         captured["run_id"] = run_id
-        return Path(output_dir) / "song2daw_run_test"
+        return Path(output_dir) / "song2daw_run_test", result
 
     from features.song2daw.core import runner as runner_module
 
     monkeypatch.setattr(runner_module, "run_default_song2daw_pipeline", _fake_run_default_song2daw_pipeline)
-    monkeypatch.setattr(runner_module, "save_run_outputs", _fake_save_run_outputs)
+    monkeypatch.setattr(runner_module, "write_run_outputs", _fake_write_run_outputs)
 
     node = nodes.Song2DawRun()
     _songgraph_json, _artifacts_json, _run_json, run_dir = node.run(
@@ -342,6 +395,123 @@ def test_song2daw_ensure_preview_mix_audio_writes_deterministic_wave():
         shutil.rmtree(temp_root, ignore_errors=True)
 
 
+def test_song2daw_preview_numpy_renderer_matches_python_fallback():
+    np = pytest.importorskip("numpy")
+    events = [
+        {
+            "source_id": f"src:{index % 3}:test",
+            "t0_sec": index * 0.1,
+            "t1_sec": index * 0.1 + 0.15 + (index % 2) * 0.1,
+            "velocity": 40 + index,
+            "midi_note": 36 + index,
+        }
+        for index in range(30)
+    ]
+    total_frames = int(3.5 * 22050)
+
+    vectorized = np.frombuffer(nodes._song2daw_render_preview_pcm_numpy(events, total_frames, 22050), dtype="<i2")
+    reference = np.frombuffer(nodes._song2daw_render_preview_pcm_python(events, total_frames, 22050), dtype="<i2")
+
+    assert vectorized.shape == reference.shape == (total_frames,)
+    assert int(np.abs(vectorized.astype(np.int32) - reference.astype(np.int32)).max()) <= 4
+
+
+def test_song2daw_preview_mix_is_prepared_in_background():
+    temp_root = Path(__file__).resolve().parent / "_tmp_step_cache" / f"case_{uuid.uuid4().hex}"
+    run_dir = temp_root / "song2daw_run_test"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        run = nodes.Song2DawRunState(
+            run_id=f"run_bg_{uuid.uuid4().hex}",
+            status="ok",
+            audio_path="song.mid",
+            stems_dir="stems",
+            run_dir=str(run_dir),
+            result={
+                "artifacts": {
+                    "events": {
+                        "items": [
+                            {
+                                "source_id": "src:bass:test",
+                                "t0_sec": 0.0,
+                                "t1_sec": 0.5,
+                                "velocity": 96,
+                                "midi_note": 48,
+                            }
+                        ]
+                    }
+                }
+            },
+        )
+
+        assert "preview_mix" not in nodes._song2daw_collect_ready_audio_assets(run)
+        status = nodes._song2daw_asset_status(run)
+        assert status["preview_mix"]["state"] in ("pending", "running", "done")
+        nodes.SONG2DAW_ASSET_JOBS.wait(f"preview_mix:{run.run_id}", timeout=10)
+
+        assets = nodes._song2daw_collect_ready_audio_assets(run)
+        assert Path(assets["preview_mix"]).read_bytes()[:4] == b"RIFF"
+        assert nodes._song2daw_asset_status(run) == {}
+    finally:
+        shutil.rmtree(temp_root, ignore_errors=True)
+
+
+def test_song2daw_preview_mix_jobs_without_output_are_final(monkeypatch):
+    temp_root = Path(__file__).resolve().parent / "_tmp_step_cache" / f"case_{uuid.uuid4().hex}"
+    run_dir = temp_root / "song2daw_run_test"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    calls = []
+
+    def _write_fails(path, events, duration_sec):
+        calls.append(path)
+        raise RuntimeError("synth failed")
+
+    collect = nodes._song2daw_collect_preview_events
+    collected = []
+
+    def _collect(result, run_dir=""):
+        collected.append(run_dir)
+        return collect(result, run_dir)
+
+    monkeypatch.setattr(nodes, "_song2daw_write_preview_mix_wav", _write_fails)
+    monkeypatch.setattr(nodes, "_song2daw_collect_preview_events", _collect)
+    event = {"source_id": "src:bass:test", "t0_sec": 0.0, "t1_sec": 0.5, "velocity": 96, "midi_note": 48}
+    try:
+        silent = nodes.Song2DawRunState(
+            run_id=f"run_silent_{uuid.uuid4().hex}",
+            status="ok",
+            audio_path="song.mid",
+            stems_dir="stems",
+            run_dir=str(run_dir),
+            result={"artifacts": {"events": {"items": []}}},
+        )
+        nodes._song2daw_asset_status(silent)
+        nodes.SONG2DAW_ASSET_JOBS.wait(f"preview_mix:{silent.run_id}", timeout=10)
+        for _ in range(3):
+            assert nodes._song2daw_asset_status(silent) == {}
+        assert nodes.SONG2DAW_ASSET_JOBS.status(f"preview_mix:{silent.run_id}")["result"] is None
+        assert len(collected) == 1
+
+        failing = nodes.Song2DawRunState(
+            run_id=f"run_failing_{uuid.uuid4().hex}",
+            status="ok",
+            audio_path="song.mid",
+            stems_dir="stems",
+            run_dir=str(run_dir),
+            result={"artifacts": {"events": {"items": [event]}}},
+        )
+        nodes._song2daw_asset_status(failing)
+        nodes.SONG2DAW_ASSET_JOBS.wait(f"preview_mix:{failing.run_id}", timeout=10)
+        for _ in range(3):
+            status = nodes._song2daw_asset_status(failing)
+            assert status["preview_mix"]["state"] == "error"
+            assert status["preview_mix"]["error"] == "synth failed"
+        assert len(calls) == 1
+        assert len(collected) == 2
+    finally:
+        shutil.rmtree(temp_root, ignore_errors=True)
+
+
 def test_song2daw_resolve_audio_asset_path_unknown_asset(monkeypatch):
     run = nodes.Song2DawRunState(run_id="run_audio_missing", status="ok", audio_path="", stems_dir="", result={})
     monkeypatch.setattr(
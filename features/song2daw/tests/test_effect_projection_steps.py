@@ -110,10 +110,10 @@ def test_run_pipeline_full_chain_until_projection_reaper():
     assert "reaper_rpp" in result["artifacts"]
     assert "export_manifest" in result["artifacts"]
     assert result["songgraph"]["node_versions"]["Ingest"] == "0.1.0"
-    assert result["songgraph"]["node_versions"]["TempoAnalysis"] == "0.1.0"
-    assert result["songgraph"]["node_versions"]["StructureSegmentation"] == "0.1.0"
-    assert result["songgraph"]["node_versions"]["SourceSeparation"] == "0.1.0"
-    assert result["songgraph"]["node_versions"]["EventExtraction"] == "0.1.0"
+    assert result["songgraph"]["node_versions"]["TempoAnalysis"] == "0.2.0"
+    assert result["songgraph"]["node_versions"]["StructureSegmentation"] == "0.2.0"
+    assert result["songgraph"]["node_versions"]["SourceSeparation"] == "0.2.0"
+    assert result["songgraph"]["node_versions"]["EventExtraction"] == "0.2.0"
     assert result["songgraph"]["node_versions"]["EffectEstimation"] == "0.1.0"
     assert "ProjectionReaper" not in result["songgraph"]["node_versions"]
     assert validate_songgraph(result["songgraph"]) is True
@@ -1,3 +1,6 @@
+import shutil
+import uuid
+import wave
 from pathlib import Path
 
 import pytest
@@ -9,9 +12,11 @@ from features.song2daw.core.steps.ingest import make_ingest_handler
 from features.song2daw.core.steps.source import make_source_separation_handler
 from features.song2daw.core.steps.structure import make_structure_handler
 from features.song2daw.core.steps.tempo import make_tempo_handler
+from features.song2daw.core.transcription import stem_process_pool
 
 
 PIPELINES_DIR = Path(__file__).resolve().parents[1] / "pipelines"
+EXAMPLE_STEMS = Path(__file__).resolve().parents[3] / "examples" / "song2daw" / "test_audio" / "stems"
 
 
 def test_run_event_extraction_step_builds_valid_songgraph():
@@ -103,8 +108,77 @@ def test_run_pipeline_until_event_extraction_with_builtin_handlers():
     assert "events" in result["artifacts"]
     assert "midi_optional" in result["artifacts"]
     assert result["songgraph"]["node_versions"]["Ingest"] == "0.1.0"
-    assert result["songgraph"]["node_versions"]["TempoAnalysis"] == "0.1.0"
-    assert result["songgraph"]["node_versions"]["StructureSegmentation"] == "0.1.0"
-    assert result["songgraph"]["node_versions"]["SourceSeparation"] == "0.1.0"
-    assert result["songgraph"]["node_versions"]["EventExtraction"] == "0.1.0"
+    assert result["songgraph"]["node_versions"]["TempoAnalysis"] == "0.2.0"
+    assert result["songgraph"]["node_versions"]["StructureSegmentation"] == "0.2.0"
+    assert result["songgraph"]["node_versions"]["SourceSeparation"] == "0.2.0"
+    assert result["songgraph"]["node_versions"]["EventExtraction"] == "0.2.0"
     assert validate_songgraph(result["songgraph"]) is True
+
+
+def _write_melody(path, midi_notes, *, note_sec=0.5, lead_sec=0.25, sample_rate=44100):
+    np = pytest.importorskip("numpy")
+    parts = [np.zeros(int(lead_sec * sample_rate))]
+    t = np.arange(int(note_sec * sample_rate)) / sample_rate
+    for note in midi_notes:
+        frequency = 440.0 * 2.0 ** ((note - 69) / 12.0)
+        envelope = np.exp(-3.0 * t) * np.minimum(1.0, t / 0.005)
+        parts.append(0.5 * envelope * (np.sin(2 * np.pi * frequency * t) + 0.3 * np.sin(4 * np.pi * frequency * t)))
+    pcm = (np.concatenate(parts) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(sample_rate)
+        handle.writeframes(pcm.tobytes())
+
+
+def test_run_event_extraction_step_transcribes_stem_onsets_and_pitch():
+    step = load_pipeline_step(PIPELINES_DIR / "event_extraction.yaml")
+    case_dir = Path(__file__).resolve().parent / "_tmp_events" / f"case_{uuid.uuid4().hex}"
+    melody = [45, 48, 52, 57, 64, 69, 40, 60]
+    try:
+        case_dir.mkdir(parents=True)
+        _write_melody(case_dir / "bass.wav", melody)
+        result = run_event_extraction_step(
+            {
+                "artifacts.sources": {"items": [{"id": "src:bass:abc"}]},
+                "artifacts.stems_generated": {
+                    "items": [{"source_id": "src:bass:abc", "path": str(case_dir / "bass.wav"), "format": "wav"}]
+                },
+                "artifacts.beatgrid": {"beats_sec": [0.0, 0.5, 1.0]},
+            },
+            step,
+        )
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+    events = result["artifacts.events"]["items"]
+    assert result["artifacts.events"]["method"] == "onset_acf_pitch_v1"
+    assert [event["midi_note"] for event in events] == melody
+    assert all(event["kind"] == "note" for event in events)
+    onsets = [event["t0_sec"] for event in events]
+    assert onsets == pytest.approx([0.25 + 0.5 * index for index in range(len(melody))], abs=0.02)
+    assert validate_songgraph(result["songgraph"]) is True
+
+
+def test_run_event_extraction_step_parallel_stems_match_serial():
+    pytest.importorskip("numpy")
+    step = load_pipeline_step(PIPELINES_DIR / "event_extraction.yaml")
+    roles = ("drums", "bass", "harmonic", "vocals")
+    inputs = {
+        "artifacts.sources": {"items": [{"id": f"src:{role}:abc"} for role in roles]},
+        "artifacts.stems_generated": {
+            "items": [{"source_id": f"src:{role}:abc", "path": str(EXAMPLE_STEMS / f"{role}.wav")} for role in roles]
+        },
+        "artifacts.beatgrid": {"beats_sec": [0.0, 0.5, 1.0]},
+    }
+
+    serial = make_event_extraction_handler()(inputs, step)
+    parallel = make_event_extraction_handler(max_workers=2)(inputs, step)
+
+    assert parallel == serial
+    # A long-lived (spawned) pool is reused across handler calls.
+    with stem_process_pool(2) as pool:
+        shared = make_event_extraction_handler(executor=pool)
+        assert shared(inputs, step) == serial
+        assert shared(inputs, step) == serial
+    assert {event["midi_channel"] for event in serial["artifacts.events"]["items"]} == {1, 2, 3, 4}
@@ -1,7 +1,9 @@
+import hashlib
 from pathlib import Path
 
 import pytest
 
+from features.song2daw.core.audio_io import open_wav_pcm, read_wav_info
 from features.song2daw.core.graph import validate_songgraph
 from features.song2daw.core.pipeline import load_pipeline_step
 from features.song2daw.core.steps.ingest import make_ingest_handler, run_ingest_step
@@ -50,3 +52,48 @@ def test_run_ingest_step_rejects_invalid_inputs():
 
     with pytest.raises(ValueError, match="audio_path must be a non-empty string"):
         run_ingest_step({"audio_path": "", "stems_dir": "stems"}, step)
+
+
+EXAMPLE_MIX = Path(__file__).resolve().parents[3] / "examples" / "song2daw" / "test_audio" / "mix.wav"
+
+
+def test_run_ingest_step_hashes_audio_content_and_decodes_wav_metadata():
+    step = load_pipeline_step(PIPELINES_DIR / "ingest.yaml")
+    expected_sha = hashlib.sha256(EXAMPLE_MIX.read_bytes()).hexdigest()
+
+    result = run_ingest_step({"audio_path": str(EXAMPLE_MIX), "stems_dir": "stems"}, step)
+    audio = result["artifacts.audio_canonical"]
+
+    assert audio["sha256"] == expected_sha
+    assert audio["id"] == f"audio:{expected_sha[:16]}"
+    assert audio["fingerprint"] == "content"
+    assert audio["format"] == "wav"
+    assert audio["sample_rate"] == 44100
+    assert audio["channels"] == 1
+    assert audio["frames"] == 352800
+    assert audio["duration_sec"] == 8.0
+
+    mapped = make_ingest_handler(chunk_size=4096, use_mmap=True)(
+        {"audio_path": str(EXAMPLE_MIX), "stems_dir": "stems"},
+        step,
+    )
+    assert mapped == result
+
+
+def test_run_ingest_step_falls_back_to_path_hash_for_missing_file():
+    step = load_pipeline_step(PIPELINES_DIR / "ingest.yaml")
+    result = run_ingest_step({"audio_path": "missing/song.wav", "stems_dir": "stems"}, step)
+    audio = result["artifacts.audio_canonical"]
+
+    assert audio["fingerprint"] == "path"
+    assert audio["sha256"] == hashlib.sha256(b"missing/song.wav").hexdigest()
+    assert "sample_rate" not in audio
+
+
+def test_open_wav_pcm_maps_data_chunk():
+    info = read_wav_info(EXAMPLE_MIX)
+    with open_wav_pcm(EXAMPLE_MIX, info) as pcm:
+        assert len(pcm) == info.frames * info.channels * info.sample_width
+        first = bytes(pcm[:16])
+    raw = EXAMPLE_MIX.read_bytes()
+    assert raw[info.data_offset : info.data_offset + 16] == first
@@ -0,0 +1,94 @@
+import nodes
+from backend.loop.manifest import LoopManifest
+
+
+def _entry(cycle_index, retry_index, status="returned", decision=None, prompt_id=None):
+    return nodes.LoopManifestEntry(
+        cycle_index=cycle_index,
+        retry_index=retry_index,
+        status=status,
+        decision=decision,
+        prompt_id=prompt_id,
+        outputs={},
+    )
+
+
+def test_loop_manifest_indexes_follow_direct_entry_updates():
+    state = nodes.LoopState(
+        loop_id="loop-manifest-index",
+        total_cycles=3,
+        manifest=[
+            _entry(0, 0, status="queued", prompt_id="p-0"),
+            _entry(1, 0, status="returned", decision="approve", prompt_id="p-1"),
+        ],
+    )
+    manifest = state.manifest
+    assert isinstance(manifest, LoopManifest)
+    assert manifest.find_prompt("p-1") is manifest[1]
+    assert manifest.has_pending() is True
+    assert manifest.actionable_count(0) == 1
+    assert manifest.approved_count(1) == 1
+
+    first = manifest.find_prompt("p-0")
+    first.status = "returned"
+    first.decision = "approve"
+    assert manifest.has_pending() is False
+    assert manifest.approved_count(0) == 1
+
+    # Moving an entry to another slot (as `_update_latest_pending` does) reindexes both slots.
+    first.cycle_index = 2
+    assert manifest.slot(0, 0) == []
+    assert manifest.slot(2, 0) == [first]
+    assert manifest.approved_count(0) == 0
+    assert manifest.approved_count(2) == 1
+    assert [entry.prompt_id for entry in manifest.cycle_entries(2)] == ["p-0"]
+
+    progression = nodes._sync_loop_runtime_from_manifest(state)
+    assert progression["next_cycle_index"] == 0
+    assert progression["needs_generation"] is True
+
+
+def test_loop_manifest_counts_latest_duplicate_per_retry():
+    stale = _entry(0, 0, decision="approve")
+    fresh = _entry(0, 0, decision="reject")
+    fresh.updated_at = stale.updated_at + 1.0
+    manifest = LoopManifest([stale, fresh])
+    assert manifest.approved_count(0) == 0
+    assert manifest.actionable_count(0) == 0
+
+    stale.updated_at = fresh.updated_at + 1.0
+    assert manifest.approved_count(0) == 1
+    assert manifest.actionable_count(0) == 1
+
+
+def test_loop_manifest_trim_and_clear_release_entries():
+    state = nodes.LoopState(
+        loop_id="loop-manifest-trim",
+        manifest=[_entry(idx, 0, status="queued", prompt_id=f"p-{idx}") for idx in range(5)],
+    )
+    dropped = state.manifest.drop_oldest(2)
+    assert [entry.prompt_id for entry in dropped] == ["p-0", "p-1"]
+    assert state.manifest.find_prompt("p-0") is None
+    assert len(state.manifest.pending()) == 3
+
+    # Detached entries no longer touch the manifest's indexes.
+    dropped[0].status = "returned"
+    dropped[0].cycle_index = 4
+    assert state.manifest.slot(4, 0) == [state.manifest[2]]
+
+    payload = nodes._manifest_entry_payload(state.manifest[0])
+    assert set(payload) == {
+        "cycle_index",
+        "retry_index",
+        "status",
+        "prompt_id",
+        "decision",
+        "outputs",
+        "created_at",
+        "updated_at",
+    }
+
+    state.manifest.clear()
+    assert len(state.manifest) == 0
+    assert state.manifest.has_pending() is False
+    assert state.manifest.cycle_retries(4) == []
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import shutil
 import uuid
 from pathlib import Path
@@ -57,3 +58,83 @@ def test_media_cache_store_clear_loop():
     assert store.clear_loop("loop-z") is True
     assert store.resolve("loop-z", saved["file_id"]) is None
     _cleanup_case(case_dir)
+
+
+def test_media_cache_store_stream_hashes_chunks_and_dedupes_by_content():
+    case_dir = _case_dir()
+    store = LoopMediaCacheStore(str(case_dir), max_files_per_loop=8, max_file_bytes=1024)
+    chunks = [b"chunk-a/", b"", b"chunk-b/", b"chunk-c"]
+    saved = store.store_stream("loop-a", "take.mov", "video/quicktime", iter(chunks))
+    assert isinstance(saved, dict)
+    assert saved == store.store("loop-a", "take.mov", "video/quicktime", b"".join(chunks))
+    assert saved["size"] == len(b"".join(chunks))
+    assert saved["sha256"] == hashlib.sha256(b"".join(chunks)).hexdigest()
+    assert saved["file_id"] == f"{saved['sha256'][:16]}_take.mov"
+    assert Path(store.resolve("loop-a", saved["file_id"])).read_bytes() == b"".join(chunks)
+
+    # The loop id can be supplied at commit time (multipart fields may follow the file).
+    upload = store.open_upload("", "take.mov", "video/quicktime")
+    assert upload.write(b"late-loop-id")
+    late = upload.commit(loop_id="loop-b")
+    assert late["loop_id"] == "loop-b"
+    assert store.resolve("loop-b", late["file_id"]) is not None
+
+    assert store.store_stream("loop-a", "big.mov", "video/quicktime", [b"x" * 600, b"x" * 600]) is None
+    assert store.store_stream("loop-a", "empty.mov", "video/quicktime", []) is None
+    assert list((case_dir / ".uploads").iterdir()) == []
+    _cleanup_case(case_dir)
+
+
+def test_media_cache_store_shares_blobs_across_loops_and_collects_unreferenced():
+    case_dir = _case_dir()
+    store = LoopMediaCacheStore(str(case_dir), max_files_per_loop=8, max_file_bytes=1024, max_total_bytes=10)
+    payload = b"shared-video-bytes"
+    digest = hashlib.sha256(payload).hexdigest()
+    first = store.store("loop-a", "take.mp4", "video/mp4", payload)
+    second = store.store("loop-b", "take-copy.mp4", "video/mp4", payload)
+    blob = case_dir / ".blobs" / digest[:2] / digest
+    assert blob.read_bytes() == payload
+    assert first["sha256"] == second["sha256"] == digest
+    path_a = Path(store.resolve("loop-a", first["file_id"]))
+    path_b = Path(store.resolve("loop-b", second["file_id"]))
+    assert path_a.read_bytes() == path_b.read_bytes() == payload
+    if blob.stat().st_nlink > 1:
+        assert path_a.stat().st_ino == path_b.stat().st_ino == blob.stat().st_ino
+
+    # A known hash is linked into another loop without re-sending the bytes.
+    known = store.store_known("loop-c", "take.mp4", "video/mp4", digest)
+    assert known["file_id"] == first["file_id"] and known["size"] == len(payload)
+    assert store.resolve("loop-c", known["file_id"]) is not None
+    assert store.store_known("loop-c", "other.mp4", "video/mp4", "0" * 64) is None
+    assert store.store_known("loop-c", "other.mp4", "video/mp4", digest[:16]) is None
+
+    # Referenced blobs survive the budget; once every loop is cleared the blob is evicted.
+    assert store.collect_garbage()["removed_blobs"] == 0
+    for loop_id in ("loop-a", "loop-b"):
+        assert store.clear_loop(loop_id) is True
+    assert store.collect_garbage()["removed_blobs"] == 0
+    assert store.clear_loop("loop-c") is True
+    # `clear_loop` also schedules the background collector, which may get there first.
+    assert store.collect_garbage()["blob_bytes"] == 0
+    assert not blob.exists()
+    assert store.has_blob(digest) is False
+    _cleanup_case(case_dir)
+
+
+def test_media_cache_store_drops_blob_when_hard_links_are_refused(monkeypatch):
+    case_dir = _case_dir()
+    store = LoopMediaCacheStore(str(case_dir), max_files_per_loop=8, max_file_bytes=1024)
+
+    def refuse_link(_src, _dst):
+        raise OSError("hard links not supported")
+
+    monkeypatch.setattr("backend.loop.media_cache.os.link", refuse_link)
+    payload = b"copied-video-bytes"
+    digest = hashlib.sha256(payload).hexdigest()
+    saved = store.store("loop-a", "take.mp4", "video/mp4", payload)
+    assert saved["size"] == len(payload)
+    assert Path(store.resolve("loop-a", saved["file_id"])).read_bytes() == payload
+    # The loop copy holds the only bytes; no orphan blob pinned by the hash prefix.
+    assert store.has_blob(digest) is False
+    assert store.collect_garbage()["blob_bytes"] == 0
+    _cleanup_case(case_dir)
@@ -0,0 +1,174 @@
+import random
+
+import pytest
+
+import nodes
+
+_STATUSES = ["queued", "running", "returned", "Returned ", "error", ""]
+_DECISIONS = [None, "approve", "approved", "Approve", "reject", "replay", "discard", ""]
+
+
+# Reference: the full-rescan progression the incremental manifest must match.
+def _norm(value):
+    return str(value or "").strip().lower()
+
+
+def _reference_dedupe(entries):
+    latest_by_retry = {}
+    for entry in entries:
+        retry = int(entry.retry_index)
+        previous = latest_by_retry.get(retry)
+        if previous is None or float(entry.updated_at) >= float(previous.updated_at):
+            latest_by_retry[retry] = entry
+    return list(latest_by_retry.values())
+
+
+def _reference_actionable(entries):
+    for entry in _reference_dedupe(entries):
+        status = _norm(entry.status)
+        if status in {"queued", "running"}:
+            return True
+        if status == "returned" and _norm(entry.decision) not in {"reject", "replay", "discard"}:
+            return True
+    return False
+
+
+def _reference_next_retry(entries, needs_generation):
+    if not entries:
+        return 0
+    max_retry = max(int(entry.retry_index) for entry in entries)
+    if needs_generation:
+        return max_retry + 1
+    running = [int(e.retry_index) for e in entries if _norm(e.status) in {"queued", "running"}]
+    if running:
+        return max(running)
+    returned = [
+        int(e.retry_index)
+        for e in entries
+        if _norm(e.status) == "returned" and _norm(e.decision) not in {"reject", "replay", "discard"}
+    ]
+    if returned:
+        return max(returned)
+    return max_retry + 1
+
+
+def _reference_progression(state):
+    manifest = list(state.manifest)
+    total_cycles = max(1, int(state.total_cycles or 1))
+    next_cycle_index = None
+    for idx in range(total_cycles):
+        entries = [entry for entry in manifest if int(entry.cycle_index) == idx]
+        if not any(_norm(entry.decision) in {"approve", "approved"} for entry in _reference_dedupe(entries)):
+            next_cycle_index = idx
+            break
+    if next_cycle_index is None:
+        return {"next_cycle_index": None, "next_retry_index": None, "needs_generation": False, "status": "complete"}
+    entries = [entry for entry in manifest if int(entry.cycle_index) == next_cycle_index]
+    needs_generation = not _reference_actionable(entries)
+    has_running = any(_norm(entry.status) in {"queued", "running"} for entry in manifest)
+    return {
+        "next_cycle_index": next_cycle_index,
+        "next_retry_index": _reference_next_retry(entries, needs_generation),
+        "needs_generation": needs_generation,
+        "status": "running" if has_running else "idle",
+    }
+
+
+def _assert_indexes_match(state):
+    manifest = state.manifest
+    entries = list(manifest)
+    for cycle in {int(entry.cycle_index) for entry in entries}:
+        expected = [entry for entry in entries if int(entry.cycle_index) == cycle]
+        assert manifest.cycle_entries(cycle) == expected
+        for retry in {int(entry.retry_index) for entry in expected}:
+            assert manifest.slot(cycle, retry) == [e for e in expected if int(e.retry_index) == retry]
+    for prompt_id in {entry.prompt_id for entry in entries if entry.prompt_id}:
+        assert manifest.find_prompt(prompt_id) is next(e for e in entries if e.prompt_id == prompt_id)
+    assert manifest.pending() == [e for e in entries if _norm(e.status) in {"queued", "running"}]
+
+
+def _random_entry(rng, state, serial):
+    entry = nodes.LoopManifestEntry(
+        cycle_index=rng.randrange(0, int(state.total_cycles) + 2),
+        retry_index=rng.randrange(0, 4),
+        status=rng.choice(_STATUSES),
+        decision=rng.choice(_DECISIONS),
+        prompt_id=rng.choice([None, f"prompt-{serial}", f"prompt-{serial % 5}"]),
+        outputs={},
+    )
+    entry.updated_at = float(rng.randrange(0, 6))
+    return entry
+
+
+def _random_step(rng, state, serial):
+    entries = list(state.manifest)
+    action = rng.randrange(10) if entries else 0
+    if action in (0, 1):
+        state.manifest.append(_random_entry(rng, state, serial))
+    elif action == 2:
+        rng.choice(entries).status = rng.choice(_STATUSES)
+    elif action == 3:
+        rng.choice(entries).decision = rng.choice(_DECISIONS)
+    elif action == 4:
+        # Coarse timestamps force ties between duplicates of the same retry.
+        rng.choice(entries).updated_at = float(rng.randrange(0, 6))
+    elif action == 5:
+        entry = rng.choice(entries)
+        entry.cycle_index = rng.randrange(0, int(state.total_cycles) + 2)
+        entry.retry_index = rng.randrange(0, 4)
+    elif action == 6:
+        entry = rng.choice(entries)
+        decision = rng.choice(["approve", "reject", "replay", "discard"])
+        assert nodes._apply_loop_decision_state(state, entry.cycle_index, entry.retry_index, decision) is not None
+        for touched in state.manifest:
+            touched.updated_at = float(int(touched.updated_at))
+    elif action == 7:
+        state.manifest.drop_oldest(rng.randrange(1, 3))
+    elif action == 8:
+        state.total_cycles = rng.randrange(1, 8)
+    elif rng.random() < 0.2:
+        state.manifest.clear()
+    else:
+        entry = rng.choice(entries)
+        entry.prompt_id = rng.choice([None, f"prompt-{serial % 5}"])
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_incremental_progression_matches_full_rescan(seed):
+    rng = random.Random(seed)
+    state = nodes.LoopState(loop_id=f"loop-prop-{seed}", total_cycles=rng.randrange(1, 8))
+    for serial in range(250):
+        _random_step(rng, state, serial)
+        assert nodes._compute_loop_progression(state) == _reference_progression(state), (seed, serial)
+    _assert_indexes_match(state)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_progression_matches_for_manifest_built_from_list(seed):
+    rng = random.Random(1000 + seed)
+    template = nodes.LoopState(loop_id="loop-template", total_cycles=6)
+    entries = [_random_entry(rng, template, serial) for serial in range(40)]
+    state = nodes.LoopState(loop_id=f"loop-list-{seed}", total_cycles=6, manifest=entries)
+    assert nodes._compute_loop_progression(state) == _reference_progression(state)
+    _assert_indexes_match(state)
+
+
+def test_incremental_progression_walks_long_batch_loop():
+    total_cycles = 3000
+    state = nodes.LoopState(loop_id="loop-batch", total_cycles=total_cycles)
+    for cycle in range(total_cycles):
+        entry = nodes.LoopManifestEntry(cycle_index=cycle, retry_index=0, status="queued", prompt_id=f"p-{cycle}")
+        state.manifest.append(entry)
+        assert nodes._sync_loop_runtime_from_manifest(state)["status"] == "running"
+        entry.status = "returned"
+        progression = nodes._apply_loop_decision_state(state, cycle, 0, "approve")
+        if cycle % 500 == 0:
+            assert progression == _reference_progression(state)
+    assert state.status == "complete"
+    assert state.current_cycle == total_cycles
+
+    # Withdrawing an early approval moves the cursor back, re-approving restores it.
+    nodes._apply_loop_decision_state(state, 7, 0, "reject")
+    assert state.current_cycle == 7 and state.current_retry == 1
+    nodes._apply_loop_decision_state(state, 7, 0, "approve")
+    assert state.status == "complete"
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import json
 import shutil
+import time
 import uuid
 from pathlib import Path
 
-from backend.loop.runtime_state import LoopRuntimeStateStore
+from backend.loop.runtime_state import LoopRuntimeStateStore, apply_merge_patch
 
 
 def _case_path() -> Path:
@@ -72,3 +74,138 @@ def test_runtime_state_store_prunes_oldest():
     assert store.get("loop-b") is not None
     assert store.get("loop-c") is not None
     _cleanup_case(state_path)
+
+
+def test_runtime_state_store_journals_saves_and_recovers_after_crash():
+    state_path = _case_path()
+    journal_path = Path(f"{state_path}.journal")
+    store = LoopRuntimeStateStore(str(state_path), max_entries=8, compact_min_bytes=1 << 30)
+    first = store.set("loop-a", {"loopId": "loop-a", "rev": 1})
+    store.set("loop-b", {"loopId": "loop-b"})
+    store.set("loop-a", {"loopId": "loop-a", "rev": 2})
+    assert store.clear("loop-b") is True
+    # Saves only append; the snapshot is not rewritten per save.
+    assert not state_path.exists()
+    assert len(journal_path.read_text(encoding="utf-8").splitlines()) == 4
+    with open(journal_path, "a", encoding="utf-8") as fh:
+        fh.write('{"op":"set","loop_id":"loop-c","state":{"rev"')  # torn write
+
+    recovered = LoopRuntimeStateStore(str(state_path), max_entries=8)
+    restored = recovered.get("loop-a")
+    assert restored["rev"] == 2
+    assert restored["updated_seq"] == first["updated_seq"] + 2
+    assert recovered.get("loop-b") is None
+    assert recovered.get("loop-c") is None
+    # Loading compacts the journal into the snapshot.
+    assert state_path.exists() and not journal_path.exists()
+    assert recovered.set("loop-d", {"loopId": "loop-d"})["updated_seq"] == restored["updated_seq"] + 1
+    _cleanup_case(state_path)
+
+
+def test_runtime_state_store_compacts_journal_in_background():
+    state_path = _case_path()
+    store = LoopRuntimeStateStore(str(state_path), max_entries=8, compact_min_bytes=256)
+    for rev in range(40):
+        store.set("loop-a", {"loopId": "loop-a", "rev": rev, "pad": "x" * 32})
+    deadline = time.time() + 5.0
+    while time.time() < deadline and not state_path.exists():
+        time.sleep(0.01)
+    store.compact()
+    assert json.loads(state_path.read_text(encoding="utf-8"))["index"]["loop-a"]["updated_seq"] == 40
+    assert not Path(f"{state_path}.journal.compacting").exists()
+    assert LoopRuntimeStateStore(str(state_path), max_entries=8).get("loop-a")["rev"] == 39
+    _cleanup_case(state_path)
+
+
+def test_runtime_state_store_shards_states_and_loads_them_lazily():
+    state_path = _case_path()
+    store = LoopRuntimeStateStore(str(state_path), max_entries=8, max_resident=2)
+    for name in ("loop-a", "loop-b", "loop-c"):
+        store.set(name, {"loopId": name, "timeline": ["clip"] * 10})
+    shard_dir = state_path.parent / "runtime_state"
+    assert len(list(shard_dir.glob("*.json"))) == 3
+    assert store.resident_count == 2
+    store.compact()
+    assert "states" not in json.loads(state_path.read_text(encoding="utf-8"))
+
+    reloaded = LoopRuntimeStateStore(str(state_path), max_entries=8, max_resident=2)
+    assert reloaded.resident_count == 0
+    assert reloaded.get("loop-a")["loopId"] == "loop-a"
+    assert reloaded.get("loop-b")["timeline"] == ["clip"] * 10
+    assert reloaded.get("loop-c") is not None
+    assert reloaded.resident_count == 2
+    # Returned states are copies; mutating one does not leak into the store.
+    reloaded.get("loop-c")["loopId"] = "mutated"
+    assert reloaded.get("loop-c")["loopId"] == "loop-c"
+
+    assert reloaded.clear("loop-a") is True
+    assert len(list(shard_dir.glob("*.json"))) == 2
+    _cleanup_case(state_path)
+
+
+def test_runtime_state_store_migrates_inline_snapshot_to_shards():
+    state_path = _case_path()
+    legacy = {
+        "version": 1,
+        "states": {
+            "loop-a": {"loopId": "loop-a", "updated_at": 10.0, "updated_seq": 3},
+            "loop-b": {"loopId": "loop-b", "updated_at": 20.0, "updated_seq": 4},
+        },
+    }
+    state_path.write_text(json.dumps(legacy), encoding="utf-8")
+    store = LoopRuntimeStateStore(str(state_path), max_entries=8)
+    assert store.get("loop-a") == {"loopId": "loop-a", "updated_at": 10.0, "updated_seq": 3}
+    assert store.set("loop-c", {"loopId": "loop-c"})["updated_seq"] == 5
+    snapshot = json.loads(state_path.read_text(encoding="utf-8"))
+    assert snapshot["version"] == 2 and set(snapshot["index"]) == {"loop-a", "loop-b"}
+    assert LoopRuntimeStateStore(str(state_path), max_entries=8).get("loop-b")["loopId"] == "loop-b"
+    _cleanup_case(state_path)
+
+
+def test_apply_merge_patch_follows_rfc7386_without_mutating_target():
+    target = {"a": {"b": 1, "c": [1, 2]}, "d": "keep", "e": 1}
+    patched = apply_merge_patch(target, {"a": {"b": None, "c": [3], "x": {"y": 1}}, "e": None, "f": 2})
+    assert patched == {"a": {"c": [3], "x": {"y": 1}}, "d": "keep", "f": 2}
+    assert target == {"a": {"b": 1, "c": [1, 2]}, "d": "keep", "e": 1}
+    assert patched["d"] is target["d"]
+
+
+def test_runtime_state_store_patches_with_optimistic_seq_and_replays_patch_log():
+    state_path = _case_path()
+    store = LoopRuntimeStateStore(str(state_path), max_entries=8, compact_min_bytes=1 << 30)
+    assert store.patch("loop-a", {"x": 1})["error"] == "not_found"
+    base = store.set("loop-a", {"loopId": "loop-a", "tracks": {"t1": {"gain": 0}}, "notes": "n"})
+
+    first = store.patch("loop-a", {"tracks": {"t1": {"gain": 3}}, "notes": None}, base_seq=base["updated_seq"])
+    assert first["ok"] is True and first["updated_seq"] == base["updated_seq"] + 1
+    stale = store.patch("loop-a", {"tracks": {"t2": {}}}, base_seq=base["updated_seq"])
+    assert stale == {"ok": False, "error": "seq_conflict", "updated_seq": first["updated_seq"]}
+    assert store.patch("loop-a", {"tracks": {"t2": {"gain": 1}}}, base_seq=first["updated_seq"])["ok"] is True
+    expected = {"loopId": "loop-a", "tracks": {"t1": {"gain": 3}, "t2": {"gain": 1}}}
+    restored = store.get("loop-a")
+    assert {key: value for key, value in restored.items() if not key.startswith("updated_")} == expected
+    assert restored["updated_seq"] == first["updated_seq"] + 1
+
+    # Patches are appended next to the untouched shard and replayed on load.
+    shard_dir = state_path.parent / "runtime_state"
+    assert len(list(shard_dir.glob("*.patches"))[0].read_text(encoding="utf-8").splitlines()) == 2
+    assert LoopRuntimeStateStore(str(state_path), max_entries=8).get("loop-a") == restored
+
+    # A full `set` supersedes the patch log.
+    store.set("loop-a", {"loopId": "loop-a"})
+    assert list(shard_dir.glob("*.patches")) == []
+    _cleanup_case(state_path)
+
+
+def test_runtime_state_store_folds_patch_log_into_shard_when_it_grows():
+    state_path = _case_path()
+    store = LoopRuntimeStateStore(str(state_path), max_entries=8, compact_min_bytes=0)
+    store.set("loop-a", {"loopId": "loop-a", "counter": 0})
+    for value in range(1, 30):
+        assert store.patch("loop-a", {"counter": value})["ok"] is True
+    shard_dir = state_path.parent / "runtime_state"
+    patch_logs = list(shard_dir.glob("*.patches"))
+    assert not patch_logs or len(patch_logs[0].read_text(encoding="utf-8").splitlines()) < 29
+    store.compact()
+    assert LoopRuntimeStateStore(str(state_path), max_entries=8).get("loop-a")["counter"] == 29
+    _cleanup_case(state_path)
@@ -1,7 +1,10 @@
+import shutil
+import uuid
 from pathlib import Path
 
 import pytest
 
+from features.song2daw.core.cache import StepResultCache
 from features.song2daw.core.pipeline import (
     PipelineExecutionError,
     load_pipeline_step,
@@ -134,3 +137,53 @@ def test_run_pipeline_with_builtin_ingest_handler():
     assert "audio_canonical" in result["artifacts"]
     assert isinstance(result["songgraph"], dict)
     assert result["songgraph"]["node_versions"]["Ingest"] == "0.1.0"
+
+
+def test_run_pipeline_reuses_cached_step_outputs():
+    cache_dir = Path(__file__).resolve().parent / "_tmp_step_cache" / f"case_{uuid.uuid4().hex}"
+    steps = load_pipeline_steps(
+        (
+            PIPELINES_DIR / "ingest.yaml",
+            PIPELINES_DIR / "tempo_analysis.yaml",
+        )
+    )
+    calls = []
+
+    def ingest_handler(_inputs, _step):
+        calls.append("Ingest")
+        return {
+            "artifacts.audio_canonical": "audio_canonical.wav",
+            "artifacts.stems_canonical": "stems_canonical",
+        }
+
+    def tempo_handler(_inputs, _step):
+        calls.append("TempoAnalysis")
+        return {
+            "artifacts.tempo": {"bpm": 128},
+            "artifacts.beatgrid": [0.0, 0.5, 1.0],
+            "songgraph": {"schema_version": "1.0.0"},
+        }
+
+    kwargs = {
+        "handlers": {"Ingest": ingest_handler, "TempoAnalysis": tempo_handler},
+        "inputs": {"audio_path": "song.wav", "stems_dir": "stems_src"},
+    }
+    try:
+        cache = StepResultCache(str(cache_dir))
+        first = run_pipeline(steps, cache=cache, **kwargs)
+        second = run_pipeline(steps, cache=cache, **kwargs)
+        third = run_pipeline(
+            steps,
+            cache=cache,
+            step_configs={"TempoAnalysis": {"window": 2048}},
+            **kwargs,
+        )
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    assert calls == ["Ingest", "TempoAnalysis", "TempoAnalysis"]
+    assert [step["cache_hit"] for step in first["steps"]] == [False, False]
+    assert [step["cache_hit"] for step in second["steps"]] == [True, True]
+    assert [step["cache_hit"] for step in third["steps"]] == [True, False]
+    assert second["artifacts"] == first["artifacts"]
+    assert second["songgraph"] == first["songgraph"]
@@ -1,13 +1,20 @@
+import json
+import shutil
+import uuid
+
 import pytest
 from pathlib import Path
 
+from features.song2daw.core.cache import StepResultCache
 from features.song2daw.core.graph import validate_songgraph
 from features.song2daw.core.runner import (
     DEFAULT_PIPELINE_MANIFESTS,
     build_default_handlers,
     get_default_pipeline_paths,
+    resume_pipeline,
     run_default_song2daw_pipeline,
     save_run_outputs,
+    write_run_outputs,
 )
 
 
@@ -100,3 +107,188 @@ def test_save_run_outputs_writes_expected_files_deterministically(monkeypatch):
 def test_save_run_outputs_rejects_empty_output_dir():
     with pytest.raises(ValueError, match="output_dir must be a non-empty path"):
         save_run_outputs({"songgraph": {}, "artifacts": {}, "steps": []}, "")
+
+
+def _counting_handlers(calls):
+    handlers = build_default_handlers()
+
+    def _wrap(name, handler):
+        def _handler(step_inputs, step):
+            calls.append(name)
+            return handler(step_inputs, step)
+
+        return _handler
+
+    return {name: _wrap(name, handler) for name, handler in handlers.items()}
+
+
+def test_resume_pipeline_reexecutes_only_invalidated_suffix():
+    cache_dir = Path(__file__).resolve().parent / "_tmp_step_cache" / f"case_{uuid.uuid4().hex}"
+    changed = {"EffectEstimation": {"default_mix": 0.5}}
+    try:
+        cache = StepResultCache(str(cache_dir))
+        previous = run_default_song2daw_pipeline(audio_path="song.wav", stems_dir="stems", cache=cache)
+
+        calls = []
+        resumed = resume_pipeline(
+            previous,
+            changed_step_configs=changed,
+            handlers_override=_counting_handlers(calls),
+            cache=cache,
+        )
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    expected = run_default_song2daw_pipeline(audio_path="song.wav", stems_dir="stems", step_configs=changed)
+
+    assert calls == ["EffectEstimation"]
+    assert resumed["artifacts"] == expected["artifacts"]
+    assert resumed["songgraph"] == expected["songgraph"]
+    assert [step["cache_key"] for step in resumed["steps"]] == [step["cache_key"] for step in expected["steps"]]
+    assert [step["index"] for step in resumed["steps"]] == list(range(len(DEFAULT_PIPELINE_MANIFESTS)))
+    assert resumed["steps"][5]["cache_hit"] is False
+
+
+def test_resume_pipeline_runs_invalidated_suffix_in_waves():
+    cache_dir = Path(__file__).resolve().parent / "_tmp_step_cache" / f"case_{uuid.uuid4().hex}"
+    changed = {"TempoAnalysis": {"window": 1024}}
+    try:
+        cache = StepResultCache(str(cache_dir))
+        previous = run_default_song2daw_pipeline(audio_path="song.wav", stems_dir="stems", cache=cache)
+
+        calls = []
+        resumed = resume_pipeline(
+            previous,
+            changed_step_configs=changed,
+            handlers_override=_counting_handlers(calls),
+            cache=cache,
+            max_workers=2,
+        )
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    expected = run_default_song2daw_pipeline(audio_path="song.wav", stems_dir="stems", step_configs=changed)
+
+    assert "Ingest" not in calls and "TempoAnalysis" in calls
+    assert resumed["waves"][0] == ["TempoAnalysis", "SourceSeparation"]
+    assert resumed["artifacts"] == expected["artifacts"]
+    assert resumed["songgraph"] == expected["songgraph"]
+    assert [step["index"] for step in resumed["steps"]] == list(range(len(DEFAULT_PIPELINE_MANIFESTS)))
+    assert resumed["steps"][0]["cache_hit"] is True
+
+
+def test_resume_pipeline_without_snapshot_falls_back_to_producing_step():
+    previous = run_default_song2daw_pipeline(audio_path="song.wav", stems_dir="stems")
+
+    calls = []
+    resumed = resume_pipeline(
+        previous,
+        changed_step_configs={"EffectEstimation": {"default_mix": 0.5}},
+        audio_path="song.wav",
+        stems_dir="stems",
+        handlers_override=_counting_handlers(calls),
+    )
+
+    assert calls == list(build_default_handlers().keys())
+    assert resumed["artifacts"] == previous["artifacts"]
+
+
+def test_resume_pipeline_returns_previous_result_when_nothing_changed():
+    previous = run_default_song2daw_pipeline(
+        audio_path="song.wav",
+        stems_dir="stems",
+        step_configs={"TempoAnalysis": {"window": 1024}},
+    )
+
+    calls = []
+    resumed = resume_pipeline(
+        previous,
+        changed_step_configs={"TempoAnalysis": {"window": 1024}},
+        handlers_override=_counting_handlers(calls),
+    )
+
+    assert calls == []
+    assert resumed["songgraph"] == previous["songgraph"]
+    assert all(step["cache_hit"] for step in resumed["steps"])
+
+
+def test_resume_pipeline_reruns_ingest_when_audio_content_changes():
+    case_dir = Path(__file__).resolve().parent / "_tmp_step_cache" / f"case_{uuid.uuid4().hex}"
+    audio_path = case_dir / "song.wav"
+    try:
+        case_dir.mkdir(parents=True)
+        audio_path.write_bytes(b"first take")
+        cache = StepResultCache(str(case_dir / "cache"))
+        previous = run_default_song2daw_pipeline(audio_path=str(audio_path), stems_dir="stems", cache=cache)
+        assert "audio_signature" in previous["steps"][0]["config"]
+
+        audio_path.write_bytes(b"second take, longer")
+        calls = []
+        resumed = resume_pipeline(
+            previous,
+            audio_path=str(audio_path),
+            stems_dir="stems",
+            handlers_override=_counting_handlers(calls),
+            cache=cache,
+        )
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+    assert calls[0] == "Ingest"
+    assert resumed["steps"][0]["cache_hit"] is False
+    assert (
+        resumed["artifacts"]["audio_canonical"]["sha256"]
+        != previous["artifacts"]["audio_canonical"]["sha256"]
+    )
+
+
+def test_run_default_pipeline_regenerates_deleted_stems_instead_of_cache_hit():
+    pytest.importorskip("numpy")
+    audio_path = Path(__file__).resolve().parents[3] / "examples" / "song2daw" / "test_audio" / "mix.wav"
+    case_dir = Path(__file__).resolve().parent / "_tmp_step_cache" / f"case_{uuid.uuid4().hex}"
+    try:
+        cache = StepResultCache(str(case_dir / "cache"))
+        kwargs = {"audio_path": str(audio_path), "stems_dir": "stems", "cache": cache}
+        first = run_default_song2daw_pipeline(stems_output_dir=str(case_dir / "stems"), **kwargs)
+        stem_paths = [Path(item["path"]) for item in first["artifacts"]["stems_generated"]["items"]]
+        assert first["steps"][3]["config"]["stems_output_dir"] == str(case_dir / "stems")
+        assert all(path.is_file() for path in stem_paths)
+
+        stem_paths[0].unlink()
+        second = run_default_song2daw_pipeline(stems_output_dir=str(case_dir / "stems"), **kwargs)
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+    assert [step["cache_hit"] for step in second["steps"][:3]] == [True, True, True]
+    assert second["steps"][3]["cache_hit"] is False
+    assert second["artifacts"]["stems_generated"] == first["artifacts"]["stems_generated"]
+
+
+def test_save_run_outputs_moves_events_to_columnar_sidecar():
+    pytest.importorskip("numpy")
+    from features.song2daw.core.event_store import EVENTS_COLUMNAR_FORMAT, load_event_items
+    from features.song2daw.core.ui_view import build_ui_view
+    import nodes
+
+    result = run_default_song2daw_pipeline(audio_path="song.wav", stems_dir="stems")
+    output_dir = Path(__file__).resolve().parent / "_tmp_step_cache" / f"case_{uuid.uuid4().hex}"
+    try:
+        run_dir, written = write_run_outputs(result, output_dir)
+        artifacts = json.loads((run_dir / "artifacts.json").read_text(encoding="utf-8"))
+        run_payload = json.loads((run_dir / "run.json").read_text(encoding="utf-8"))
+        events_ref = artifacts["events"]
+        restored = load_event_items(events_ref, run_dir)
+        compact_view = build_ui_view(run_payload, run_id="r1", run_dir=str(run_dir))
+        compact_preview = nodes._song2daw_collect_preview_events(run_payload, str(run_dir))
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    assert events_ref["format"] == EVENTS_COLUMNAR_FORMAT
+    assert "items" not in events_ref
+    assert events_ref["summary"]["count"] == len(result["artifacts"]["events"]["items"])
+    assert run_payload["steps"][4]["outputs"]["artifacts.events"]["format"] == EVENTS_COLUMNAR_FORMAT
+    assert run_payload["songgraph"]["artifacts"]["event_extraction"]["events"]["format"] == EVENTS_COLUMNAR_FORMAT
+    assert restored == result["artifacts"]["events"]["items"]
+    assert written == run_payload
+    assert compact_view == build_ui_view(result, run_id="r1")
+    assert compact_preview == nodes._song2daw_collect_preview_events(result)
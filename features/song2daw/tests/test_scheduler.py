@@ -0,0 +1,92 @@
+import pickle
+import threading
+
+from features.song2daw.core.pipeline import load_pipeline_steps, run_pipeline
+from features.song2daw.core.runner import (
+    build_default_handlers,
+    get_default_pipeline_paths,
+    run_default_song2daw_pipeline,
+)
+from features.song2daw.core.scheduler import (
+    build_execution_waves,
+    merge_songgraph_updates,
+    run_pipeline_parallel,
+)
+
+
+def _default_steps():
+    return load_pipeline_steps(get_default_pipeline_paths())
+
+
+def test_build_execution_waves_groups_independent_default_steps():
+    steps = _default_steps()
+    waves = build_execution_waves(steps)
+    names = [[steps[index].name for index in wave] for wave in waves]
+    assert names == [
+        ["Ingest"],
+        ["TempoAnalysis", "SourceSeparation"],
+        ["StructureSegmentation", "EventExtraction"],
+        ["EffectEstimation"],
+        ["ProjectionReaper"],
+    ]
+
+
+def test_run_pipeline_parallel_matches_sequential_result():
+    steps = _default_steps()
+    inputs = {"audio_path": "song.wav", "stems_dir": "stems"}
+    sequential = run_pipeline(steps, build_default_handlers(), inputs=inputs)
+    parallel = run_pipeline_parallel(steps, build_default_handlers(), inputs=inputs, max_workers=2)
+
+    assert parallel["songgraph"] == sequential["songgraph"]
+    assert parallel["artifacts"] == sequential["artifacts"]
+    assert [step["cache_key"] for step in parallel["steps"][:2]] == [
+        step["cache_key"] for step in sequential["steps"][:2]
+    ]
+    assert parallel["waves"][1] == ["TempoAnalysis", "SourceSeparation"]
+
+
+def test_run_pipeline_parallel_runs_wave_steps_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    handlers = build_default_handlers()
+
+    def _waiting(name):
+        inner = handlers[name]
+
+        def _handler(step_inputs, step):
+            barrier.wait()
+            return inner(step_inputs, step)
+
+        return _handler
+
+    handlers["TempoAnalysis"] = _waiting("TempoAnalysis")
+    handlers["SourceSeparation"] = _waiting("SourceSeparation")
+
+    result = run_default_song2daw_pipeline(
+        audio_path="song.wav",
+        stems_dir="stems",
+        handlers_override=handlers,
+        max_workers=2,
+    )
+    assert [step["name"] for step in result["steps"]][-1] == "ProjectionReaper"
+
+
+def test_merge_songgraph_updates_keeps_step_order_for_new_nodes():
+    base = {"nodes": [{"id": "a"}], "edges": [], "artifacts": {"x": 1}}
+    ranks = {"a": (-1, 0)}
+    merged = merge_songgraph_updates(
+        base,
+        [
+            (2, {"nodes": [{"id": "a"}, {"id": "c"}], "edges": [], "artifacts": {"x": 1, "c": 3}}),
+            (1, {"nodes": [{"id": "a", "v": 2}, {"id": "b"}], "edges": [], "artifacts": {"x": 1, "b": 2}}),
+        ],
+        ranks,
+    )
+    assert [node["id"] for node in merged["nodes"]] == ["a", "b", "c"]
+    assert merged["nodes"][0] == {"id": "a", "v": 2}
+    assert merged["artifacts"] == {"x": 1, "b": 2, "c": 3}
+
+
+def test_default_handlers_are_picklable():
+    handlers = build_default_handlers()
+    restored = pickle.loads(pickle.dumps(handlers))
+    assert set(restored) == set(handlers)
@@ -51,3 +51,31 @@ def test_schema_uses_validator_when_available(monkeypatch):
 
     monkeypatch.setattr(graph_module, "Draft202012Validator", _FakeValidator)
     assert graph_module.validate_songgraph(_minimal_graph()) is True
+
+
+def test_songgraph_builder_upserts_without_mutating_base():
+    base = _minimal_graph()
+    base["nodes"] = [{"id": "n1", "type": "TimeNode", "data": {"bpm": 120}}]
+    base["artifacts"] = {"ingest": {"ok": True}}
+
+    builder = graph_module.SongGraphBuilder(base, pipeline_version="0.2.0")
+    builder.set_step_version("TempoAnalysis", "0.2.0")
+    builder.set_artifact("tempo_analysis", {"bpm": 128})
+    builder.upsert_node({"id": "n1", "type": "TimeNode", "data": {"bpm": 128}})
+    builder.upsert_node({"id": "n2", "type": "EventNode", "data": {}})
+    graph = builder.build()
+
+    assert [node["id"] for node in graph["nodes"]] == ["n1", "n2"]
+    assert graph["nodes"][0]["data"] == {"bpm": 128}
+    assert graph["node_versions"] == {"TempoAnalysis": "0.2.0"}
+    assert graph["artifacts"] == {"ingest": {"ok": True}, "tempo_analysis": {"bpm": 128}}
+    assert graph["timebase"] is base["timebase"]
+    assert base["nodes"] == [{"id": "n1", "type": "TimeNode", "data": {"bpm": 120}}]
+    assert base["artifacts"] == {"ingest": {"ok": True}}
+    assert "node_versions" not in base
+    assert validate_songgraph(graph) is True
+
+
+def test_songgraph_builder_creates_graph_without_base():
+    graph = graph_module.SongGraphBuilder(None, pipeline_version="0.1.0").build()
+    assert graph == _minimal_graph()
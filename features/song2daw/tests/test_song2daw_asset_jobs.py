@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import threading
+
+from backend.song2daw.asset_jobs import Song2DawAssetJobQueue
+
+
+def test_asset_job_queue_coalesces_duplicate_submissions():
+    queue = Song2DawAssetJobQueue(max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def _job():
+        calls.append(1)
+        release.wait(5)
+        return "preview.wav"
+
+    first = queue.submit("preview_mix:run-a", _job, eta_sec=2.0)
+    second = queue.submit("preview_mix:run-a", _job, eta_sec=2.0)
+    assert first["state"] in ("pending", "running")
+    assert second["state"] in ("pending", "running")
+    assert 0.0 <= second["eta_sec"] <= 2.0
+
+    release.set()
+    done = queue.wait("preview_mix:run-a", timeout=5)
+    assert done["state"] == "done"
+    assert done["result"] == "preview.wav"
+    assert done["eta_sec"] == 0.0
+    assert calls == [1]
+    assert queue.submit("preview_mix:run-a", _job)["state"] == "done"
+    assert calls == [1]
+
+
+def test_asset_job_queue_reports_errors_and_allows_retry():
+    queue = Song2DawAssetJobQueue(max_workers=1)
+
+    def _boom():
+        raise RuntimeError("synth failed")
+
+    queue.submit("preview_mix:run-b", _boom)
+    failed = queue.wait("preview_mix:run-b", timeout=5)
+    assert failed["state"] == "error"
+    assert failed["error"] == "synth failed"
+
+    queue.submit("preview_mix:run-b", lambda: "ok.wav")
+    retried = queue.wait("preview_mix:run-b", timeout=5)
+    assert retried["state"] == "done"
+    assert retried["result"] == "ok.wav"
+
+
+def test_asset_job_queue_status_unknown_key_is_none():
+    queue = Song2DawAssetJobQueue()
+    assert queue.status("missing") is None
+    assert queue.wait("missing", timeout=0.1) is None
@@ -1,13 +1,19 @@
+import shutil
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
 
 from features.song2daw.core.graph import validate_songgraph
 from features.song2daw.core.pipeline import load_pipeline_step
+from features.song2daw.core.separation import separate_to_stems
 from features.song2daw.core.steps.source import make_source_separation_handler, run_source_separation_step
 
 
 PIPELINES_DIR = Path(__file__).resolve().parents[1] / "pipelines"
+EXAMPLE_MIX = Path(__file__).resolve().parents[3] / "examples" / "song2daw" / "test_audio" / "mix.wav"
 
 
 def test_run_source_separation_step_builds_valid_songgraph():
@@ -59,3 +65,57 @@ def test_run_source_separation_step_rejects_invalid_audio_ref():
     step = load_pipeline_step(PIPELINES_DIR / "source_separation.yaml")
     with pytest.raises(ValueError, match="artifacts.audio_canonical must be a string or mapping"):
         run_source_separation_step({"artifacts.audio_canonical": None}, step)
+
+
+def _read_pcm(path):
+    np = pytest.importorskip("numpy")
+    with wave.open(str(path), "rb") as handle:
+        return np.frombuffer(handle.readframes(handle.getnframes()), dtype="<i2").astype(np.int64)
+
+
+def test_run_source_separation_step_writes_stems_that_sum_to_mix():
+    pytest.importorskip("numpy")
+    step = load_pipeline_step(PIPELINES_DIR / "source_separation.yaml")
+    case_dir = Path(__file__).resolve().parent / "_tmp_source" / f"case_{uuid.uuid4().hex}"
+    try:
+        handler = make_source_separation_handler(output_dir=str(case_dir), chunk_sec=3.0, overlap_sec=0.25, max_workers=2)
+        inputs = {"artifacts.audio_canonical": {"source": str(EXAMPLE_MIX), "sha256": "e" * 64, "format": "wav"}}
+        result = handler(inputs, step)
+        stems = result["artifacts.stems_generated"]
+        paths = [Path(item["path"]) for item in stems["items"]]
+
+        assert stems["method"] == "chunked_overlap_add_v1"
+        assert stems["model"] == "spectral_mask_v1"
+        assert all(path.is_file() and path.parent.parent == case_dir for path in paths)
+        assert all(item["path_hint"] == item["path"] for item in stems["items"])
+        mix = _read_pcm(EXAMPLE_MIX)
+        assert all(item["frames"] == mix.size for item in stems["items"])
+        total = sum(_read_pcm(path) for path in paths)
+        assert int(abs(total - mix).max()) <= len(paths)
+
+        # A complete stem set for the same audio/model is reused, not recomputed.
+        assert handler(inputs, step) == result
+
+        # Different separation settings must not reuse those stems.
+        rechunked = make_source_separation_handler(output_dir=str(case_dir), chunk_sec=4.0, overlap_sec=0.25)
+        other_paths = [Path(item["path"]) for item in rechunked(inputs, step)["artifacts.stems_generated"]["items"]]
+        assert other_paths[0].parent != paths[0].parent
+        assert all(path.is_file() for path in other_paths)
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+
+def test_separate_to_stems_tolerates_concurrent_writers_of_one_folder():
+    pytest.importorskip("numpy")
+    case_dir = Path(__file__).resolve().parent / "_tmp_source" / f"case_{uuid.uuid4().hex}"
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [
+                pool.submit(separate_to_stems, EXAMPLE_MIX, case_dir, ["drums", "bass"], chunk_sec=3.0)
+                for _ in range(2)
+            ]
+            first, second = [future.result() for future in futures]
+        assert first == second
+        assert sorted(path.name for path in case_dir.iterdir()) == ["bass.wav", "drums.wav"]
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
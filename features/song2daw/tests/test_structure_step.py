@@ -1,3 +1,6 @@
+import shutil
+import uuid
+import wave
 from pathlib import Path
 
 import pytest
@@ -85,6 +88,57 @@ def test_run_pipeline_ingest_tempo_structure_with_builtin_handlers():
     assert "sections" in result["artifacts"]
     assert len(result["artifacts"]["sections"]["sections"]) > 0
     assert result["songgraph"]["node_versions"]["Ingest"] == "0.1.0"
-    assert result["songgraph"]["node_versions"]["TempoAnalysis"] == "0.1.0"
-    assert result["songgraph"]["node_versions"]["StructureSegmentation"] == "0.1.0"
+    assert result["songgraph"]["node_versions"]["TempoAnalysis"] == "0.2.0"
+    assert result["songgraph"]["node_versions"]["StructureSegmentation"] == "0.2.0"
+    assert validate_songgraph(result["songgraph"]) is True
+
+
+def _write_aba_song(path, *, beats_per_part=24, beat_sec=0.5, sample_rate=22050):
+    np = pytest.importorskip("numpy")
+    parts = []
+    for index, (freqs, bright) in enumerate(
+        (((261.6, 329.6, 392.0), False), ((370.0, 466.2, 554.4), True), ((261.6, 329.6, 392.0), False))
+    ):
+        t = np.arange(int(beats_per_part * beat_sec * sample_rate)) / sample_rate
+        signal = sum(np.sin(2 * np.pi * freq * t) for freq in freqs) * 0.1
+        if bright:
+            signal += 0.1 * np.sign(np.sin(2 * np.pi * freqs[0] * 2 * t))
+        for beat in range(beats_per_part):
+            start = int(beat * beat_sec * sample_rate)
+            signal[start : start + 200] += 0.3 * np.exp(-np.arange(200) / 40.0)
+        parts.append(signal)
+    pcm = (np.clip(np.concatenate(parts), -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(sample_rate)
+        handle.writeframes(pcm.tobytes())
+    return [round(index * beat_sec, 6) for index in range(3 * beats_per_part)]
+
+
+def test_run_structure_segmentation_step_finds_novelty_boundaries_in_audio():
+    step = load_pipeline_step(PIPELINES_DIR / "structure_segmentation.yaml")
+    case_dir = Path(__file__).resolve().parent / "_tmp_structure" / f"case_{uuid.uuid4().hex}"
+    try:
+        case_dir.mkdir(parents=True)
+        audio_path = case_dir / "aba.wav"
+        beats = _write_aba_song(audio_path)
+        result = run_structure_segmentation_step(
+            {
+                "artifacts.audio_canonical": {"source": str(audio_path), "sha256": "d" * 64, "format": "wav"},
+                "artifacts.beatgrid": {"beats_sec": beats},
+            },
+            step,
+        )
+    finally:
+        shutil.rmtree(case_dir, ignore_errors=True)
+
+    artifact = result["artifacts.sections"]
+    assert artifact["method"] == "beat_chroma_novelty_v1"
+    assert [(item["start_beat_index"], item["end_beat_index"]) for item in artifact["sections"]] == [
+        (0, 24),
+        (24, 48),
+        (48, 71),
+    ]
+    assert all(0.3 <= item["confidence"] <= 1.0 for item in artifact["sections"])
     assert validate_songgraph(result["songgraph"]) is True
@@ -71,5 +71,39 @@ def test_run_pipeline_ingest_then_tempo_with_builtin_handlers():
     assert "tempo" in result["artifacts"]
     assert "beatgrid" in result["artifacts"]
     assert result["songgraph"]["node_versions"]["Ingest"] == "0.1.0"
-    assert result["songgraph"]["node_versions"]["TempoAnalysis"] == "0.1.0"
+    assert result["songgraph"]["node_versions"]["TempoAnalysis"] == "0.2.0"
     assert validate_songgraph(result["songgraph"]) is True
+
+
+EXAMPLE_MIX = Path(__file__).resolve().parents[3] / "examples" / "song2daw" / "test_audio" / "mix.wav"
+
+
+def test_run_tempo_analysis_step_tracks_beats_in_wav_fixture():
+    pytest.importorskip("numpy")
+    step = load_pipeline_step(PIPELINES_DIR / "tempo_analysis.yaml")
+
+    result = run_tempo_analysis_step(
+        {"artifacts.audio_canonical": {"source": str(EXAMPLE_MIX), "sha256": "c" * 64, "format": "wav"}},
+        step,
+    )
+    tempo = result["artifacts.tempo"]
+    beats = result["artifacts.beatgrid"]["beats_sec"]
+
+    assert tempo["method"] == "onset_autocorr_dp_v1"
+    assert tempo["bpm"] == pytest.approx(120.0, abs=1.0)
+    assert 0.0 < tempo["confidence"] <= 1.0
+    assert len(beats) >= 14
+    intervals = sorted(later - earlier for earlier, later in zip(beats, beats[1:]))
+    assert intervals[len(intervals) // 2] == pytest.approx(0.5, abs=0.03)
+    assert set(result["artifacts.beatgrid"]["downbeats_sec"]).issubset(beats)
+    assert validate_songgraph(result["songgraph"]) is True
+
+
+def test_run_tempo_analysis_step_keeps_placeholder_when_analysis_disabled():
+    step = load_pipeline_step(PIPELINES_DIR / "tempo_analysis.yaml")
+    handler = make_tempo_handler(analyze_audio=False)
+
+    result = handler({"artifacts.audio_canonical": {"source": str(EXAMPLE_MIX), "sha256": "c" * 64}}, step)
+
+    assert result["artifacts.tempo"]["method"] == "deterministic_placeholder_v1"
+    assert len(result["artifacts.beatgrid"]["beats_sec"]) == 16
@@ -5,6 +5,7 @@ ComfyUI-leMouf nodes.
 from __future__ import annotations
 
 import asyncio
+import functools
 import json
 import math
 import os
@@ -18,7 +19,7 @@ import uuid
 import wave
 from urllib.parse import quote as url_quote
 from array import array
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from hashlib import sha256
 from typing import Any, Dict, List, Mapping, Optional, Tuple
 
@@ -30,18 +31,28 @@ try:
     from .backend.workflows import catalog as workflow_catalog
     from .backend.workflows import profiles as workflow_profiles
     from .backend.composition.export_manifest import CompositionRenderManifestStore
+    from .backend.composition.proxy_media import CompositionProxyStore
     from .backend.composition.render_execute import CompositionRenderExecutionService
+    from .backend.composition.render_jobs import CompositionRenderJobQueue
     from .backend.composition import export_profiles as composition_export_profiles
+    from .backend.loop import manifest as loop_manifest
+    from .backend.loop.manifest import LoopManifest
     from .backend.loop.media_cache import LoopMediaCacheStore
     from .backend.loop.runtime_state import LoopRuntimeStateStore
+    from .backend.song2daw.asset_jobs import Song2DawAssetJobQueue
 except Exception:  # pragma: no cover - direct import context
     from backend.workflows import catalog as workflow_catalog
     from backend.workflows import profiles as workflow_profiles
     from backend.composition.export_manifest import CompositionRenderManifestStore
+    from backend.composition.proxy_media import CompositionProxyStore
     from backend.composition.render_execute import CompositionRenderExecutionService
+    from backend.composition.render_jobs import CompositionRenderJobQueue
     from backend.composition import export_profiles as composition_export_profiles
+    from backend.loop import manifest as loop_manifest
+    from backend.loop.manifest import LoopManifest
     from backend.loop.media_cache import LoopMediaCacheStore
     from backend.loop.runtime_state import LoopRuntimeStateStore
+    from backend.song2daw.asset_jobs import Song2DawAssetJobQueue
 
 def _int_env(name: str, default: int) -> int:
     try:
@@ -103,8 +114,28 @@ MAX_RUNTIME_STATES = _int_env("LEMOUF_MAX_RUNTIME_STATES", max(10, MAX_LOOPS if
 MAX_MEDIA_CACHE_FILES_PER_LOOP = _int_env("LEMOUF_MAX_MEDIA_CACHE_FILES_PER_LOOP", 512)
 MAX_MEDIA_CACHE_FILE_MB = _int_env("LEMOUF_MAX_MEDIA_CACHE_FILE_MB", 512)
 MAX_MEDIA_CACHE_FILE_BYTES = max(1, int(MAX_MEDIA_CACHE_FILE_MB)) * 1024 * 1024
+MAX_MEDIA_CACHE_TOTAL_MB = _int_env("LEMOUF_MAX_MEDIA_CACHE_TOTAL_MB", 10240)
+_MEDIA_UPLOAD_CHUNK_BYTES = 1024 * 1024
 MAX_COMPOSITION_EXPORTS_PER_SCOPE = _int_env("LEMOUF_MAX_COMPOSITION_EXPORTS_PER_SCOPE", 200)
 MAX_COMPOSITION_RENDERS_PER_SCOPE = _int_env("LEMOUF_MAX_COMPOSITION_RENDERS_PER_SCOPE", 120)
+COMPOSITION_RENDER_WORKERS = _int_env("LEMOUF_COMPOSITION_RENDER_WORKERS", 2)
+# Segments of every concurrent job run at once: split the cores across the few job slots
+# (not cpu x cpu ffmpegs), keeping at least two so long timelines are always segmented.
+COMPOSITION_RENDER_SEGMENTS = _int_env(
+    "LEMOUF_COMPOSITION_RENDER_SEGMENTS",
+    max(2, (os.cpu_count() or 1) // max(1, COMPOSITION_RENDER_WORKERS)),
+)
+COMPOSITION_RENDER_MIN_SEGMENT_SEC = _int_env("LEMOUF_COMPOSITION_RENDER_MIN_SEGMENT_SEC", 20)
+COMPOSITION_PROXY_MAX_HEIGHT = _int_env("LEMOUF_COMPOSITION_PROXY_MAX_HEIGHT", 540)
+COMPOSITION_PROXY_WORKERS = _int_env("LEMOUF_COMPOSITION_PROXY_WORKERS", 1)
+COMPOSITION_PROXY_TOTAL_MB = _int_env("LEMOUF_COMPOSITION_PROXY_TOTAL_MB", 4096)
+SONG2DAW_STEP_CACHE_MB = _int_env("LEMOUF_SONG2DAW_STEP_CACHE_MB", 1024)
+SONG2DAW_STEP_CACHE_MAX_AGE_HOURS = _int_env("LEMOUF_SONG2DAW_STEP_CACHE_MAX_AGE_HOURS", 24 * 14)
+# Steps of one dependency wave run concurrently; independent of resume and of per-stem workers.
+SONG2DAW_MAX_WORKERS = _int_env("LEMOUF_SONG2DAW_MAX_WORKERS", 1)
+# One worker per stem of the default 4-stem split, within the available cores.
+SONG2DAW_STEM_WORKERS = _int_env("LEMOUF_SONG2DAW_STEM_WORKERS", min(4, os.cpu_count() or 1))
+SONG2DAW_ASSET_WORKERS = _int_env("LEMOUF_SONG2DAW_ASSET_WORKERS", 1)
 _MIDI_EXTENSIONS = {".mid", ".midi"}
 
 _LOOP_RUNTIME_STATE_PATH = os.path.join(THIS_DIR, "backend", "loop", "runtime_state.json")
@@ -117,16 +148,31 @@ LOOP_MEDIA_CACHE = LoopMediaCacheStore(
     path=_LOOP_MEDIA_CACHE_DIR,
     max_files_per_loop=MAX_MEDIA_CACHE_FILES_PER_LOOP,
     max_file_bytes=MAX_MEDIA_CACHE_FILE_BYTES,
+    max_total_bytes=max(0, int(MAX_MEDIA_CACHE_TOTAL_MB)) * 1024 * 1024,
 )
 _COMPOSITION_EXPORT_DIR = os.path.join(THIS_DIR, "backend", "composition", "render_exports")
 COMPOSITION_EXPORTS = CompositionRenderManifestStore(
     path=_COMPOSITION_EXPORT_DIR,
     max_files_per_scope=MAX_COMPOSITION_EXPORTS_PER_SCOPE,
 )
+_COMPOSITION_PROXY_DIR = os.path.join(THIS_DIR, "backend", "composition", "proxies")
+COMPOSITION_PROXIES = CompositionProxyStore(
+    path=_COMPOSITION_PROXY_DIR,
+    max_height=COMPOSITION_PROXY_MAX_HEIGHT,
+    max_workers=COMPOSITION_PROXY_WORKERS,
+    max_total_bytes=max(0, int(COMPOSITION_PROXY_TOTAL_MB)) * 1024 * 1024,
+)
 _COMPOSITION_RENDER_OUTPUT_DIR = os.path.join(THIS_DIR, "backend", "composition", "renders")
 COMPOSITION_RENDER_EXECUTOR = CompositionRenderExecutionService(
     path=_COMPOSITION_RENDER_OUTPUT_DIR,
     max_files_per_scope=MAX_COMPOSITION_RENDERS_PER_SCOPE,
+    max_segments=COMPOSITION_RENDER_SEGMENTS,
+    min_segment_sec=COMPOSITION_RENDER_MIN_SEGMENT_SEC,
+    proxies=COMPOSITION_PROXIES,
+)
+COMPOSITION_RENDER_JOBS = CompositionRenderJobQueue(
+    COMPOSITION_RENDER_EXECUTOR,
+    max_workers=COMPOSITION_RENDER_WORKERS,
 )
 
 
@@ -162,6 +208,18 @@ class LoopManifestEntry:
     created_at: float = field(default_factory=time.time)
     updated_at: float = field(default_factory=time.time)
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Entries inside a LoopManifest keep its prompt/slot/counter indexes in sync.
+        manifest = self.__dict__.get("_manifest")
+        if manifest is not None and name in loop_manifest.INDEXED_FIELDS:
+            manifest.reindex(self, name, value)
+        else:
+            object.__setattr__(self, name, value)
+
+
+def _manifest_entry_payload(entry: LoopManifestEntry) -> Dict[str, Any]:
+    return {item.name: getattr(entry, item.name) for item in fields(entry)}
+
 
 @dataclass
 class LoopState:
@@ -179,11 +237,16 @@ class LoopState:
     workflow: Optional[Dict[str, Any]] = None
     workflow_meta: Optional[Dict[str, Any]] = None
     workflow_source: str = "path"
-    manifest: List[LoopManifestEntry] = field(default_factory=list)
+    manifest: LoopManifest = field(default_factory=LoopManifest)
     created_at: float = field(default_factory=time.time)
     updated_at: float = field(default_factory=time.time)
     last_error: Optional[str] = None
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == "manifest" and not isinstance(value, LoopManifest):
+            value = LoopManifest(value or ())
+        object.__setattr__(self, name, value)
+
 
 class LoopRegistry:
     def __init__(self) -> None:
@@ -203,7 +266,7 @@ class LoopRegistry:
             for state in self._loops.values():
                 if len(state.manifest) > MAX_MANIFEST:
                     overflow = len(state.manifest) - MAX_MANIFEST
-                    state.manifest = state.manifest[overflow:]
+                    state.manifest.drop_oldest(overflow)
                     state.updated_at = time.time()
                     _log(f"Trimmed manifest for {state.loop_id} (kept {MAX_MANIFEST})")
                     self._last_warning = f"manifest_limit_reached: max_manifest={MAX_MANIFEST}"
@@ -252,7 +315,7 @@ class LoopRegistry:
             state.current_cycle = 0
             state.current_retry = 0
             state.last_error = None
-            state.manifest = []
+            state.manifest.clear()
             state.loop_map_error = None
             state.payload_error = None
             if not keep_workflow:
@@ -291,119 +354,37 @@ class LoopRegistry:
             state = self._loops.get(loop_id)
             if not state:
                 return None
-            for entry in state.manifest:
-                if entry.cycle_index == cycle_index and entry.retry_index == retry_index:
-                    for k, v in kwargs.items():
-                        if hasattr(entry, k):
-                            setattr(entry, k, v)
-                    entry.updated_at = time.time()
-                    state.updated_at = time.time()
-                    return entry
+            for entry in state.manifest.slot(cycle_index, retry_index):
+                for k, v in kwargs.items():
+                    if hasattr(entry, k):
+                        setattr(entry, k, v)
+                entry.updated_at = time.time()
+                state.updated_at = time.time()
+                return entry
             return None
 
-
-REGISTRY = LoopRegistry()
-
-
-_APPROVED_DECISIONS = {"approve", "approved"}
-_RETRY_DECISIONS = {"replay", "reject"}
-_NON_ACTIONABLE_DECISIONS = {"reject", "replay", "discard"}
-_QUEUE_RUNNING_STATUSES = {"queued", "running"}
-
-
-def _normalize_loop_decision(value: Any) -> str:
-    return str(value or "").strip().lower()
-
-
-def _normalize_loop_status(value: Any) -> str:
-    return str(value or "").strip().lower()
-
-
-def _entries_for_cycle(state: LoopState, cycle_index: int) -> List[LoopManifestEntry]:
-    return [entry for entry in state.manifest if int(entry.cycle_index) == int(cycle_index)]
-
-
-def _dedupe_cycle_entries(entries: List[LoopManifestEntry]) -> List[LoopManifestEntry]:
-    latest_by_retry: Dict[int, LoopManifestEntry] = {}
-    for entry in entries:
-        retry = int(entry.retry_index)
-        previous = latest_by_retry.get(retry)
-        if previous is None or float(entry.updated_at) >= float(previous.updated_at):
-            latest_by_retry[retry] = entry
-    return list(latest_by_retry.values())
-
-
-def _cycle_has_approved_entry(entries: List[LoopManifestEntry]) -> bool:
-    return any(
-        _normalize_loop_decision(entry.decision) in _APPROVED_DECISIONS
-        for entry in _dedupe_cycle_entries(entries)
-    )
+    def find_loop_by_prompt(self, prompt_id: str) -> Optional[str]:
+        with self._lock:
+            for state in self._loops.values():
+                if state.manifest.find_prompt(prompt_id) is not None:
+                    return state.loop_id
+            return None
 
 
-def _cycle_has_actionable_entry(entries: List[LoopManifestEntry]) -> bool:
-    for entry in _dedupe_cycle_entries(entries):
-        status = _normalize_loop_status(entry.status)
-        decision = _normalize_loop_decision(entry.decision)
-        if status in _QUEUE_RUNNING_STATUSES:
-            return True
-        if status == "returned" and decision not in _NON_ACTIONABLE_DECISIONS:
-            return True
-    return False
+REGISTRY = LoopRegistry()
 
 
-def _next_retry_index_for_cycle(entries: List[LoopManifestEntry], needs_generation: bool) -> int:
-    if not entries:
-        return 0
-    max_retry = max(int(entry.retry_index) for entry in entries)
-    if needs_generation:
-        return max_retry + 1
-    running_retries = [
-        int(entry.retry_index)
-        for entry in entries
-        if _normalize_loop_status(entry.status) in _QUEUE_RUNNING_STATUSES
-    ]
-    if running_retries:
-        return max(running_retries)
-    returned_retries = [
-        int(entry.retry_index)
-        for entry in entries
-        if _normalize_loop_status(entry.status) == "returned"
-        and _normalize_loop_decision(entry.decision) not in _NON_ACTIONABLE_DECISIONS
-    ]
-    if returned_retries:
-        return max(returned_retries)
-    return max_retry + 1
+_APPROVED_DECISIONS = loop_manifest.APPROVED_DECISIONS
+_RETRY_DECISIONS = loop_manifest.RETRY_DECISIONS
+_NON_ACTIONABLE_DECISIONS = loop_manifest.NON_ACTIONABLE_DECISIONS
+_QUEUE_RUNNING_STATUSES = loop_manifest.QUEUE_RUNNING_STATUSES
+_normalize_loop_decision = loop_manifest.normalize_decision
+_normalize_loop_status = loop_manifest.normalize_status
 
 
 def _compute_loop_progression(state: LoopState) -> Dict[str, Any]:
-    total_cycles = max(1, int(state.total_cycles or 1))
-    next_cycle_index: Optional[int] = None
-    for idx in range(total_cycles):
-        entries = _entries_for_cycle(state, idx)
-        if not _cycle_has_approved_entry(entries):
-            next_cycle_index = idx
-            break
-
-    if next_cycle_index is None:
-        return {
-            "next_cycle_index": None,
-            "next_retry_index": None,
-            "needs_generation": False,
-            "status": "complete",
-        }
-
-    cycle_entries = _entries_for_cycle(state, next_cycle_index)
-    needs_generation = not _cycle_has_actionable_entry(cycle_entries)
-    next_retry_index = _next_retry_index_for_cycle(cycle_entries, needs_generation)
-    has_running = any(
-        _normalize_loop_status(entry.status) in _QUEUE_RUNNING_STATUSES for entry in state.manifest
-    )
-    return {
-        "next_cycle_index": next_cycle_index,
-        "next_retry_index": next_retry_index,
-        "needs_generation": needs_generation,
-        "status": "running" if has_running else "idle",
-    }
+    # Maintained incrementally by the manifest on every entry change; see backend/loop/manifest.py.
+    return state.manifest.progression(state.total_cycles)
 
 
 def _sync_loop_runtime_from_manifest(state: LoopState) -> Dict[str, Any]:
@@ -428,10 +409,7 @@ def _apply_loop_decision_state(
     decision: Any,
 ) -> Optional[Dict[str, Any]]:
     normalized_decision = _normalize_loop_decision(decision)
-    targets: List[LoopManifestEntry] = []
-    for entry in state.manifest:
-        if int(entry.cycle_index) == int(cycle_index) and int(entry.retry_index) == int(retry_index):
-            targets.append(entry)
+    targets = state.manifest.slot(cycle_index, retry_index)
     if not targets:
         return None
 
@@ -441,9 +419,7 @@ def _apply_loop_decision_state(
         target.updated_at = now
 
     if normalized_decision in _APPROVED_DECISIONS:
-        for entry in state.manifest:
-            if int(entry.cycle_index) != int(cycle_index):
-                continue
+        for entry in state.manifest.cycle_entries(cycle_index):
             if int(entry.retry_index) == int(retry_index):
                 continue
             if _normalize_loop_decision(entry.decision) in _APPROVED_DECISIONS:
@@ -506,8 +482,68 @@ class Song2DawRunRegistry:
         with self._lock:
             self._runs.clear()
 
+    def find_resumable(
+        self,
+        audio_path: str,
+        stems_dir: str,
+        model_versions: Mapping[str, Any],
+    ) -> Optional[Song2DawRunState]:
+        with self._lock:
+            candidates = [
+                run
+                for run in self._runs.values()
+                if run.status == "ok"
+                and run.audio_path == audio_path
+                and run.stems_dir == stems_dir
+                and run.model_versions == dict(model_versions)
+                and isinstance(run.result.get("steps"), list)
+                and run.result.get("steps")
+            ]
+            if not candidates:
+                return None
+            return max(candidates, key=lambda s: s.updated_at)
+
 
 SONG2DAW_RUNS = Song2DawRunRegistry()
+SONG2DAW_ASSET_JOBS = Song2DawAssetJobQueue(max_workers=SONG2DAW_ASSET_WORKERS)
+
+_SONG2DAW_STEP_CACHE_DIR = os.path.join(THIS_DIR, "backend", "song2daw", "step_cache")
+_SONG2DAW_STEP_CACHE = None
+_SONG2DAW_STEP_CACHE_LOCK = threading.Lock()
+
+
+def _song2daw_step_cache():
+    """Return the shared song2daw step result cache, or None when disabled."""
+    global _SONG2DAW_STEP_CACHE
+    if SONG2DAW_STEP_CACHE_MB <= 0:
+        return None
+    with _SONG2DAW_STEP_CACHE_LOCK:
+        if _SONG2DAW_STEP_CACHE is None:
+            from features.song2daw.core.cache import StepResultCache
+
+            _SONG2DAW_STEP_CACHE = StepResultCache(
+                _SONG2DAW_STEP_CACHE_DIR,
+                max_bytes=int(SONG2DAW_STEP_CACHE_MB) * 1024 * 1024,
+                max_age_sec=max(1, int(SONG2DAW_STEP_CACHE_MAX_AGE_HOURS)) * 3600.0,
+            )
+        return _SONG2DAW_STEP_CACHE
+
+
+_SONG2DAW_STEM_EXECUTOR = None
+_SONG2DAW_STEM_EXECUTOR_LOCK = threading.Lock()
+
+
+def _song2daw_stem_executor():
+    """Return the long-lived (spawned) stem transcription pool, or None when stems run serially."""
+    global _SONG2DAW_STEM_EXECUTOR
+    if SONG2DAW_STEM_WORKERS <= 1:
+        return None
+    with _SONG2DAW_STEM_EXECUTOR_LOCK:
+        if _SONG2DAW_STEM_EXECUTOR is None:
+            from features.song2daw.core.transcription import stem_process_pool
+
+            _SONG2DAW_STEM_EXECUTOR = stem_process_pool(SONG2DAW_STEM_WORKERS)
+        return _SONG2DAW_STEM_EXECUTOR
 
 
 # -------------------------
@@ -799,6 +835,51 @@ def _extract_loop_config(
     return loop_map, loop_map_error, payload, payload_error, loop_map_found, payload_found
 
 
+def _loop_media_cache_asset(saved: Mapping[str, Any], file_name: str) -> Dict[str, Any]:
+    safe_loop_id = str(saved.get("loop_id") or "default")
+    safe_file_id = str(saved.get("file_id") or "")
+    # Start the preview proxy now so the first draft export does not wait for it.
+    cached_path = LOOP_MEDIA_CACHE.resolve(loop_id=safe_loop_id, file_id=safe_file_id)
+    if cached_path:
+        COMPOSITION_PROXIES.schedule(cached_path)
+    src = (
+        f"/lemouf/loop/media_cache/{url_quote(safe_loop_id, safe='')}/"
+        f"{url_quote(safe_file_id, safe='')}"
+    )
+    mime = str(saved.get("mime") or "")
+    preview_src = src if mime.lower().startswith("image/") else ""
+    return {
+        "src": src,
+        "previewSrc": preview_src,
+        "mime": mime,
+        "size": int(saved.get("size") or 0),
+        "filename": str(saved.get("filename") or file_name or "resource.bin"),
+        "loop_id": safe_loop_id,
+        "cache_id": safe_file_id,
+        "sha256": str(saved.get("sha256") or ""),
+    }
+
+
+def _composition_render_download_url(execution: Mapping[str, Any], scope_key: str) -> str:
+    output_path = str(execution.get("output_path") or "").strip()
+    if not output_path:
+        return ""
+    try:
+        safe_scope = url_quote(str(execution.get("scope_key") or scope_key), safe="")
+        safe_name = url_quote(os.path.basename(output_path), safe="")
+    except Exception:
+        return ""
+    return f"/lemouf/composition/render_file/{safe_scope}/{safe_name}"
+
+
+def _composition_render_job_payload(job: Mapping[str, Any], include_execution: bool = True) -> Dict[str, Any]:
+    payload = {key: value for key, value in job.items() if key != "execution"}
+    if include_execution:
+        execution = job.get("execution")
+        payload["execution"] = execution if isinstance(execution, dict) else {}
+    return payload
+
+
 def _workflows_dir() -> str:
     return os.path.join(os.path.dirname(__file__), "workflows")
 
@@ -876,6 +957,7 @@ def _song2daw_run_summary(result: Dict[str, Any]) -> Dict[str, Any]:
                 "name": step.get("name"),
                 "version": step.get("version"),
                 "cache_key": step.get("cache_key"),
+                "cache_hit": bool(step.get("cache_hit")),
                 "outputs": output_keys,
             }
         )
@@ -896,6 +978,7 @@ def _song2daw_build_ui_view_payload(run: Song2DawRunState) -> Dict[str, Any]:
         run_id=run.run_id,
         audio_path=run.audio_path,
         stems_dir=run.stems_dir,
+        run_dir=run.run_dir,
     )
     return {
         "run_id": run.run_id,
@@ -910,14 +993,18 @@ def _is_midi_path(path: str) -> bool:
     return ext in _MIDI_EXTENSIONS
 
 
-def _song2daw_collect_preview_events(result: Mapping[str, Any]) -> List[Dict[str, Any]]:
+def _song2daw_collect_preview_events(result: Mapping[str, Any], run_dir: str = "") -> List[Dict[str, Any]]:
+    from features.song2daw.core.event_store import is_columnar_events
+
     artifacts = result.get("artifacts")
     if not isinstance(artifacts, Mapping):
         return []
 
     events_ref = artifacts.get("events")
+    if is_columnar_events(events_ref):
+        return _song2daw_collect_sidecar_preview_events(events_ref, run_dir)
     items = events_ref.get("items") if isinstance(events_ref, Mapping) else None
-    if not isinstance(items, list):
+    if not isinstance(items, list) or not items:
         return []
 
     normalized: List[Dict[str, Any]] = []
@@ -944,6 +1031,45 @@ def _song2daw_collect_preview_events(result: Mapping[str, Any]) -> List[Dict[str
     return normalized
 
 
+def _song2daw_collect_sidecar_preview_events(events_ref: Mapping[str, Any], run_dir: str = "") -> List[Dict[str, Any]]:
+    # Same normalization as the inline path, applied to the memory-mapped columns.
+    import numpy as np
+
+    from features.song2daw.core.event_store import open_events_sidecar
+
+    records = open_events_sidecar(events_ref, run_dir or None)
+    if records is None or not len(records):
+        return []
+    sources = [str(source_id or "src:preview") for source_id in events_ref.get("sources") or []]
+    t0 = np.asarray(records["t0_sec"], dtype=np.float64)
+    t1 = np.asarray(records["t1_sec"], dtype=np.float64)
+    t1 = np.where(t1 == 0.0, t0, t1)
+    keep = np.flatnonzero(np.isfinite(t0) & np.isfinite(t1))
+    t0 = t0[keep]
+    t1 = t1[keep]
+    t1 = np.where(t1 <= t0, t0 + 0.08, t1)
+    velocity = np.asarray(records["velocity"], dtype=np.int64)[keep]
+    note = np.asarray(records["midi_note"], dtype=np.int64)[keep]
+    velocity = np.clip(np.where(velocity == 0, 80, velocity), 1, 127)
+    note = np.clip(np.where(note == 0, 60, note), 12, 120)
+    return [
+        {
+            "source_id": sources[source],
+            "t0_sec": start,
+            "t1_sec": end,
+            "velocity": vel,
+            "midi_note": pitch,
+        }
+        for source, start, end, vel, pitch in zip(
+            np.asarray(records["source"])[keep].tolist(),
+            np.maximum(t0, 0.0).tolist(),
+            np.maximum(t1, 0.0).tolist(),
+            velocity.tolist(),
+            note.tolist(),
+        )
+    ]
+
+
 def _song2daw_infer_preview_duration_sec(result: Mapping[str, Any], events: List[Dict[str, Any]]) -> float:
     duration_sec = 0.0
     artifacts = result.get("artifacts")
@@ -963,31 +1089,82 @@ def _midi_note_to_hz(note: int) -> float:
     return 440.0 * (2.0 ** ((float(note) - 69.0) / 12.0))
 
 
-def _song2daw_write_preview_mix_wav(path: str, events: List[Dict[str, Any]], duration_sec: float) -> bool:
-    if not events:
-        return False
+_SONG2DAW_PREVIEW_SAMPLE_RATE = 22050
 
-    sample_rate = 22050
-    total_frames = max(1, int(round(duration_sec * sample_rate)))
+
+def _song2daw_preview_voice(event: Mapping[str, Any], sample_rate: int, total_frames: int, phases: Dict[str, float]):
+    """Return `(start, length, phase0, step, amp)` for one preview event, or None when out of range."""
+    start = int(round(float(event["t0_sec"]) * sample_rate))
+    end = int(round(float(event["t1_sec"]) * sample_rate))
+    if end <= start:
+        end = start + max(1, int(0.05 * sample_rate))
+    if start >= total_frames:
+        return None
+    end = min(total_frames, end)
+    source_id = str(event["source_id"])
+    if source_id not in phases:
+        seed = int(sha256(source_id.encode("utf-8")).hexdigest()[:8], 16)
+        phases[source_id] = (seed % 6283) / 1000.0
+    freq = _midi_note_to_hz(int(event["midi_note"]))
+    step = (2.0 * math.pi * freq) / sample_rate
+    amp = 0.04 + (float(event["velocity"]) / 127.0) * 0.12
+    return start, max(1, end - start), phases[source_id], step, amp
+
+
+def _song2daw_render_preview_pcm_numpy(events: List[Dict[str, Any]], total_frames: int, sample_rate: int) -> bytes:
+    import numpy as np
+
+    attack_frames = max(1, int(0.004 * sample_rate))
+    release_frames = max(1, int(0.022 * sample_rate))
+    phases: Dict[str, float] = {}
+    # Events of equal length share one frame ramp + envelope and are rendered as
+    # one (events x frames) float32 block; only the final slice-add is per event.
+    voices_by_length: Dict[int, List[Tuple[int, float, float, float]]] = {}
+    for event in events:
+        voice = _song2daw_preview_voice(event, sample_rate, total_frames, phases)
+        if voice is not None:
+            start, length, phase0, step, amp = voice
+            voices_by_length.setdefault(length, []).append((start, phase0, step, amp))
+
+    samples = np.zeros(total_frames, dtype=np.float32)
+    for length, voices in voices_by_length.items():
+        frames = np.arange(length, dtype=np.float32)
+        env = np.where(
+            frames < attack_frames,
+            frames / attack_frames,
+            np.where(frames > length - release_frames, np.maximum(0.0, (length - frames) / release_frames), 1.0),
+        ).astype(np.float32)
+        table = np.asarray(voices, dtype=np.float64)
+        rows_per_block = max(1, (1 << 21) // length)
+        for offset in range(0, len(voices), rows_per_block):
+            chunk = table[offset : offset + rows_per_block]
+            phase0 = chunk[:, 1:2].astype(np.float32)
+            step = chunk[:, 2:3].astype(np.float32)
+            block = np.sin(phase0 + step * frames)
+            block *= chunk[:, 3:4].astype(np.float32)
+            block *= env
+            for start, row in zip(chunk[:, 0].astype(np.int64).tolist(), block):
+                samples[start : start + length] += row
+
+    peak = max(float(samples.max()), -float(samples.min())) if total_frames else 0.0
+    gain = 0.0 if peak <= 1e-9 else 0.92 / peak
+    # Gain keeps |value| <= 0.92, so scale, round and narrow in place without a clip pass.
+    samples *= np.float32(gain * 32767.0)
+    np.rint(samples, out=samples)
+    return samples.astype("<i2").tobytes()
+
+
+def _song2daw_render_preview_pcm_python(events: List[Dict[str, Any]], total_frames: int, sample_rate: int) -> bytes:
     samples = [0.0] * total_frames
     attack_frames = max(1, int(0.004 * sample_rate))
     release_frames = max(1, int(0.022 * sample_rate))
+    phases: Dict[str, float] = {}
 
     for event in events:
-        start = int(round(float(event["t0_sec"]) * sample_rate))
-        end = int(round(float(event["t1_sec"]) * sample_rate))
-        if end <= start:
-            end = start + max(1, int(0.05 * sample_rate))
-        if start >= total_frames:
+        voice = _song2daw_preview_voice(event, sample_rate, total_frames, phases)
+        if voice is None:
             continue
-        end = min(total_frames, end)
-        length = max(1, end - start)
-        source_id = str(event["source_id"])
-        seed = int(sha256(source_id.encode("utf-8")).hexdigest()[:8], 16)
-        phase0 = (seed % 6283) / 1000.0
-        freq = _midi_note_to_hz(int(event["midi_note"]))
-        step = (2.0 * math.pi * freq) / sample_rate
-        amp = 0.04 + (float(event["velocity"]) / 127.0) * 0.12
+        start, length, phase0, step, amp = voice
 
         for frame in range(length):
             env = 1.0
@@ -1011,14 +1188,35 @@ def _song2daw_write_preview_mix_wav(path: str, events: List[Dict[str, Any]], dur
     for value in samples:
         scaled = max(-1.0, min(1.0, value * gain))
         pcm.append(int(round(scaled * 32767.0)))
+    if sys.byteorder != "little":
+        pcm.byteswap()
+    return pcm.tobytes()
+
 
+def _song2daw_write_preview_mix_wav(path: str, events: List[Dict[str, Any]], duration_sec: float) -> bool:
+    if not events:
+        return False
+
+    sample_rate = _SONG2DAW_PREVIEW_SAMPLE_RATE
+    total_frames = max(1, int(round(duration_sec * sample_rate)))
     try:
-        with wave.open(path, "wb") as handle:
+        pcm = _song2daw_render_preview_pcm_numpy(events, total_frames, sample_rate)
+    except ImportError:
+        pcm = _song2daw_render_preview_pcm_python(events, total_frames, sample_rate)
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with wave.open(tmp_path, "wb") as handle:
             handle.setnchannels(1)
             handle.setsampwidth(2)
             handle.setframerate(sample_rate)
-            handle.writeframes(pcm.tobytes())
+            handle.writeframes(pcm)
+        os.replace(tmp_path, path)
     except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
         return False
     return True
 
@@ -1035,7 +1233,7 @@ def _song2daw_ensure_preview_mix_audio(run: Song2DawRunState) -> Optional[str]:
     if os.path.isfile(preview_path):
         return preview_path
 
-    events = _song2daw_collect_preview_events(run.result if isinstance(run.result, Mapping) else {})
+    events = _song2daw_collect_preview_events(run.result if isinstance(run.result, Mapping) else {}, run_dir_real)
     if not events:
         return None
     duration_sec = _song2daw_infer_preview_duration_sec(
@@ -1046,9 +1244,80 @@ def _song2daw_ensure_preview_mix_audio(run: Song2DawRunState) -> Optional[str]:
     return preview_path if ok and os.path.isfile(preview_path) else None
 
 
+def _song2daw_preview_mix_path(run: Song2DawRunState) -> Optional[str]:
+    run_dir = str(run.run_dir or "").strip()
+    if not run_dir:
+        return None
+    return os.path.join(os.path.realpath(run_dir), "preview_mix.wav")
+
+
+def _song2daw_estimate_preview_sec(run: Song2DawRunState) -> float:
+    artifacts = run.result.get("artifacts") if isinstance(run.result, Mapping) else None
+    events_ref = artifacts.get("events") if isinstance(artifacts, Mapping) else None
+    count = 0
+    if isinstance(events_ref, Mapping):
+        summary = events_ref.get("summary")
+        if isinstance(summary, Mapping) and isinstance(summary.get("count"), int):
+            count = summary["count"]
+        elif isinstance(events_ref.get("items"), list):
+            count = len(events_ref["items"])
+    # ~30us per event with the NumPy renderer, plus fixed WAV/setup cost.
+    return round(0.05 + count * 3e-5, 3)
+
+
+def _song2daw_schedule_preview_mix(run: Song2DawRunState) -> Optional[Dict[str, Any]]:
+    """Start (or join) the background preview-mix job for `run`; None when there is nothing to do."""
+    preview_path = _song2daw_preview_mix_path(run)
+    if not preview_path or os.path.isfile(preview_path):
+        return None
+    key = f"preview_mix:{run.run_id}"
+    status = SONG2DAW_ASSET_JOBS.status(key)
+    if status is not None and status["state"] in ("done", "error"):
+        if status["state"] == "error" or not status["result"]:
+            # Final: synthesis failed or there is nothing previewable; polling must not re-run it.
+            return status
+        # The job wrote the file, which was removed since; render it again.
+        SONG2DAW_ASSET_JOBS.discard(key)
+    return SONG2DAW_ASSET_JOBS.submit(
+        key,
+        lambda: _song2daw_ensure_preview_mix_audio(run),
+        eta_sec=_song2daw_estimate_preview_sec(run),
+    )
+
+
+def _song2daw_asset_status(run: Song2DawRunState) -> Dict[str, Any]:
+    """Return `{"preview_mix": {...}}` job status without blocking (empty when ready/not applicable)."""
+    job = _song2daw_schedule_preview_mix(run)
+    if job is None:
+        return {}
+    if job["state"] == "done" and not job["result"]:
+        return {}
+    return {
+        "preview_mix": {
+            "state": job["state"],
+            "eta_sec": job["eta_sec"],
+            "error": job["error"],
+        }
+    }
+
+
 def _song2daw_collect_audio_assets(run: Song2DawRunState) -> Dict[str, str]:
+    return _song2daw_build_audio_assets(run, _song2daw_ensure_preview_mix_audio(run))
+
+
+def _song2daw_collect_ready_audio_assets(run: Song2DawRunState) -> Dict[str, str]:
+    """Like `_song2daw_collect_audio_assets`, but never synthesizes the preview mix inline.
+
+    The preview mix is listed once its background job has written it (see
+    `_song2daw_asset_status`).
+    """
+    preview_path = _song2daw_preview_mix_path(run)
+    ready = preview_path if preview_path and os.path.isfile(preview_path) else None
+    return _song2daw_build_audio_assets(run, ready)
+
+
+def _song2daw_build_audio_assets(run: Song2DawRunState, preview_mix_path: Optional[str]) -> Dict[str, str]:
     assets: Dict[str, str] = {}
-    preview_mix_path = _song2daw_ensure_preview_mix_audio(run)
     if preview_mix_path:
         assets["preview_mix"] = preview_mix_path
 
@@ -1078,8 +1347,13 @@ def _song2daw_collect_audio_assets(run: Song2DawRunState) -> Dict[str, str]:
     return dict(sorted(assets.items(), key=lambda entry: entry[0]))
 
 
-def _song2daw_resolve_audio_asset_path(run: Song2DawRunState, asset: str) -> Optional[str]:
-    assets = _song2daw_collect_audio_assets(run)
+def _song2daw_resolve_audio_asset_path(
+    run: Song2DawRunState,
+    asset: str,
+    assets: Optional[Dict[str, str]] = None,
+) -> Optional[str]:
+    if assets is None:
+        assets = _song2daw_collect_audio_assets(run)
     requested = str(asset or "").strip()
     if not requested:
         requested = "mix"
@@ -1181,27 +1455,22 @@ def _resolve_loop_id(loop_id: str) -> Optional[str]:
     ctx = get_executing_context()
     if not ctx or not getattr(ctx, "prompt_id", None):
         return loop_id or None
-    prompt_id = ctx.prompt_id
-    for loop in REGISTRY.list():
-        for entry in loop.manifest:
-            if entry.prompt_id == prompt_id:
-                return loop.loop_id
-    return loop_id or None
+    return REGISTRY.find_loop_by_prompt(ctx.prompt_id) or loop_id or None
 
 
 def _update_manifest_by_prompt(loop_id: str, prompt_id: str, **kwargs: Any) -> Optional[LoopManifestEntry]:
     s = REGISTRY.get(loop_id)
     if not s:
         return None
-    for entry in s.manifest:
-        if entry.prompt_id == prompt_id:
-            for k, v in kwargs.items():
-                if hasattr(entry, k):
-                    setattr(entry, k, v)
-            entry.updated_at = time.time()
-            s.updated_at = time.time()
-            return entry
-    return None
+    entry = s.manifest.find_prompt(prompt_id)
+    if entry is None:
+        return None
+    for k, v in kwargs.items():
+        if hasattr(entry, k):
+            setattr(entry, k, v)
+    entry.updated_at = time.time()
+    s.updated_at = time.time()
+    return entry
 
 
 def _update_latest_pending(
@@ -1213,7 +1482,7 @@ def _update_latest_pending(
     s = REGISTRY.get(loop_id)
     if not s:
         return None
-    pending = [entry for entry in s.manifest if entry.status in ("queued", "running")]
+    pending = [entry for entry in s.manifest.pending() if entry.status in ("queued", "running")]
     if not pending:
         return None
     same_cycle = [entry for entry in pending if entry.cycle_index == cycle_index]
@@ -1567,7 +1836,7 @@ def _ensure_routes() -> None:
             "loop_map_error": s.loop_map_error,
             "payload_error": s.payload_error,
             "workflow_source": s.workflow_source,
-            "manifest": [entry.__dict__ for entry in s.manifest],
+            "manifest": [_manifest_entry_payload(entry) for entry in s.manifest],
             "last_error": s.last_error,
             "runtime_state": runtime_state,
         }
@@ -1623,10 +1892,7 @@ def _ensure_routes() -> None:
         cycle_index = s.current_cycle if raw_cycle is None else int(raw_cycle)
         if raw_retry is None:
             retry_index = s.current_retry
-            if any(
-                entry.cycle_index == cycle_index and entry.retry_index == retry_index
-                for entry in s.manifest
-            ):
+            if s.manifest.slot(cycle_index, retry_index):
                 retry_index += 1
         else:
             retry_index = int(raw_retry)
@@ -1761,7 +2027,29 @@ def _ensure_routes() -> None:
         saved = LOOP_RUNTIME_STATES.set(loop_id, runtime_state)
         if not saved:
             return web.json_response({"error": "invalid_runtime_state"}, status=400)
-        return web.json_response({"ok": True})
+        return web.json_response({"ok": True, "updated_seq": int(saved.get("updated_seq") or 0)})
+
+    async def loop_runtime_state_patch(request):
+        try:
+            payload = await request.json()
+        except Exception:
+            return web.json_response({"error": "invalid_payload"}, status=400)
+        if not isinstance(payload, dict):
+            return web.json_response({"error": "invalid_payload"}, status=400)
+        loop_id = str(payload.get("loop_id") or "").strip()
+        if not loop_id:
+            return web.json_response({"error": "missing_loop_id"}, status=400)
+        base_seq = payload.get("base_seq")
+        if base_seq is not None:
+            try:
+                base_seq = int(base_seq)
+            except (TypeError, ValueError):
+                return web.json_response({"error": "invalid_base_seq"}, status=400)
+        result = LOOP_RUNTIME_STATES.patch(loop_id, payload.get("patch"), base_seq=base_seq)
+        if result.get("ok"):
+            return web.json_response({"ok": True, "updated_seq": result["updated_seq"]})
+        status = {"not_found": 404, "seq_conflict": 409}.get(str(result.get("error")), 400)
+        return web.json_response({"error": result.get("error"), "updated_seq": result.get("updated_seq")}, status=status)
 
     async def loop_media_cache_upload(request):
         if not request.content_type or "multipart/" not in str(request.content_type):
@@ -1773,72 +2061,76 @@ def _ensure_routes() -> None:
         loop_id = ""
         file_name = ""
         content_type = ""
-        payload = None
-        while True:
-            part = await reader.next()
-            if part is None:
-                break
-            name = str(getattr(part, "name", "") or "").strip().lower()
-            if name == "loop_id":
-                try:
-                    loop_id = str(await part.text()).strip()
-                except Exception:
-                    loop_id = ""
-                continue
-            if name != "file":
-                try:
-                    await part.release()
-                except Exception:
-                    pass
-                continue
-            file_name = str(getattr(part, "filename", "") or "resource.bin").strip()
-            content_type = str(
-                getattr(part, "content_type", "") or part.headers.get("Content-Type") or ""
-            ).strip()
-            data = bytearray()
-            total = 0
+        upload = None
+        try:
             while True:
-                chunk = await part.read_chunk()
-                if not chunk:
+                part = await reader.next()
+                if part is None:
                     break
-                total += len(chunk)
-                if total > LOOP_MEDIA_CACHE.max_file_bytes:
-                    return web.json_response(
-                        {
-                            "error": "file_too_large",
-                            "max_file_bytes": int(LOOP_MEDIA_CACHE.max_file_bytes),
-                        },
-                        status=413,
-                    )
-                data.extend(chunk)
-            payload = bytes(data)
-        if payload is None:
+                name = str(getattr(part, "name", "") or "").strip().lower()
+                if name == "loop_id":
+                    try:
+                        loop_id = str(await part.text()).strip()
+                    except Exception:
+                        loop_id = ""
+                    continue
+                if name != "file":
+                    try:
+                        await part.release()
+                    except Exception:
+                        pass
+                    continue
+                file_name = str(getattr(part, "filename", "") or "resource.bin").strip()
+                content_type = str(
+                    getattr(part, "content_type", "") or part.headers.get("Content-Type") or ""
+                ).strip()
+                if upload is not None:
+                    upload.abort()
+                # Stream to a temp file (hashing as we go) instead of buffering the upload in RAM.
+                upload = LOOP_MEDIA_CACHE.open_upload(loop_id=loop_id, filename=file_name, content_type=content_type)
+                while True:
+                    chunk = await part.read_chunk(_MEDIA_UPLOAD_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    if not upload.write(chunk):
+                        return web.json_response(
+                            {
+                                "error": "file_too_large",
+                                "max_file_bytes": int(LOOP_MEDIA_CACHE.max_file_bytes),
+                            },
+                            status=413,
+                        )
+        except BaseException:
+            if upload is not None:
+                upload.abort()
+            raise
+        if upload is None:
             return web.json_response({"error": "missing_file"}, status=400)
-        saved = LOOP_MEDIA_CACHE.store(loop_id=loop_id, filename=file_name, content_type=content_type, data=payload)
+        saved = upload.commit(loop_id=loop_id)
         if not saved:
             return web.json_response({"error": "cache_store_failed"}, status=400)
-        safe_loop_id = str(saved.get("loop_id") or "default")
-        safe_file_id = str(saved.get("file_id") or "")
-        src = (
-            f"/lemouf/loop/media_cache/{url_quote(safe_loop_id, safe='')}/"
-            f"{url_quote(safe_file_id, safe='')}"
-        )
-        mime = str(saved.get("mime") or "")
-        preview_src = src if mime.lower().startswith("image/") else ""
-        return web.json_response(
-            {
-                "ok": True,
-                "asset": {
-                    "src": src,
-                    "previewSrc": preview_src,
-                    "mime": mime,
-                    "size": int(saved.get("size") or 0),
-                    "filename": str(saved.get("filename") or file_name or "resource.bin"),
-                    "loop_id": safe_loop_id,
-                    "cache_id": safe_file_id,
-                },
-            }
+        return web.json_response({"ok": True, "asset": _loop_media_cache_asset(saved, file_name)})
+
+    async def loop_media_cache_check(request):
+        try:
+            payload = await request.json()
+        except Exception:
+            return web.json_response({"error": "invalid_payload"}, status=400)
+        if not isinstance(payload, dict):
+            return web.json_response({"error": "invalid_payload"}, status=400)
+        digest = str(payload.get("sha256") or "").strip().lower()
+        if not digest:
+            return web.json_response({"error": "missing_sha256"}, status=400)
+        file_name = str(payload.get("filename") or "resource.bin").strip()
+        saved = LOOP_MEDIA_CACHE.store_known(
+            loop_id=str(payload.get("loop_id") or "").strip(),
+            filename=file_name,
+            content_type=str(payload.get("mime") or "").strip(),
+            digest=digest,
         )
+        if not saved:
+            return web.json_response({"ok": True, "exists": False})
+        return web.json_response({"ok": True, "exists": True, "asset": _loop_media_cache_asset(saved, file_name)})
 
     async def loop_media_cache_get(request):
         loop_id = request.match_info.get("loop_id", "")
@@ -1937,31 +2229,90 @@ def _ensure_routes() -> None:
             timeout_raw = 300.0
         timeout_sec = max(1.0, min(900.0, timeout_raw))
         execute_now = bool(payload.get("execute"))
-        execution = COMPOSITION_RENDER_EXECUTOR.execute(
-            scope_key=scope_key,
-            manifest=manifest_obj,
-            export_plan=export_plan,
-            execute=execute_now,
-            timeout_sec=timeout_sec,
+        use_cache = not bool(payload.get("force"))
+        quality = "preview" if str(payload.get("quality") or "").strip().lower() == "preview" else "final"
+        # Planning clones the manifest, stats every source and builds the filter graph:
+        # keep it (and the render-cache lookup under the service lock) off the event loop.
+        loop = asyncio.get_running_loop()
+        if not execute_now:
+            execution = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    COMPOSITION_RENDER_EXECUTOR.execute,
+                    scope_key=scope_key,
+                    manifest=manifest_obj,
+                    export_plan=export_plan,
+                    execute=False,
+                    use_cache=use_cache,
+                    quality=quality,
+                ),
+            )
+            return web.json_response(
+                {
+                    "ok": bool(execution.get("status") == "planned"),
+                    "execution": execution,
+                    "export_plan": export_plan,
+                    "download_url": _composition_render_download_url(execution, scope_key),
+                }
+            )
+        job = await loop.run_in_executor(
+            None,
+            functools.partial(
+                COMPOSITION_RENDER_JOBS.submit,
+                scope_key=scope_key,
+                manifest=manifest_obj,
+                export_plan=export_plan,
+                timeout_sec=timeout_sec,
+                use_cache=use_cache,
+                quality=quality,
+            ),
         )
-        output_path = str(execution.get("output_path") or "").strip()
-        download_url = ""
-        if output_path:
-            try:
-                safe_scope = url_quote(str(execution.get("scope_key") or scope_key), safe="")
-                safe_name = url_quote(os.path.basename(output_path), safe="")
-                download_url = f"/lemouf/composition/render_file/{safe_scope}/{safe_name}"
-            except Exception:
-                download_url = ""
+        if bool(payload.get("wait")):
+            # Blocking callers wait on a worker thread, never on the event loop.
+            job = await loop.run_in_executor(None, COMPOSITION_RENDER_JOBS.wait, job["job_id"], timeout_sec + 30.0) or job
+        execution = job.get("execution") if isinstance(job.get("execution"), dict) else {}
+        job_done = job.get("state") in {"ok", "failed", "cancelled"}
         return web.json_response(
             {
-                "ok": bool(execution.get("status") in {"planned", "ok"}),
+                "ok": bool(job.get("state") not in {"failed", "cancelled"}),
+                "job": _composition_render_job_payload(job, include_execution=False),
                 "execution": execution,
                 "export_plan": export_plan,
-                "download_url": download_url,
+                "download_url": _composition_render_download_url(execution, scope_key),
+                "status_url": f"/lemouf/composition/render_jobs/{job['job_id']}",
+            },
+            status=200 if job_done else 202,
+        )
+
+    async def composition_render_jobs_get(request):
+        scope_key = str(request.query.get("scope_key") or "").strip()
+        jobs = COMPOSITION_RENDER_JOBS.list_jobs(scope_key)
+        return web.json_response(
+            {
+                "ok": True,
+                "max_workers": COMPOSITION_RENDER_JOBS.max_workers,
+                "jobs": [_composition_render_job_payload(job, include_execution=False) for job in jobs],
+            }
+        )
+
+    async def composition_render_job_get(request):
+        job = COMPOSITION_RENDER_JOBS.status(request.match_info.get("job_id", ""))
+        if job is None:
+            return web.json_response({"error": "job_not_found"}, status=404)
+        return web.json_response(
+            {
+                "ok": True,
+                "job": _composition_render_job_payload(job),
+                "download_url": _composition_render_download_url(job.get("execution") or {}, job.get("scope_key") or ""),
             }
         )
 
+    async def composition_render_job_cancel_post(request):
+        job = COMPOSITION_RENDER_JOBS.cancel(request.match_info.get("job_id", ""))
+        if job is None:
+            return web.json_response({"error": "job_not_found"}, status=404)
+        return web.json_response({"ok": True, "job": _composition_render_job_payload(job)})
+
     async def composition_render_file_get(request):
         scope_key = request.match_info.get("scope_key", "")
         file_name = request.match_info.get("file_name", "")
@@ -2045,7 +2396,7 @@ def _ensure_routes() -> None:
         run = SONG2DAW_RUNS.get(run_id)
         if not run:
             return web.json_response({"error": "not_found"}, status=404)
-        audio_assets = _song2daw_collect_audio_assets(run)
+        audio_assets = _song2daw_collect_ready_audio_assets(run)
         return web.json_response(
             {
                 "run_id": run.run_id,
@@ -2053,6 +2404,7 @@ def _ensure_routes() -> None:
                 "audio_path": run.audio_path,
                 "stems_dir": run.stems_dir,
                 "audio_assets": audio_assets,
+                "audio_assets_status": _song2daw_asset_status(run),
                 "step_configs": run.step_configs,
                 "model_versions": run.model_versions,
                 "run_dir": run.run_dir,
@@ -2074,6 +2426,7 @@ def _ensure_routes() -> None:
 
     async def song2daw_runs_clear(_request):
         SONG2DAW_RUNS.clear()
+        SONG2DAW_ASSET_JOBS.clear()
         return web.json_response({"ok": True})
 
     async def song2daw_run_open(request):
@@ -2096,7 +2449,20 @@ def _ensure_routes() -> None:
             return web.json_response({"error": "not_found"}, status=404)
 
         asset = str(request.query.get("asset") or "mix").strip()
-        audio_path = _song2daw_resolve_audio_asset_path(run, asset)
+        audio_path = _song2daw_resolve_audio_asset_path(run, asset, _song2daw_collect_ready_audio_assets(run))
+        if asset in ("mix", "preview_mix") and (not audio_path or _is_midi_path(audio_path)):
+            pending = _song2daw_asset_status(run).get("preview_mix")
+            if pending and pending["state"] in ("pending", "running"):
+                return web.json_response(
+                    {"status": "pending", "asset": asset, "eta_sec": pending["eta_sec"]},
+                    status=202,
+                    headers={"Retry-After": str(max(1, int(math.ceil(pending["eta_sec"]))))},
+                )
+            if pending and pending["state"] == "error":
+                return web.json_response(
+                    {"error": "asset_failed", "asset": asset, "detail": pending["error"]},
+                    status=404,
+                )
         if not audio_path:
             return web.json_response({"error": "asset_not_found", "asset": asset}, status=404)
         return web.FileResponse(path=audio_path)
@@ -2112,13 +2478,18 @@ def _ensure_routes() -> None:
     add_route("POST", "/lemouf/loop/export_approved", loop_export_approved)
     add_route("POST", "/lemouf/loop/reset", loop_reset)
     add_route("POST", "/lemouf/loop/runtime_state", loop_runtime_state_set)
+    add_route("POST", "/lemouf/loop/runtime_state/patch", loop_runtime_state_patch)
     add_route("POST", "/lemouf/loop/media_cache", loop_media_cache_upload)
+    add_route("POST", "/lemouf/loop/media_cache/check", loop_media_cache_check)
     add_route("GET", "/lemouf/loop/media_cache/{loop_id}/{file_id}", loop_media_cache_get)
     add_route("GET", "/lemouf/composition/export_profiles", composition_export_profiles_get)
     add_route("POST", "/lemouf/composition/export_manifest", composition_export_manifest_post)
     add_route("GET", "/lemouf/composition/export_manifest/{scope_key}/{file_name}", composition_export_manifest_get)
     add_route("POST", "/lemouf/composition/export_execute", composition_export_execute_post)
     add_route("GET", "/lemouf/composition/render_file/{scope_key}/{file_name}", composition_render_file_get)
+    add_route("GET", "/lemouf/composition/render_jobs", composition_render_jobs_get)
+    add_route("GET", "/lemouf/composition/render_jobs/{job_id}", composition_render_job_get)
+    add_route("POST", "/lemouf/composition/render_jobs/{job_id}/cancel", composition_render_job_cancel_post)
     add_route("GET", "/lemouf/workflows/list", workflows_list)
     add_route("POST", "/lemouf/workflows/load", workflows_load)
     add_route("GET", "/lemouf/song2daw/runs", song2daw_runs_list)
@@ -2377,7 +2748,11 @@ class Song2DawRun:
         model_versions_json: str = "{}",
         output_dir: str = "",
     ):
-        from features.song2daw.core.runner import run_default_song2daw_pipeline, save_run_outputs
+        from features.song2daw.core.runner import (
+            resume_pipeline,
+            run_default_song2daw_pipeline,
+            write_run_outputs,
+        )
 
         step_configs, step_configs_error = _parse_json_field(step_configs_json, "step_configs")
         if step_configs_error:
@@ -2399,12 +2774,6 @@ class Song2DawRun:
         run_id = str(uuid.uuid4())
         run_dir = ""
         try:
-            result = run_default_song2daw_pipeline(
-                audio_path=audio_path,
-                stems_dir=stems_dir,
-                step_configs=step_configs,
-                model_versions=model_versions,
-            )
             target_output_dir = ""
             if isinstance(output_dir, str) and output_dir.strip():
                 target_output_dir = output_dir.strip()
@@ -2420,8 +2789,42 @@ class Song2DawRun:
                 except Exception:
                     target_output_dir = ""
 
+            stems_output_dir = os.path.join(target_output_dir, "stems") if target_output_dir else None
+            previous = SONG2DAW_RUNS.find_resumable(audio_path, stems_dir, model_versions)
+            if previous is not None:
+                result = resume_pipeline(
+                    previous.result,
+                    changed_step_configs={
+                        str(step.get("name")): step_configs.get(str(step.get("name"))) or {}
+                        for step in previous.result["steps"]
+                        if isinstance(step, dict)
+                    },
+                    audio_path=audio_path,
+                    stems_dir=stems_dir,
+                    model_versions=model_versions,
+                    cache=_song2daw_step_cache(),
+                    max_workers=max(1, SONG2DAW_MAX_WORKERS),
+                    stem_workers=max(1, SONG2DAW_STEM_WORKERS),
+                    stem_executor=_song2daw_stem_executor(),
+                    stems_output_dir=stems_output_dir,
+                )
+            else:
+                result = run_default_song2daw_pipeline(
+                    audio_path=audio_path,
+                    stems_dir=stems_dir,
+                    step_configs=step_configs,
+                    model_versions=model_versions,
+                    cache=_song2daw_step_cache(),
+                    max_workers=max(1, SONG2DAW_MAX_WORKERS),
+                    stem_workers=max(1, SONG2DAW_STEM_WORKERS),
+                    stem_executor=_song2daw_stem_executor(),
+                    stems_output_dir=stems_output_dir,
+                )
+
             if target_output_dir:
-                run_dir = str(save_run_outputs(result, target_output_dir))
+                # Keep the events sidecar reference (not the item list) in memory and outputs.
+                written_dir, result = write_run_outputs(result, target_output_dir)
+                run_dir = str(written_dir)
 
             SONG2DAW_RUNS.add(
                 Song2DawRunState(
@@ -2436,6 +2839,8 @@ class Song2DawRun:
                     result=result,
                 )
             )
+            if run_dir:
+                _song2daw_schedule_preview_mix(SONG2DAW_RUNS.get(run_id))
         except Exception as exc:
             SONG2DAW_RUNS.add(
                 Song2DawRunState(
@@ -51,6 +51,8 @@ const VIDEO_PREWARM_MAX_SOURCES = 24;
 const PREVIEW_CACHE_MAX_POSTERS = 120;
 const PREVIEW_CACHE_MAX_TIMELINE_ENTRIES = 420;
 const IMAGE_VIRTUAL_SOURCE_DURATION_SEC = 21_600;
+// Larger files upload directly: hashing reads the whole file into memory.
+const MEDIA_CACHE_PRECHECK_MAX_BYTES = 256 * 1024 * 1024;
 const COMPOSITION_SPLIT_MIN_PERCENT = 28;
 const COMPOSITION_SPLIT_MAX_PERCENT = 72;
 const COMPOSITION_ROW_SPLIT_MIN_PERCENT = 24;
@@ -612,11 +614,48 @@ function createManualResource(file, kind, options = {}) {
   };
 }
 
+async function fileSha256Hex(file) {
+  const subtle = globalThis?.crypto?.subtle;
+  if (!subtle || !file || typeof file.arrayBuffer !== "function") return "";
+  if (!(file.size > 0) || file.size > MEDIA_CACHE_PRECHECK_MAX_BYTES) return "";
+  try {
+    const digest = await subtle.digest("SHA-256", await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest)).map((b) => b.toString(16).padStart(2, "0")).join("");
+  } catch {
+    return "";
+  }
+}
+
+async function findManualFileOnBackend(file, idHint) {
+  const sha256 = await fileSha256Hex(file);
+  if (!sha256) return null;
+  try {
+    const res = await api.fetchApi("/lemouf/loop/media_cache/check", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        loop_id: idHint,
+        sha256,
+        filename: String(file?.name || "resource.bin"),
+        mime: String(file?.type || ""),
+      }),
+    });
+    const payload = await safeJsonResponse(res);
+    if (!res?.ok || !payload?.exists || !payload?.asset?.src) return null;
+    return payload.asset;
+  } catch {
+    return null;
+  }
+}
+
 async function cacheManualFileOnBackend(file, { loopId = "", scopeKey = "" } = {}) {
   if (!file || typeof FormData === "undefined") return null;
+  const idHint = String(loopId || scopeKey || "default").trim();
+  // Known content (any loop) is linked server-side, skipping the upload.
+  const known = await findManualFileOnBackend(file, idHint);
+  if (known) return known;
   const body = new FormData();
   body.append("file", file, String(file?.name || "resource.bin"));
-  const idHint = String(loopId || scopeKey || "default").trim();
   if (idHint) body.append("loop_id", idHint);
   try {
     const res = await api.fetchApi("/lemouf/loop/media_cache", { method: "POST", body });
@@ -3647,6 +3686,40 @@ export function renderLoopCompositionStudioView({
     type: "button",
   });
   setButtonIcon(monitorExportBtn, { icon: "export_render", title: "Export render manifest (.json). Shift+click: execute render." });
+  const waitForRenderJob = async (initialResult) => {
+    // Renders run as backend jobs; poll until the job reaches a final state.
+    let result = initialResult;
+    const jobId = String(initialResult?.job?.job_id || "");
+    const finalStates = new Set(["ok", "failed", "cancelled"]);
+    while (jobId && !finalStates.has(String(result?.job?.state || ""))) {
+      const job = result?.job || {};
+      const percent = Math.round(Math.max(0, Math.min(1, toNumber(job.progress?.fraction, 0))) * 100);
+      applyMonitorHeadFeedback(
+        job.state === "queued" ? "Render queued..." : `Rendering... ${percent}%`,
+        job.state === "queued" && Number.isFinite(Number(job.queue_position))
+          ? `Position ${Number(job.queue_position) + 1} in scope queue.`
+          : "Render running on backend.",
+        "warning"
+      );
+      await new Promise((resolve) => window.setTimeout(resolve, 750));
+      let pollJson = null;
+      try {
+        const pollRes = await api.fetchApi(`/lemouf/composition/render_jobs/${encodeURIComponent(jobId)}`);
+        if (!pollRes?.ok) break;
+        pollJson = await pollRes?.json?.();
+      } catch {
+        break;
+      }
+      if (!pollJson || typeof pollJson !== "object" || !pollJson.job) break;
+      result = {
+        ...result,
+        job: pollJson.job,
+        execution: pollJson.job.execution || result.execution,
+        download_url: pollJson.download_url || result.download_url,
+      };
+    }
+    return result;
+  };
   const exportRenderManifest = async (clickEvent) => {
     const executeNow = Boolean(clickEvent?.shiftKey);
     applyMonitorHeadFeedback(
@@ -3737,6 +3810,9 @@ export function renderLoopCompositionStudioView({
               execJson = await execRes?.json?.();
             } catch {}
             executeResult = (execJson && typeof execJson === "object") ? execJson : null;
+            if (executeResult?.job?.job_id) {
+              executeResult = await waitForRenderJob(executeResult);
+            }
           } else {
             backendError = await extractApiErrorDetailFromResponse(execRes);
           }
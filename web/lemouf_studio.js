@@ -2776,6 +2776,71 @@ app.registerExtension({
     const RUNTIME_STATE_REMOTE_PERSIST_DEBOUNCE_MS = 180;
     let runtimeStateRemoteTimer = null;
     let runtimeStateRemotePending = null;
+    // Last state the backend acknowledged ({ loopId, seq, state }); edits are sent as merge patches against it.
+    let runtimeStateRemoteBase = null;
+    const MERGE_PATCH_UNREPRESENTABLE = Symbol("merge_patch_unrepresentable");
+
+    const isPlainJsonObject = (value) => Boolean(value) && typeof value === "object" && !Array.isArray(value);
+
+    // Merge patches read `null` members as deletions, so objects holding nulls must go as a full save.
+    const hasNullObjectMember = (value) =>
+      isPlainJsonObject(value) &&
+      Object.values(value).some((item) => item === null || hasNullObjectMember(item));
+
+    const buildRuntimeStateMergePatch = (prev, next) => {
+      if (!isPlainJsonObject(prev) || !isPlainJsonObject(next)) {
+        if (JSON.stringify(prev) === JSON.stringify(next)) return undefined;
+        if (next === null || hasNullObjectMember(next)) return MERGE_PATCH_UNREPRESENTABLE;
+        return next;
+      }
+      const patch = {};
+      for (const key of Object.keys(prev)) {
+        if (!(key in next)) patch[key] = null;
+      }
+      for (const [key, value] of Object.entries(next)) {
+        const child = key in prev ? buildRuntimeStateMergePatch(prev[key], value) : buildRuntimeStateMergePatch(undefined, value);
+        if (child === MERGE_PATCH_UNREPRESENTABLE) return child;
+        if (child !== undefined) patch[key] = child;
+      }
+      return Object.keys(patch).length ? patch : undefined;
+    };
+
+    const postRuntimeState = async (path, body) => {
+      try {
+        const res = await api.fetchApi(path, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify(body),
+        });
+        const data = await safeJson(res);
+        return res?.ok && data?.ok ? data : null;
+      } catch {
+        return null;
+      }
+    };
+
+    const sendRemotePipelineRuntimeState = async (loopId, runtimeState) => {
+      const state = JSON.parse(JSON.stringify(runtimeState || {}));
+      const base = runtimeStateRemoteBase;
+      if (base && base.loopId === loopId) {
+        const patch = buildRuntimeStateMergePatch(base.state, state);
+        if (patch === undefined) return;
+        if (patch !== MERGE_PATCH_UNREPRESENTABLE) {
+          const patched = await postRuntimeState("/lemouf/loop/runtime_state/patch", {
+            loop_id: loopId,
+            base_seq: base.seq,
+            patch,
+          });
+          if (patched) {
+            runtimeStateRemoteBase = { loopId, seq: patched.updated_seq, state };
+            return;
+          }
+        }
+      }
+      // First save, unrepresentable edit, or seq conflict (another tab/session): send the full state.
+      const saved = await postRuntimeState("/lemouf/loop/runtime_state", { loop_id: loopId, runtime_state: state });
+      runtimeStateRemoteBase = saved ? { loopId, seq: saved.updated_seq, state } : null;
+    };
 
     const scheduleRemotePipelineRuntimePersist = (loopId, runtimeState, { clear = false } = {}) => {
       const safeLoopId = String(loopId || "").trim();
@@ -2791,17 +2856,16 @@ app.registerExtension({
         runtimeStateRemotePending = null;
         runtimeStateRemoteTimer = null;
         if (!payload || !payload.loopId) return;
+        if (payload.clear) {
+          runtimeStateRemoteBase = null;
+          await postRuntimeState("/lemouf/loop/runtime_state", { loop_id: payload.loopId, clear: true });
+          return;
+        }
         try {
-          await api.fetchApi("/lemouf/loop/runtime_state", {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify(
-              payload.clear
-                ? { loop_id: payload.loopId, clear: true }
-                : { loop_id: payload.loopId, runtime_state: payload.runtimeState || {} }
-            ),
-          });
-        } catch {}
+          await sendRemotePipelineRuntimeState(payload.loopId, payload.runtimeState);
+        } catch {
+          runtimeStateRemoteBase = null;
+        }
       }, RUNTIME_STATE_REMOTE_PERSIST_DEBOUNCE_MS);
     };
 